@@ -9,9 +9,71 @@
  */
 class ImageFileManager {
     
+    /** @var array Month manifests read so far, keyed by YYYYMM (null when missing) */
+    private $manifests = [];
+    
     public function __construct() {
     }
     
+    /**
+     * Read the manifest month_manifest.py writes for a month, if there is one
+     * 
+     * @param string $year
+     * @param string $month Two digits
+     * @return array|null Decoded manifest or null if missing/unreadable
+     */
+    public function getMonthManifest(string $year, string $month): ?array {
+        $key = "$year$month";
+        if (!array_key_exists($key, $this->manifests)) {
+            $data = null;
+            $file = "manifests/$key.json";
+            if (is_file($file)) {
+                $decoded = json_decode(@file_get_contents($file), true);
+                if (is_array($decoded) && isset($decoded['days']) && is_array($decoded['days'])) {
+                    $data = $decoded;
+                }
+            }
+            $this->manifests[$key] = $data;
+        }
+        return $this->manifests[$key];
+    }
+    
+    /**
+     * Manifest entry for one day
+     * 
+     * Returns null when the manifest can't answer (no manifest for the month,
+     * today's still-growing directory, or a day that isn't two digits), so the
+     * caller falls back to globbing. Returns an empty array for a day the
+     * manifest knows has no images.
+     * 
+     * @return array|null
+     */
+    public function getDayManifest(string $year, string $month, string $day): ?array {
+        if (!preg_match('/^\d{2}$/', $day) || "$year$month$day" === date('Ymd')) {
+            return null;
+        }
+        $manifest = $this->getMonthManifest($year, $month);
+        if ($manifest === null) {
+            return null;
+        }
+        return $manifest['days'][$day] ?? [];
+    }
+    
+    /**
+     * Whether an image has a mini/ thumbnail, answered from the manifest when possible
+     * 
+     * @param string $yyyymmddhhmmss Example: "20231114134047"
+     * @return bool
+     */
+    public function hasMiniImage(string $yyyymmddhhmmss): bool {
+        [$year, $month, $day] = $this->splitImageFilename($yyyymmddhhmmss);
+        $entry = $this->getDayManifest($year, $month, $day);
+        if ($entry && in_array($yyyymmddhhmmss, $entry['hours'], true)) {
+            return !in_array($yyyymmddhhmmss, $entry['no_mini'] ?? [], true);
+        }
+        return file_exists("$year/$month/$day/mini/$yyyymmddhhmmss.jpg");
+    }
+    
     /**
      * Extract date/time components from image filename
      * 
@@ -137,6 +199,12 @@ class ImageFileManager {
      */
     public function getLatestImageInDirectoryByDateHour(string $directory, int $hour): string {
         $date = preg_replace("/[^0-9]/", "", $directory);
+        if (strlen($date) === 8) {
+            $entry = $this->getDayManifest(substr($date, 0, 4), substr($date, 4, 2), substr($date, 6, 2));
+            if ($entry !== null) {
+                return $entry ? "$directory/{$entry['hours'][$hour]}.jpg" : '';
+            }
+        }
         $hour_padded = sprintf("%02d", $hour);
         $images = glob("$directory/$date$hour_padded*.jpg");
 
@@ -158,6 +226,11 @@ class ImageFileManager {
      */
     public function findFirstImageAfterTime(string $year, string $month, string $day,
                                            int $hour, int $minute, int $seconds): string {
+        $entry = $this->getDayManifest($year, $month, $day);
+        if ($entry !== null) {
+            return $entry ? $entry['hours'][$hour] : '';
+        }
+
         $minute = sprintf("%02d", $minute);
         $seconds = sprintf("%02d", $seconds);
         $hour = sprintf("%02d", $hour);
@@ -227,7 +300,7 @@ class ImageFileManager {
                             [$img_year, $img_month, $img_day] = $this->splitImageFilename($yyyymmddhhmmss);
                             
                             if ($size == "mini" || empty($size)) {
-                                if (file_exists("$img_year/$img_month/$img_day/mini/$yyyymmddhhmmss.jpg")) {
+                                if ($this->hasMiniImage($yyyymmddhhmmss)) {
                                     $prefetch_images[] = "$img_year/$img_month/$img_day/mini/$yyyymmddhhmmss.jpg";
                                 } else {
                                     $prefetch_images[] = "$img_year/$img_month/$img_day/$yyyymmddhhmmss.jpg";
@@ -5,9 +5,10 @@
  * Shows webcam images identified as likely containing aurora borealis,
  * organised by month with the same navigation style as webcam.php.
  *
- * Reads aurora.json generated by aurora_scan.py:
+ * Reads the data/aurora/ result store written by aurora_scan.py (falls back
+ * to data/aurora-YYYY.json when there is no store):
  *   python aurora_scan.py /path/to/images --threshold 0.3 --night \
- *     --json-output /path/to/webcam/aurora.json
+ *     --store /path/to/webcam/data/aurora
  */
 
 require_once 'WebcamConfig.php';
@@ -57,20 +58,66 @@ function load_cached_json_rows($glob_pattern, $cache_key, $ttl_seconds = 900)
     return $rows;
 }
 
+/**
+ * Month navigation data from a result_store.py directory
+ *
+ * @param string $store_dir e.g. data/aurora
+ * @return array|null Summary months keyed by YYYYMM, or null if there is no store
+ */
+function load_result_summary($store_dir)
+{
+    $summary = json_decode(@file_get_contents("$store_dir/summary.json"), true);
+    if (!is_array($summary) || !isset($summary['months']) || !is_array($summary['months'])) {
+        return null;
+    }
+    return $summary['months'];
+}
+
+/**
+ * Rows for one month from a result_store.py segment (later lines win)
+ *
+ * @param string $store_dir
+ * @param string $ym YYYYMM
+ * @return array Rows sorted by timestamp
+ */
+function load_result_month($store_dir, $ym)
+{
+    $rows = [];
+    $lines = @file("$store_dir/$ym.jsonl", FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES) ?: [];
+    foreach ($lines as $line) {
+        $row = json_decode($line, true);
+        $ts = $row['timestamp'] ?? '';
+        if (!preg_match('/^\d{14}$/', $ts)) continue; // torn or malformed line
+        $rows[$ts] = $row;
+    }
+    ksort($rows);
+    return array_values($rows);
+}
+
 // ============================================================
 // Load aurora data
 // ============================================================
 
-$all_images = load_cached_json_rows(__DIR__ . '/data/aurora-*.json', 'webcam_aurora_data_cache', 900);
+// Prefer the result store (summary + the viewed month's segment, see
+// result_store.py); fall back to the legacy per-year JSON files.
+$_store_dir = __DIR__ . '/data/aurora';
+$_store_months = load_result_summary($_store_dir);
 
-// Build sorted list of YYYYMM strings that have aurora images.
-$months_with_images = [];
-foreach ($all_images as $img) {
-    $ym = substr($img['timestamp'], 0, 6);
-    $months_with_images[$ym] = true;
+if ($_store_months !== null) {
+    $months_list = array_keys($_store_months);
+    sort($months_list); // ascending
+} else {
+    $all_images = load_cached_json_rows(__DIR__ . '/data/aurora-*.json', 'webcam_aurora_data_cache', 900);
+
+    // Build sorted list of YYYYMM strings that have aurora images.
+    $months_with_images = [];
+    foreach ($all_images as $img) {
+        $ym = substr($img['timestamp'], 0, 6);
+        $months_with_images[$ym] = true;
+    }
+    ksort($months_with_images);
+    $months_list = array_keys($months_with_images); // ascending
 }
-ksort($months_with_images);
-$months_list = array_keys($months_with_images); // ascending
 
 // ============================================================
 // Determine which month to show
@@ -126,14 +173,29 @@ foreach ($months_list as $ym) {
 // Filter images for current month, sorted chronologically
 // ============================================================
 
-$month_images = array_values(array_filter($all_images, function ($img) use ($current_ym) {
-    return substr($img['timestamp'], 0, 6) === $current_ym;
-}));
-usort($month_images, fn($a, $b) => strcmp($a['timestamp'], $b['timestamp']));
+if ($_store_months !== null) {
+    $month_images = load_result_month($_store_dir, $current_ym);
+} else {
+    $month_images = array_values(array_filter($all_images, function ($img) use ($current_ym) {
+        return substr($img['timestamp'], 0, 6) === $current_ym;
+    }));
+    usort($month_images, fn($a, $b) => strcmp($a['timestamp'], $b['timestamp']));
+}
+
+// Precomputed events (aurora_events.py): one card per event instead of every
+// frame, unless &frames=all asks for the frames. They sit in the store, or
+// next to data/aurora-YYYY.json when there is no store.
+$month_events = [];
+$_events_dir = $_store_months !== null ? $_store_dir : __DIR__ . '/data';
+$_events = json_decode(@file_get_contents("$_events_dir/events-$year_str.json"), true);
+foreach (is_array($_events) ? $_events : [] as $_ev) {
+    if (substr($_ev['night'] ?? '', 0, 7) === "$year_str-$month_str") $month_events[] = $_ev;
+}
+$show_events = !empty($month_events) && ($_GET['frames'] ?? '') !== 'all';
 
 $_preload_image = '';
 if (!empty($month_images)) {
-    $_ts0 = $month_images[0]['timestamp'];
+    $_ts0 = $show_events ? $month_events[0]['peak'] : $month_images[0]['timestamp'];
     $_y0 = substr($_ts0, 0, 4);
     $_m0 = substr($_ts0, 4, 2);
     $_d0 = substr($_ts0, 6, 2);
@@ -179,7 +241,9 @@ $_aurora_canonical = $using_default
 
 // Always revalidate — aurora data is updated hourly at night.
 // Last-Modified enables 304 responses so repeat visits cost zero bytes when unchanged.
-$_aurora_json_files = glob(__DIR__ . '/data/aurora-*.json') ?: [];
+$_aurora_json_files = $_store_months !== null
+    ? ["$_store_dir/summary.json"]
+    : (glob(__DIR__ . '/data/aurora-*.json') ?: []);
 $_aurora_last_mod = 0;
 foreach ($_aurora_json_files as $_f) {
     $_mtime = @filemtime($_f);
@@ -294,6 +358,11 @@ if ($size === 'large') {
 } else {
     $nav_links[] = "<a href=\"{$base_url}&size=large\">" . t('nav_large_photos') . "</a>";
 }
+if ($show_events) {
+    $nav_links[] = "<a href=\"{$base_url}&frames=all\">" . ucfirst(t('all_photos')) . "</a>";
+} elseif (!empty($month_events)) {
+    $nav_links[] = "<a href=\"{$base_url}\">" . t_month_year($month, $year) . "</a>";
+}
 $nav_links[] = lang_selector_html();
 if ($using_default && $current_ym !== date('Ym')) {
     echo "<p>" . rtrim(t('aurora_showing_latest'), '.') . ': ' . t_month_year($month, $year) . ".</p>\n\n";
@@ -312,7 +381,39 @@ $grid_class = ($size === 'large') ? 'grid-container-large' : 'grid-container';
 echo "<div class=\"$grid_class\">\n";
 
 $count = 0;
-foreach ($month_images as $img) {
+foreach ($show_events ? $month_events : [] as $ev) {
+    $ts    = $ev['peak'];
+    $pct   = round($ev['peak_score'] * 100);
+    $y  = substr($ts, 0, 4);
+    $m  = substr($ts, 4, 2);
+    $d  = substr($ts, 6, 2);
+    $start = substr($ev['start'], 8, 2) . ':' . substr($ev['start'], 10, 2);
+    $end   = substr($ev['end'], 8, 2) . ':' . substr($ev['end'], 10, 2);
+
+    $full_path = "$y/$m/$d/$ts.jpg";
+    $mini_path = "$y/$m/$d/mini/$ts.jpg";
+    if ($size === 'large') {
+        $src = $full_path;
+        $img_attrs = "";
+    } else {
+        $src = file_exists($mini_path) ? $mini_path : $full_path;
+        $img_attrs = " width=\"$mini_w\" height=\"$mini_h\"";
+    }
+    $night_d = substr($ev['night'], 8, 2);
+    $alt   = "Lillevik Lofoten webcam: {$ev['night']} $start–$end – aurora {$pct}%, {$ev['frames']} photos";
+    $link  = "webcam.php?type=one&image=$ts" . lang_param();
+    $label = "$night_d $start–$end ({$pct}%)";
+    $lazy  = ($count === 0) ? '' : ' loading="lazy"';
+
+    $item_style = ($size === 'large') ? ' style="max-width:900px"' : '';
+    $time_style = ($size === 'large') ? ' style="bottom:40px"' : '';
+    echo "  <div class=\"grid-item\"$item_style>\n";
+    echo "    <a href=\"$link\"><img alt=\"$alt\" src=\"$src\"{$lazy}{$img_attrs}></a>\n";
+    echo "    <span class=\"time\"$time_style>$label</span>\n";
+    echo "  </div>\n";
+    $count++;
+}
+foreach ($show_events ? [] : $month_images as $img) {
     $ts    = $img['timestamp']; // YYYYMMDDHHMMSS
     $score = $img['score'];
 
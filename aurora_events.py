@@ -0,0 +1,162 @@
+"""
+aurora_events.py — group aurora frames into events, one per display.
+
+The aurora store (data/aurora/, see result_store.py) is a flat list of frames.
+An event is a run of them within one night where no two consecutive frames
+are more than --gap minutes apart. This writes one compact file per year,
+data/aurora/events-YYYY.json, which aurora.php renders as one card per event:
+
+    [{"night": "2026-01-31", "start": "20260131221019", "end": "20260201004019",
+      "peak": "20260131233019", "peak_score": 0.8123, "minutes": 150, "frames": 16}, ...]
+
+A night runs from noon to noon, so an event crossing midnight stays whole
+and belongs to the evening it started on.
+
+aurora_scan.py and scan_pipeline.py update the events for each month they
+write (update_events()). Only nights in the written months are recomputed.
+A scan without --store writes data/aurora-YYYY.json instead; its events then
+go next to it, to data/events-YYYY.json. Run this directly to rebuild
+everything, e.g. after importing old results:
+
+    python3 aurora_events.py data/aurora
+    python3 aurora_events.py data/aurora --month 202601 --gap 20
+    python3 aurora_events.py data/aurora-2026.json
+"""
+
+import argparse
+import json
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from result_store import ResultStore, locked, write_atomic
+
+GAP_MINUTES = 30
+
+
+def _dt(ts):
+    return datetime.strptime(ts, "%Y%m%d%H%M%S")
+
+
+def night_of(ts):
+    """The evening date (YYYY-MM-DD) a frame's night started on."""
+    return (_dt(ts) - timedelta(hours=12)).strftime("%Y-%m-%d")
+
+
+def group_events(entries, gap_minutes=GAP_MINUTES):
+    """Events from {"timestamp", "score"} entries (any order)."""
+    events = []
+    current = None
+    for e in sorted(entries, key=lambda e: e["timestamp"]):
+        ts, score = e["timestamp"], e["score"]
+        if (current is not None and night_of(ts) == current["night"]
+                and (_dt(ts) - _dt(current["end"])).total_seconds() <= gap_minutes * 60):
+            current["end"] = ts
+            current["frames"] += 1
+            if score > current["peak_score"]:
+                current["peak"], current["peak_score"] = ts, score
+            continue
+        current = {"night": night_of(ts), "start": ts, "end": ts,
+                   "peak": ts, "peak_score": score, "minutes": 0, "frames": 1}
+        events.append(current)
+    for ev in events:
+        ev["minutes"] = round((_dt(ev["end"]) - _dt(ev["start"])).total_seconds() / 60)
+    return events
+
+
+def _month_offset(ym, delta):
+    y, m = int(ym[:4]), int(ym[4:]) + delta
+    y, m = y + (m - 1) // 12, (m - 1) % 12 + 1
+    return f"{y:04d}{m:02d}"
+
+
+def _json_months(path):
+    """
+    Store-like month(ym) reader for a data/<kind>-YYYY.json results file.
+    A month of another year comes from that year's file next to it.
+    """
+    path = Path(path)
+    named = re.fullmatch(r"(.+-)\d{4}", path.stem)
+    files = {}
+
+    def month(ym):
+        file = path.with_name(f"{named.group(1)}{ym[:4]}.json") if named else path
+        if file not in files:
+            files[file] = json.loads(file.read_text()) if file.exists() else []
+        return sorted((e for e in files[file] if e["timestamp"][:6] == ym), key=lambda e: e["timestamp"])
+    return month
+
+
+def events_path(store_dir, year):
+    return Path(store_dir) / f"events-{year}.json"
+
+
+def load_events(store_dir, year):
+    try:
+        return json.loads(events_path(store_dir, year).read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def update_events(store_dir, months, gap_minutes=GAP_MINUTES):
+    """
+    Recompute the events of every night that starts in one of `months`
+    (YYYYMM) and splice them into the per-year events files.
+
+    store_dir is a result store directory, or a data/aurora-YYYY.json file
+    whose events go to events-YYYY.json in the same directory.
+    The first morning of a month belongs to the previous month's last night,
+    so that month is recomputed too. Returns the number of events written.
+    """
+    if Path(store_dir).suffix == ".json":
+        month = _json_months(store_dir)
+        store_dir = Path(store_dir).parent
+    else:
+        month = ResultStore(store_dir).month
+    nights = {m for ym in months for m in (ym, _month_offset(ym, -1))}
+    frames = []
+    for ym in sorted(nights | {_month_offset(ym, 1) for ym in nights}):
+        frames.extend(month(ym))
+    fresh = [ev for ev in group_events(frames, gap_minutes)
+             if ev["night"][:7].replace("-", "") in nights]
+
+    written = 0
+    for year in sorted({ym[:4] for ym in nights}):
+        path = events_path(store_dir, year)
+        with locked(path):
+            kept = [ev for ev in load_events(store_dir, year)
+                    if ev["night"][:7].replace("-", "") not in nights]
+            merged = sorted(kept + [ev for ev in fresh if ev["night"][:4] == year],
+                            key=lambda ev: ev["start"])
+            if merged or path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                write_atomic(path, json.dumps(merged, separators=(",", ":")))
+                written += len(merged) - len(kept)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("store", help="Aurora result store directory, e.g. data/aurora, or a "
+                                      "data/aurora-YYYY.json results file")
+    parser.add_argument("--month", metavar="YYYYMM", action="append",
+                        help="Only recompute nights starting in this month (repeatable; default: all)")
+    parser.add_argument("--gap", type=int, default=GAP_MINUTES,
+                        help=f"Largest gap in minutes between frames of one event (default: {GAP_MINUTES})")
+    args = parser.parse_args()
+
+    if Path(args.store).suffix == ".json":
+        entries = json.loads(Path(args.store).read_text()) if Path(args.store).exists() else []
+        months = set(args.month or {e["timestamp"][:6] for e in entries})
+        events_dir = Path(args.store).parent
+    else:
+        months = set(args.month or ResultStore(args.store).months())
+        events_dir = args.store
+    if not months:
+        raise SystemExit(f"No results in {args.store}")
+    n = update_events(args.store, months, args.gap)
+    print(f"{n} events for {len(months)} month(s) written to {events_dir}/events-YYYY.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,26 @@
+from pathlib import Path
+
 import cv2
 import numpy as np
-import multiprocessing
-import os
-from pathlib import Path
-from datetime import datetime
 
+from aurora_events import GAP_MINUTES, update_events
+from camera_profiles import add_profile_arguments
+from exif_header import read_exif
+from frame_cache import add_cache_arguments, cache_from_args
+from frame_hash import near_duplicate, signature_of
+from run_metrics import add_metrics_arguments, metrics_from_args
+from scan_pipeline import (Analyzer, MonthSink, add_budget_arguments, budget_from_args, infer_scanned_months,
+                           infer_year, load_reference, parse_dt_from_stem, print_top, report_recall,
+                           run_pipeline, scan_from_args, workers_arg)
+from scan_shards import add_shard_arguments
+from sky_mask import load_masks, select_mask
+from stage_profile import add_stage_profile_arguments, stage, stage_profile_from_args
 from sun_calculator import is_aurora_time
 
 BASE_URL = "https://lilleviklofoten.no/webcam/?type=one&image="
 
-def parse_dt_from_stem(stem: str):
-    # Try exact match first (standard renamed files: YYYYMMDDHHMMSS)
-    try:
-        return datetime.strptime(stem, "%Y%m%d%H%M%S")
-    except ValueError:
-        pass
-    # Extract 14-digit timestamp from pre-rename filenames like
-    # "Lillevik Lofoten_01_20260313054407" or "Viktun_01_20260313054407"
-    import re
-    m = re.search(r'(\d{14})$', stem)
-    if m:
-        try:
-            return datetime.strptime(m.group(1), "%Y%m%d%H%M%S")
-        except ValueError:
-            pass
-    return None
+# Working width for the mini/ thumbnail pre-screen (the cron minis are 160×120).
+MINI_WORK_WIDTH = 160
 
 def aurora_score(image_path):
     # IMREAD_REDUCED_COLOR_4 decodes the JPEG at 1/4 resolution in the decoder
@@ -34,26 +30,73 @@ def aurora_score(image_path):
         img = cv2.imread(str(image_path))  # fallback for non-JPEG or older OpenCV
     if img is None:
         return 0.0
+    return aurora_score_image(img)
+
+
+def aurora_score_mini(mini_path, sky_masks=None):
+    """
+    Cheap pre-screen score from a mini/ thumbnail (160×120 from cron, up to
+    1024 px from regen_minis.py). Scored at 160 px working width so both kinds
+    of mini behave the same. sky_masks: as for AuroraAnalyzer.
+    """
+    img = cv2.imread(str(mini_path))
+    if img is None:
+        return None
+    mask = select_mask(sky_masks, img.shape, parse_dt_from_stem(Path(mini_path).stem)) if sky_masks else None
+    return aurora_score_image(img, work_width=MINI_WORK_WIDTH, mask=mask)
+
+
+def aurora_score_image(img, work_width=640, mask=None):
+    """
+    Score an already-decoded BGR frame. work_width is the sky width the
+    heuristics run at; the blur radius and patch-size bonus are scaled from
+    their 640 px calibration so small inputs (mini thumbnails) score on the
+    same scale. mask: optional sky_mask.SkyMask; only its sky pixels are scored.
+    """
+    with stage("aurora.crop"):
+        sky = sky_crop(img, work_width, mask)
+    return aurora_score_sky(sky, mask.index(*sky.shape[:2]) if mask is not None else None)
+
 
+def sky_crop(img, work_width=640, mask=None):
+    """The part of a frame the aurora score looks at, resized to work_width."""
     h, w, _ = img.shape
 
-    # Ignore bottom 35% to reduce lights/sea/ground reflections
-    sky = img[0:int(h*0.65), :, :]
+    # Ignore bottom 35% to reduce lights/sea/ground reflections (or below the
+    # lowest sky pixel of a mask)
+    sky = img[0:max(1, int(h * (mask.bottom if mask is not None else 0.65))), :, :]
 
     # Downscale for speed + smoother stats
-    sky_small = cv2.resize(sky, (640, int(640 * sky.shape[0] / sky.shape[1])))
+    return cv2.resize(sky, (work_width, int(work_width * sky.shape[0] / sky.shape[1])))
 
-    hsv = cv2.cvtColor(sky_small, cv2.COLOR_BGR2HSV)
-    H, S, V = cv2.split(hsv)
 
-    # 2) Reject globally green-tinted overcast: measure global green cast
-    B, G, R = cv2.split(sky_small.astype(np.float32))
-    global_green_cast = np.mean(G - (R + B) / 2.0) / 255.0  # positive means "overall green bias"
+def aurora_score_sky(sky_small, sky_index=None):
+    """
+    Score a sky crop from sky_crop(), e.g. a row of a frame_stack.py stack.
+    Its width is the work width the heuristics are scaled to. sky_index:
+    optional flat indices of the pixels that are sky (SkyMask.index()); the
+    score then only looks at those.
+    """
+    scale = sky_small.shape[1] / 640.0
+    if sky_index is not None:
+        if not len(sky_index):
+            return 0.0
+        features = _masked_features(sky_small, sky_index, scale)
+        return float(_scores_from_features(features[None], len(sky_index), scale)[0])
+
+    with stage("aurora.hsv"):
+        hsv = cv2.cvtColor(sky_small, cv2.COLOR_BGR2HSV)
+        H, S, V = cv2.split(hsv)
+
+        # 2) Reject globally green-tinted overcast: measure global green cast
+        B, G, R = cv2.split(sky_small.astype(np.float32))
+        global_green_cast = np.mean(G - (R + B) / 2.0) / 255.0  # positive means "overall green bias"
 
     # 3) Look for STRUCTURE: aurora tends to have local contrast/texture in V channel
     # Overcast tends to be smooth.
-    blur = cv2.GaussianBlur(V, (0, 0), 3)
-    local_contrast = np.mean(np.abs(V.astype(np.float32) - blur.astype(np.float32))) / 255.0
+    with stage("aurora.blur"):
+        blur = cv2.GaussianBlur(V, (0, 0), max(0.75, 3 * scale))
+        local_contrast = np.mean(np.abs(V.astype(np.float32) - blur.astype(np.float32))) / 255.0
 
     # 5) Sky brightness penalty. Aurora is visible against a dark sky. Twilight
     # produces a broadly lit sky even when the sun is below the horizon. A high
@@ -87,7 +130,7 @@ def aurora_score(image_path):
         # is a strong positive signal even when overall coverage is low.
         # Included in raw score so brightness_factor still suppresses it for
         # bright (twilight) images.
-        effective_bonus = patch_bonus if largest_cc_pixels >= 200 else 0.0
+        effective_bonus = patch_bonus if largest_cc_pixels >= 200 * scale * scale else 0.0
 
         return (
             (green_ratio * 1.8) +
@@ -100,128 +143,349 @@ def aurora_score(image_path):
     # Classic aurora green (yellow-green, H 38–85 in OpenCV 0–180 scale).
     # Patch bonus enabled: a compact cluster of yellow-green pixels can only be
     # aurora — nothing else produces that colour in a night sky.
-    score_classic = _component_score(38, 85, 55, 25, patch_bonus=0.10)
+    with stage("aurora.components"):
+        score_classic = _component_score(38, 85, 55, 25, patch_bonus=0.10)
 
     # Teal/cyan aurora (H 38–100): captures cameras that render aurora as blue-green.
     # Capped at H=100 to exclude the blue end of the spectrum (H 100–130) which
     # matches pre-dawn/post-dusk twilight sky rather than aurora. No patch bonus —
     # cyan pixels can also be polar night twilight glow or atmospheric scattering.
-    score_teal = _component_score(38, 100, 55, 25, patch_bonus=0.0)
+    with stage("aurora.components"):
+        score_teal = _component_score(38, 100, 55, 25, patch_bonus=0.0)
 
     # Apply brightness factor last so it suppresses both components equally.
     # Twilight sky (bright) is pushed toward zero; dark aurora sky is unaffected.
     return float(max(score_classic, score_teal) * brightness_factor)
 
 
+# Columns of aurora_features_batch(): hue-mask coverage and largest connected
+# patch (pixels) for the classic and teal ranges, then the whole-sky terms.
+FEATURES = ("green_classic", "green_teal", "cc_classic", "cc_teal",
+            "local_contrast", "green_cast", "sky_mean_v")
 
-def _score_worker(path):
-    """Top-level function required for multiprocessing pickling."""
-    # Suppress libjpeg "Premature end of JPEG file" warnings that come from
-    # IMREAD_REDUCED_COLOR_4 decoding partial DCT data. The images are fine.
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    old_stderr = os.dup(2)
-    os.dup2(devnull, 2)
-    try:
-        score = aurora_score(path)
-    finally:
-        os.dup2(old_stderr, 2)
-        os.close(old_stderr)
-        os.close(devnull)
-    return (score, path)
-
-def human_time_from_filename(stem):
-    dt = parse_dt_from_stem(stem)
-    if not dt:
-        return stem
-    return dt.strftime("%Y-%m-%d %H:%M:%S")
-
-def scan_folder(folder, limit=50, threshold=0.0, night_only=False, workers=None):
-    # Collect paths first so we know the total count upfront.
-    # Print progress during collection — can be slow on network volumes.
-    print("Collecting file list...", end="", flush=True)
-    paths = []
-    skipped_time = 0
-    for path in Path(folder).rglob("*.jpg"):
-        if "mini" in str(path):
-            continue
-        stem = path.stem
-        dt = parse_dt_from_stem(stem)
-        if night_only and dt:
-            if not is_aurora_time(dt):
-                skipped_time += 1
-                continue
-        paths.append(path)
-        if len(paths) % 500 == 0:
-            print(f"\rCollecting file list... {len(paths)} found", end="", flush=True)
-
-    total = len(paths)
-    print(f"\rFound {total} images to scan ({skipped_time} skipped by time filter)    ")
-
-    results = []
-    scanned = 0
-    tick = 0
-    spinner = ["-", "\\", "|", "/"]
-
-    num_workers = workers if workers is not None else multiprocessing.cpu_count()
-    try:
-        with multiprocessing.Pool(processes=num_workers) as pool:
-            for score, path in pool.imap_unordered(_score_worker, paths, chunksize=1):
-                scanned += 1
-                tick += 1
-                if score >= threshold:
-                    results.append((score, path))
-                print(f"\r  {spinner[tick % 4]} {scanned}/{total} scanned, {len(results)} above threshold", end="", flush=True)
-    except KeyboardInterrupt:
-        print(f"\n\nInterrupted after {scanned}/{total} images.")
-
-    print()  # newline after progress line
-    results.sort(reverse=True)
-
-    print(f"\nTop {limit} likely aurora frames:\n")
-    for score, path in results[:limit]:
-        timestamp = path.stem
-        url = BASE_URL + timestamp
-        readable = human_time_from_filename(timestamp)
-        print(f"{score:.4f}  {readable}")
-        print(f"        {url}")
-
-    print(f"\nScanned {scanned} images, kept {len(results)} above threshold {threshold}")
-    return results
 
-def _infer_scanned_months(folder, new_data):
+def aurora_features_batch(stack):
+    """
+    Features for a stack of sky crops (N×H×W×3 uint8, e.g. frame_stack.py
+    rows). The per-pixel work runs over the whole stack at once: one HSV
+    conversion, the Gaussian blur as two separable passes, one inRange() per
+    hue range. Only the sums and connected components are per frame, and
+    components only for frames whose hue mask has any pixels (the teal mask
+    reuses the classic result when no pixel is in the teal-only hues).
+
+    Returns an N×len(FEATURES) float64 array. Scores from it match
+    aurora_score_sky() to within rounding of the blur (about 1e-4).
     """
-    Return the set of YYYYMM strings that were covered by this scan.
+    stack = np.ascontiguousarray(stack)
+    n, h, w, _ = stack.shape
+    if n == 0:
+        return np.zeros((0, len(FEATURES)))
+    pixels = h * w
+    scale = w / 640.0
+
+    hsv = cv2.cvtColor(stack.reshape(n * h, w, 3), cv2.COLOR_BGR2HSV)
+    V = np.ascontiguousarray(hsv[..., 2])
+
+    sums = np.array([cv2.sumElems(frame)[:3] for frame in stack])
+    green_cast = (sums[:, 1] - (sums[:, 0] + sums[:, 2]) / 2.0) / pixels / 255.0
+    V = V.reshape(n, h, w)
+    sky_mean_v = np.array([cv2.sumElems(v)[0] for v in V]) / pixels / 255.0
+
+    # GaussianBlur(V, (0, 0), sigma) per frame, done as a vertical pass over
+    # the columns of all frames side by side and a horizontal pass over all
+    # rows; neither mixes frames, and the reflected borders are the same as
+    # per frame.
+    sigma = max(0.75, 3 * scale)
+    kernel = cv2.getGaussianKernel(int(round(sigma * 6 + 1)) | 1, sigma)
+    one = np.ones((1, 1))
+    cols = np.ascontiguousarray(V.transpose(1, 0, 2)).reshape(h, n * w)
+    cols = cv2.sepFilter2D(cols, cv2.CV_32F, one, kernel)
+    rows = np.ascontiguousarray(cols.reshape(h, n, w).transpose(1, 0, 2)).reshape(n * h, w)
+    blur = cv2.sepFilter2D(rows, cv2.CV_8U, kernel, one).reshape(n, h, w)
+    diff = cv2.absdiff(V, blur)
+    local_contrast = np.array([cv2.sumElems(d)[0] for d in diff]) / pixels / 255.0
+
+    classic = cv2.inRange(hsv, (38, 55, 25), (85, 255, 255)).reshape(n, h, w)
+    teal = cv2.inRange(hsv, (38, 55, 25), (100, 255, 255)).reshape(n, h, w)
+    green_classic = np.array([cv2.countNonZero(m) for m in classic])
+    green_teal = np.array([cv2.countNonZero(m) for m in teal])
+
+    cc_classic = np.zeros(n)
+    cc_teal = np.zeros(n)
+    for i in np.flatnonzero(green_teal):
+        if green_classic[i]:
+            cc_classic[i] = _largest_component(classic[i])
+        if green_teal[i] == green_classic[i]:
+            cc_teal[i] = cc_classic[i]  # no pixels in the teal-only hues, so the same mask
+        else:
+            cc_teal[i] = _largest_component(teal[i])
+
+    return np.column_stack([green_classic / pixels, green_teal / pixels, cc_classic, cc_teal,
+                            local_contrast, green_cast, sky_mean_v])
+
+
+def _masked_features(sky_small, sky_index, scale):
+    # aurora_features_batch() for one crop, over the masked pixels only. The
+    # blur needs the neighbourhood, so it (and the HSV conversion it needs)
+    # still runs on the whole crop. Gathered pixels are kept as a 1×N image:
+    # OpenCV is fast on long rows and slow on N×1 columns.
+    h, w = sky_small.shape[:2]
+    count = len(sky_index)
+    with stage("aurora.hsv"):
+        hsv = cv2.cvtColor(sky_small, cv2.COLOR_BGR2HSV)
+    with stage("aurora.blur"):
+        blur = cv2.GaussianBlur(cv2.extractChannel(hsv, 2), (0, 0), max(0.75, 3 * scale))
+    with stage("aurora.hsv"):
+        bgr = np.take(sky_small.reshape(-1, 3), sky_index, axis=0)[None]
+        hsv = np.take(hsv.reshape(-1, 3), sky_index, axis=0)[None]
+        V = cv2.extractChannel(hsv, 2)
+
+        b, g, r, _ = cv2.sumElems(bgr)
+        green_cast = (g - (r + b) / 2.0) / count / 255.0
+        sky_mean_v = cv2.sumElems(V)[0] / count / 255.0
+    with stage("aurora.blur"):
+        local_contrast = cv2.sumElems(cv2.absdiff(V, np.take(blur, sky_index)[None]))[0] / count / 255.0
+
+    with stage("aurora.components"):
+        classic = cv2.inRange(hsv, (38, 55, 25), (85, 255, 255))
+        teal = cv2.inRange(hsv, (38, 55, 25), (100, 255, 255))
+        green_classic, green_teal = cv2.countNonZero(classic), cv2.countNonZero(teal)
+        cc_classic = _largest_component(_scatter(classic, sky_index, h, w)) if green_classic else 0
+        if green_teal == green_classic:
+            cc_teal = cc_classic
+        else:
+            cc_teal = _largest_component(_scatter(teal, sky_index, h, w))
+    return np.array([green_classic / count, green_teal / count, cc_classic, cc_teal,
+                     local_contrast, green_cast, sky_mean_v])
+
+
+def _scatter(values, index, h, w):
+    full = np.zeros(h * w, np.uint8)
+    full[index] = values[0]
+    return full.reshape(h, w)
+
+
+def _largest_component(mask):
+    # Labelling only the bounding box of the mask is much cheaper when the
+    # candidate pixels sit in one part of the sky, as they usually do.
+    x, y, w, h = cv2.boundingRect(mask)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask[y:y + h, x:x + w], connectivity=8)
+    return int(stats[1:, cv2.CC_STAT_AREA].max()) if len(stats) > 1 else 0
+
 
-    If the folder path contains a specific month (e.g. .../2026/03) or day
-    (.../2026/03/15), derive the month directly from the path so that a scan
-    returning 0 results still removes old entries for that month.
-    Fall back to the months present in new_data when the path is ambiguous
-    (e.g. a whole-year scan).
+def aurora_scores_batch(stack):
     """
-    parts = Path(folder).parts
-    year = None
-    month = None
-    for i, part in enumerate(parts):
-        if part.isdigit() and len(part) == 4 and 2000 <= int(part) <= 2100:
-            year = part
-            if i + 1 < len(parts) and parts[i + 1].isdigit() and len(parts[i + 1]) == 2:
-                month = parts[i + 1]
-            break
-    if year and month:
-        return {year + month}
-    if year:
-        # Whole-year scan: clear all months for this year, even if 0 results.
-        return {f"{year}{m:02d}" for m in range(1, 13)}
-    # Unknown layout — use months present in the results
-    return {x["timestamp"][:6] for x in new_data}
-
-
-def _infer_year(folder):
-    """Extract a 4-digit year from the folder path, e.g. /images/2026 or /images/2026/03."""
-    for part in Path(folder).parts:
-        if part.isdigit() and len(part) == 4 and 2000 <= int(part) <= 2100:
-            return part
-    return None
+    (features, scores) for a stack of sky crops: aurora_features_batch() and
+    the aurora_score_sky() score of every frame as an N-vector.
+    """
+    stack = np.asarray(stack)
+    features = aurora_features_batch(stack)
+    return features, _scores_from_features(features, stack.shape[1] * stack.shape[2], stack.shape[2] / 640.0)
+
+
+def _scores_from_features(features, pixels, scale):
+    green_classic, green_teal, cc_classic, cc_teal, local_contrast, green_cast, sky_mean_v = features.T
+    base = local_contrast * 1.2 - green_cast * 0.8
+    score_classic = (green_classic * 1.8 + np.minimum(cc_classic / pixels, 0.20) * 1.5 + base
+                     + np.where(cc_classic >= 200 * scale * scale, 0.10, 0.0))
+    score_teal = green_teal * 1.8 + np.minimum(cc_teal / pixels, 0.20) * 1.5 + base
+    brightness_factor = np.clip((0.35 - sky_mean_v) / 0.17, 0.0, 1.0)
+    return np.maximum(score_classic, score_teal) * brightness_factor
+
+
+# ── Analyzer ──────────────────────────────────────────────────────────────────
+# Runs inside scan_pipeline.py, which walks the tree, reads each frame once and
+# hands over a Frame decoded at 1/4 scale (or resized from a finer decode when
+# another analyzer needs more resolution).
+
+REPORT_TITLE = "likely aurora frames"
+
+
+class AuroraAnalyzer(Analyzer):
+    """
+    Aurora scoring for scan_pipeline.run_pipeline().
+
+    prescreen: probe threshold for the mini/ thumbnail tier. Frames whose mini
+    scores below it are not decoded at full size. Frames without a mini are
+    always scored in full.
+    min_exposure: skip frames whose EXIF exposure time is shorter than this
+    many seconds (day-mode frames). Frames without EXIF are scored.
+    dedupe_distance: scan each night as a chronological sequence and reuse
+    the previous score for frames whose dHash is within this Hamming distance.
+    sky_masks: optional [sky_mask.SkyMask]; each frame (and its mini) is
+    scored over the sky pixels of the first mask that matches its size and
+    date, or the default 65% crop when none does.
+    profiles: optional camera_profiles.CameraProfiles; the masks then come
+    from the eras of each frame's camera instead of sky_masks.
+    """
+
+    name = "aurora"
+    scale = 4
+
+    def __init__(self, threshold=0.0, night_only=False, prescreen=None, min_exposure=None,
+                 dedupe_distance=None, dedupe_hash_size=8, sky_masks=None, profiles=None):
+        self.threshold = threshold
+        self.night_only = night_only
+        self.prescreen = prescreen
+        self.min_exposure = min_exposure
+        self.dedupe_distance = dedupe_distance
+        self.dedupe_hash_size = dedupe_hash_size
+        self.sky_masks = sky_masks or []
+        self.profiles = profiles
+        self.stateful = dedupe_distance is not None
+        self._last = (None, None)
+
+    def wants(self, dt):
+        return not self.night_only or dt is None or is_aurora_time(dt)
+
+    def priority(self, dt):
+        # Winter months and the hours around midnight
+        if dt is None:
+            return 0.0
+        season = (1.0, 1.0, 0.7, 0.4, 0.1, 0.1, 0.1, 0.1, 0.4, 0.7, 1.0, 1.0)[dt.month - 1]
+        hour = dt.hour + dt.minute / 60
+        return season * (1.0 - min(hour, 24 - hour) / 12)
+
+    def begin_sequence(self):
+        self._last = (None, None)
+
+    def masks_for(self, path):
+        return self.profiles.camera_of(path).sky_masks if self.profiles is not None else self.sky_masks
+
+    def prefilter(self, path):
+        if self.min_exposure is not None:
+            # Short exposure = the camera was in day mode; a few KB of header
+            # is enough to tell, no decode needed.
+            exposure = read_exif(path)["exposure_time"]
+            if exposure is not None and exposure < self.min_exposure:
+                return (0.0, "exif")
+        if self.prescreen is not None:
+            mini_score = aurora_score_mini(path.parent / "mini" / path.name, self.masks_for(path))
+            if mini_score is not None and mini_score < self.prescreen:
+                return (mini_score, "prescreen")
+        return None
+
+    def analyze(self, frame):
+        if self.dedupe_distance is not None:
+            # Reuse the last fully scored result for frames whose signature is
+            # within dedupe_distance bits (and the colour tolerance) of it.
+            with stage("aurora.dedupe"):
+                small = frame.view(8)
+                sig = signature_of(small, self.dedupe_hash_size) if small is not None else None
+            last_sig, last_score = self._last
+            if near_duplicate(sig, last_sig, self.dedupe_distance):
+                return (last_score, "dedupe")
+        img = frame.view(self.scale)
+        if img is None:
+            score = 0.0
+        else:
+            mask = select_mask(self.masks_for(frame.path), img.shape, parse_dt_from_stem(frame.path.stem))
+            score = aurora_score_image(img, mask=mask)
+        if self.dedupe_distance is not None:
+            self._last = (sig, score)
+        return (score, None)
+
+
+def add_analyzer_arguments(parser, prefix=""):
+    """Aurora scoring options; scan_pipeline.py adds them with prefix "aurora-"."""
+    parser.add_argument(f"--{prefix}threshold", type=float, default=0.15, help="Minimum score to include")
+    parser.add_argument(f"--{prefix}day", action="store_true", help="Scan all images including daytime (default: night only)")
+    parser.add_argument(f"--{prefix}exif-min-exposure", type=float, metavar="SECONDS", default=None,
+                        help="Skip frames whose EXIF exposure time is shorter than this (day-mode frames), "
+                             "read from the file header without decoding; e.g. 0.033")
+    parser.add_argument(f"--{prefix}mini-prescreen", type=float, metavar="PROBE", default=None,
+                        help="Score the mini/ thumbnail first and only decode the full frame when it "
+                             "reaches PROBE (keep it well below --threshold, e.g. 0.05)")
+    parser.add_argument(f"--{prefix}dedupe-distance", type=int, metavar="BITS", default=None,
+                        help="Scan each night in time order and reuse the previous score for frames whose "
+                             "dHash differs by at most BITS (e.g. 4); off by default")
+    parser.add_argument(f"--{prefix}dedupe-hash-size", type=int, default=8,
+                        help="dHash grid size; the hash has size² bits")
+    parser.add_argument(f"--{prefix}sky-masks", metavar="FILE",
+                        help="Score only the sky pixels of per-camera/per-era masks from this JSON file "
+                             "(see sky_mask.py); frames without a matching mask use the top 65%%")
+    parser.add_argument(f"--{prefix}event-gap", type=int, metavar="MINUTES", default=GAP_MINUTES,
+                        help="Frames less than this far apart in one night form one event "
+                             "(events-YYYY.json in the result store, or next to the JSON output)")
+
+
+def analyzer_from_args(args, prefix="", folder=None, profiles=None):
+    def get(name):
+        return getattr(args, (prefix + name).replace("-", "_"))
+    if profiles is not None and get("sky-masks"):
+        print(f"--{prefix}sky-masks is ignored with --profiles: each camera's eras have their own sky masks")
+    return AuroraAnalyzer(
+        threshold=get("threshold"),
+        night_only=not get("day"),
+        prescreen=get("mini-prescreen"),
+        min_exposure=get("exif-min-exposure"),
+        dedupe_distance=get("dedupe-distance"),
+        dedupe_hash_size=get("dedupe-hash-size"),
+        sky_masks=load_masks(get("sky-masks")) if get("sky-masks") and profiles is None else None,
+        profiles=profiles,
+    )
+
+
+def after_write(store_dir, args, prefix=""):
+    """MonthSink hook: refresh the aurora events for the months just written to store_dir (or a JSON file)."""
+    gap = getattr(args, (prefix + "event-gap").replace("-", "_"))
+    return lambda months: update_events(store_dir, months, gap)
+
+
+def scan_folder(folder, limit=50, threshold=0.0, night_only=False, workers=None,
+                prescreen=None, reference=None, min_exposure=None,
+                dedupe_distance=None, dedupe_hash_size=8, catalog=None, sink=None, budget=None,
+                cache=None, sky_masks=None, profile=None, metrics=None):
+    """
+    Score every frame under folder and print the top `limit`.
+
+    See AuroraAnalyzer for prescreen, min_exposure and dedupe_distance.
+    reference: optional {timestamp: score} from an earlier full-resolution
+    scan; reports how many of those frames the pre-screen dropped or the
+    dedupe gave a below-threshold score (recall of the short-circuits).
+    catalog: image_catalog.py database to take the file list from.
+    sink: optional MonthSink; results are then written month by month as
+    the scan goes and only the top `limit` are returned.
+    budget: optional ScanBudget to time-box the scan (scan_pipeline.py).
+    cache: optional frame_cache.FrameCache to read frames through.
+    sky_masks: optional [sky_mask.SkyMask], see AuroraAnalyzer.
+    profile: optional stage_profile.StageProfile (--profile).
+    metrics: optional run_metrics.RunMetrics (--metrics).
+    """
+    analyzer = AuroraAnalyzer(threshold, night_only, prescreen, min_exposure,
+                              dedupe_distance, dedupe_hash_size, sky_masks)
+    runs, all_months, interrupted = run_pipeline(
+        folder, [analyzer], workers=workers, catalog=catalog,
+        sinks={analyzer.name: sink} if sink else None, top_k=limit, recall=reference is not None,
+        budget=budget, cache=cache, profile=profile, metrics=metrics,
+    )
+    run = runs[analyzer.name]
+    top = run.top.best() if run.top else []
+    results = run.results if sink is None else top
+    print_top(top, limit, REPORT_TITLE, BASE_URL)
+
+    scanned = run.scanned
+    print(f"\nScanned {scanned} images, kept {run.kept} above threshold {threshold}")
+    if min_exposure is not None:
+        print(f"EXIF prefilter: {run.skipped['exif']} frames shorter than {min_exposure}s exposure skipped")
+    if prescreen is not None:
+        print(f"Mini pre-screen (probe {prescreen}): {run.skipped['prescreen']} of {scanned} frames "
+              f"not decoded at full size")
+        if reference:
+            prescreened = {p: s for p, s in run.short_circuited.items() if s is None}
+            report_recall("Pre-screen", run.paths, prescreened, reference, threshold)
+    if dedupe_distance is not None:
+        print(f"Dedupe (dHash {dedupe_hash_size}×{dedupe_hash_size}, distance ≤ {dedupe_distance}): "
+              f"{run.skipped['dedupe']} of {scanned} frames reused the previous score")
+        if reference:
+            deduped = {p: s for p, s in run.short_circuited.items() if s is not None}
+            report_recall("Dedupe", run.paths, deduped, reference, threshold)
+    if sink is not None:
+        if not interrupted:
+            sink.close(all_months | infer_scanned_months(folder, []))
+        elif budget is None or not budget.expired:
+            print("\nScan was interrupted — only completed months were written.")
+    return results
 
 
 if __name__ == "__main__":
@@ -233,61 +497,68 @@ if __name__ == "__main__":
     )
     parser.add_argument("folder", help="Folder to scan (year, month, or day directory)")
     parser.add_argument("--limit", type=int, default=50, help="Number of results to print")
-    parser.add_argument("--threshold", type=float, default=0.15, help="Minimum score to include")
-    parser.add_argument("--day", action="store_true", help="Scan all images including daytime (default: night only)")
-    parser.add_argument("--workers", type=int, default=None, help="Parallel workers (default: all CPU cores; try 1-2 for network drives)")
+    parser.add_argument("--workers", type=workers_arg, default=None,
+                        help="Parallel workers, or auto to adjust workers and read-ahead while scanning (default: all CPU cores)")
     parser.add_argument("--json-output", metavar="FILE", help="JSON output file (default: data/aurora-YYYY.json derived from folder path)")
+    parser.add_argument("--store", metavar="DIR", help="Result store directory, e.g. data/aurora (see result_store.py); replaces the JSON default")
     parser.add_argument("--append", action="store_true", help="Upsert entries by timestamp instead of replacing the whole scanned month")
+    parser.add_argument("--catalog", metavar="DB",
+                        help="Take the file list from an image_catalog.py database instead of walking the folder")
+    add_analyzer_arguments(parser)
+    add_profile_arguments(parser)
+    add_shard_arguments(parser)
+    add_budget_arguments(parser)
+    add_cache_arguments(parser)
+    add_stage_profile_arguments(parser)
+    add_metrics_arguments(parser)
+    parser.add_argument("--reference", "--prescreen-reference", dest="reference", metavar="FILE",
+                        help="Earlier full-resolution results to report pre-screen/dedupe recall against "
+                             "(default: the store or JSON output file, if it exists)")
 
     args = parser.parse_args()
 
+    if args.profiles or args.shard_dir:
+        # Every camera in one pass (results go to each camera's <data>/aurora store),
+        # or a share of a scan split across hosts (partial results, see scan_shards.py)
+        # The module by its import name, not __main__, so workers unpickle aurora_scan's analyzer
+        import aurora_scan
+        with metrics_from_args(args, "aurora_scan") as metrics:
+            scan_from_args(args, {"aurora": aurora_scan}, prefixed=False, metrics=metrics)
+        raise SystemExit(0)
+
     # Derive json output path from folder year if not given explicitly
     json_output = args.json_output
-    if json_output is None:
-        year = _infer_year(args.folder)
+    if json_output is None and args.store is None:
+        year = infer_year(args.folder)
         if year:
             json_output = f"data/aurora-{year}.json"
 
-    results = scan_folder(
-        args.folder,
-        limit=args.limit,
-        threshold=args.threshold,
-        night_only=not args.day,
-        workers=args.workers,
-    )
-
-    if json_output:
-        import json
-        def _ts(path):
-            dt = parse_dt_from_stem(path.stem)
-            return dt.strftime("%Y%m%d%H%M%S") if dt else path.stem
-        new_data = sorted(
-            [{"timestamp": _ts(path), "score": round(score, 4)} for score, path in results],
-            key=lambda x: x["timestamp"]
+    reference = None
+    if args.mini_prescreen is not None or args.dedupe_distance is not None:
+        reference = load_reference(args.reference or args.store or json_output)
+
+    sink = None
+    if args.store or json_output:
+        sink = MonthSink(store=args.store, json_output=json_output, append=args.append,
+                         on_write=after_write(args.store or json_output, args))
+
+    with metrics_from_args(args, "aurora_scan") as metrics:
+        scan_folder(
+            args.folder,
+            limit=args.limit,
+            threshold=args.threshold,
+            night_only=not args.day,
+            workers=args.workers,
+            prescreen=args.mini_prescreen,
+            reference=reference,
+            min_exposure=args.exif_min_exposure,
+            dedupe_distance=args.dedupe_distance,
+            dedupe_hash_size=args.dedupe_hash_size,
+            catalog=args.catalog,
+            sink=sink,
+            budget=budget_from_args(args, args.store or json_output),
+            cache=cache_from_args(args),
+            sky_masks=load_masks(args.sky_masks) if args.sky_masks else None,
+            profile=stage_profile_from_args(args),
+            metrics=metrics,
         )
-        output_path = Path(json_output)
-        if output_path.exists():
-            existing = json.loads(output_path.read_text())
-            if args.append:
-                # Upsert mode: merge new entries into existing by timestamp
-                if not new_data:
-                    print(f"\nNo new results; {json_output} unchanged.")
-                else:
-                    by_ts = {x["timestamp"]: x for x in existing}
-                    for item in new_data:
-                        by_ts[item["timestamp"]] = item
-                    merged = sorted(by_ts.values(), key=lambda x: x["timestamp"])
-                    output_path.write_text(json.dumps(merged, indent=2))
-                    print(f"\nJSON updated in {json_output} ({len(merged)} total entries, {len(new_data)} new/updated)")
-            else:
-                # Replace mode: remove all entries for scanned months, add new ones.
-                # This correctly clears false positives when a rescan finds 0 results.
-                scanned_months = _infer_scanned_months(args.folder, new_data)
-                kept = [x for x in existing if x["timestamp"][:6] not in scanned_months]
-                merged = sorted(kept + new_data, key=lambda x: x["timestamp"])
-                output_path.write_text(json.dumps(merged, indent=2))
-                removed = len(existing) - len(kept)
-                print(f"\nJSON merged into {json_output} ({len(merged)} total entries, {len(new_data)} from this scan, {removed} removed)")
-        else:
-            output_path.write_text(json.dumps(new_data, indent=2))
-            print(f"\nJSON written to {json_output} ({len(new_data)} entries)")
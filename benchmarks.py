@@ -0,0 +1,299 @@
+"""
+benchmarks.py — offline benchmarks of the scanners' hot paths, with a
+baseline to compare against.
+
+Everything runs on generated data, so no archive or network is needed:
+
+    aurora.decode.<W>x<H>        JPEG decode at the aurora scale (1/4), per frame
+    aurora.score.<W>x<H>         decode + aurora score, as AuroraAnalyzer does it
+    people.fgmask.<W>x<H>        decode + background difference (needs people_scan's imports)
+    people.score.<W>x<H>         decode + fgmask + YOLO (only with yolov8s.pt present)
+    discovery.frame_paths        walking a synthetic YYYY/MM/DD tree, per file
+    discovery.collect_work       the scan's file list with the night filter, per file
+    sun.find_sun_times           dawn/dusk for one day
+    sun.is_aurora_time           the night filter for one frame time
+    results.write_json           merging a month into a per-year JSON file
+    results.write_store          replacing a month in a result store
+
+The resolutions are the camera eras in cameras.json. Each benchmark runs
+once to warm up and then --rounds times; the median time per item (frame,
+file, day, merge) is kept, with the best round and items/sec:
+
+    python3 benchmarks.py run --output benchmark-baseline.json
+    # ... change aurora_score_sky() ...
+    python3 benchmarks.py run --baseline benchmark-baseline.json
+    python3 benchmarks.py compare benchmark-baseline.json benchmark-results.json --tolerance 0.1
+
+compare (and run --baseline) flags every benchmark whose median got slower
+than the baseline by more than --tolerance (default 15%) and exits 1 if
+there is one. Timings depend on the machine: keep one baseline per machine,
+and rerun it after OS or library upgrades. --quick uses a smaller tree and
+fewer rounds for a smoke run.
+
+Requires: opencv-python, numpy, astral (ultralytics for the people.score benchmarks)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import socket
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from fnmatch import fnmatch
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from aurora_scan import AuroraAnalyzer
+from result_store import ResultStore
+from scan_pipeline import Frame, collect_work, frame_paths, write_results
+from sun_calculator import find_sun_times, is_aurora_time
+
+# Frame sizes of the camera eras in cameras.json: Lillevik before and after
+# the July 2025 camera change
+RESOLUTIONS = ((2560, 1920), (3840, 2160))
+TOLERANCE = 0.15
+ROUNDS = 5
+OUTPUT = "benchmark-results.json"
+STAMP = "20260115220000"
+
+
+def synthetic_frame(width, height, seed=0):
+    """A night frame as JPEG bytes: noisy dark sky with a green band, lit ground below."""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 24, (height, width, 3), dtype=np.uint8)
+    band = slice(int(height * 0.25), int(height * 0.35))
+    img[band, int(width * 0.2):int(width * 0.8)] += np.array([20, 90, 30], np.uint8)
+    img[int(height * 0.7):] += np.uint8(60)
+    ok, data = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return data.tobytes()
+
+
+def synthetic_tree(root, months, per_day):
+    """Empty frames under root/YYYY/MM/DD, per_day spread over each day; returns the file count."""
+    count = 0
+    for m in range(months):
+        first = date(2025 + m // 12, 1 + m % 12, 1)
+        day = first
+        while day.month == first.month:
+            folder = Path(root) / f"{day:%Y/%m/%d}"
+            folder.mkdir(parents=True)
+            for i in range(per_day):
+                t = datetime(day.year, day.month, day.day) + timedelta(seconds=i * 86400 // per_day)
+                (folder / f"{t:%Y%m%d%H%M%S}.jpg").touch()
+            (folder / "mini").mkdir()
+            count += per_day
+            day += timedelta(days=1)
+    return count
+
+
+def measure(fn, items=1, rounds=ROUNDS):
+    """Time fn() rounds times after a warm-up run; seconds per item, median and best."""
+    fn()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {"median": median / items, "best": min(times) / items, "per_second": items / median,
+            "items": items, "rounds": rounds}
+
+
+def _quiet(fn):
+    """fn with its stdout discarded (the scan helpers print progress)."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+
+def _frame_benchmarks():
+    analyzer = AuroraAnalyzer()
+    path = Path(f"{STAMP}.jpg")
+    for width, height in RESOLUTIONS:
+        data = synthetic_frame(width, height)
+        size = f"{width}x{height}"
+        yield f"aurora.decode.{size}", "frame", lambda data=data: Frame(path, data, analyzer.scale).view(analyzer.scale)
+        yield f"aurora.score.{size}", "frame", lambda data=data: analyzer.analyze(Frame(path, data, analyzer.scale))
+
+    try:
+        import people_scan
+    except ImportError as e:
+        for width, height in RESOLUTIONS:
+            yield f"people.fgmask.{width}x{height}", f"skipped: {e}", None
+            yield f"people.score.{width}x{height}", f"skipped: {e}", None
+        return
+    for width, height in RESOLUTIONS:
+        data = synthetic_frame(width, height)
+        background = cv2.imdecode(np.frombuffer(synthetic_frame(width, height, seed=1), np.uint8), cv2.IMREAD_COLOR)
+        size = f"{width}x{height}"
+
+        def fgmask(data=data, background=background):
+            img = people_scan._decode_cropped(data)
+            return img, people_scan._foreground_mask(img, background)
+
+        yield f"people.fgmask.{size}", "frame", fgmask
+        if Path("yolov8s.pt").exists():
+            yield f"people.score.{size}", "frame", lambda fgmask=fgmask: people_scan._best_detection(*fgmask())
+        else:
+            yield f"people.score.{size}", "skipped: yolov8s.pt not in the working directory", None
+
+
+def run_benchmarks(only=None, quick=False, rounds=None):
+    """
+    Run the benchmarks whose names match one of the only patterns (fnmatch,
+    e.g. "aurora.*"; default all). Returns {name: result} where a result is
+    measure()'s dict plus the item unit, or {"skipped": reason}.
+    """
+    rounds = rounds or (2 if quick else ROUNDS)
+    months, per_day = (1, 48) if quick else (3, 144)
+    wanted = (lambda name: any(fnmatch(name, p) for p in only)) if only else (lambda name: True)
+    results = {}
+
+    def add(name, unit, fn, items=1):
+        if not wanted(name):
+            return
+        if fn is None:
+            results[name] = {"skipped": unit[len("skipped: "):]}
+            print(f"  {name:<32}skipped ({results[name]['skipped']})")
+            return
+        results[name] = {"unit": unit, **measure(fn, items, rounds)}
+        print(f"  {name:<32}{results[name]['median'] * 1000:10.3f} ms/{unit}", flush=True)
+
+    # cv2 threading would make the per-frame numbers depend on the core count; the scan
+    # runs one frame per worker process, so measure the same way
+    threads = cv2.getNumThreads()
+    cv2.setNumThreads(1)
+    try:
+        for name, unit, fn in _frame_benchmarks():
+            add(name, unit, fn)
+    finally:
+        cv2.setNumThreads(threads)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if wanted("discovery.*"):
+            files = synthetic_tree(Path(tmp) / "archive", months, per_day)
+            archive = str(Path(tmp) / "archive")
+            add("discovery.frame_paths", "file", lambda: sum(1 for _ in frame_paths(archive)), files)
+            night = AuroraAnalyzer(night_only=True)
+            add("discovery.collect_work", "file", _quiet(lambda: collect_work(archive, [night])), files)
+
+        days = [date(2025, 1, 1) + timedelta(days=i) for i in range(365)]
+        add("sun.find_sun_times", "day", lambda: [find_sun_times(d) for d in days], len(days))
+        step = 3600 if quick else 600
+        times = [datetime(2025, 1, 1) + timedelta(seconds=s) for s in range(0, 365 * 86400, step)]
+        add("sun.is_aurora_time", "frame", lambda: [is_aurora_time(t) for t in times], len(times))
+
+        # A year of results (a busy people year) and one rescanned month of new ones
+        year = [(0.5, Path(f"{t:%Y%m%d%H%M%S}.jpg"))
+                for t in (datetime(2025, 1, 1) + timedelta(minutes=10 * i) for i in range(0, 52560, 4))]
+        month = [(0.6, path) for _, path in year if path.stem.startswith("202503")]
+        json_path = Path(tmp) / "people-2025.json"
+        store = Path(tmp) / "people"
+        _quiet(lambda: write_results(json_path, year, set()))()
+        ResultStore(store).write([{"timestamp": p.stem, "score": s} for s, p in year], set())
+        entries = [{"timestamp": p.stem, "score": s} for s, p in month]
+        add("results.write_json", "merge", _quiet(lambda: write_results(json_path, month, {"202503"})))
+        add("results.write_store", "merge", lambda: ResultStore(store).write(entries, {"202503"}))
+    return results
+
+
+def environment():
+    """What the timings depend on besides the code."""
+    return {
+        "host": socket.gethostname(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(baseline, current, tolerance=TOLERANCE):
+    """
+    [(name, baseline median, current median, change)] for benchmarks in both
+    files (change: current / baseline - 1), and the names of those slower by
+    more than tolerance.
+    """
+    rows = []
+    regressions = []
+    for name, now in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if not before or "median" not in before or "median" not in now:
+            continue
+        change = now["median"] / before["median"] - 1
+        rows.append((name, before["median"], now["median"], change))
+        if change > tolerance:
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_comparison(baseline, current, tolerance=TOLERANCE):
+    """Print the comparison table; returns the names of the regressions."""
+    if baseline["environment"].get("host") != current["environment"].get("host"):
+        print(f"Note: baseline is from {baseline['environment'].get('host')}, "
+              f"this run from {current['environment'].get('host')}: timings are not comparable across machines")
+    rows, regressions = compare(baseline, current, tolerance)
+    print(f"{'benchmark':<32}{'baseline ms':>13}{'now ms':>11}{'change':>9}")
+    for name, before, now, change in rows:
+        flag = "  REGRESSION" if name in regressions else ("  faster" if change < -tolerance else "")
+        print(f"{name:<32}{before * 1000:>13.3f}{now * 1000:>11.3f}{change:>+9.0%}{flag}")
+    new = sorted(set(current["benchmarks"]) - set(baseline["benchmarks"]))
+    gone = sorted(set(baseline["benchmarks"]) - set(current["benchmarks"]))
+    if new:
+        print(f"Not in the baseline: {', '.join(new)}")
+    if gone:
+        print(f"Not run now: {', '.join(gone)}")
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) more than {tolerance:.0%} slower than the baseline")
+    else:
+        print(f"\nNo benchmark more than {tolerance:.0%} slower than the baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("run", help="Run the benchmarks and write their results")
+    r.add_argument("--output", default=OUTPUT, help=f"Results file (default: {OUTPUT})")
+    r.add_argument("--only", metavar="PATTERNS",
+                   help="Comma-separated name patterns to run, e.g. 'aurora.*,sun.*' (default: all)")
+    r.add_argument("--rounds", type=int, help=f"Timed rounds per benchmark (default: {ROUNDS}, 2 with --quick)")
+    r.add_argument("--quick", action="store_true", help="Smaller tree and fewer rounds, for a smoke run")
+    r.add_argument("--baseline", metavar="FILE", help="Compare with this baseline afterwards (exit 1 on a regression)")
+    r.add_argument("--tolerance", type=float, default=TOLERANCE,
+                   help=f"Slowdown allowed before a benchmark is flagged (default: {TOLERANCE})")
+    c = sub.add_parser("compare", help="Compare a results file with a baseline")
+    c.add_argument("baseline", help="Baseline results file")
+    c.add_argument("current", help="Results file to check")
+    c.add_argument("--tolerance", type=float, default=TOLERANCE,
+                   help=f"Slowdown allowed before a benchmark is flagged (default: {TOLERANCE})")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        only = [p.strip() for p in args.only.split(",") if p.strip()] if args.only else None
+        current = {"environment": environment(),
+                   "benchmarks": run_benchmarks(only, args.quick, args.rounds)}
+        Path(args.output).write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+        if not args.baseline:
+            return
+        baseline = json.loads(Path(args.baseline).read_text())
+    else:
+        baseline = json.loads(Path(args.baseline).read_text())
+        current = json.loads(Path(args.current).read_text())
+    if print_comparison(baseline, current, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+camera_profiles.py — per-camera settings for scanning several cameras in one run.
+
+A profiles file describes each camera: where its archive is, the page its
+frames link to, where its results go, and, per era (a date range with one
+camera body and framing), the people exclusion zones and the aurora sky mask:
+
+    {"cameras": [
+      {"name": "lillevik", "root": "/Volumes/homes/cl/Lillevik-webcam",
+       "url": "https://lilleviklofoten.no/webcam/?type=one&image=", "data": "data",
+       "eras": [
+         {"name": "old", "until": "20250725", "size": [2560, 1920],
+          "exclude_zones": ["0.0,0.0,1.0,0.68", "0.52,0.70,0.61,0.81"]},
+         {"name": "new", "from": "20250726", "size": [3840, 2160],
+          "exclude_zones": ["0.0,0.0,1.0,0.60", "0.0,0.60,0.45,0.68"],
+          "sky": ["0.0,0.0,1.0,0.45"], "sky_exclude": ["0.52,0.40,0.61,0.50"]}]},
+      {"name": "viktun", ...}
+    ]}
+
+"data" is the camera's data directory: results go to the stores
+<data>/aurora/ and <data>/people/. The people backgrounds are read from,
+and built into, "backgrounds" (default: the data directory) as
+background-YYYY-MM.png, or background-YYYY-MM-<era>.png for a month that two
+eras share (the names util/people-rescan-all.py uses). "sky"/"sky_exclude"
+regions make the era's sky mask, as in sky_mask.py; eras without one keep the
+default crop. Dates are YYYYMMDD, inclusive. A frame without a date in its
+name belongs to the last era.
+
+cameras.json has both cameras. With --profiles, the scanners' folder
+argument is a path under every camera root (2026/03, or . for the whole
+archive). All cameras are then scanned in one pass with one worker pool:
+
+    python3 scan_pipeline.py 2026/03 --profiles cameras.json --people-civil-day
+    python3 aurora_scan.py 2026 --profiles cameras.json --cameras lillevik
+"""
+
+import json
+import os
+from pathlib import Path
+
+from scan_pipeline import parse_dt_from_stem, timestamp_of
+from sky_mask import SkyMask
+
+
+def parse_zone(zone):
+    """An "x1,y1,x2,y2" exclusion zone (fractions 0–1) → tuple of floats."""
+    try:
+        x1, y1, x2, y2 = (float(v) for v in zone.split(","))
+    except ValueError:
+        raise ValueError(f"Invalid zone '{zone}': expected x1,y1,x2,y2 as fractions 0–1")
+    return (x1, y1, x2, y2)
+
+
+class Era:
+    """One camera body and framing over a date range."""
+
+    def __init__(self, camera, name, start=None, end=None, size=None, exclude_zones=(), sky=None,
+                 sky_exclude=()):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.exclude_zones = [parse_zone(z) for z in exclude_zones]
+        self.sky_mask = SkyMask(f"{camera}-{name}", sky, sky_exclude, size, start, end) if sky else None
+
+    @classmethod
+    def from_dict(cls, camera, entry):
+        return cls(camera, entry.get("name", "all"), entry.get("from"), entry.get("until"), entry.get("size"),
+                   entry.get("exclude_zones", ()), entry.get("sky"), entry.get("sky_exclude", ()))
+
+    def overlaps(self, first, last):
+        """Whether the era covers any day from first to last (YYYYMMDD)."""
+        return (not self.start or last >= self.start) and (not self.end or first <= self.end)
+
+
+class Camera:
+    """One camera's archive, page URL, data directory and eras."""
+
+    def __init__(self, name, root, url, data="data", backgrounds=None, eras=()):
+        self.name = name
+        self.root = Path(root)
+        self.url = url
+        self.data = Path(data)
+        self.backgrounds = Path(backgrounds) if backgrounds else self.data
+        self.eras = list(eras) or [Era(name, "all")]
+        self.sky_masks = [era.sky_mask for era in self.eras if era.sky_mask is not None]
+
+    @classmethod
+    def from_dict(cls, entry):
+        name = entry["name"]
+        return cls(name, entry["root"], entry["url"], entry.get("data", "data"), entry.get("backgrounds"),
+                   [Era.from_dict(name, e) for e in entry.get("eras", ())])
+
+    def era_for(self, dt):
+        """The era a frame taken at dt belongs to (the last one for dt None or outside every era)."""
+        if dt is not None:
+            day = dt.strftime("%Y%m%d")
+            for era in self.eras:
+                if era.overlaps(day, day):
+                    return era
+        return self.eras[-1]
+
+    def eras_in_month(self, ym):
+        return [era for era in self.eras if era.overlaps(ym + "01", ym + "31")]
+
+    def background_path(self, era, ym):
+        """The era's background for month YYYYMM in the camera's background bank."""
+        name = f"background-{ym[:4]}-{ym[4:]}"
+        if len(self.eras_in_month(ym)) > 1:
+            name += f"-{era.name}"
+        return self.backgrounds / f"{name}.png"
+
+
+class CameraProfiles:
+    """The cameras of a profiles file; finds the camera and era of a frame path."""
+
+    def __init__(self, cameras):
+        self.cameras = list(cameras)
+        self._by_dir = {}
+
+    def camera_of(self, path):
+        """The camera whose root the path is under (the longest matching root)."""
+        parent = os.path.dirname(str(path))
+        camera = self._by_dir.get(parent)
+        if camera is None:
+            matches = [c for c in self.cameras
+                       if parent == str(c.root) or parent.startswith(str(c.root).rstrip(os.sep) + os.sep)]
+            if not matches:
+                raise ValueError(f"{path} is not under any camera root")
+            camera = self._by_dir[parent] = max(matches, key=lambda c: len(str(c.root)))
+        return camera
+
+    def era_of(self, path):
+        """(camera, era) of a frame path."""
+        camera = self.camera_of(path)
+        return camera, camera.era_for(parse_dt_from_stem(Path(path).stem))
+
+    def frame_key(self, path):
+        """camera/YYYYMMDDHHMMSS: the pipeline's key for a frame (timestamps repeat across cameras)."""
+        return f"{self.camera_of(path).name}/{timestamp_of(path)}"
+
+    def camera_name(self, path):
+        return self.camera_of(path).name
+
+    def url_of(self, path):
+        return self.camera_of(path).url
+
+    def folders(self, subpath="."):
+        """[(camera, folder)]: subpath under each camera root, for the cameras that have it."""
+        return [(camera, camera.root / subpath) for camera in self.cameras if (camera.root / subpath).is_dir()]
+
+
+def load_profiles(path, names=None):
+    """CameraProfiles from a profiles file; names: comma-separated cameras to keep (default all)."""
+    data = json.loads(Path(path).read_text())
+    cameras = [Camera.from_dict(entry) for entry in data["cameras"]]
+    if names:
+        wanted = [n.strip() for n in names.split(",") if n.strip()]
+        unknown = set(wanted) - {c.name for c in cameras}
+        if unknown:
+            raise ValueError(f"unknown camera(s) {', '.join(sorted(unknown))}")
+        cameras = [c for c in cameras if c.name in wanted]
+    return CameraProfiles(cameras)
+
+
+def month_folders(folder):
+    """
+    [(YYYYMM, month directory)] for the months a scan of folder covers: the
+    folder's own month for a month or day folder, else every YYYY/MM under it.
+    """
+    folder = Path(folder)
+    parts = folder.parts
+    for i, part in enumerate(parts):
+        if part.isdigit() and len(part) == 4:
+            if i + 1 < len(parts) and parts[i + 1].isdigit() and len(parts[i + 1]) == 2:
+                return [(part + parts[i + 1], Path(*parts[:i + 2]))]
+            return [(part + m.name, m) for m in sorted(folder.glob("[01][0-9]")) if m.is_dir()]
+    return [(y.name + m.name, m) for y in sorted(folder.glob("[12][0-9][0-9][0-9]")) if y.is_dir()
+            for m in sorted(y.glob("[01][0-9]")) if m.is_dir()]
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profiles", metavar="FILE",
+                        help="Scan every camera in this profiles file (see camera_profiles.py) in one pass; "
+                             "the folder is then a path under each camera root, e.g. 2026/03 or .")
+    parser.add_argument("--cameras", metavar="NAMES",
+                        help="With --profiles: comma-separated cameras to scan (default: all)")
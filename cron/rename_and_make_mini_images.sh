@@ -41,3 +41,8 @@ for f in *.jpg; do
     [ -f "$f" ] || continue
     [ ! -f "mini/$f" ] && convert "$f" -quality 85 -resize 160x120 "mini/$f"
 done
+
+# Refresh the month manifests webcam.php reads instead of globbing.
+# Yesterday's month too, so the last day of a month is finalised on the 1st.
+python3 "$webcam_dir/month_manifest.py" "$webcam_dir" \
+    --month "$(date +'%Y/%m')" --month "$(date -d yesterday +'%Y/%m')" > /dev/null
@@ -0,0 +1,141 @@
+"""
+exif_header.py
+
+Minimal JPEG header reader: exposure time, ISO and pixel dimensions without
+decoding the image. Only the segment headers before the scan data are read —
+a few KB per file instead of a multi-MB JPEG decode — so the scanners can use
+it as a cheap prefilter before handing a frame to OpenCV.
+
+Walks the JPEG markers with seeks, so files rewritten by `exiftool` in the
+rename cron (extra XMP/COM segments, relocated APP1) parse the same as the
+camera originals.
+
+No dependencies beyond the standard library.
+"""
+
+import struct
+
+# EXIF tags we care about
+_TAG_EXIF_IFD = 0x8769
+_TAG_EXPOSURE_TIME = 0x829A
+_TAG_ISO = 0x8827
+_TAG_PIXEL_X = 0xA002
+_TAG_PIXEL_Y = 0xA003
+
+# Start-of-frame markers carry the real image size (C4/C8/CC are not SOF)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Bytes per component for TIFF field types
+_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def read_exif(path, max_bytes=131072):
+    """
+    Return {"exposure_time", "iso", "width", "height"} for a JPEG file.
+
+    exposure_time is in seconds (float). Missing values are None; a file that
+    is not a JPEG returns all None. At most max_bytes of header data is read.
+    """
+    info = {"exposure_time": None, "iso": None, "width": None, "height": None}
+    try:
+        with open(path, "rb") as f:
+            if f.read(2) != b"\xff\xd8":
+                return info
+            budget = max_bytes
+            while budget > 0:
+                head = f.read(4)
+                if len(head) < 4 or head[0] != 0xFF:
+                    break
+                marker = head[1]
+                if marker == 0xFF:
+                    # Fill byte — resync one byte on
+                    f.seek(-3, 1)
+                    continue
+                if marker in (0xD9, 0xDA):  # EOI / SOS: no more headers
+                    break
+                length = struct.unpack(">H", head[2:4])[0] - 2
+                if length < 0:
+                    break  # corrupt segment length
+                if marker == 0xE1:
+                    # APP1 is also XMP (often tens of KB): read only the
+                    # identifier, and the rest only if it is EXIF
+                    ident = f.read(min(length, 6))
+                    budget -= len(ident)
+                    rest = length - len(ident)
+                    if ident == b"Exif\x00\x00":
+                        data = f.read(min(rest, budget))
+                        budget -= len(data)
+                        rest -= len(data)
+                        _parse_tiff(data, info)
+                    f.seek(rest, 1)
+                elif marker in _SOF_MARKERS:
+                    data = f.read(min(length, budget))
+                    budget -= len(data)
+                    if len(data) < length:
+                        break
+                    if len(data) >= 5:
+                        info["height"], info["width"] = struct.unpack(">HH", data[1:5])
+                        break  # SOF comes after the APPn segments
+                else:
+                    f.seek(length, 1)
+    except OSError:
+        pass
+    return info
+
+
+def _parse_tiff(tiff, info):
+    if len(tiff) < 8:
+        return
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None:
+        return
+    ifd0 = struct.unpack(order + "I", tiff[4:8])[0]
+    entries = _read_ifd(tiff, ifd0, order)
+    exif_offset = entries.get(_TAG_EXIF_IFD)
+    if exif_offset is not None:
+        entries.update(_read_ifd(tiff, exif_offset, order))
+
+    exposure = entries.get(_TAG_EXPOSURE_TIME)
+    if exposure is not None:
+        info["exposure_time"] = exposure
+    iso = entries.get(_TAG_ISO)
+    if iso is not None:
+        info["iso"] = int(iso)
+    if entries.get(_TAG_PIXEL_X) and entries.get(_TAG_PIXEL_Y):
+        info["width"] = int(entries[_TAG_PIXEL_X])
+        info["height"] = int(entries[_TAG_PIXEL_Y])
+
+
+def _read_ifd(tiff, offset, order):
+    """Return {tag: first value} for the numeric entries of one IFD."""
+    values = {}
+    if offset + 2 > len(tiff):
+        return values
+    count = struct.unpack(order + "H", tiff[offset:offset + 2])[0]
+    for i in range(count):
+        pos = offset + 2 + i * 12
+        if pos + 12 > len(tiff):
+            break
+        tag, typ, n = struct.unpack(order + "HHI", tiff[pos:pos + 8])
+        size = _TYPE_SIZES.get(typ)
+        if size is None or n < 1:
+            continue
+        if size * n <= 4:
+            data_pos = pos + 8
+        else:
+            data_pos = struct.unpack(order + "I", tiff[pos + 8:pos + 12])[0]
+        if data_pos + size > len(tiff):
+            continue
+        raw = tiff[data_pos:data_pos + size]
+        if typ == 3:
+            values[tag] = struct.unpack(order + "H", raw)[0]
+        elif typ == 4:
+            values[tag] = struct.unpack(order + "I", raw)[0]
+        elif typ == 9:
+            values[tag] = struct.unpack(order + "i", raw)[0]
+        elif typ in (5, 10):
+            num, den = struct.unpack(order + ("II" if typ == 5 else "ii"), raw)
+            values[tag] = num / den if den else None
+        elif typ in (1, 7):
+            values[tag] = raw[0]
+    return values
@@ -0,0 +1,214 @@
+"""
+frame_cache.py — local read-through cache for frames on a network drive.
+
+The archive lives on a NAS, and the same months are read again and again:
+background sampling and then the scan in util/people-rescan-all.py, every
+rescan after tuning a threshold, aurora rescans of the same winters. With
+--cache DIR the scanners read each frame through a cache on local disk.
+The first run fills it; later runs over the same months read from it and
+are bound by CPU rather than the network.
+
+    python3 aurora_scan.py /Volumes/homes/cl/Lillevik-webcam/2026/01 --cache ~/.cache/webcam-frames
+    python3 people_scan.py /Volumes/.../2025/07 --cache /ssd/frames --cache-size 200 --background ...
+
+    FRAME_CACHE_DIR=/ssd/frames python3 util/people-rescan-all.py 2025   # via the environment
+
+Entries are keyed by the frame's path, mtime and size, so a replaced or
+re-encoded file is a miss rather than stale data. Two modes:
+
+    raw       the original JPEG bytes (default; any analyzer, any scale)
+    decoded   the decoded image at the scan's base scale as .npy, which also
+              skips the JPEG decode on a hit, at several times the disk space
+
+The cache is capped at --cache-size GB. Each hit refreshes the entry's mtime,
+and when the cache grows past the cap the least recently used entries are
+deleted until it is back under 90% of it. Several processes can share one
+cache directory: entries are written atomically, and a lost race just costs
+a read from the NAS.
+
+    python3 frame_cache.py ~/.cache/webcam-frames            # usage
+    python3 frame_cache.py ~/.cache/webcam-frames --clear
+
+Requires: numpy
+"""
+
+import argparse
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from result_store import locked
+
+DEFAULT_SIZE_GB = 50
+MODES = ("raw", "decoded")
+
+
+class FrameCache:
+    """Read-through LRU cache of frame bytes or decoded arrays in a local directory."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_SIZE_GB * 2**30, mode="raw"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode: {mode} (choose from {', '.join(MODES)})")
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._added = 0
+
+    def _entry(self, path, suffix):
+        st = os.stat(path)
+        key = hashlib.sha1(f"{Path(path).resolve()}|{st.st_mtime_ns}|{st.st_size}".encode()).hexdigest()
+        return self.directory / key[:2] / f"{key}{suffix}"
+
+    def _hit(self, entry):
+        self.hits += 1
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+    def _store(self, entry, write):
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+        try:
+            write(tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        self._added += entry.stat().st_size
+        if self._added > self.max_bytes / 20:
+            self.evict()
+
+    def read(self, path):
+        """The bytes of path, from the cache if present; raises OSError like Path.read_bytes()."""
+        entry = self._entry(path, ".raw")
+        try:
+            data = entry.read_bytes()
+        except OSError:
+            pass
+        else:
+            self._hit(entry)
+            return data
+        self.misses += 1
+        data = Path(path).read_bytes()
+        self._store(entry, lambda tmp: tmp.write_bytes(data))
+        return data
+
+    def get_array(self, path, scale):
+        """The cached decode of path at 1/scale, or None."""
+        try:
+            entry = self._entry(path, f"-{scale}.npy")
+            img = np.load(entry)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self._hit(entry)
+        return img
+
+    def put_array(self, path, scale, img):
+        try:
+            entry = self._entry(path, f"-{scale}.npy")
+        except OSError:
+            return
+        self._store(entry, lambda tmp: _save_array(tmp, img))
+
+    def usage(self):
+        """(entries, bytes) currently in the cache."""
+        entries = total = 0
+        for _, size, _ in self._entries():
+            entries += 1
+            total += size
+        return entries, total
+
+    def _entries(self):
+        if not self.directory.is_dir():
+            return
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for f in os.scandir(sub.path):
+                if f.name.startswith("."):
+                    continue
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, f.path
+
+    def evict(self):
+        """Delete least recently used entries until the cache is under 90% of its cap."""
+        self._added = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with locked(self.directory / "evict"):
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return 0
+            removed = 0
+            for _, size, path in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self):
+        for _, _, path in list(self._entries()):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def _save_array(path, img):
+    # A file object, so np.save doesn't append .npy to the temp name
+    with open(path, "wb") as f:
+        np.save(f, img)
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache", metavar="DIR", default=os.environ.get("FRAME_CACHE_DIR"),
+                        help="Read frames through a local cache directory, e.g. on an SSD "
+                             "(default: $FRAME_CACHE_DIR; see frame_cache.py)")
+    parser.add_argument("--cache-size", type=float, metavar="GB",
+                        default=float(os.environ.get("FRAME_CACHE_GB", DEFAULT_SIZE_GB)),
+                        help=f"Cache size cap in GB (default: $FRAME_CACHE_GB or {DEFAULT_SIZE_GB})")
+    parser.add_argument("--cache-mode", choices=MODES, default=os.environ.get("FRAME_CACHE_MODE", "raw"),
+                        help="Cache original bytes (raw) or base-scale decoded arrays (decoded)")
+
+
+def cache_from_args(args):
+    """FrameCache for --cache/--cache-size/--cache-mode, or None."""
+    directory = getattr(args, "cache", None)
+    if not directory:
+        return None
+    return FrameCache(Path(directory).expanduser(), int(args.cache_size * 2**30), args.cache_mode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Cache directory")
+    parser.add_argument("--clear", action="store_true", help="Delete every entry")
+    parser.add_argument("--evict", type=float, metavar="GB", help="Evict least recently used entries down to this size")
+    args = parser.parse_args()
+
+    cache = FrameCache(Path(args.directory).expanduser())
+    if args.clear:
+        cache.clear()
+    elif args.evict is not None:
+        cache.max_bytes = int(args.evict * 2**30)
+        print(f"{cache.evict()} entries evicted")
+    entries, total = cache.usage()
+    print(f"{args.directory}: {entries} entries, {total / 2**30:.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
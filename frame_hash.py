@@ -0,0 +1,63 @@
+"""
+frame_hash.py
+
+Cheap signature of a webcam frame for spotting near-identical consecutive
+frames — long calm nights, foggy days — so the scanners can reuse the previous
+result instead of re-running the scorer or detector.
+
+A signature is a difference hash (dHash) of the grayscale frame plus a 4×4
+grid of mean colours. dHash only sees the direction of brightness gradients,
+so on its own a uniformly brighter or greener sky hashes the same as a dark
+one; the colour grid catches exactly that.
+
+The analyzers hash frame.view(8): a 1/8-scale image resized from the
+frame's shared base decode (see scan_pipeline.Frame), so a signature costs
+no decode of its own.
+
+Requires: opencv-python, numpy
+"""
+
+import cv2
+import numpy as np
+
+# Max per-cell, per-channel difference (0–255) of the colour grid for two
+# frames to still count as near-identical.
+COLOUR_TOLERANCE = 6
+
+
+def dhash(gray, size=8):
+    """
+    Return the size×size-bit difference hash of a grayscale image as an int.
+
+    Each bit says whether a pixel is brighter than its left neighbour in a
+    (size+1)×size downscale of the image.
+    """
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), "big")
+
+
+def colour_grid(bgr, grid=4):
+    """Mean colour of each cell in a grid×grid split of the image (uint8, grid×grid×3)."""
+    return cv2.resize(bgr, (grid, grid), interpolation=cv2.INTER_AREA)
+
+
+def signature_of(bgr, size=8):
+    """(dhash, colour_grid) of a decoded BGR image."""
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    return dhash(gray, size), colour_grid(bgr)
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def near_duplicate(a, b, max_distance, colour_tolerance=COLOUR_TOLERANCE):
+    """True if two signatures are within max_distance hash bits and the colour tolerance."""
+    if a is None or b is None:
+        return False
+    if hamming(a[0], b[0]) > max_distance:
+        return False
+    diff = np.abs(a[1].astype(np.int16) - b[1].astype(np.int16))
+    return int(diff.max()) <= colour_tolerance
@@ -0,0 +1,281 @@
+"""
+frame_index.py — find archive frames that look like a given frame.
+
+Builds a compact per-year index of frame signatures (64-bit dHash + 4×4 mean
+colour grid, see frame_hash.py) and answers "show me frames like this one"
+in milliseconds, without rescanning with the scorers.
+
+Signatures come from the mini/ thumbnail when there is one, otherwise from a
+1/8-scale decode of the full frame. The index is a NumPy .npz per year
+(~64 bytes per frame) and is updated incrementally: frames already indexed
+are not read again.
+
+Queries use multi-index hashing: the 64-bit hash is split into four 16-bit
+chunks, each with its own sorted lookup table. Any hash within Hamming
+distance r of the query matches at least one chunk within r // 4 bits, so
+only those buckets are probed. The search radius grows until there are
+enough candidates (falling back to a vectorised scan for sparse
+neighbourhoods), which are then ranked by hash distance plus colour
+difference.
+
+Usage:
+    # Build / update the index for a year
+    python3 frame_index.py build /path/to/images --year 2026
+
+    # Frames like a known timestamp, or like an arbitrary image file
+    python3 frame_index.py query 20260115221508 --limit 20
+    python3 frame_index.py query /tmp/nice-aurora.jpg
+
+Requires: opencv-python, numpy
+"""
+
+import argparse
+import multiprocessing
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from frame_hash import signature_of
+
+BASE_URL = "https://lilleviklofoten.no/webcam/?type=one&image="
+
+# One colour level of mean difference is worth this many hash bits in the ranking
+COLOUR_WEIGHT = 0.25
+
+_CHUNKS = 4
+_CHUNK_BITS = 16
+
+
+def index_path(index_dir, year):
+    return Path(index_dir) / f"frames-{year}.npz"
+
+
+# ── Building ──────────────────────────────────────────────────────────────────
+
+def _signature_worker(path):
+    """Return (timestamp, hash, colour grid) for one frame, or None if unreadable."""
+    mini = path.parent / "mini" / path.name
+    img = cv2.imread(str(mini)) if mini.exists() else None
+    if img is None:
+        img = cv2.imread(str(path), cv2.IMREAD_REDUCED_COLOR_8)
+    if img is None:
+        return None
+    h, grid = signature_of(img)
+    return int(path.stem), h, grid.reshape(-1)
+
+
+def load_index(path):
+    """Return (timestamps, hashes, colours) arrays for one index file, or empty arrays."""
+    path = Path(path)
+    if not path.exists():
+        return (np.zeros(0, np.uint64), np.zeros(0, np.uint64), np.zeros((0, 48), np.uint8))
+    with np.load(path) as data:
+        return data["timestamps"], data["hashes"], data["colours"]
+
+
+def build_index(root, year, index_dir="data", workers=None):
+    """Index every frame of one year under root, reusing existing entries."""
+    out = index_path(index_dir, year)
+    timestamps, hashes, colours = load_index(out)
+    known = set(timestamps.tolist())
+
+    print("Collecting file list...", end="", flush=True)
+    paths = [p for p in (Path(root) / str(year)).rglob("*.jpg")
+             if "mini" not in p.parts and p.stem.isdigit() and len(p.stem) == 14
+             and int(p.stem) not in known]
+    print(f"\rFound {len(paths)} new frames to index ({len(known)} already indexed)    ")
+    if not paths:
+        return
+
+    new = []
+    num_workers = workers if workers is not None else multiprocessing.cpu_count()
+    with multiprocessing.Pool(processes=num_workers) as pool:
+        for i, item in enumerate(pool.imap_unordered(_signature_worker, paths, chunksize=16), 1):
+            if item is not None:
+                new.append(item)
+            if i % 200 == 0 or i == len(paths):
+                print(f"\r  {i}/{len(paths)} indexed", end="", flush=True)
+    print()
+
+    if new:
+        timestamps = np.concatenate([timestamps, np.array([t for t, _, _ in new], np.uint64)])
+        hashes = np.concatenate([hashes, np.array([h for _, h, _ in new], np.uint64)])
+        colours = np.concatenate([colours, np.stack([c for _, _, c in new]).astype(np.uint8)])
+    order = np.argsort(timestamps)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp.npz")
+    np.savez(tmp, timestamps=timestamps[order], hashes=hashes[order], colours=colours[order])
+    tmp.replace(out)
+    print(f"Index written to {out} ({len(order)} frames, {len(new)} new)")
+
+
+# ── Searching ─────────────────────────────────────────────────────────────────
+
+def _popcount(x):
+    """Per-element number of set bits of a uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype(np.int64)
+    as_bytes = x.view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(as_bytes, axis=1).sum(axis=1).astype(np.int64)
+
+
+class FrameIndex:
+    """All loaded years plus the multi-index hashing tables."""
+
+    def __init__(self, timestamps, hashes, colours):
+        self.timestamps = timestamps
+        self.hashes = hashes
+        self.colours = colours.astype(np.int16)
+        self._tables = []
+        for c in range(_CHUNKS):
+            chunk = ((hashes >> np.uint64(c * _CHUNK_BITS)) & np.uint64(0xFFFF)).astype(np.uint16)
+            order = np.argsort(chunk, kind="stable")
+            self._tables.append((chunk[order], order))
+
+    @classmethod
+    def load(cls, index_dir="data"):
+        parts = [load_index(p) for p in sorted(Path(index_dir).glob("frames-*.npz"))]
+        if not parts:
+            return cls(*load_index(Path(index_dir) / "missing"))
+        return cls(*(np.concatenate(a) for a in zip(*parts)))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def lookup(self, timestamp):
+        """Return (hash, colours) for an indexed timestamp, or None."""
+        i = np.searchsorted(self.timestamps, np.uint64(timestamp))
+        if i < len(self.timestamps) and self.timestamps[i] == np.uint64(timestamp):
+            return int(self.hashes[i]), self.colours[i]
+        return None
+
+    def _candidates(self, query_hash, radius):
+        """Indices of all entries within `radius` bits (plus some farther ones)."""
+        masks = _flip_masks(radius // _CHUNKS)
+        found = []
+        for c in range(_CHUNKS):
+            values, order = self._tables[c]
+            probes = (((query_hash >> (c * _CHUNK_BITS)) & 0xFFFF) ^ masks).astype(np.uint16)
+            lo = np.searchsorted(values, probes, side="left")
+            hi = np.searchsorted(values, probes, side="right")
+            found.extend(order[a:b] for a, b in zip(lo[hi > lo], hi[hi > lo]))
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, np.int64)
+
+    def nearest(self, query_hash, query_colours, n=20, exclude=lambda ts: False):
+        """Return [(distance, bits, timestamp)] for the n most similar frames."""
+        if not len(self):
+            return []
+        q = np.uint64(query_hash)
+        want = n * 4
+        idx = None
+        # Probe radius 3, 7, 11 (0, 1, 2 flipped bits per chunk). Beyond that the
+        # number of probes outgrows a plain vectorised scan.
+        for radius in (3, 7, 11):
+            cand = self._candidates(query_hash, radius)
+            bits = _popcount(self.hashes[cand] ^ q)
+            if np.count_nonzero(bits <= radius) >= want:
+                idx = cand
+                break
+        if idx is None:
+            bits = _popcount(self.hashes ^ q)
+            k = min(len(bits), max(want * 10, 200))
+            idx = np.argpartition(bits, k - 1)[:k] if k < len(bits) else np.arange(len(bits))
+        bits = _popcount(self.hashes[idx] ^ q)
+        colour = np.abs(self.colours[idx] - np.asarray(query_colours, np.int16)).mean(axis=1)
+        dist = bits + COLOUR_WEIGHT * colour
+        out = []
+        for j in np.argsort(dist, kind="stable"):
+            ts = int(self.timestamps[idx[j]])
+            if exclude(ts):
+                continue
+            out.append((float(dist[j]), int(bits[j]), ts))
+            if len(out) >= n:
+                break
+        return out
+
+
+_MASK_CACHE = {}
+
+
+def _flip_masks(max_flips):
+    """All 16-bit XOR masks with at most max_flips bits set."""
+    if max_flips not in _MASK_CACHE:
+        every = np.arange(1 << _CHUNK_BITS, dtype=np.uint32)
+        _MASK_CACHE[max_flips] = every[_popcount(every.astype(np.uint64)) <= max_flips]
+    return _MASK_CACHE[max_flips]
+
+
+def query(index, target, n=20, min_gap_minutes=60):
+    """
+    Nearest frames to a timestamp (YYYYMMDDHHMMSS, looked up in the index) or
+    an image file. Frames within min_gap_minutes of a timestamp query are
+    skipped so one night's neighbours don't fill the list.
+    """
+    query_dt = None
+    if target.isdigit() and len(target) == 14:
+        query_dt = datetime.strptime(target, "%Y%m%d%H%M%S")
+        sig = index.lookup(int(target))
+        if sig is None:
+            raise SystemExit(f"{target} is not in the index — build it first or pass an image file")
+        query_hash, query_colours = sig
+    else:
+        img = cv2.imread(target, cv2.IMREAD_REDUCED_COLOR_8)
+        if img is None:
+            raise SystemExit(f"Could not read image: {target}")
+        query_hash, grid = signature_of(img)
+        query_colours = grid.reshape(-1)
+
+    def exclude(ts):
+        if query_dt is None:
+            return False
+        dt = datetime.strptime(str(ts), "%Y%m%d%H%M%S")
+        return abs((dt - query_dt).total_seconds()) < min_gap_minutes * 60
+
+    return index.nearest(query_hash, query_colours, n=n, exclude=exclude)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="Build or update the index for one or more years")
+    b.add_argument("root", help="Image root containing YYYY/MM/DD directories")
+    b.add_argument("--year", type=int, action="append", required=True, help="Year to index (repeatable)")
+    b.add_argument("--index-dir", default="data", help="Where frames-YYYY.npz files live (default: data)")
+    b.add_argument("--workers", type=int, default=None, help="Parallel workers (default: all CPU cores)")
+
+    q = sub.add_parser("query", help="Find frames similar to a timestamp or image")
+    q.add_argument("target", help="Timestamp YYYYMMDDHHMMSS or path to an image")
+    q.add_argument("--limit", type=int, default=20, help="Number of results")
+    q.add_argument("--min-gap-minutes", type=int, default=60,
+                   help="Skip frames this close in time to a timestamp query (default 60)")
+    q.add_argument("--index-dir", default="data", help="Where frames-YYYY.npz files live (default: data)")
+    q.add_argument("--base-url", default=BASE_URL, help="URL prefix for results")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        for year in args.year:
+            build_index(args.root, year, args.index_dir, args.workers)
+        return
+
+    t0 = time.perf_counter()
+    index = FrameIndex.load(args.index_dir)
+    t1 = time.perf_counter()
+    results = query(index, args.target, n=args.limit, min_gap_minutes=args.min_gap_minutes)
+    t2 = time.perf_counter()
+
+    print(f"\nTop {len(results)} frames like {args.target}:\n")
+    for dist, bits, ts in results:
+        readable = datetime.strptime(str(ts), "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{dist:6.2f}  ({bits:2d} bits)  {readable}")
+        print(f"        {args.base_url}{ts}")
+    print(f"\n{len(index)} frames indexed; loaded in {(t1 - t0) * 1000:.0f} ms, "
+          f"searched in {(t2 - t1) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+frame_stack.py — per-month memory-mapped stacks of reduced frames.
+
+Tuning aurora_score() or the people filters means decoding the same JPEGs
+over and over. This decodes each frame of a month once and stores the
+reduced image in a fixed-size uint8 array (N × H × W × 3, a plain .npy file)
+with a JSON index of timestamps next to it. Experiments then open the
+stack with np.load(mmap_mode="r") and run on it directly; a second run over
+a winter is page-cache reads instead of hours of JPEG decoding.
+
+    python3 frame_stack.py build /Volumes/homes/cl/Lillevik-webcam/2026/01 --camera lillevik
+    python3 frame_stack.py build /Volumes/homes/cl/Lillevik-webcam/2025 --camera lillevik --workers 8
+    python3 frame_stack.py info data/stacks/lillevik
+    python3 frame_stack.py score data/stacks/lillevik --threshold 0.15 --compare data/aurora
+    python3 frame_stack.py bench data/stacks/lillevik/202601-sky-640x312.npy
+
+Stacks go to data/stacks/<camera>/YYYYMM-<kind>-<W>x<H>.npy (+ .json). Frames
+of a different size (the Lillevik camera change in July 2025) get their own
+stack, so every stack has one fixed row shape. Kinds:
+
+    sky     the 640 px sky crop aurora_score_image() works on (1/4-scale
+            decode, top 65%); night frames only unless --all-hours.
+            About 0.6 MB per frame.
+    frame   the whole frame at 960 px (1/2-scale decode), e.g. for
+            background-model experiments. About 1.6 MB per frame.
+
+In Python:
+
+    from frame_stack import open_stack
+    frames, timestamps, meta = open_stack("data/stacks/lillevik/202601-sky-640x312.npy")
+    features, scores = aurora_scores_batch(frames[:64])   # see aurora_scan.FEATURES
+
+A month whose stack already lists the same frames is skipped (--force to
+rebuild). Frames that cannot be decoded stay black and are listed under
+"missing" in the index.
+
+score runs aurora_scan.aurora_scores_batch() over --batch frames at a time;
+bench times it against the per-frame aurora_score_sky() at batch sizes
+1–256 and reports the largest score difference.
+
+Requires: opencv-python, numpy, astral
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from exif_header import read_exif
+from result_store import write_atomic
+from scan_pipeline import _DECODE_FLAGS, frame_paths, load_reference, parse_dt_from_stem, quiet_stderr, timestamp_of
+from sun_calculator import is_aurora_time
+
+KINDS = {
+    "sky": {"scale": 4, "crop": 0.65, "width": 640, "night": True},
+    "frame": {"scale": 2, "crop": 1.0, "width": 960, "night": False},
+}
+
+
+def reduce_frame(img, kind="sky", width=None):
+    """The stack row for a decoded frame: the top crop of it, resized to width."""
+    spec = KINDS[kind]
+    width = width or spec["width"]
+    if kind == "sky":
+        from aurora_scan import sky_crop
+        return sky_crop(img, width)
+    h, w = img.shape[:2]
+    top = img[0:int(h * spec["crop"])]
+    return cv2.resize(top, (width, int(width * top.shape[0] / top.shape[1])), interpolation=cv2.INTER_AREA)
+
+
+def stack_paths(directory, month=None):
+    """The .npy stacks in directory (optionally only one YYYYMM), sorted."""
+    pattern = f"{month}-*.npy" if month else "*.npy"
+    return sorted(p for p in Path(directory).glob(pattern) if not p.name.startswith("."))
+
+
+def open_stack(path):
+    """(frames memmap N×H×W×3, timestamps, index) for a stack file."""
+    path = Path(path)
+    meta = json.loads(path.with_suffix(".json").read_text())
+    return np.load(path, mmap_mode="r"), meta["timestamps"], meta
+
+
+def _decode(path, scale):
+    img = cv2.imread(str(path), _DECODE_FLAGS[scale])
+    if img is None and scale != 1:
+        img = cv2.imread(str(path))
+        if img is not None:
+            h, w = img.shape[:2]
+            img = cv2.resize(img, (max(1, w // scale), max(1, h // scale)), interpolation=cv2.INTER_AREA)
+    return img
+
+
+def _group_by_size(paths):
+    """{(w, h) or None: [paths]} from the JPEG headers; headerless frames join the largest group."""
+    groups = {}
+    for path in paths:
+        info = read_exif(path)
+        size = (info["width"], info["height"]) if info["width"] and info["height"] else None
+        groups.setdefault(size, []).append(path)
+    unsized = groups.pop(None, [])
+    if unsized:
+        if groups:
+            biggest = max(groups, key=lambda k: len(groups[k]))
+            groups[biggest] = sorted(groups[biggest] + unsized, key=lambda p: timestamp_of(p))
+        else:
+            groups[None] = unsized
+    return groups
+
+
+def build_stack(paths, output, kind="sky", width=None, workers=4, camera=None):
+    """
+    Decode paths (in time order) into a new stack at output (…/YYYYMM-kind.npy
+    is renamed to include WxH). Returns the written path, or None if no frame
+    could be decoded.
+    """
+    spec = KINDS[kind]
+    shape = None
+    for path in paths:
+        img = _decode(path, spec["scale"])
+        if img is not None:
+            shape = reduce_frame(img, kind, width).shape
+            break
+    if shape is None:
+        return None
+    h, w = shape[:2]
+    final = output.with_name(f"{output.stem}-{w}x{h}.npy")
+    tmp = final.with_name(f".{final.name}.{os.getpid()}.tmp")
+    frames = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint8, shape=(len(paths), h, w, 3))
+    missing = []
+
+    def fill(i):
+        img = _decode(paths[i], spec["scale"])
+        if img is None:
+            missing.append(timestamp_of(paths[i]))
+            return
+        row = reduce_frame(img, kind, width)
+        if row.shape != shape:
+            row = cv2.resize(row, (w, h), interpolation=cv2.INTER_AREA)
+        frames[i] = row
+
+    try:
+        with quiet_stderr(), ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(fill, range(len(paths))))
+        frames.flush()
+        del frames
+        os.replace(tmp, final)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    write_atomic(final.with_suffix(".json"), json.dumps({
+        "camera": camera,
+        "kind": kind,
+        "month": timestamp_of(paths[0])[:6],
+        "shape": [len(paths), h, w, 3],
+        "timestamps": [timestamp_of(p) for p in paths],
+        "missing": sorted(missing),
+    }, separators=(",", ":")))
+    return final
+
+
+def build(folder, output_dir, kind="sky", width=None, all_hours=False, workers=4, camera=None,
+          catalog=None, force=False):
+    """Build or refresh the stacks of every month under folder. Returns the paths written."""
+    spec = KINDS[kind]
+    months = {}
+    for path in frame_paths(folder, catalog):
+        dt = parse_dt_from_stem(path.stem)
+        if dt is None or (spec["night"] and not all_hours and not is_aurora_time(dt)):
+            continue
+        months.setdefault(dt.strftime("%Y%m"), []).append(path)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for ym in sorted(months):
+        paths = sorted(months[ym], key=timestamp_of)
+        for group in _group_by_size(paths).values():
+            stamps = [timestamp_of(p) for p in group]
+            current = [p for p in stack_paths(output_dir, ym) if f"-{kind}-" in p.name]
+            if not force and any(open_stack(p)[1] == stamps for p in current):
+                print(f"{ym}: {len(group)} frames, up to date")
+                continue
+            start = time.monotonic()
+            stack = build_stack(group, output_dir / f"{ym}-{kind}", kind, width, workers, camera)
+            if stack is None:
+                print(f"{ym}: no decodable frames")
+                continue
+            # A rebuilt month replaces stacks whose frames it now covers
+            for old in current:
+                if old != stack and set(open_stack(old)[1]) <= set(stamps):
+                    old.unlink()
+                    old.with_suffix(".json").unlink(missing_ok=True)
+            size = stack.stat().st_size / 2**30
+            print(f"{ym}: {len(group)} frames → {stack.name} ({size:.2f} GB, {time.monotonic() - start:.0f} s)")
+            written.append(stack)
+    return written
+
+
+def score_stacks(paths, batch=16):
+    """
+    Yield (timestamp, aurora score) for every frame of the sky stacks in
+    paths, except the "missing" ones (left black, so not worth a score).
+    """
+    from aurora_scan import aurora_scores_batch
+    for path in paths:
+        frames, timestamps, meta = open_stack(path)
+        if meta["kind"] != "sky":
+            continue
+        missing = set(meta["missing"])
+        rows = [i for i, ts in enumerate(timestamps) if ts not in missing]
+        for start in range(0, len(rows), batch):
+            chunk = rows[start:start + batch]
+            _, scores = aurora_scores_batch(frames[chunk])
+            yield from zip((timestamps[i] for i in chunk), scores.tolist())
+
+
+def benchmark(frames, batch_sizes=(1, 4, 16, 64, 256)):
+    """
+    [(label, frames/s, largest score difference from aurora_score_sky())] for
+    the per-frame scorer and aurora_scores_batch() at each batch size.
+    """
+    from aurora_scan import aurora_score_sky, aurora_scores_batch
+    frames = np.asarray(frames)
+    start = time.perf_counter()
+    reference = np.array([aurora_score_sky(sky) for sky in frames])
+    rows = [("per frame", len(frames) / (time.perf_counter() - start), 0.0)]
+    for size in batch_sizes:
+        start = time.perf_counter()
+        scores = np.concatenate([aurora_scores_batch(frames[i:i + size])[1] for i in range(0, len(frames), size)])
+        elapsed = time.perf_counter() - start
+        rows.append((f"batch {size}", len(frames) / elapsed, float(np.abs(scores - reference).max())))
+    return rows
+
+
+def _stack_files(targets):
+    files = []
+    for target in targets:
+        target = Path(target)
+        files.extend(stack_paths(target) if target.is_dir() else [target])
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("build", help="Build or refresh the stacks of every month under a folder")
+    b.add_argument("folder", help="Year, month or day folder of one camera")
+    b.add_argument("--camera", default="lillevik", help="Camera name; stacks go to <output>/<camera>/")
+    b.add_argument("--output", default="data/stacks", help="Stack root (default: data/stacks)")
+    b.add_argument("--kind", choices=sorted(KINDS), default="sky", help="What each row holds (default: sky)")
+    b.add_argument("--width", type=int, help="Row width in pixels (default: 640 for sky, 960 for frame)")
+    b.add_argument("--all-hours", action="store_true", help="sky: include frames that are too light for aurora")
+    b.add_argument("--workers", type=int, default=4, help="Decode threads (default: 4)")
+    b.add_argument("--catalog", metavar="DB",
+                   help="Take the file list from an image_catalog.py database instead of walking the folder")
+    b.add_argument("--force", action="store_true", help="Rebuild stacks that are up to date")
+
+    i = sub.add_parser("info", help="List stacks")
+    i.add_argument("targets", nargs="+", help="Stack files or directories")
+
+    s = sub.add_parser("score", help="Run aurora_score_sky() over sky stacks")
+    s.add_argument("targets", nargs="+", help="Stack files or directories")
+    s.add_argument("--threshold", type=float, default=0.15, help="Score to count as aurora (default: 0.15)")
+    s.add_argument("--limit", type=int, default=20, help="Best frames to print (default: 20)")
+    s.add_argument("--compare", metavar="RESULTS",
+                   help="Result store or JSON to compare against (frames above threshold in each)")
+    s.add_argument("--batch", type=int, default=16, help="Frames scored per aurora_scores_batch() call (default: 16)")
+
+    m = sub.add_parser("bench", help="Frames/s of per-frame and batched aurora scoring on one sky stack")
+    m.add_argument("stack", help="Sky stack file")
+    m.add_argument("--frames", type=int, default=512, help="Frames to use from the start of the stack (default: 512)")
+    m.add_argument("--batch-sizes", default="1,4,16,64,256", help="Comma-separated (default: 1,4,16,64,256)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.folder, Path(args.output) / args.camera, args.kind, args.width, args.all_hours,
+              args.workers, args.camera, args.catalog, args.force)
+    elif args.command == "info":
+        for path in _stack_files(args.targets):
+            frames, timestamps, meta = open_stack(path)
+            print(f"{path}  {meta['kind']}  {len(timestamps)} frames  {frames.shape[2]}×{frames.shape[1]}  "
+                  f"{timestamps[0]}–{timestamps[-1]}  {path.stat().st_size / 2**30:.2f} GB"
+                  + (f"  {len(meta['missing'])} missing" if meta["missing"] else ""))
+    elif args.command == "bench":
+        frames = np.asarray(open_stack(args.stack)[0][:args.frames])
+        print(f"{len(frames)} frames of {frames.shape[2]}×{frames.shape[1]}")
+        for label, rate, diff in benchmark(frames, [int(b) for b in args.batch_sizes.split(",")]):
+            print(f"{label:>10}  {rate:7.1f} frames/s  max |Δscore| {diff:.1e}")
+    else:
+        start = time.monotonic()
+        scores = dict(score_stacks(_stack_files(args.targets), args.batch))
+        elapsed = time.monotonic() - start
+        hits = {ts for ts, score in scores.items() if score >= args.threshold}
+        print(f"{len(scores)} frames scored in {elapsed:.1f} s ({len(scores) / max(elapsed, 1e-9):.0f} frames/s), "
+              f"{len(hits)} at or above {args.threshold}")
+        for ts, score in sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:args.limit]:
+            print(f"{score:.4f}  {ts}")
+        if args.compare:
+            reference = load_reference(args.compare) or {}
+            known = {ts for ts, score in reference.items() if ts in scores and score >= args.threshold}
+            print(f"vs {args.compare}: {len(hits & known)} in both, {len(hits - known)} new, "
+                  f"{len(known - hits)} no longer above threshold")
+
+
+if __name__ == "__main__":
+    main()
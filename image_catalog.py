@@ -0,0 +1,382 @@
+"""
+image_catalog.py — SQLite catalog of every archived frame.
+
+The scanners and the util/ maintenance scripts all need the list of frames
+under a camera root. Walking YYYY/MM/DD over SMB costs minutes per tool per
+run. The catalog keeps one row per frame (camera, timestamp, path, size,
+mtime, dimensions, mini present, truncated), so a tool gets its work list
+from one indexed query instead.
+
+Updates are incremental. A day directory is only listed again when its mtime
+or the mtime of its mini/ differs from the last update, or when it holds a
+frame flagged truncated (a finished upload grows the file but leaves the
+directory's mtime alone). Only new or changed files have their header
+read. Dimensions come from the JPEG SOF header (see exif_header.py). A frame
+is flagged truncated when it has no end-of-image marker, which usually means
+the camera was still uploading it.
+
+Keep the database on a local disk; SQLite's WAL mode does not work on
+network filesystems. The default is data/catalog.sqlite.
+
+Usage:
+    # Build once, then re-run (e.g. nightly) to pick up changes
+    python3 image_catalog.py update /Volumes/homes/cl/Lillevik-webcam --camera lillevik
+    python3 image_catalog.py update /Volumes/homes/cl/Viktun-webcam --camera viktun
+
+    python3 image_catalog.py stats
+    python3 image_catalog.py list --camera lillevik --start 20260301 --end 20260401
+
+Then pass --catalog data/catalog.sqlite to aurora_scan.py, people_scan.py,
+scan_pipeline.py, util/regen_minis.py, util/prune_webcam.py and
+util/delete_old_images.py to skip their directory walks.
+
+No dependencies beyond the standard library and exif_header.py.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from exif_header import read_exif
+
+DEFAULT_DB = "data/catalog.sqlite"
+
+_TIMESTAMP_RE = re.compile(r"(\d{14})$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cameras (
+    camera     TEXT PRIMARY KEY,
+    root       TEXT NOT NULL,
+    updated    REAL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    camera     TEXT NOT NULL,
+    dir        TEXT NOT NULL,      -- day directory relative to the root, YYYY/MM/DD
+    mtime      REAL NOT NULL,
+    mini_mtime REAL,
+    PRIMARY KEY (camera, dir)
+);
+CREATE TABLE IF NOT EXISTS frames (
+    camera     TEXT NOT NULL,
+    dir        TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    timestamp  TEXT NOT NULL,      -- YYYYMMDDHHMMSS, '' if the name has none
+    size       INTEGER,
+    mtime      REAL,
+    width      INTEGER,
+    height     INTEGER,
+    has_mini   INTEGER,
+    truncated  INTEGER,
+    PRIMARY KEY (camera, dir, name)
+);
+CREATE INDEX IF NOT EXISTS frames_time ON frames (camera, timestamp);
+"""
+
+Entry = namedtuple("Entry", "camera timestamp path size mtime width height has_mini truncated")
+
+
+def timestamp_from_name(name):
+    """YYYYMMDDHHMMSS from a frame filename (also pre-rename names), or ''."""
+    m = _TIMESTAMP_RE.search(os.path.splitext(name)[0])
+    return m.group(1) if m else ""
+
+
+def is_truncated(path, size):
+    """True if the file has no JPEG end-of-image marker near its end."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, size - 32))
+            return b"\xff\xd9" not in f.read()
+    except OSError:
+        return True
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _day_dirs(root):
+    """Yield (relative, absolute) for every YYYY/MM/DD directory under root."""
+    levels = (r"\d{4}", r"\d{2}", r"\d{2}")
+
+    def walk(path, rel, depth):
+        try:
+            entries = sorted(os.scandir(path), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            if not (re.fullmatch(levels[depth], entry.name) and entry.is_dir()):
+                continue
+            child = f"{rel}/{entry.name}" if rel else entry.name
+            if depth == 2:
+                yield child, entry.path
+            else:
+                yield from walk(entry.path, child, depth + 1)
+
+    yield from walk(root, "", 0)
+
+
+def _list_day(full, known):
+    """
+    Catalog rows for one day directory: (name, timestamp, size, mtime, width,
+    height, has_mini, truncated). Headers are only read for files whose size
+    or mtime differs from `known` ({name: row}).
+    """
+    try:
+        minis = set(os.listdir(os.path.join(full, "mini")))
+    except OSError:
+        minis = set()
+    rows = []
+    try:
+        entries = list(os.scandir(full))
+    except OSError:
+        return rows
+    for entry in entries:
+        if not entry.name.lower().endswith(".jpg") or not entry.is_file():
+            continue
+        st = entry.stat()
+        old = known.get(entry.name)
+        if old is not None and old[0] == st.st_size and old[1] == st.st_mtime:
+            width, height, truncated = old[2], old[3], old[4]
+        else:
+            info = read_exif(entry.path)
+            width, height = info["width"], info["height"]
+            truncated = int(is_truncated(entry.path, st.st_size))
+        rows.append((entry.name, timestamp_from_name(entry.name), st.st_size, st.st_mtime,
+                     width, height, int(entry.name in minis), truncated))
+    return rows
+
+
+class Catalog:
+    """One SQLite catalog file, shared by any number of camera roots."""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ── Updating ──────────────────────────────────────────────────────────────
+
+    def update(self, root, camera=None, workers=8):
+        """
+        Bring the catalog in line with root. Returns (dirs_listed, frames, removed_dirs).
+
+        Only day directories whose mtime (or mini/ mtime) changed since the
+        last update, or with frames flagged truncated, are listed; readers
+        keep working from the previous state until each batch commits.
+        """
+        root = os.path.abspath(root)
+        camera = camera or os.path.basename(root.rstrip(os.sep))
+        db = self.conn
+        db.execute("INSERT INTO cameras (camera, root) VALUES (?, ?) "
+                   "ON CONFLICT (camera) DO UPDATE SET root = excluded.root", (camera, root))
+        known_dirs = {d: (m, mm) for d, m, mm in
+                      db.execute("SELECT dir, mtime, mini_mtime FROM dirs WHERE camera = ?", (camera,))}
+        # A file that grows (an upload finishing) leaves its directory's mtime alone
+        truncated_dirs = {d for d, in db.execute(
+            "SELECT DISTINCT dir FROM frames WHERE camera = ? AND truncated", (camera,))}
+
+        print("Checking day directories...", end="", flush=True)
+        seen = set()
+        changed = []
+        for rel, full in _day_dirs(root):
+            seen.add(rel)
+            # Stat before listing, so a file arriving mid-update changes the
+            # mtime we compare against next time.
+            stamp = (_mtime(full), _mtime(os.path.join(full, "mini")))
+            if known_dirs.get(rel) != stamp or rel in truncated_dirs:
+                changed.append((rel, full, stamp))
+            if len(seen) % 200 == 0:
+                print(f"\rChecking day directories... {len(seen)}", end="", flush=True)
+        removed = sorted(set(known_dirs) - seen)
+        print(f"\rChecked {len(seen)} day directories: {len(changed)} changed, {len(removed)} removed    ")
+
+        with db:
+            for rel in removed:
+                db.execute("DELETE FROM frames WHERE camera = ? AND dir = ?", (camera, rel))
+                db.execute("DELETE FROM dirs WHERE camera = ? AND dir = ?", (camera, rel))
+
+        frames = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            jobs = []
+            for rel, full, stamp in changed:
+                known = {name: (size, mtime, w, h, t) for name, size, mtime, w, h, t in db.execute(
+                    "SELECT name, size, mtime, width, height, truncated FROM frames "
+                    "WHERE camera = ? AND dir = ?", (camera, rel))}
+                jobs.append((rel, stamp, pool.submit(_list_day, full, known)))
+            for i, (rel, stamp, job) in enumerate(jobs, 1):
+                rows = job.result()
+                frames += len(rows)
+                with db:
+                    db.execute("DELETE FROM frames WHERE camera = ? AND dir = ?", (camera, rel))
+                    db.executemany("INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [(camera, rel) + row for row in rows])
+                    db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                               (camera, rel, stamp[0], stamp[1]))
+                if i % 20 == 0 or i == len(jobs):
+                    print(f"\r  {i}/{len(jobs)} directories listed, {frames} frames", end="", flush=True)
+        if jobs:
+            print()
+        with db:
+            db.execute("UPDATE cameras SET updated = ? WHERE camera = ?", (time.time(), camera))
+        return len(changed), frames, len(removed)
+
+    # ── Querying ──────────────────────────────────────────────────────────────
+
+    def roots(self):
+        """{camera: root} for every camera in the catalog."""
+        return dict(self.conn.execute("SELECT camera, root FROM cameras"))
+
+    def _locate(self, folder):
+        """(camera, root, relative dir prefix) for a folder inside a catalogued root, or None."""
+        folder = os.path.abspath(folder)
+        for camera, root in self.roots().items():
+            if folder == root:
+                return camera, root, ""
+            if folder.startswith(root.rstrip(os.sep) + os.sep):
+                return camera, root, os.path.relpath(folder, root).replace(os.sep, "/")
+        return None
+
+    def entries(self, camera=None, start=None, end=None, under=None, include_truncated=True):
+        """
+        Catalogued frames in (camera, timestamp) order.
+
+        start/end are YYYYMMDD[HHMMSS] prefixes; end is exclusive. under
+        restricts to a folder inside a catalogued root (a camera root, or one
+        of its YYYY, YYYY/MM or YYYY/MM/DD directories).
+        """
+        sql = ["SELECT f.camera, f.timestamp, c.root, f.dir, f.name, f.size, f.mtime, f.width, "
+               "f.height, f.has_mini, f.truncated FROM frames f JOIN cameras c USING (camera) WHERE 1"]
+        params = []
+        if under is not None:
+            located = self._locate(under)
+            if located is None:
+                return []
+            camera, _, prefix = located
+            if prefix:
+                sql.append("AND (f.dir = ? OR f.dir LIKE ?)")
+                params += [prefix, prefix + "/%"]
+        if camera is not None:
+            sql.append("AND f.camera = ?")
+            params.append(camera)
+        if start:
+            sql.append("AND f.timestamp >= ?")
+            params.append(start)
+        if end:
+            sql.append("AND f.timestamp < ?")
+            params.append(end)
+        if not include_truncated:
+            sql.append("AND NOT f.truncated")
+        sql.append("ORDER BY f.camera, f.timestamp, f.dir, f.name")
+        return [Entry(cam, ts, Path(root) / d / name, size, mtime, w, h, bool(mini), bool(trunc))
+                for cam, ts, root, d, name, size, mtime, w, h, mini, trunc
+                in self.conn.execute(" ".join(sql), params)]
+
+    def paths_under(self, folder, start=None, end=None):
+        """Frame paths under folder, or None if folder is not in a catalogued root."""
+        if self._locate(folder) is None:
+            return None
+        return [e.path for e in self.entries(start=start, end=end, under=folder)]
+
+    def day_listing(self, root, month_filter=None):
+        """
+        [(day directory, [jpg names])] for a catalogued root, in date order —
+        the same work list the util/ scripts build with os.listdir. None if
+        root is not catalogued. month_filter is "YYYY/MM".
+        """
+        under = os.path.join(root, month_filter) if month_filter else root
+        if self._locate(under) is None:
+            return None
+        days = {}
+        for e in self.entries(under=under):
+            days.setdefault(str(e.path.parent), []).append(e.path.name)
+        return [(d, sorted(names)) for d, names in sorted(days.items())]
+
+    def stats(self):
+        """[(camera, root, frames, truncated, without mini, first, last, updated)]"""
+        return list(self.conn.execute(
+            "SELECT c.camera, c.root, COUNT(f.name), COALESCE(SUM(f.truncated), 0), "
+            "COALESCE(SUM(1 - f.has_mini), 0), MIN(NULLIF(f.timestamp, '')), MAX(f.timestamp), c.updated "
+            "FROM cameras c LEFT JOIN frames f USING (camera) GROUP BY c.camera ORDER BY c.camera"))
+
+
+def open_catalog(db_path):
+    """Catalog at db_path, or exit with a hint if it has not been built yet."""
+    if not Path(db_path).exists():
+        raise SystemExit(f"Catalog not found: {db_path} (build it with: python3 image_catalog.py update ROOT)")
+    return Catalog(db_path)
+
+
+
+def day_listing_or_none(db_path, root, month_filter=None):
+    """
+    Catalog.day_listing of root from the catalog at db_path, for the util/
+    scripts' --catalog option. None, after saying so, if root is not
+    catalogued and the caller should list the directories itself.
+    """
+    listing = open_catalog(db_path).day_listing(root, month_filter)
+    if listing is None:
+        print(f"{root} is not in catalog {db_path} — listing directories instead")
+    return listing
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Catalog database (default: {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    u = sub.add_parser("update", help="Build or incrementally update the catalog for a camera root")
+    u.add_argument("root", help="Image root containing YYYY/MM/DD directories")
+    u.add_argument("--camera", help="Camera name (default: the root directory name)")
+    u.add_argument("--workers", type=int, default=8, help="Parallel directory listings (default: 8)")
+
+    sub.add_parser("stats", help="Frames per camera")
+
+    ls = sub.add_parser("list", help="Print catalogued frame paths")
+    ls.add_argument("--camera", help="Only this camera")
+    ls.add_argument("--start", metavar="YYYYMMDD", help="From this date/time (inclusive)")
+    ls.add_argument("--end", metavar="YYYYMMDD", help="Up to this date/time (exclusive)")
+    ls.add_argument("--skip-truncated", action="store_true", help="Leave out truncated frames")
+
+    args = parser.parse_args()
+
+    if args.command == "update":
+        t0 = time.perf_counter()
+        catalog = Catalog(args.db)
+        dirs, frames, removed = catalog.update(args.root, camera=args.camera, workers=args.workers)
+        print(f"Catalog {args.db} updated in {time.perf_counter() - t0:.1f}s "
+              f"({dirs} directories re-listed, {frames} frames in them, {removed} directories removed)")
+        return
+
+    catalog = open_catalog(args.db)
+    if args.command == "stats":
+        for camera, root, frames, truncated, no_mini, first, last, updated in catalog.stats():
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(updated)) if updated else "never"
+            print(f"{camera}: {frames} frames ({truncated} truncated, {no_mini} without mini) "
+                  f"{first or '-'} – {last or '-'}  root {root}  updated {when}")
+        return
+
+    t0 = time.perf_counter()
+    entries = catalog.entries(camera=args.camera, start=args.start, end=args.end,
+                              include_truncated=not args.skip_truncated)
+    for e in entries:
+        print(e.path)
+    print(f"{len(entries)} frames in {(time.perf_counter() - t0) * 1000:.0f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
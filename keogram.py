@@ -0,0 +1,216 @@
+"""
+keogram.py — one keogram per night from the archived frames.
+
+A keogram stacks one north–south slice of the sky per frame, left to right
+in time, so a whole night of aurora fits in a single strip. Each night
+(noon to noon, like aurora_events.py) is built by one worker. It reads its
+frames in time order, each once, with a reduced DCT decode (--scale), and
+copies one column into a preallocated image. Memory per worker is one
+decoded frame plus the keogram.
+
+Output:
+    <output>/YYYY/YYYYMMDD.png    one per night, named after the evening it starts
+    <output>/index-YYYY.json      {"20260115": {"png": "2026/20260115.png", "frames": 96,
+                                                "start": ..., "end": ..., "slot": 10}, ...}
+
+The x axis is time, one column per --slot minutes from the night's first
+to its last frame. Missing frames stay black. A night runs into the next
+month (or year), so for a day, month or year folder the day before and the
+day after it are read too, and only nights whose evening and morning both
+lie in the days read are built: the last night of a month is built whole
+whichever of the two month folders is scanned. Nights whose index entry
+already has the same frame count are skipped, so the nightly run only
+builds the new night:
+
+    # Nightly (cron): last night's month; finished nights are skipped
+    python3 keogram.py /path/to/images/2026/03
+
+    # Backfill a year, 4 nights at a time
+    python3 keogram.py /path/to/images/2025 --workers 4
+
+Requires: opencv-python, numpy, astral
+"""
+
+import argparse
+import json
+import multiprocessing
+import re
+from datetime import date, timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from aurora_events import night_of
+from result_store import locked, write_atomic
+from scan_pipeline import Frame, frame_paths, parse_dt_from_stem, quiet_stderr, timestamp_of
+from sun_calculator import is_aurora_time
+
+
+def _folder_days(folder):
+    """
+    (root, first day, last day) for a YYYY, YYYY/MM or YYYY/MM/DD folder under
+    root, or None for any other folder.
+    """
+    parts = Path(folder).resolve().parts
+    for depth, widths in ((3, (4, 2, 2)), (2, (4, 2)), (1, (4,))):
+        tail = parts[-depth:]
+        if len(parts) > depth and all(re.fullmatch(rf"\d{{{n}}}", p) for p, n in zip(tail, widths)):
+            numbers = [int(p) for p in tail]
+            try:
+                first = date(numbers[0], *(numbers[1:] + [1] * (3 - depth)))
+            except ValueError:
+                return None
+            if depth == 3:
+                last = first
+            elif depth == 2:
+                last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            else:
+                last = first.replace(month=12, day=31)
+            return Path(*parts[:-depth]), first, last
+    return None
+
+
+def collect_nights(folder, all_hours=False, catalog=None):
+    """
+    {night YYYYMMDD: [(datetime, path), ...] in time order} for frames under
+    folder. For a date folder the day before and after it are read as well,
+    and only nights lying wholly inside the days read are returned.
+    """
+    folders = [folder]
+    span = _folder_days(folder)
+    if span:
+        root, first, last = span
+        first, last = first - timedelta(days=1), last + timedelta(days=1)
+        folders += [root / f"{d:%Y/%m/%d}" for d in (first, last) if (root / f"{d:%Y/%m/%d}").is_dir()]
+    nights = {}
+    for f in folders:
+        for path in frame_paths(f, catalog):
+            dt = parse_dt_from_stem(path.stem)
+            if dt is None or not (all_hours or is_aurora_time(dt)):
+                continue
+            nights.setdefault(night_of(timestamp_of(path)).replace("-", ""), []).append((dt, path))
+    if span:
+        # Night N runs from noon on N to noon on N+1: both days must have been read
+        complete = {f"{first + timedelta(days=i):%Y%m%d}" for i in range((last - first).days)}
+        nights = {n: frames for n, frames in nights.items() if n in complete}
+    for frames in nights.values():
+        frames.sort()
+    return nights
+
+
+def build_keogram(frames, column=0.5, sky=(0.0, 0.6), scale=4, slot=10, width=2):
+    """
+    Keogram (BGR uint8) for one night's [(datetime, path)] in time order, or
+    None if no frame could be read. Each --slot minutes gets `width` pixels.
+    """
+    start = frames[0][0]
+    slots = int((frames[-1][0] - start) / timedelta(minutes=slot)) + 1
+    keogram = None
+    for dt, path in frames:
+        try:
+            raw = Path(path).read_bytes()
+        except OSError:
+            continue
+        img = Frame(path, raw, scale).view(scale)
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        strip = img[int(h * sky[0]):max(int(h * sky[0]) + 1, int(h * sky[1])),
+                    min(w - 1, int(w * column))]
+        if keogram is None:
+            keogram = np.zeros((len(strip), slots * width, 3), np.uint8)
+        elif len(strip) != keogram.shape[0]:
+            # Camera changed resolution mid-night
+            strip = cv2.resize(strip[:, None], (1, keogram.shape[0]), interpolation=cv2.INTER_AREA)[:, 0]
+        # Floor, as for slots: rounding could put the last frame past the end
+        x = int((dt - start) / timedelta(minutes=slot)) * width
+        keogram[:, x:x + width] = strip[:, None]
+    return keogram
+
+
+def _build_night(task):
+    night, frames, out_png, options = task
+    with quiet_stderr():
+        keogram = build_keogram(frames, **options)
+    if keogram is None:
+        return night, None
+    out_png.parent.mkdir(parents=True, exist_ok=True)
+    ok, buf = cv2.imencode(".png", keogram)
+    tmp = out_png.with_name(f".{out_png.name}.tmp")
+    tmp.write_bytes(buf.tobytes())
+    tmp.replace(out_png)
+    return night, {
+        "png": f"{night[:4]}/{night}.png",
+        "frames": len(frames),
+        "start": frames[0][1].stem[-14:],
+        "end": frames[-1][1].stem[-14:],
+        "slot": options["slot"],
+    }
+
+
+def load_index(output, year):
+    try:
+        return json.loads((Path(output) / f"index-{year}.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index_entries(output, entries):
+    """Merge {night: entry} into the per-year index files."""
+    for year in sorted({night[:4] for night in entries}):
+        path = Path(output) / f"index-{year}.json"
+        with locked(path):
+            index = load_index(output, year)
+            index.update({n: e for n, e in entries.items() if n.startswith(year)})
+            write_atomic(path, json.dumps(dict(sorted(index.items())), indent=1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="Folder to scan (year, month, or day directory)")
+    parser.add_argument("--output", default="data/keograms", help="Output directory (default: data/keograms)")
+    parser.add_argument("--column", type=float, default=0.5,
+                        help="Horizontal position of the slice as a fraction of the width (default: 0.5)")
+    parser.add_argument("--sky", default="0.0,0.6", metavar="TOP,BOTTOM",
+                        help="Vertical extent of the slice as fractions of the height (default: 0.0,0.6)")
+    parser.add_argument("--scale", type=int, choices=(1, 2, 4, 8), default=4,
+                        help="DCT decode scale (default: 4)")
+    parser.add_argument("--slot", type=int, default=10, help="Minutes per keogram column (default: 10)")
+    parser.add_argument("--width", type=int, default=2, help="Pixels per column (default: 2)")
+    parser.add_argument("--all-hours", action="store_true",
+                        help="Include daylight frames (default: only frames dark enough for aurora)")
+    parser.add_argument("--force", action="store_true", help="Rebuild nights that are already in the index")
+    parser.add_argument("--workers", type=int, default=None, help="Nights built in parallel (default: all CPU cores)")
+    parser.add_argument("--catalog", metavar="DB",
+                        help="Take the file list from an image_catalog.py database instead of walking the folder")
+    args = parser.parse_args()
+
+    top, bottom = (float(v) for v in args.sky.split(","))
+    options = {"column": args.column, "sky": (top, bottom), "scale": args.scale,
+               "slot": args.slot, "width": args.width}
+
+    nights = collect_nights(args.folder, args.all_hours, args.catalog)
+    indexes = {}
+    tasks = []
+    for night, frames in sorted(nights.items()):
+        index = indexes.setdefault(night[:4], load_index(args.output, night[:4]))
+        out_png = Path(args.output) / night[:4] / f"{night}.png"
+        if not args.force and index.get(night, {}).get("frames") == len(frames) and out_png.exists():
+            continue
+        tasks.append((night, frames, out_png, options))
+    print(f"{len(nights)} nights found, {len(tasks)} to build")
+
+    built = {}
+    with multiprocessing.Pool(processes=args.workers) as pool:
+        for night, entry in pool.imap_unordered(_build_night, tasks):
+            if entry is not None:
+                built[night] = entry
+                print(f"  {night}: {entry['frames']} frames")
+    if built:
+        save_index_entries(args.output, built)
+    print(f"{len(built)} keogram(s) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
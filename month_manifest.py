@@ -0,0 +1,198 @@
+"""
+month_manifest.py — per-month manifests, so webcam.php doesn't glob the archive.
+
+The year and all-years pages show one image per day: the first image taken
+in the configured hour. Finding it meant globbing every day directory,
+thousands of globs per page view. This writes one small JSON file per month,
+manifests/YYYYMM.json in the webcam root, and ImageFileManager.php reads
+that instead:
+
+    {"month": "202603", "days": {"15": {
+        "count": 144, "first": "20260315000019", "last": "20260315235019",
+        "hours": ["20260315000019", ..., "20260315230019"],
+        "no_mini": [],
+        "dawn": "04:41", "dusk": "20:02", "midnight_sun": false, "polar_night": false,
+        "mtime": [1742079019.0, 1742079020.0]}}}
+
+hours[h] is the image the pages show for hour h. It is the first image taken
+in that hour, or the image closest to h:00 if that hour has none. This is the
+same rule as ImageFileManager::findFirstImageAfterTime(). no_mini lists the
+hour images that have no mini/ thumbnail. dawn and dusk are the display
+window from sun_calculator.py.
+
+Updates are incremental. A day is rebuilt only when the mtime of its
+directory or of its mini/ changed. A manifest is rewritten only when a day
+changed, and always atomically (temp file + fsync + rename), so a page
+never reads half a file.
+
+Usage:
+    # After each ingest cycle (see cron/rename_and_make_mini_images.sh)
+    python3 month_manifest.py /home/1/l/lilleviklofoten/www/webcam --month 2026/03
+
+    # Everything (first run, and after pruning old images)
+    python3 month_manifest.py /home/1/l/lilleviklofoten/www/webcam
+
+Requires: astral  (pip install astral)
+"""
+
+import argparse
+import json
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from image_catalog import _mtime
+from result_store import write_atomic
+from sun_calculator import find_sun_times
+
+MANIFEST_DIR = "manifests"
+
+_FRAME_RE = re.compile(r"^(\d{14})\.jpg$", re.IGNORECASE)
+
+
+def manifest_path(root, year, month):
+    return Path(root) / MANIFEST_DIR / f"{year}{month}.json"
+
+
+def hour_images(timestamps):
+    """
+    The image shown for each whole hour of one day (24 entries, '' for an
+    empty day). timestamps must be sorted.
+    """
+    hours = []
+    for h in range(24):
+        prefix = f"{h:02d}"
+        in_hour = [ts for ts in timestamps if ts[8:10] == prefix]
+        if in_hour:
+            hours.append(in_hour[0])
+            continue
+        # No image in the hour: the closest one, earliest on a tie
+        best, best_diff = "", None
+        for ts in timestamps:
+            diff = abs(int(ts[8:10]) * 60 + int(ts[10:12]) - h * 60)
+            if best_diff is None or diff < best_diff:
+                best, best_diff = ts, diff
+        hours.append(best)
+    return hours
+
+
+def day_entry(day_dir, day, stamp):
+    """Manifest entry for one day directory, or None if it has no images."""
+    try:
+        names = os.listdir(day_dir)
+    except OSError:
+        return None
+    timestamps = sorted(m.group(1) for m in map(_FRAME_RE.match, names) if m)
+    if not timestamps:
+        return None
+    try:
+        minis = set(os.listdir(os.path.join(day_dir, "mini")))
+    except OSError:
+        minis = set()
+    hours = hour_images(timestamps)
+    dawn, dusk, midnight_sun, polar_night = find_sun_times(day)
+    return {
+        "count": len(timestamps),
+        "first": timestamps[0],
+        "last": timestamps[-1],
+        "hours": hours,
+        "no_mini": sorted({ts for ts in hours if f"{ts}.jpg" not in minis}),
+        "dawn": dawn.strftime("%H:%M"),
+        "dusk": dusk.strftime("%H:%M"),
+        "midnight_sun": midnight_sun,
+        "polar_night": polar_night,
+        "mtime": list(stamp),
+    }
+
+
+def load_manifest(path):
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and isinstance(data.get("days"), dict) else None
+
+
+def update_month(root, year, month):
+    """Bring manifests/YYYYMM.json up to date. Returns the number of days rebuilt, or None if unchanged."""
+    month_dir = Path(root) / year / month
+    out = manifest_path(root, year, month)
+    old = load_manifest(out) or {"days": {}}
+    days = {}
+    rebuilt = 0
+    if month_dir.is_dir():
+        for dd in sorted(os.listdir(month_dir)):
+            day_dir = month_dir / dd
+            if not (re.fullmatch(r"\d{2}", dd) and day_dir.is_dir()):
+                continue
+            # Stat before listing: a frame arriving mid-update changes the
+            # mtime we compare against next time.
+            stamp = [_mtime(day_dir), _mtime(day_dir / "mini")]
+            previous = old["days"].get(dd)
+            if previous is not None and previous.get("mtime") == stamp:
+                days[dd] = previous
+                continue
+            try:
+                day = date(int(year), int(month), int(dd))
+            except ValueError:
+                continue
+            entry = day_entry(day_dir, day, stamp)
+            rebuilt += 1
+            if entry is not None:
+                days[dd] = entry
+
+    if rebuilt == 0 and days.keys() == old["days"].keys():
+        return None
+    if not days:
+        if out.exists():
+            out.unlink()
+        return rebuilt
+    out.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(out, json.dumps({"month": f"{year}{month}", "days": days}, separators=(",", ":")))
+    return rebuilt
+
+
+def months_under(root):
+    """Every (YYYY, MM) directory under root, plus months that only have a stale manifest."""
+    found = set()
+    for yy in sorted(os.listdir(root)):
+        if not (re.fullmatch(r"\d{4}", yy) and os.path.isdir(os.path.join(root, yy))):
+            continue
+        for mm in sorted(os.listdir(os.path.join(root, yy))):
+            if re.fullmatch(r"\d{2}", mm) and os.path.isdir(os.path.join(root, yy, mm)):
+                found.add((yy, mm))
+    manifest_dir = Path(root) / MANIFEST_DIR
+    if manifest_dir.is_dir():
+        for p in manifest_dir.glob("[0-9][0-9][0-9][0-9][0-9][0-9].json"):
+            found.add((p.stem[:4], p.stem[4:]))
+    return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="Webcam root containing YYYY/MM/DD directories")
+    parser.add_argument("--month", metavar="YYYY/MM", action="append",
+                        help="Only update this month (repeatable; default: every month)")
+    args = parser.parse_args()
+
+    if args.month:
+        months = []
+        for m in args.month:
+            if not re.fullmatch(r"\d{4}/\d{2}", m):
+                raise SystemExit(f"--month must be YYYY/MM, got {m}")
+            months.append(tuple(m.split("/")))
+    else:
+        months = months_under(args.root)
+
+    written = 0
+    for year, month in months:
+        rebuilt = update_month(args.root, year, month)
+        if rebuilt is not None:
+            written += 1
+            print(f"{year}/{month}: {rebuilt} day(s) rebuilt")
+    print(f"{written} of {len(months)} manifest(s) updated in {Path(args.root) / MANIFEST_DIR}")
+
+
+if __name__ == "__main__":
+    main()
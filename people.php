@@ -5,9 +5,10 @@
  * Shows webcam images identified as likely containing people,
  * organised by month with the same navigation style as webcam.php.
  *
- * Reads people-YYYY.json generated by people_scan.py:
+ * Reads the data/people/ result store written by people_scan.py (falls back
+ * to people-YYYY.json when there is no store):
  *   python3 people_scan.py /path/to/images/2026 --day --threshold 0.3 \
- *     --json-output /path/to/webcam/data/people-2026.json
+ *     --store /path/to/webcam/data/people
  */
 
 require_once __DIR__ . '/WebcamConfig.php';
@@ -66,22 +67,68 @@ function load_cached_json_rows($glob_pattern, $cache_key, $ttl_seconds = 900)
     return $rows;
 }
 
+/**
+ * Month navigation data from a result_store.py directory
+ *
+ * @param string $store_dir e.g. data/aurora
+ * @return array|null Summary months keyed by YYYYMM, or null if there is no store
+ */
+function load_result_summary($store_dir)
+{
+    $summary = json_decode(@file_get_contents("$store_dir/summary.json"), true);
+    if (!is_array($summary) || !isset($summary['months']) || !is_array($summary['months'])) {
+        return null;
+    }
+    return $summary['months'];
+}
+
+/**
+ * Rows for one month from a result_store.py segment (later lines win)
+ *
+ * @param string $store_dir
+ * @param string $ym YYYYMM
+ * @return array Rows sorted by timestamp
+ */
+function load_result_month($store_dir, $ym)
+{
+    $rows = [];
+    $lines = @file("$store_dir/$ym.jsonl", FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES) ?: [];
+    foreach ($lines as $line) {
+        $row = json_decode($line, true);
+        $ts = $row['timestamp'] ?? '';
+        if (!preg_match('/^\d{14}$/', $ts)) continue; // torn or malformed line
+        $rows[$ts] = $row;
+    }
+    ksort($rows);
+    return array_values($rows);
+}
+
 // ============================================================
 // Load people data
 // ============================================================
 
-$all_images = load_cached_json_rows(PEOPLE_DATA_DIR . '/people-*.json', 'webcam_people_data_cache', 900);
+// Prefer the result store (summary + the viewed month's segment, see
+// result_store.py); fall back to the legacy per-year JSON files.
+$_store_dir = PEOPLE_DATA_DIR . '/people';
+$_store_months = load_result_summary($_store_dir);
 
-// Build sorted list of YYYYMM strings that have people images.
-$months_with_images = [];
-foreach ($all_images as $img) {
-    $ts = $img['timestamp'] ?? '';
-    if (!preg_match('/^\d{14}$/', $ts)) continue; // skip malformed timestamps
-    $ym = substr($ts, 0, 6);
-    $months_with_images[$ym] = true;
+if ($_store_months !== null) {
+    $months_list = array_keys($_store_months);
+    sort($months_list); // ascending
+} else {
+    $all_images = load_cached_json_rows(PEOPLE_DATA_DIR . '/people-*.json', 'webcam_people_data_cache', 900);
+
+    // Build sorted list of YYYYMM strings that have people images.
+    $months_with_images = [];
+    foreach ($all_images as $img) {
+        $ts = $img['timestamp'] ?? '';
+        if (!preg_match('/^\d{14}$/', $ts)) continue; // skip malformed timestamps
+        $ym = substr($ts, 0, 6);
+        $months_with_images[$ym] = true;
+    }
+    ksort($months_with_images);
+    $months_list = array_keys($months_with_images); // ascending
 }
-ksort($months_with_images);
-$months_list = array_keys($months_with_images); // ascending
 
 // ============================================================
 // Determine which month to show
@@ -136,10 +183,14 @@ foreach ($months_list as $ym) {
 // Filter images for current month, sorted chronologically
 // ============================================================
 
-$month_images = array_values(array_filter($all_images, function ($img) use ($current_ym) {
-    return substr($img['timestamp'], 0, 6) === $current_ym;
-}));
-usort($month_images, fn($a, $b) => strcmp($a['timestamp'], $b['timestamp']));
+if ($_store_months !== null) {
+    $month_images = load_result_month($_store_dir, $current_ym);
+} else {
+    $month_images = array_values(array_filter($all_images, function ($img) use ($current_ym) {
+        return substr($img['timestamp'], 0, 6) === $current_ym;
+    }));
+    usort($month_images, fn($a, $b) => strcmp($a['timestamp'], $b['timestamp']));
+}
 
 $_preload_image = '';
 if (!empty($month_images)) {
@@ -174,7 +225,9 @@ $script_url = '//' . $_SERVER['SERVER_NAME'] . $_SERVER['SCRIPT_NAME'];
 
 // Always revalidate — people data is updated by daily cron.
 // Last-Modified enables 304 responses so repeat visits cost zero bytes when unchanged.
-$_people_json_files = glob(PEOPLE_DATA_DIR . '/people-*.json') ?: [];
+$_people_json_files = $_store_months !== null
+    ? ["$_store_dir/summary.json"]
+    : (glob(PEOPLE_DATA_DIR . '/people-*.json') ?: []);
 $_people_last_mod = 0;
 foreach ($_people_json_files as $_f) {
     $_mtime = @filemtime($_f);
@@ -1,7 +1,9 @@
 """
 people_scan.py — scan webcam images for people, animals, and vehicles using YOLOv8.
 
-Mirrors aurora_scan.py: same CLI, same JSON merge/replace behaviour.
+Mirrors aurora_scan.py: same CLI, same JSON merge/replace behaviour, and the
+same scan engine (scan_pipeline.py) — run that directly to do aurora and
+people in one pass over the archive.
 Score = highest detection confidence in the frame (0–1).
 
 Two complementary false-positive reduction techniques are available:
@@ -28,6 +30,13 @@ Two complementary false-positive reduction techniques are available:
                    from the background (i.e. something has changed).
                    Build once with --build-background, reuse thereafter.
 
+  --adaptive-background
+                   No separate build pass: each day is scanned as one
+                   chronological shard and the background is a running
+                   median, seeded from its first --bg-window frames.
+                   Compare against a static-median run with
+                   util/compare_results.py.
+
 Usage:
     # 1. Build background model once (uses all JPEGs in the folder tree)
     python3 people_scan.py /path/to/images/2026 \\
@@ -40,14 +49,11 @@ Usage:
         --exclude-zone 0.0,0.60,0.45,0.68 \\
         --exclude-zone 0.52,0.70,0.61,0.81 \\
         --exclude-zone 0.40,0.88,0.46,0.99 \\
-        --json-output data/people-2026.json
+        --store data/people
 
 Dependencies: ultralytics, astral  (pip install ultralytics astral)
 """
 
-import json
-import multiprocessing
-import os
 import random
 from datetime import datetime
 from pathlib import Path
@@ -56,10 +62,21 @@ from zoneinfo import ZoneInfo
 import cv2
 import numpy as np
 
+from camera_profiles import add_profile_arguments, month_folders
+from exif_header import read_exif
+from frame_cache import add_cache_arguments, cache_from_args
+from frame_hash import near_duplicate, signature_of
+from run_metrics import add_metrics_arguments, metrics_from_args
+from scan_pipeline import (Analyzer, MonthSink, add_budget_arguments, budget_from_args, load_reference,
+                           parse_dt_from_stem, print_top, report_recall, run_pipeline, scan_from_args,
+                           timestamp_of, workers_arg)
+from scan_shards import add_shard_arguments
+from stage_profile import add_stage_profile_arguments, stage, stage_profile_from_args
 from sun_calculator import find_sun_times
 from ultralytics import YOLO
 
 BASE_URL = "https://lilleviklofoten.no/webcam/?type=one&image="
+REPORT_TITLE = "likely frames with people"
 _TZ = ZoneInfo("Europe/Oslo")
 
 # COCO classes to detect (people, common vehicles, animals).
@@ -82,13 +99,6 @@ _DETECT_CLASSES = {
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-def parse_dt_from_stem(stem: str):
-    try:
-        return datetime.strptime(stem, "%Y%m%d%H%M%S")
-    except Exception:
-        return None
-
-
 def is_daytime(dt: datetime, depression: float = 12) -> bool:
     """Return True if dt falls between dawn and dusk (handles midnight sun and polar night)."""
     dawn, dusk, _ms, _pn = find_sun_times(dt.date(), depression=depression)
@@ -99,7 +109,7 @@ def is_daytime(dt: datetime, depression: float = 12) -> bool:
 # ── Per-worker state ───────────────────────────────────────────────────────────
 # NOTE: multiprocessing on macOS uses "spawn", so module-level globals in the
 # main process are NOT inherited by workers.  All per-worker state is set via
-# _worker_init(), which is called once per worker at Pool creation time.
+# _worker_init(), which PeopleAnalyzer.start() calls once per worker process.
 
 _worker_model = None
 _background = None          # BGR uint8 ndarray, or None
@@ -107,6 +117,7 @@ _exclude_zones = []         # [(x1, y1, x2, y2), ...] as image fractions 0–1
 _bg_diff_threshold = 25     # pixel intensity diff to mark a pixel as "changed"
 _fg_overlap_min = 0.15      # min fraction of bbox in foreground to accept a detection
 _crop_top = 0.0             # fraction of image height to crop from the top before inference
+_bank = {}                  # camera profile background path → BGR image (or None), see _bank_background()
 
 
 def _remap_zones(zones, crop_top):
@@ -126,7 +137,7 @@ def _remap_zones(zones, crop_top):
 
 
 def _worker_init(background_path, exclude_zones, fg_overlap_min, bg_diff_threshold, crop_top=0.0):
-    """Called once per worker process at Pool creation. Sets all per-worker globals."""
+    """Called once per worker process (PeopleAnalyzer.start()). Sets all per-worker globals."""
     global _background, _exclude_zones, _fg_overlap_min, _bg_diff_threshold, _crop_top
     _crop_top = crop_top
     _exclude_zones = _remap_zones(exclude_zones, crop_top)
@@ -138,6 +149,16 @@ def _worker_init(background_path, exclude_zones, fg_overlap_min, bg_diff_thresho
             _background = bg
 
 
+def _bank_background(path):
+    """A background from a camera profile's bank, loaded once per worker (None if missing)."""
+    key = str(path)
+    if key not in _bank:
+        if len(_bank) >= 8:
+            _bank.clear()   # a month at a time per camera era, so a few are plenty
+        _bank[key] = cv2.imread(key)
+    return _bank[key]
+
+
 def _get_model():
     global _worker_model
     if _worker_model is None:
@@ -147,39 +168,59 @@ def _get_model():
 
 # ── Scoring ────────────────────────────────────────────────────────────────────
 
-def _in_excluded_zone(cx: float, cy: float) -> bool:
-    for x1, y1, x2, y2 in _exclude_zones:
+def _in_excluded_zone(cx: float, cy: float, zones=None) -> bool:
+    for x1, y1, x2, y2 in _exclude_zones if zones is None else zones:
         if x1 <= cx <= x2 and y1 <= cy <= y2:
             return True
     return False
 
 
-def people_score(image_path) -> float:
-    """Return highest detection confidence (people/animals/vehicles) not filtered by exclusion rules, or 0.0."""
-    model = _get_model()
-    raw = Path(image_path).read_bytes()
+def _crop(img):
+    """Apply the worker's --crop-top (a view, no copy)."""
+    if _crop_top > 0.0:
+        img = img[int(img.shape[0] * _crop_top):, :]
+    return img
+
+
+def _decode_cropped(raw: bytes):
+    """Decode JPEG bytes and apply the worker's --crop-top. Returns None if undecodable."""
     img = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
     if img is None:
-        return 0.0
+        return None
+    return _crop(img)
+
+
+def _foreground_mask(img, bg):
+    """Binary mask of pixels that differ significantly from the background."""
     h, w = img.shape[:2]
+    if bg.shape[:2] != (h, w):
+        bg = cv2.resize(bg, (w, h))
+    diff = cv2.absdiff(img, bg)
+    gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
+    _, fg_mask = cv2.threshold(gray, _bg_diff_threshold, 255, cv2.THRESH_BINARY)
+    # Dilate so the full silhouette of a person is covered, not just edges.
+    return cv2.dilate(fg_mask, np.ones((20, 20), np.uint8))
 
-    if _crop_top > 0.0:
-        img = img[int(h * _crop_top):, :]
-        h = img.shape[0]
 
-    # Build foreground mask: pixels that differ significantly from the background.
-    fg_mask = None
-    if _background is not None:
-        bg = _background
-        if bg.shape[:2] != (h, w):
-            bg = cv2.resize(bg, (w, h))
-        diff = cv2.absdiff(img, bg)
-        gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
-        _, fg_mask = cv2.threshold(gray, _bg_diff_threshold, 255, cv2.THRESH_BINARY)
-        # Dilate so the full silhouette of a person is covered, not just edges.
-        fg_mask = cv2.dilate(fg_mask, np.ones((20, 20), np.uint8))
+def people_score(image_path) -> float:
+    """Return highest detection confidence (people/animals/vehicles) not filtered by exclusion rules, or 0.0."""
+    img = _decode_cropped(Path(image_path).read_bytes())
+    if img is None:
+        return 0.0
+    fg_mask = _foreground_mask(img, _background) if _background is not None else None
+    return _best_detection(img, fg_mask)
 
-    results = model(img, verbose=False, device="cpu", imgsz=1280)
+
+def _best_detection(img, fg_mask, zones=None) -> float:
+    """
+    Run YOLO on an already-cropped image and apply the zone/background filters.
+    zones: cropped-coordinate exclusion zones instead of the worker's --exclude-zone.
+    """
+    zones = _exclude_zones if zones is None else zones
+    model = _get_model()
+    h, w = img.shape[:2]
+    with stage("people.yolo"):
+        results = model(img, verbose=False, device="cpu", imgsz=1280)
     best = 0.0
     for box in results[0].boxes:
         if int(box.cls) not in _DETECT_CLASSES:
@@ -189,7 +230,7 @@ def people_score(image_path) -> float:
         cx, cy = (x1 + x2) / 2 / w, (y1 + y2) / 2 / h
 
         # Exclusion zones: drop detections centred in known-static regions.
-        if _exclude_zones and _in_excluded_zone(cx, cy):
+        if zones and _in_excluded_zone(cx, cy, zones):
             continue
 
         # Background subtraction: drop detections that match the static background.
@@ -208,20 +249,297 @@ def people_score(image_path) -> float:
     return best
 
 
-def _score_worker(path):
-    """Top-level function required for multiprocessing pickling."""
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    old_stderr = os.dup(2)
-    os.dup2(devnull, 2)
-    try:
-        score = people_score(path)
-    except Exception:
-        score = 0.0
-    finally:
-        os.dup2(old_stderr, 2)
-        os.close(old_stderr)
-        os.close(devnull)
-    return (score, path)
+# ── Adaptive background ────────────────────────────────────────────────────────
+
+class AdaptiveBackground:
+    """
+    Running background for one chronological shard of frames.
+
+    Frames are kept at reduced resolution (at most max_long_edge on the long
+    side, same as build_background). The first `window` frames are seeded
+    into a per-pixel median, computed once; after that each frame moves every
+    pixel of the background at most `step` levels towards itself. This
+    approximate running median follows snow, grass and light through the
+    day for a few integer operations per pixel, and a person walking through
+    shifts it by only `step` per frame.
+    """
+
+    def __init__(self, window=15, max_long_edge=960, step=4):
+        self.window = window
+        self.max_long_edge = max_long_edge
+        self.step = step
+        self.frames = []            # seed frames; None once the median is seeded
+        self._target_size = None
+        self._median = None
+
+    def _small(self, img):
+        if self._target_size is None:
+            h, w = img.shape[:2]
+            scale = min(1.0, self.max_long_edge / max(h, w))
+            self._target_size = (int(w * scale), int(h * scale))
+        return cv2.resize(img, self._target_size, interpolation=cv2.INTER_AREA)
+
+    def push(self, img):
+        small = self._small(img)
+        if self.frames is not None and len(self.frames) < self.window:
+            self.frames.append(small)
+            self._median = None
+            return
+        background = self.background().astype(np.int16)
+        self.frames = None
+        delta = np.clip(small.astype(np.int16) - background, -self.step, self.step)
+        self._median = (background + delta).astype(np.uint8)
+
+    def background(self):
+        if self._median is None and self.frames:
+            self._median = np.median(np.stack(self.frames, axis=0), axis=0).astype(np.uint8)
+        return self._median
+
+
+# ── Analyzer ───────────────────────────────────────────────────────────────────
+
+class PeopleAnalyzer(Analyzer):
+    """
+    People/animal/vehicle detection for scan_pipeline.run_pipeline().
+
+    With adaptive_background each day is one chronological sequence and the
+    background is a running window, warmed with the first bg_window frames of
+    the day.  With dedupe_distance a frame whose signature is close to the
+    last fully scored frame reuses that score without running YOLO.
+
+    profiles: optional camera_profiles.CameraProfiles. Each frame then uses
+    the exclusion zones of its camera's era and, unless adaptive, that era's
+    background for the month from the camera's bank (see ensure_backgrounds()),
+    instead of exclude_zones and background_path.
+    """
+
+    name = "people"
+    scale = 1
+
+    def __init__(self, threshold=0.0, day_only=False, civil_day=False, exclude_zones=None,
+                 background_path=None, fg_overlap=0.15, bg_diff_threshold=25, crop_top=0.0,
+                 adaptive_background=False, bg_window=15, max_exposure=None,
+                 dedupe_distance=None, dedupe_hash_size=16, profiles=None):
+        self.threshold = threshold
+        self.day_only = day_only
+        self.civil_day = civil_day
+        self.exclude_zones = exclude_zones or []
+        self.background_path = background_path
+        self.fg_overlap = fg_overlap
+        self.bg_diff_threshold = bg_diff_threshold
+        self.crop_top = crop_top
+        self.adaptive_background = adaptive_background
+        self.bg_window = bg_window
+        self.max_exposure = max_exposure
+        self.dedupe_distance = dedupe_distance
+        self.dedupe_hash_size = dedupe_hash_size    # finer than aurora, subjects are small
+        self.profiles = profiles
+        self.stateful = adaptive_background or dedupe_distance is not None
+        self.warmup = bg_window if adaptive_background else 0
+        self._model_bg = None
+        self._warmed = set()
+        self._last = (None, None)
+
+    def wants(self, dt):
+        if not (self.day_only or self.civil_day) or dt is None:
+            return True
+        return is_daytime(dt, depression=6 if self.civil_day else 12)
+
+    def priority(self, dt):
+        # Daylight: the hours around solar noon (about 12:05 CET / 13:05 CEST here)
+        if dt is None:
+            return 0.0
+        return max(0.0, 1.0 - abs(dt.hour + dt.minute / 60 - 12.5) / 12)
+
+    def start(self):
+        _worker_init(self.background_path, self.exclude_zones, self.fg_overlap,
+                     self.bg_diff_threshold, self.crop_top)
+
+    def begin_sequence(self):
+        self._model_bg = AdaptiveBackground(window=self.bg_window) if self.adaptive_background else None
+        self._warmed = set()
+        self._last = (None, None)
+
+    def warm(self, frame):
+        img = frame.view(1)
+        if img is not None:
+            self._model_bg.push(_crop(img))
+            self._warmed.add(frame.path)
+
+    def prefilter(self, path):
+        if self.max_exposure is not None:
+            # Long exposure = night mode; nothing for YOLO to find.
+            exposure = read_exif(path)["exposure_time"]
+            if exposure is not None and exposure > self.max_exposure:
+                return (0.0, "exif")
+        return None
+
+    def analyze(self, frame):
+        sig = None
+        if self.dedupe_distance is not None:
+            with stage("people.dedupe"):
+                small = frame.view(8)
+                sig = signature_of(_crop(small), self.dedupe_hash_size) if small is not None else None
+            last_sig, last_score = self._last
+            if near_duplicate(sig, last_sig, self.dedupe_distance):
+                return (last_score, "dedupe")
+        img = frame.view(1)
+        if img is None:
+            return (0.0, None)
+        img = _crop(img)
+        bg = self._model_bg.background() if self._model_bg is not None else _background
+        zones = None
+        if self.profiles is not None:
+            camera, era = self.profiles.era_of(frame.path)
+            zones = _remap_zones(era.exclude_zones, _crop_top)
+            if self._model_bg is None:
+                bg = _bank_background(camera.background_path(era, timestamp_of(frame.path)[:6]))
+        with stage("people.fgmask"):
+            fg_mask = _foreground_mask(img, bg) if bg is not None else None
+        score = _best_detection(img, fg_mask, zones)
+        if self._model_bg is not None and frame.path not in self._warmed:
+            self._model_bg.push(img)
+        self._last = (sig, score)
+        return (score, None)
+
+
+def parse_exclude_zones(zone_strs):
+    """Parse repeated x1,y1,x2,y2 strings; exits with a message on a bad zone."""
+    exclude_zones = []
+    for zone_str in (zone_strs or []):
+        try:
+            parts = [float(v) for v in zone_str.split(",")]
+            if len(parts) != 4:
+                raise ValueError
+            exclude_zones.append(tuple(parts))
+        except ValueError:
+            print(f"Invalid --exclude-zone '{zone_str}': expected x1,y1,x2,y2 as fractions 0–1")
+            raise SystemExit(1)
+    return exclude_zones
+
+
+def resolve_background(background, folder, bg_samples=300, cache=None):
+    """Return the background path to use, building and saving it from folder if missing."""
+    if not background:
+        return None
+    bg_file = Path(background)
+    if not bg_file.exists():
+        print(f"Background file not found — building from {folder} ...")
+        all_paths = [p for p in Path(folder).rglob("*.jpg") if "mini" not in str(p)]
+        bg = build_background(all_paths, n_samples=bg_samples, cache=cache)
+        if bg is not None:
+            cv2.imwrite(background, bg)
+            print(f"Background saved to {background}")
+    return background if bg_file.exists() else None
+
+
+def ensure_backgrounds(profiles, folders, bg_samples=300, cache=None):
+    """
+    Build the missing backgrounds in each camera's bank for the months under
+    folders ([(camera, folder)], see CameraProfiles.folders), before a
+    --profiles scan. A month shared by two eras gets one background per era,
+    each sampled from that era's frames only.
+    """
+    for camera, folder in folders:
+        for ym, month_dir in month_folders(folder):
+            eras = camera.eras_in_month(ym)
+            for era in eras:
+                bg_file = camera.background_path(era, ym)
+                if bg_file.exists():
+                    continue
+                paths = [p for p in month_dir.rglob("*.jpg") if "mini" not in str(p)]
+                if len(eras) > 1:
+                    paths = [p for p in paths if camera.era_for(parse_dt_from_stem(p.stem)) is era]
+                print(f"{camera.name}: {bg_file} not found — building from {month_dir} ...")
+                bg = build_background(paths, n_samples=bg_samples, cache=cache) if paths else None
+                if bg is not None:
+                    bg_file.parent.mkdir(parents=True, exist_ok=True)
+                    cv2.imwrite(str(bg_file), bg)
+                    print(f"Background saved to {bg_file}")
+
+
+def add_analyzer_arguments(parser, prefix=""):
+    """People scoring options; scan_pipeline.py adds them with prefix "people-"."""
+    parser.add_argument(f"--{prefix}threshold", type=float, default=0.0,
+                        help="Minimum detection confidence to include (0–1, default 0)")
+    parser.add_argument(f"--{prefix}day", action="store_true",
+                        help="Only scan images taken during daylight (nautical twilight, 12° depression)")
+    parser.add_argument(f"--{prefix}civil-day", action="store_true",
+                        help="Like --day but uses civil twilight (6° depression) — fewer low-light false positives")
+
+    # False-positive suppression
+    parser.add_argument(f"--{prefix}exclude-zone", metavar="x1,y1,x2,y2", action="append",
+                        help="Ignore detections whose centre falls in this zone (fractions 0–1). "
+                             "Repeatable. Recommended: "
+                             "new cam: '0.0,0.0,1.0,0.60' + '0.0,0.60,0.45,0.68' (sky/water), "
+                             "old cam: '0.0,0.0,1.0,0.68' (sky/water), "
+                             "'0.52,0.70,0.61,0.81' (boathouse), "
+                             "'0.40,0.88,0.46,0.99' (poles)")
+    parser.add_argument(f"--{prefix}background", metavar="FILE",
+                        help="Background model PNG. If FILE does not exist it is built automatically "
+                             "from --bg-samples frames and saved.")
+    parser.add_argument(f"--{prefix}bg-samples", type=int, default=300,
+                        help="Frames to sample when building the background (default 300)")
+    parser.add_argument(f"--{prefix}bg-diff", type=int, default=25,
+                        help="Pixel intensity diff to consider a region changed from background (default 25)")
+    parser.add_argument(f"--{prefix}fg-overlap", type=float, default=0.15,
+                        help="Min fraction of a detection box that must be in foreground (default 0.15)")
+    parser.add_argument(f"--{prefix}adaptive-background", action="store_true",
+                        help="Instead of a static --background, process each day as a chronological shard "
+                             "and keep a running median seeded from its first --bg-window frames. No separate "
+                             "build pass.")
+    parser.add_argument(f"--{prefix}bg-window", type=int, default=15,
+                        help="Frames seeding the adaptive background (default 15)")
+
+    parser.add_argument(f"--{prefix}crop-top", type=float, default=0.0, metavar="FRAC",
+                        help="Crop this fraction from the top of each image before inference "
+                             "(e.g. 0.67 removes sky/sea/mountains). Exclusion zones are "
+                             "remapped automatically to cropped coordinates.")
+    parser.add_argument(f"--{prefix}exif-max-exposure", type=float, metavar="SECONDS", default=None,
+                        help="Skip frames whose EXIF exposure time is longer than this (night-mode frames), "
+                             "read from the file header without decoding; e.g. 0.033")
+    parser.add_argument(f"--{prefix}dedupe-distance", type=int, metavar="BITS", default=None,
+                        help="Scan each day in time order and reuse the previous score for frames whose "
+                             "dHash differs by at most BITS; off by default. Small subjects barely move "
+                             "the hash — check the reported losses against --reference first.")
+    parser.add_argument(f"--{prefix}dedupe-hash-size", type=int, default=16,
+                        help="dHash grid size; the hash has size² bits")
+
+
+def analyzer_from_args(args, prefix="", folder=None, profiles=None):
+    def get(name):
+        return getattr(args, (prefix + name).replace("-", "_"))
+    if get("adaptive-background") and get("background"):
+        print("--adaptive-background and --background are mutually exclusive")
+        raise SystemExit(1)
+    if profiles is not None:
+        if get("exclude-zone") or get("background"):
+            print(f"--{prefix}exclude-zone and --{prefix}background are ignored with --profiles: "
+                  "each camera's eras have their own zones and backgrounds")
+        if not get("adaptive-background"):
+            ensure_backgrounds(profiles, profiles.folders(folder), get("bg-samples"), cache_from_args(args))
+        return PeopleAnalyzer(
+            threshold=get("threshold"), day_only=get("day"), civil_day=get("civil-day"),
+            fg_overlap=get("fg-overlap"), bg_diff_threshold=get("bg-diff"), crop_top=get("crop-top"),
+            adaptive_background=get("adaptive-background"), bg_window=get("bg-window"),
+            max_exposure=get("exif-max-exposure"), dedupe_distance=get("dedupe-distance"),
+            dedupe_hash_size=get("dedupe-hash-size"), profiles=profiles,
+        )
+    return PeopleAnalyzer(
+        threshold=get("threshold"),
+        day_only=get("day"),
+        civil_day=get("civil-day"),
+        exclude_zones=parse_exclude_zones(get("exclude-zone")),
+        background_path=resolve_background(get("background"), folder, get("bg-samples"), cache_from_args(args)),
+        fg_overlap=get("fg-overlap"),
+        bg_diff_threshold=get("bg-diff"),
+        crop_top=get("crop-top"),
+        adaptive_background=get("adaptive-background"),
+        bg_window=get("bg-window"),
+        max_exposure=get("exif-max-exposure"),
+        dedupe_distance=get("dedupe-distance"),
+        dedupe_hash_size=get("dedupe-hash-size"),
+    )
 
 
 # ── Diagnostic visualiser ─────────────────────────────────────────────────────
@@ -340,7 +658,7 @@ def annotate_image(image_path, output_path, exclude_zones=None,
 
 # ── Background model ───────────────────────────────────────────────────────────
 
-def build_background(paths, n_samples=300, max_long_edge=960):
+def build_background(paths, n_samples=300, max_long_edge=960, cache=None):
     """
     Compute a median background image from a random sample of frames.
 
@@ -352,6 +670,9 @@ def build_background(paths, n_samples=300, max_long_edge=960):
     Because people appear in only a tiny fraction of frames, the per-pixel
     median of a large sample is an excellent approximation of the empty scene
     under varying lighting conditions.
+
+    cache: optional frame_cache.FrameCache, so the scan that usually follows
+    reads the sampled frames from local disk.
     """
     sample = random.sample(list(paths), min(n_samples, len(paths)))
     print(f"Building background from {len(sample)} frames...", flush=True)
@@ -360,7 +681,7 @@ def build_background(paths, n_samples=300, max_long_edge=960):
     frames = []
     for i, path in enumerate(sample):
         try:
-            raw = Path(path).read_bytes()
+            raw = cache.read(path) if cache else Path(path).read_bytes()
             img = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
             if img is None:
                 continue
@@ -389,88 +710,54 @@ def build_background(paths, n_samples=300, max_long_edge=960):
 def scan_folder(folder, threshold=0.0, limit=50, day_only=False, civil_day=False,
                 exclude_zones=None, background_path=None,
                 fg_overlap=0.15, bg_diff_threshold=25, workers=None,
-                date_before=None, date_after=None, crop_top=0.0):
-    if not Path(folder).is_dir():
-        print(f"Error: folder not found: {folder}")
-        return [], set()
-
-    print("Collecting file list...", end="", flush=True)
-    paths = []
-    all_months = set()  # every month present in the folder, regardless of time filter
-    skipped_time = 0
-    skipped_date = 0
-    for path in Path(folder).rglob("*.jpg"):
-        if "mini" in str(path):
-            continue
-        stem = path.stem
-        dt = parse_dt_from_stem(stem)
-        date_str = stem[:8]
-        if date_before and date_str >= date_before:
-            skipped_date += 1
-            continue
-        if date_after and date_str < date_after:
-            skipped_date += 1
-            continue
-        if dt:
-            all_months.add(dt.strftime("%Y%m"))
-        if (day_only or civil_day) and dt:
-            depression = 6 if civil_day else 12
-            if not is_daytime(dt, depression=depression):
-                skipped_time += 1
-                continue
-        paths.append(path)
-        if len(paths) % 500 == 0:
-            print(f"\rCollecting file list... {len(paths)} found", end="", flush=True)
-
-    total = len(paths)
-    date_note = f", {skipped_date} by date filter" if skipped_date else ""
-    print(f"\rFound {total} images to scan ({skipped_time} skipped by time filter{date_note})    ")
-
+                date_before=None, date_after=None, crop_top=0.0,
+                adaptive_background=False, bg_window=15, max_exposure=None,
+                dedupe_distance=None, dedupe_hash_size=16, reference=None, catalog=None, sink=None,
+                budget=None, cache=None, profile=None, metrics=None):
+    """
+    Detect people in every frame under folder and print the top `limit`.
+
+    Returns (results, all_months, interrupted). With sink (a MonthSink)
+    results are written month by month as the scan goes and only the top
+    `limit` are returned, so the results don't grow with the archive.
+    budget: optional ScanBudget to time-box the scan (scan_pipeline.py);
+    interrupted is then also True when it runs out.
+    cache: optional frame_cache.FrameCache to read frames through.
+    profile: optional stage_profile.StageProfile (--profile).
+    metrics: optional run_metrics.RunMetrics (--metrics).
+    """
+    analyzer = PeopleAnalyzer(threshold, day_only, civil_day, exclude_zones, background_path,
+                              fg_overlap, bg_diff_threshold, crop_top, adaptive_background,
+                              bg_window, max_exposure, dedupe_distance, dedupe_hash_size)
     if exclude_zones:
         print(f"Exclusion zones ({len(exclude_zones)}): {exclude_zones}")
     if background_path:
         print(f"Background model: {background_path}")
+    if adaptive_background:
+        print(f"Adaptive background: one chronological shard per day, window {bg_window} frames")
 
-    results = []
-    scanned = 0
-    tick = 0
-    spinner = ["-", "\\", "|", "/"]
-    interrupted = False
-
-    num_workers = workers if workers is not None else multiprocessing.cpu_count()
-    try:
-        with multiprocessing.Pool(
-            processes=num_workers,
-            initializer=_worker_init,
-            initargs=(background_path, exclude_zones or [], fg_overlap, bg_diff_threshold, crop_top),
-        ) as pool:
-            for score, path in pool.imap_unordered(_score_worker, paths, chunksize=1):
-                scanned += 1
-                tick += 1
-                if score >= threshold:
-                    results.append((score, path))
-                print(
-                    f"\r  {spinner[tick % 4]} {scanned}/{total} scanned, "
-                    f"{len(results)} above threshold",
-                    end="", flush=True,
-                )
-    except KeyboardInterrupt:
-        interrupted = True
-        print(f"\n\nInterrupted after {scanned}/{total} images.")
-
-    print()
-    results.sort(reverse=True)
-
-    print(f"\nTop {limit} likely frames with people:\n")
-    for score, path in results[:limit]:
-        timestamp = path.stem
-        url = BASE_URL + timestamp
-        dt = parse_dt_from_stem(timestamp)
-        readable = dt.strftime("%Y-%m-%d %H:%M:%S") if dt else timestamp
-        print(f"{score:.4f}  {readable}")
-        print(f"        {url}")
-
-    print(f"\nScanned {scanned} images, kept {len(results)} above threshold {threshold}")
+    runs, all_months, interrupted = run_pipeline(
+        folder, [analyzer], workers=workers, date_before=date_before, date_after=date_after,
+        catalog=catalog, sinks={analyzer.name: sink} if sink else None, top_k=limit,
+        recall=reference is not None, budget=budget, cache=cache, profile=profile, metrics=metrics,
+    )
+    run = runs[analyzer.name]
+    top = run.top.best() if run.top else []
+    results = run.results if sink is None else top
+    print_top(top, limit, REPORT_TITLE, BASE_URL)
+
+    scanned = run.scanned
+    print(f"\nScanned {scanned} images, kept {run.kept} above threshold {threshold}")
+    if max_exposure is not None:
+        print(f"EXIF prefilter: {run.skipped['exif']} frames longer than {max_exposure}s exposure skipped")
+    if dedupe_distance is not None:
+        print(f"Dedupe (dHash {dedupe_hash_size}×{dedupe_hash_size}, distance ≤ {dedupe_distance}): "
+              f"{run.skipped['dedupe']} of {scanned} frames reused the previous score")
+        if reference:
+            # A person entering an otherwise unchanged scene barely moves the
+            # signature, so check this before trusting a distance.
+            deduped = {p: s for p, s in run.short_circuited.items() if s is not None}
+            report_recall("Dedupe", run.paths, deduped, reference, threshold)
     return results, all_months, interrupted
 
 
@@ -479,41 +766,25 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Scan webcam images for people using YOLOv8.")
     parser.add_argument("folder", help="Folder to scan (or sample from, with --build-background)")
-    parser.add_argument("--threshold", type=float, default=0.0,
-                        help="Minimum detection confidence to include (0–1, default 0)")
     parser.add_argument("--limit", type=int, default=50,
                         help="Cap the stdout report at N results (does not affect JSON output)")
-    parser.add_argument("--day", action="store_true",
-                        help="Only scan images taken during daylight (nautical twilight, 12° depression)")
-    parser.add_argument("--civil-day", action="store_true",
-                        help="Like --day but uses civil twilight (6° depression) — fewer low-light false positives")
-    parser.add_argument("--workers", type=int, default=None,
-                        help="Number of parallel workers (default: all CPU cores; try 1–2 for network drives)")
-
-    # False-positive suppression
-    parser.add_argument("--exclude-zone", metavar="x1,y1,x2,y2", action="append",
-                        help="Ignore detections whose centre falls in this zone (fractions 0–1). "
-                             "Repeatable. Recommended: "
-                             "new cam: '0.0,0.0,1.0,0.60' + '0.0,0.60,0.45,0.68' (sky/water), "
-                             "old cam: '0.0,0.0,1.0,0.68' (sky/water), "
-                             "'0.52,0.70,0.61,0.81' (boathouse), "
-                             "'0.40,0.88,0.46,0.99' (poles)")
-    parser.add_argument("--background", metavar="FILE",
-                        help="Background model PNG. If FILE does not exist it is built automatically "
-                             "from --bg-samples frames and saved.")
+    parser.add_argument("--workers", type=workers_arg, default=None,
+                        help="Number of parallel workers, or auto to adjust workers and read-ahead while "
+                             "scanning (default: all CPU cores)")
+    parser.add_argument("--catalog", metavar="DB",
+                        help="Take the file list from an image_catalog.py database instead of walking the folder")
+    add_analyzer_arguments(parser)
+    add_profile_arguments(parser)
+    add_shard_arguments(parser)
+    add_budget_arguments(parser)
+    add_cache_arguments(parser)
+    add_stage_profile_arguments(parser)
+    add_metrics_arguments(parser)
     parser.add_argument("--build-background", metavar="FILE",
                         help="Build background model from a sample of images, save to FILE, then exit.")
-    parser.add_argument("--bg-samples", type=int, default=300,
-                        help="Frames to sample when building the background (default 300)")
-    parser.add_argument("--bg-diff", type=int, default=25,
-                        help="Pixel intensity diff to consider a region changed from background (default 25)")
-    parser.add_argument("--fg-overlap", type=float, default=0.15,
-                        help="Min fraction of a detection box that must be in foreground (default 0.15)")
-
-    parser.add_argument("--crop-top", type=float, default=0.0, metavar="FRAC",
-                        help="Crop this fraction from the top of each image before inference "
-                             "(e.g. 0.67 removes sky/sea/mountains). Exclusion zones are "
-                             "remapped automatically to cropped coordinates.")
+    parser.add_argument("--reference", metavar="FILE",
+                        help="Earlier results to check dedupe losses against "
+                             "(default: the store or JSON output file, if it exists)")
     parser.add_argument("--before", metavar="YYYYMMDD",
                         help="Only scan images before this date (exclusive upper bound)")
     parser.add_argument("--after", metavar="YYYYMMDD",
@@ -524,22 +795,14 @@ if __name__ == "__main__":
                              "save to OUTPUT, then exit. Respects --exclude-zone and --background.")
     parser.add_argument("--json-output", metavar="FILE",
                         help="Write results as JSON to FILE (sorted by timestamp, all results above threshold)")
+    parser.add_argument("--store", metavar="DIR",
+                        help="Write results to a result store directory, e.g. data/people (see result_store.py)")
     parser.add_argument("--append", action="store_true",
                         help="Upsert entries by timestamp instead of replacing the whole scanned month")
 
     args = parser.parse_args()
 
-    # Parse exclusion zones
-    exclude_zones = []
-    for zone_str in (args.exclude_zone or []):
-        try:
-            parts = [float(v) for v in zone_str.split(",")]
-            if len(parts) != 4:
-                raise ValueError
-            exclude_zones.append(tuple(parts))
-        except ValueError:
-            print(f"Invalid --exclude-zone '{zone_str}': expected x1,y1,x2,y2 as fractions 0–1")
-            raise SystemExit(1)
+    exclude_zones = parse_exclude_zones(args.exclude_zone)
 
     # ── Annotate mode (diagnostic) ────────────────────────────────────────────
     if args.annotate:
@@ -555,68 +818,69 @@ if __name__ == "__main__":
     if args.build_background:
         all_paths = [p for p in Path(args.folder).rglob("*.jpg") if "mini" not in str(p)]
         print(f"Found {len(all_paths)} images in {args.folder}")
-        bg = build_background(all_paths, n_samples=args.bg_samples)
+        bg = build_background(all_paths, n_samples=args.bg_samples, cache=cache_from_args(args))
         if bg is not None:
             cv2.imwrite(args.build_background, bg)
             print(f"Background saved to {args.build_background}")
         raise SystemExit(0)
 
-    # ── Auto-build background if --background file is missing ─────────────────
-    background_path = None
-    if args.background:
-        bg_file = Path(args.background)
-        if not bg_file.exists():
-            print(f"Background file not found — building from {args.folder} ...")
-            all_paths = [p for p in Path(args.folder).rglob("*.jpg") if "mini" not in str(p)]
-            bg = build_background(all_paths, n_samples=args.bg_samples)
-            if bg is not None:
-                cv2.imwrite(args.background, bg)
-                print(f"Background saved to {args.background}")
-        if bg_file.exists():
-            background_path = args.background
+    # ── Every camera in one pass, or one host's share of a sharded scan ─────────
+    if args.profiles or args.shard_dir:
+        # The module by its import name, not __main__, so workers unpickle people_scan's analyzer
+        import people_scan
+        with metrics_from_args(args, "people_scan") as metrics:
+            scan_from_args(args, {"people": people_scan}, prefixed=False, metrics=metrics)
+        raise SystemExit(0)
 
-    # ── Scan ──────────────────────────────────────────────────────────────────
-    results, scanned_months, interrupted = scan_folder(
-        args.folder,
-        threshold=args.threshold,
-        limit=args.limit,
-        day_only=args.day,
-        civil_day=args.civil_day,
-        exclude_zones=exclude_zones,
-        background_path=background_path,
-        fg_overlap=args.fg_overlap,
-        bg_diff_threshold=args.bg_diff,
-        workers=args.workers,
-        date_before=args.before,
-        date_after=args.after,
-        crop_top=args.crop_top,
-    )
+    # Auto-builds the background if the --background file is missing
+    analyzer = analyzer_from_args(args, folder=args.folder)
 
-    if interrupted:
-        print("\nJSON not written — scan was interrupted.")
-        raise SystemExit(1)
+    reference = None
+    if args.dedupe_distance is not None:
+        reference = load_reference(args.reference or args.store or args.json_output)
+
+    sink = None
+    if args.store or args.json_output:
+        sink = MonthSink(store=args.store, json_output=args.json_output, append=args.append)
 
-    if args.json_output:
-        new_data = sorted(
-            [{"timestamp": path.stem, "score": round(score, 4)} for score, path in results],
-            key=lambda x: x["timestamp"]
+    budget = budget_from_args(args, args.store or args.json_output)
+
+    # ── Scan ──────────────────────────────────────────────────────────────────
+    with metrics_from_args(args, "people_scan") as metrics:
+        results, scanned_months, interrupted = scan_folder(
+            args.folder,
+            threshold=analyzer.threshold,
+            limit=args.limit,
+            day_only=analyzer.day_only,
+            civil_day=analyzer.civil_day,
+            exclude_zones=analyzer.exclude_zones,
+            background_path=analyzer.background_path,
+            fg_overlap=analyzer.fg_overlap,
+            bg_diff_threshold=analyzer.bg_diff_threshold,
+            workers=args.workers,
+            date_before=args.before,
+            date_after=args.after,
+            crop_top=analyzer.crop_top,
+            adaptive_background=analyzer.adaptive_background,
+            bg_window=analyzer.bg_window,
+            max_exposure=analyzer.max_exposure,
+            dedupe_distance=analyzer.dedupe_distance,
+            dedupe_hash_size=analyzer.dedupe_hash_size,
+            reference=reference,
+            catalog=args.catalog,
+            sink=sink,
+            budget=budget,
+            cache=cache_from_args(args),
+            profile=stage_profile_from_args(args),
+            metrics=metrics,
         )
-        output_path = Path(args.json_output)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        if output_path.exists():
-            existing = json.loads(output_path.read_text())
-            if args.append:
-                by_ts = {x["timestamp"]: x for x in existing}
-                for item in new_data:
-                    by_ts[item["timestamp"]] = item
-                merged = sorted(by_ts.values(), key=lambda x: x["timestamp"])
-                output_path.write_text(json.dumps(merged, indent=2))
-                print(f"\nJSON updated in {args.json_output} ({len(merged)} total entries, {len(new_data)} new/updated)")
-            else:
-                kept = [x for x in existing if x["timestamp"][:6] not in scanned_months]
-                merged = sorted(kept + new_data, key=lambda x: x["timestamp"])
-                output_path.write_text(json.dumps(merged, indent=2))
-                print(f"\nJSON merged into {args.json_output} ({len(merged)} total entries, {len(new_data)} from this scan)")
-        else:
-            output_path.write_text(json.dumps(new_data, indent=2))
-            print(f"\nJSON written to {args.json_output} ({len(new_data)} entries)")
+
+        if budget is not None and budget.expired:
+            raise SystemExit(0)
+        if interrupted:
+            print("\nScan was interrupted — only completed months were written.")
+            raise SystemExit(1)
+
+        if sink is not None:
+            # Months with no results left to write (replace mode clears them)
+            sink.close(scanned_months)
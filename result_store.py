@@ -0,0 +1,289 @@
+"""
+result_store.py — per-month result segments plus a small summary.
+
+The scanners used to merge every scan into data/<kind>-YYYY.json and
+rewrite the whole year with json.dumps(indent=2). aurora.php and people.php
+then decoded every year's file on every cache miss. The store keeps one
+directory per kind instead:
+
+    data/aurora/
+        summary.json      {"months": {"202603": {"count": 41, "max": 0.93,
+                                                 "top": [{"timestamp": ..., "score": ...}, ...],
+                                                 "days": {"15": [12, 0.93], ...}}, ...}}
+        202603.jsonl      one {"timestamp": ..., "score": ...} per line, append-only
+        ...
+
+Replace mode (the scanners' default) rewrites only the segments of the
+scanned months. Append mode (--append) adds lines to a segment, and the last
+line for a timestamp wins. A segment is compacted (deduplicated and sorted)
+once it holds twice as many lines as entries. The pages load summary.json
+for month navigation and then the one segment being viewed.
+
+Writers take an advisory lock (locked()) and replace files atomically
+(write_atomic()), so month scans can run in parallel and a crash never
+leaves a half-written file. scan_pipeline.write_results() uses the same two
+helpers for the legacy JSON.
+
+The legacy per-year JSON can still be produced, and old files imported:
+
+    python3 result_store.py export data/aurora --output-dir data      # data/aurora-YYYY.json
+    python3 result_store.py import data/aurora data/aurora-*.json
+    python3 result_store.py compact data/aurora
+    python3 result_store.py summary data/aurora
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+SUMMARY = "summary.json"
+TOP_N = 10
+
+_SEGMENT_RE = re.compile(r"^(\d{6})\.jsonl$")
+_TIMESTAMP_RE = re.compile(r"^\d{14}$")
+
+
+@contextmanager
+def locked(path):
+    """
+    Hold an exclusive advisory lock on <path>.lock for a read-merge-write.
+
+    Every writer of a results file or store takes this lock, so parallel
+    month scans re-read the latest contents and merge into them instead of
+    overwriting each other. Readers (the PHP pages) don't lock; they rely on
+    write_atomic().
+    """
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _trim_torn_line(path):
+    """Cut a segment back to its last complete line, so an append doesn't join a torn one."""
+    try:
+        with open(path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            f.truncate(f.read().rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+def write_atomic(path, text):
+    """Replace path with text so readers see the old or the new file, never a partial one."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _jsonl(entries):
+    return "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries)
+
+
+def month_summary(entries):
+    """Summary entry for one month of sorted {"timestamp", "score"} entries."""
+    days = {}
+    for e in entries:
+        count, best = days.get(e["timestamp"][6:8], (0, None))
+        days[e["timestamp"][6:8]] = (count + 1, e["score"] if best is None else max(best, e["score"]))
+    top = sorted(entries, key=lambda e: (-e["score"], e["timestamp"]))[:TOP_N]
+    return {
+        "count": len(entries),
+        "max": top[0]["score"],
+        "top": top,
+        "days": {dd: list(v) for dd, v in sorted(days.items())},
+    }
+
+
+class ResultStore:
+    """Results for one kind (aurora, people) in a directory of month segments."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _segment(self, ym):
+        return self.directory / f"{ym}.jsonl"
+
+    def months(self):
+        """Months that have a segment, ascending."""
+        if not self.directory.is_dir():
+            return []
+        return sorted(m.group(1) for m in map(_SEGMENT_RE.match, os.listdir(self.directory)) if m)
+
+    def _read_lines(self, ym):
+        """(entries by timestamp, last line wins; number of lines) for one segment."""
+        by_ts = {}
+        lines = 0
+        try:
+            f = open(self._segment(ym))
+        except FileNotFoundError:
+            return by_ts, 0
+        with f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue  # a torn last line from an interrupted append
+                lines += 1
+                if _TIMESTAMP_RE.match(str(e.get("timestamp", ""))):
+                    by_ts[e["timestamp"]] = e
+        return by_ts, lines
+
+    def month(self, ym):
+        """Entries for one month, sorted by timestamp."""
+        by_ts, _ = self._read_lines(ym)
+        return [by_ts[ts] for ts in sorted(by_ts)]
+
+    def entries(self, year=None):
+        """Every entry (or one year's), sorted by timestamp."""
+        out = []
+        for ym in self.months():
+            if year is None or ym.startswith(str(year)):
+                out.extend(self.month(ym))
+        return out
+
+    def load_summary(self):
+        try:
+            data = json.loads((self.directory / SUMMARY).read_text())
+        except (OSError, ValueError):
+            return {"months": {}}
+        return data if isinstance(data.get("months"), dict) else {"months": {}}
+
+    def _save_summary(self, summary):
+        summary["months"] = dict(sorted(summary["months"].items()))
+        write_atomic(self.directory / SUMMARY, json.dumps(summary, separators=(",", ":")))
+
+    def _rewrite(self, ym, entries):
+        """Write one month's sorted entries as a fresh segment (or remove it when empty)."""
+        if entries:
+            write_atomic(self._segment(ym), _jsonl(entries))
+        elif self._segment(ym).exists():
+            self._segment(ym).unlink()
+
+    def write(self, new_entries, scanned_months, append=False):
+        """
+        Store {"timestamp", "score"} entries.
+
+        Replace mode drops every existing entry in scanned_months first, as
+        write_results() does for the JSON files. Append mode upserts by
+        timestamp and leaves everything else alone. Only the touched
+        segments and the summary are written. Returns {month: entry count}.
+        """
+        with locked(self.directory):
+            self.directory.mkdir(parents=True, exist_ok=True)
+            by_month = {}
+            for e in new_entries:
+                by_month.setdefault(e["timestamp"][:6], []).append(e)
+            touched = set(by_month) if append else set(by_month) | set(scanned_months)
+
+            summary = self.load_summary()
+            counts = {}
+            for ym in sorted(touched):
+                fresh = sorted(by_month.get(ym, []), key=lambda e: e["timestamp"])
+                if append:
+                    by_ts, lines = self._read_lines(ym)
+                    by_ts.update((e["timestamp"], e) for e in fresh)
+                    merged = [by_ts[ts] for ts in sorted(by_ts)]
+                    if lines + len(fresh) > 2 * len(merged):
+                        self._rewrite(ym, merged)
+                    else:
+                        _trim_torn_line(self._segment(ym))
+                        with open(self._segment(ym), "a") as f:
+                            f.write(_jsonl(fresh))
+                            f.flush()
+                            os.fsync(f.fileno())
+                else:
+                    merged = fresh
+                    self._rewrite(ym, merged)
+                counts[ym] = len(merged)
+                if merged:
+                    summary["months"][ym] = month_summary(merged)
+                else:
+                    summary["months"].pop(ym, None)
+            self._save_summary(summary)
+            return counts
+
+    def compact(self):
+        """Rewrite every segment deduplicated and sorted, and rebuild the summary."""
+        summary = {"months": {}}
+        with locked(self.directory):
+            for ym in self.months():
+                entries = self.month(ym)
+                self._rewrite(ym, entries)
+                if entries:
+                    summary["months"][ym] = month_summary(entries)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._save_summary(summary)
+        return len(summary["months"])
+
+    def export_json(self, output_dir, kind):
+        """Write <output_dir>/<kind>-YYYY.json in the legacy format. Returns the paths written."""
+        written = []
+        for year in sorted({ym[:4] for ym in self.months()}):
+            path = Path(output_dir) / f"{kind}-{year}.json"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with locked(path):
+                write_atomic(path, json.dumps(self.entries(year), indent=2))
+            written.append(path)
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="Write legacy <kind>-YYYY.json files from a store")
+    p.add_argument("store", help="Store directory, e.g. data/aurora")
+    p.add_argument("--output-dir", default="data", help="Where to write the JSON files (default: data)")
+    p.add_argument("--kind", help="File prefix (default: the store directory name)")
+    p = sub.add_parser("import", help="Load legacy <kind>-YYYY.json files into a store (upsert)")
+    p.add_argument("store")
+    p.add_argument("files", nargs="+", metavar="JSON")
+    p = sub.add_parser("compact", help="Deduplicate every segment and rebuild the summary")
+    p.add_argument("store")
+    p = sub.add_parser("summary", help="Print per-month counts and best scores")
+    p.add_argument("store")
+    args = parser.parse_args()
+
+    store = ResultStore(args.store)
+    if args.command == "export":
+        for path in store.export_json(args.output_dir, args.kind or store.directory.name):
+            print(f"Wrote {path}")
+    elif args.command == "import":
+        total = 0
+        for name in args.files:
+            entries = [{"timestamp": e["timestamp"], "score": e["score"]} for e in json.loads(Path(name).read_text())]
+            store.write(entries, set(), append=True)
+            total += len(entries)
+            print(f"{name}: {len(entries)} entries")
+        print(f"Imported {total} entries into {store.directory} ({store.compact()} months)")
+    elif args.command == "compact":
+        print(f"Compacted {store.compact()} months in {store.directory}")
+    else:
+        for ym, m in store.load_summary()["months"].items():
+            print(f"{ym[:4]}-{ym[4:]}  {m['count']:5d} entries  best {m['max']:.4f}  ({m['top'][0]['timestamp']})")
+
+
+if __name__ == "__main__":
+    main()
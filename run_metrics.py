@@ -0,0 +1,252 @@
+"""
+run_metrics.py — machine-readable records of batch runs (--metrics DIR).
+
+The scanners and the util/ maintenance scripts count what a run did: items
+processed (frames, files, months), bytes read/written/freed, errors, wall
+time, throughput, workers and skip reasons. With --metrics DIR (or
+WEBCAM_METRICS_DIR in the environment, which cron and util/people-rescan-all.py
+pass on to the scans they start) each run, when it ends, also
+
+  • appends one JSON line to DIR/runs.jsonl: the history to graph, and
+  • replaces DIR/webcam_<tool>.prom: its last run in Prometheus text format,
+    for node_exporter's textfile collector
+    (--collector.textfile.directory=DIR).
+
+    python3 aurora_scan.py /path/to/images/2026/03 --store data/aurora --metrics /var/lib/node_exporter/textfile
+    python3 run_metrics.py /var/lib/node_exporter/textfile --tool aurora_scan
+
+The .prom file is replaced atomically and keeps the time of the tool's
+last successful run across failed ones, so an alert can fire both on a
+throughput drop and on a tool that stopped succeeding:
+
+    webcam_run_items_per_second{tool="aurora_scan"}
+      < 0.5 * avg_over_time(webcam_run_items_per_second{tool="aurora_scan"}[7d])
+    time() - webcam_run_last_success_timestamp_seconds > 36 * 3600
+
+Without a directory nothing is written; the counting is a few integer
+additions per batch.
+
+Requires: nothing beyond the standard library
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from result_store import locked, write_atomic
+
+JSONL_NAME = "runs.jsonl"
+
+# (name, help) of the per-run gauges in the .prom file
+GAUGES = (
+    ("start_timestamp_seconds", "Unix time the last run started"),
+    ("duration_seconds", "Wall time of the last run"),
+    ("success", "1 if the last run finished normally, else 0"),
+    ("last_success_timestamp_seconds", "Unix time the last successful run ended"),
+    ("items", "Items (frames, files, months) the last run processed"),
+    ("items_per_second", "Items per second of wall time in the last run"),
+    ("errors", "Items the last run failed on"),
+    ("workers", "Worker processes of the last run"),
+)
+
+
+class RunMetrics:
+    """
+    Counters of one run of a batch tool. Use as a context manager around the
+    work: on exit the run's status is set from how it ended and the record is
+    written (see finish()).
+    """
+
+    def __init__(self, tool, directory=None):
+        self.tool = tool
+        self.directory = Path(directory) if directory else None
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.items = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.bytes_freed = 0
+        self.errors = 0
+        self.workers = None
+        self.skipped = Counter()
+        self.extra = {}             # tool-specific numbers, JSON line only
+        self.status = "ok"          # or "interrupted", "budget", "failed"
+        self._finished = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is KeyboardInterrupt:
+            self.status = "interrupted"
+        elif exc_type is SystemExit:
+            if exc.code not in (None, 0) and self.status == "ok":
+                self.status = "failed"
+        elif exc_type is not None:
+            self.status = "failed"
+        self.finish()
+        return False
+
+    def record(self):
+        """This run as a dict (one line of runs.jsonl)."""
+        duration = time.perf_counter() - self._start
+        return {
+            "tool": self.tool,
+            "host": socket.gethostname(),
+            "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "duration": round(duration, 3),
+            "status": self.status,
+            "items": self.items,
+            "items_per_second": round(self.items / duration, 3) if duration > 0 else 0.0,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "bytes_freed": self.bytes_freed,
+            "errors": self.errors,
+            "workers": self.workers,
+            "skipped": dict(self.skipped),
+            "args": sys.argv[1:],
+            **self.extra,
+        }
+
+    def finish(self):
+        """Write the record once: a line in runs.jsonl and the tool's .prom file."""
+        if self._finished:
+            return None
+        self._finished = True
+        record = self.record()
+        if self.directory is None:
+            return record
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            jsonl = self.directory / JSONL_NAME
+            with locked(jsonl), open(jsonl, "a") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            prom = self.directory / f"webcam_{self.tool}.prom"
+            last_success = time.time() if self.status == "ok" else _last_success(prom)
+            write_atomic(prom, prometheus_text(record, self.started, last_success))
+        except OSError as e:
+            # Metrics never fail the run they describe
+            print(f"Could not write run metrics to {self.directory}: {e}", file=sys.stderr)
+        return record
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _last_success(prom):
+    """The last-success time kept in an earlier .prom file, or None."""
+    try:
+        match = re.search(r"^webcam_run_last_success_timestamp_seconds\{[^}]*\} (\S+)$", prom.read_text(), re.M)
+    except OSError:
+        return None
+    return float(match.group(1)) if match else None
+
+
+def prometheus_text(record, started, last_success=None):
+    """A run record in Prometheus text exposition format (gauges labelled with the tool)."""
+    tool = f'tool="{_label(record["tool"])}"'
+    values = {
+        "start_timestamp_seconds": round(started, 3),
+        "duration_seconds": record["duration"],
+        "success": 1 if record["status"] == "ok" else 0,
+        "last_success_timestamp_seconds": round(last_success, 3) if last_success is not None else None,
+        "items": record["items"],
+        "items_per_second": record["items_per_second"],
+        "errors": record["errors"],
+        "workers": record["workers"],
+    }
+    lines = []
+    for name, help_text in GAUGES:
+        if values[name] is None:
+            continue
+        lines += [f"# HELP webcam_run_{name} {help_text}", f"# TYPE webcam_run_{name} gauge",
+                  f"webcam_run_{name}{{{tool}}} {values[name]}"]
+    lines += ["# HELP webcam_run_bytes Bytes the last run read, wrote or freed",
+              "# TYPE webcam_run_bytes gauge"]
+    lines += [f'webcam_run_bytes{{{tool},direction="{d}"}} {record[f"bytes_{d}"]}'
+              for d in ("read", "written", "freed")]
+    if record["skipped"]:
+        lines += ["# HELP webcam_run_skipped Items the last run skipped, by reason",
+                  "# TYPE webcam_run_skipped gauge"]
+        lines += [f'webcam_run_skipped{{{tool},reason="{_label(reason)}"}} {n}'
+                  for reason, n in sorted(record["skipped"].items())]
+    return "\n".join(lines) + "\n"
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics", metavar="DIR", default=os.environ.get("WEBCAM_METRICS_DIR"),
+                        help="Append a run record to DIR/runs.jsonl and write DIR/webcam_<tool>.prom for "
+                             "node_exporter's textfile collector (default: $WEBCAM_METRICS_DIR; see run_metrics.py)")
+
+
+def metrics_from_args(args, tool):
+    """RunMetrics for the tool, writing to --metrics DIR if one is given."""
+    directory = getattr(args, "metrics", None)
+    return RunMetrics(tool, Path(directory).expanduser() if directory else None)
+
+
+def load_runs(directory, tool=None):
+    """The records in directory/runs.jsonl, oldest first; tool: only that tool's."""
+    path = Path(directory) / JSONL_NAME
+    if not path.exists():
+        return []
+    runs = []
+    for line in path.read_text().splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue    # a line cut short by a full disk
+        if tool is None or record.get("tool") == tool:
+            runs.append(record)
+    return runs
+
+
+def slow_runs(runs, window=7, factor=0.5):
+    """
+    Runs whose items/sec fell below factor × the median of the same tool's
+    previous `window` successful runs.
+    """
+    history = {}
+    slow = []
+    for record in runs:
+        earlier = history.setdefault(record["tool"], [])
+        if record["status"] != "ok" or not record["items"]:
+            continue
+        if len(earlier) >= 3 and record["items_per_second"] < factor * statistics.median(earlier[-window:]):
+            slow.append(record)
+        earlier.append(record["items_per_second"])
+    return slow
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Metrics directory (--metrics of the tools)")
+    parser.add_argument("--tool", help="Only this tool's runs (e.g. aurora_scan, regen_minis)")
+    parser.add_argument("--last", type=int, default=20, help="Runs to list (default: 20)")
+    args = parser.parse_args()
+
+    runs = load_runs(args.directory, args.tool)
+    if not runs:
+        print(f"No runs in {Path(args.directory) / JSONL_NAME}")
+        return
+    slow = {id(r) for r in slow_runs(runs)}
+    print(f"{'started':<20}{'tool':<20}{'status':<12}{'items':>9}{'items/s':>10}{'errors':>8}{'duration':>10}")
+    for r in runs[-args.last:]:
+        note = "  slow" if id(r) in slow else ""
+        print(f"{r['started']:<20}{r['tool']:<20}{r['status']:<12}{r['items']:>9}{r['items_per_second']:>10.1f}"
+              f"{r['errors']:>8}{r['duration']:>9.0f}s{note}")
+    if slow:
+        print(f"\n{len(slow)} run(s) below half the median throughput of the tool's previous runs")
+
+
+if __name__ == "__main__":
+    main()
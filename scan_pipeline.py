@@ -0,0 +1,1362 @@
+"""
+scan_pipeline.py — shared scan engine for aurora_scan.py and people_scan.py.
+
+Walks the archive once, reads each frame once and decodes it once, at the
+largest scale any enabled analyzer needs for that frame. Every analyzer gets
+a view of the same decoded image at its own scale and crops its own region
+of interest from it. Each analyzer's results go to its own result store,
+data/<analyzer>/ (see result_store.py), with the month-replace / upsert rules
+the scanners have always used. Results are streamed: each month is written as
+soon as its last frame is scored, and only the top --limit are kept for the
+report, so the results held in memory don't grow with the size of the
+archive (the work list still holds every frame path; see run_pipeline).
+--export-json also writes the legacy data/<analyzer>-YYYY.json files.
+
+--max-seconds / --deadline time-box a scan (see ScanBudget): the newest
+frames go first, then the ones each analyzer thinks most likely to score,
+and a run that runs out of time writes what it has and leaves a resume file
+for the next run.
+
+aurora_scan.py and people_scan.py are thin front ends over this module. Run
+it directly for a combined pass — aurora looks at night frames and people at
+day frames, but the tree is walked and every frame read only once:
+
+    python3 scan_pipeline.py /path/to/images/2026/03 --analyzers aurora,people \\
+        --aurora-threshold 0.08 \\
+        --people-threshold 0.2 --people-civil-day \\
+        --people-background data/background-2026-03.png \\
+        --people-exclude-zone 0.0,0.0,1.0,0.60 --people-exclude-zone 0.52,0.70,0.61,0.81
+
+Every scanner option is available with the analyzer name as prefix
+(--aurora-mini-prescreen, --people-adaptive-background, ...).
+
+--profiles cameras.json scans every camera of a profiles file (see
+camera_profiles.py) in the same single pass: the folder is then a path under
+each camera root, zones, sky masks and backgrounds come from each frame's
+camera and era, and each camera's results go to its own data directory.
+
+New analyzers subclass Analyzer below; see AuroraAnalyzer in aurora_scan.py
+and PeopleAnalyzer in people_scan.py.
+"""
+
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import stage_profile
+from frame_cache import add_cache_arguments, cache_from_args
+from result_store import ResultStore, locked, write_atomic
+from run_metrics import add_metrics_arguments, metrics_from_args
+from stage_profile import add_stage_profile_arguments, stage_profile_from_args
+
+# cv2.imread flag for each DCT scale factor
+_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+# ── Filenames and folders ─────────────────────────────────────────────────────
+
+def parse_dt_from_stem(stem: str):
+    # Try exact match first (standard renamed files: YYYYMMDDHHMMSS)
+    try:
+        return datetime.strptime(stem, "%Y%m%d%H%M%S")
+    except ValueError:
+        pass
+    # Extract 14-digit timestamp from pre-rename filenames like
+    # "Lillevik Lofoten_01_20260313054407" or "Viktun_01_20260313054407"
+    m = re.search(r'(\d{14})$', stem)
+    if m:
+        try:
+            return datetime.strptime(m.group(1), "%Y%m%d%H%M%S")
+        except ValueError:
+            pass
+    return None
+
+
+def timestamp_of(path):
+    """YYYYMMDDHHMMSS for a frame path, also for pre-rename filenames."""
+    dt = parse_dt_from_stem(path.stem)
+    return dt.strftime("%Y%m%d%H%M%S") if dt else path.stem
+
+
+def infer_scanned_months(folder, results):
+    """
+    Return the set of YYYYMM strings that were covered by this scan.
+
+    If the folder path contains a specific month (e.g. .../2026/03) or day
+    (.../2026/03/15), derive the month directly from the path so that a scan
+    returning 0 results still removes old entries for that month.
+    Fall back to the months of the (score, path) results when the path has
+    no year in it.
+    """
+    parts = Path(folder).parts
+    year = None
+    month = None
+    for i, part in enumerate(parts):
+        if part.isdigit() and len(part) == 4 and 2000 <= int(part) <= 2100:
+            year = part
+            if i + 1 < len(parts) and parts[i + 1].isdigit() and len(parts[i + 1]) == 2:
+                month = parts[i + 1]
+            break
+    if year and month:
+        return {year + month}
+    if year:
+        # Whole-year scan: clear all months for this year, even if 0 results.
+        return {f"{year}{m:02d}" for m in range(1, 13)}
+    # Unknown layout — use months present in the results
+    return {timestamp_of(path)[:6] for _, path in results}
+
+
+def infer_year(folder):
+    """Extract a 4-digit year from the folder path, e.g. /images/2026 or /images/2026/03."""
+    for part in Path(folder).parts:
+        if part.isdigit() and len(part) == 4 and 2000 <= int(part) <= 2100:
+            return part
+    return None
+
+
+def chronological_sequences(items, frame_key=timestamp_of):
+    """
+    Group (path, ...) work items by capture date, each group in time order.
+    frame_key as for run_pipeline(): with camera profiles each camera's day
+    is its own group.
+    """
+    groups = {}
+    for item in items:
+        dt = parse_dt_from_stem(item[0].stem)
+        groups.setdefault(frame_key(item[0])[:-6] if dt else str(item[0].parent), []).append(item)
+    return [sorted(g, key=lambda it: parse_dt_from_stem(it[0].stem) or datetime.min)
+            for _, g in sorted(groups.items())]
+
+
+@contextmanager
+def quiet_stderr():
+    # Suppress libjpeg "Premature end of JPEG file" warnings that come from
+    # reduced-scale decoding of partial DCT data. The images are fine.
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    old_stderr = os.dup(2)
+    os.dup2(devnull, 2)
+    try:
+        yield
+    finally:
+        os.dup2(old_stderr, 2)
+        os.close(old_stderr)
+        os.close(devnull)
+
+
+# ── Frames and analyzers ──────────────────────────────────────────────────────
+
+class Frame:
+    """
+    One archive frame: read once, decoded once at base_scale, and shared by
+    every analyzer. view(scale) returns the image at 1/scale resolution;
+    coarser views are resized from the base decode and cached.
+    """
+
+    decode_seconds = 0.0    # time spent in JPEG decodes in this process (stage timing)
+
+    def __init__(self, path, raw, base_scale=1):
+        self.path = path
+        self.raw = raw
+        self.base_scale = base_scale
+        self._views = {}
+
+    def _decode(self, scale):
+        start = time.perf_counter()
+        try:
+            with stage_profile.stage("decode"):
+                return self._decode_at(scale)
+        finally:
+            Frame.decode_seconds += time.perf_counter() - start
+
+    def _decode_at(self, scale):
+        if self.raw is None:
+            return None
+        buf = np.frombuffer(self.raw, np.uint8)
+        img = cv2.imdecode(buf, _DECODE_FLAGS.get(scale, cv2.IMREAD_COLOR))
+        if img is None and scale != 1:
+            img = cv2.imdecode(buf, cv2.IMREAD_COLOR)  # fallback for non-JPEG
+            if img is not None:
+                h, w = img.shape[:2]
+                img = cv2.resize(img, (max(1, w // scale), max(1, h // scale)),
+                                 interpolation=cv2.INTER_AREA)
+        return img
+
+    def view(self, scale):
+        """BGR image at 1/scale resolution, or None if the frame can't be decoded."""
+        if scale in self._views:
+            return self._views[scale]
+        if scale <= self.base_scale:
+            img = self._decode(scale)
+        else:
+            base = self.view(self.base_scale)
+            if base is None:
+                img = None
+            else:
+                h, w = base.shape[:2]
+                factor = self.base_scale / scale
+                img = cv2.resize(base, (max(1, int(w * factor)), max(1, int(h * factor))),
+                                 interpolation=cv2.INTER_AREA)
+        self._views[scale] = img
+        return img
+
+    def release(self):
+        """Drop decoded views but keep the bytes (for frames held across a sequence)."""
+        if self.raw is not None:
+            self._views = {}
+
+
+class Analyzer:
+    """
+    One kind of scoring run by the pipeline. Subclasses set the class
+    attributes and implement analyze(); the other hooks are optional.
+
+    Instances are pickled to the worker processes, so keep heavy state
+    (models, background images) out of __init__ and load it in start().
+    """
+
+    name = "analyzer"   # results go to data/<name>/
+    scale = 1           # DCT decode scale the analyzer works at: 1, 2, 4 or 8
+    threshold = 0.0     # frames scoring at or above this are kept
+    stateful = False    # True: each day's frames arrive in time order in one worker
+    warmup = 0          # frames at the start of each sequence passed to warm() first (prefiltered ones skipped)
+
+    def wants(self, dt):
+        """Time-window filter, run in the parent while collecting. dt may be None."""
+        return True
+
+    def priority(self, dt):
+        """How likely a frame at dt is to score, for time-boxed scans (higher goes first). dt may be None."""
+        return 0.0
+
+    def start(self):
+        """Called once in each worker process before any frame."""
+
+    def begin_sequence(self):
+        """Called at the start of each chronological sequence (stateful analyzers)."""
+
+    def warm(self, frame):
+        """Receives the first `warmup` frames of a sequence its prefilter let through, before they are scored."""
+
+    def prefilter(self, path):
+        """
+        Cheap check before any read/decode. Return (score, reason) to settle the
+        frame. Runs for a whole task before its frames are read, so it must not
+        depend on sequence state.
+        """
+        return None
+
+    def analyze(self, frame):
+        """Score a Frame. Return (score, reason); reason is None unless short-circuited."""
+        raise NotImplementedError
+
+
+class TopK:
+    """The k best (score, path) pairs pushed so far, kept in a k-sized min-heap."""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+
+    def push(self, score, path):
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (score, path))
+        elif score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (score, path))
+
+    def best(self):
+        """Best first."""
+        return sorted(self._heap, reverse=True)
+
+
+class MonthSink:
+    """
+    Streams one analyzer's results to its outputs a month at a time.
+
+    Results are buffered per month. A month is written (store segment and/or
+    JSON, replace or append as for write_results) as soon as its last frame
+    is scored, so the parent holds at most the months in flight rather than
+    the whole scan. close() writes the remaining scanned months, including
+    ones without results, which clears stale entries in replace mode.
+    on_write, if given, is called with each set of months after they are
+    written (aurora_scan.py uses it to update the event files).
+    """
+
+    def __init__(self, store=None, json_output=None, append=False, on_write=None):
+        self.store = store
+        self.json_output = json_output
+        self.append = append
+        self.on_write = on_write
+        self.upsert_months = set()   # months always upserted (partly scanned by an earlier run)
+        self.buffers = {}
+        self.written = set()
+
+    def add(self, score, path):
+        self.buffers.setdefault(timestamp_of(path)[:6], []).append((score, path))
+
+    def resume(self, months):
+        """Upsert these months: an earlier, time-boxed run already wrote part of them."""
+        self.upsert_months |= set(months)
+
+    def _write(self, months):
+        upsert = set(months) if self.append else set(months) & self.upsert_months
+        for group, append in ((set(months) - upsert, False), (upsert, True)):
+            if not group:
+                continue
+            results = [r for ym in sorted(group) for r in self.buffers.pop(ym, [])]
+            if self.store:
+                write_results_store(self.store, results, group, append=append)
+            if self.json_output:
+                write_results(self.json_output, results, group, append=append)
+        self.written |= months
+        if self.on_write is not None:
+            self.on_write(months)
+
+    def month_done(self, ym):
+        self._write({ym})
+
+    def flush_partial(self):
+        """Upsert the results of months that were not finished (a scan stopped by its ScanBudget)."""
+        months = set(self.buffers) - self.written
+        if months:
+            self.upsert_months |= months
+            self._write(months)
+
+    def close(self, scanned_months):
+        remaining = (set(scanned_months) | set(self.buffers)) - self.written
+        if remaining:
+            self._write(remaining)
+
+
+class SinkRouter:
+    """
+    One analyzer's MonthSinks for several cameras (camera_profiles.py). Takes
+    the camera/YYYYMM month keys of a profiles scan and passes each month to
+    the sink of its camera. camera_of maps a frame path to a camera name.
+    """
+
+    def __init__(self, sinks, camera_of):
+        self.sinks = sinks
+        self.camera_of = camera_of
+
+    def _split(self, keys):
+        by_camera = {}
+        for key in keys:
+            camera, ym = key.split("/")
+            by_camera.setdefault(camera, set()).add(ym)
+        return by_camera.items()
+
+    @property
+    def written(self):
+        return {f"{camera}/{ym}" for camera, sink in self.sinks.items() for ym in sink.written}
+
+    def add(self, score, path):
+        self.sinks[self.camera_of(path)].add(score, path)
+
+    def resume(self, keys):
+        for camera, months in self._split(keys):
+            self.sinks[camera].resume(months)
+
+    def month_done(self, key):
+        camera, ym = key.split("/")
+        self.sinks[camera].month_done(ym)
+
+    def flush_partial(self):
+        for sink in self.sinks.values():
+            sink.flush_partial()
+
+    def close(self, scanned_months):
+        months = dict(self._split(scanned_months))
+        for camera, sink in self.sinks.items():
+            sink.close(months.get(camera, set()))
+
+
+RECENT_DAYS = 2
+
+
+class ScanBudget:
+    """
+    Time box and resume point for a scan (--max-seconds / --deadline).
+
+    With a budget, run_pipeline() scans frames from the newest `recent_days`
+    days first, newest first, then the rest by Analyzer.priority(). Once the
+    deadline passes no new results are taken: months still in progress are
+    upserted (MonthSink.flush_partial) and every frame scored so far is
+    recorded in the resume file. The next run with the same file skips those
+    frames and upserts the months they are in, so the earlier results stay.
+    The file is removed when a scan gets through everything.
+    """
+
+    def __init__(self, deadline=None, resume_path=None, recent_days=RECENT_DAYS):
+        self.deadline = deadline          # time.time() value, or None for no limit
+        self.resume_path = Path(resume_path) if resume_path else None
+        self.recent_days = recent_days
+        self.done = set()                 # frame keys (timestamps) scored by this and earlier runs
+        self.expired = False
+        self.key = None
+
+    def start(self, folder, names):
+        """Load the resume file if it belongs to this scan (same folder(s) and analyzers)."""
+        folders = [str(Path(f).resolve()) for f in folder] if isinstance(folder, list) else str(Path(folder).resolve())
+        self.key = {"folder": folders, "analyzers": sorted(names)}
+        if not self.resume_path or not self.resume_path.exists():
+            return
+        try:
+            data = json.loads(self.resume_path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("key") != self.key:
+            print(f"Ignoring {self.resume_path}: it was written by a scan of another folder or analyzers")
+            return
+        self.done = {day + t for day, times in data.get("done", {}).items() for t in times}
+        print(f"Resuming from {self.resume_path}: {len(self.done)} frames already scanned")
+
+    def resumed_months(self):
+        return {key[:-8] for key in self.done}
+
+    def out_of_time(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def save(self):
+        if not self.resume_path:
+            return
+        by_day = {}
+        for key in sorted(self.done):
+            by_day.setdefault(key[:-6], []).append(key[-6:])
+        self.resume_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.resume_path, json.dumps({"key": self.key, "done": by_day}, separators=(",", ":")))
+
+    def finish(self):
+        if self.resume_path:
+            self.resume_path.unlink(missing_ok=True)
+
+
+def deadline_from(max_seconds=None, until=None, now=None):
+    """
+    time.time() deadline from a number of seconds and/or a wall-clock HH:MM
+    (the next one to come), whichever is earlier; None if neither is given.
+    """
+    now = now if now is not None else time.time()
+    deadlines = []
+    if max_seconds is not None:
+        deadlines.append(now + max_seconds)
+    if until:
+        start = datetime.fromtimestamp(now)
+        h, m = (int(v) for v in until.split(":"))
+        end = start.replace(hour=h, minute=m, second=0, microsecond=0)
+        if end <= start:
+            end += timedelta(days=1)
+        deadlines.append(end.timestamp())
+    return min(deadlines) if deadlines else None
+
+
+def add_budget_arguments(parser):
+    parser.add_argument("--max-seconds", type=float, metavar="N",
+                        help="Stop after N seconds: newest and most likely frames first, partial results "
+                             "written, the rest left for the next run (see --resume)")
+    parser.add_argument("--deadline", metavar="HH:MM",
+                        help="Like --max-seconds, but stop at this local time")
+    parser.add_argument("--resume", metavar="FILE",
+                        help="Resume file for time-boxed scans (default: resume.json in the result store, "
+                             "or <JSON output>.resume)")
+
+
+def budget_from_args(args, output=None):
+    """ScanBudget for --max-seconds/--deadline/--resume, or None. output: store directory or JSON file."""
+    deadline = deadline_from(args.max_seconds, args.deadline)
+    if deadline is None and not args.resume:
+        return None
+    resume = args.resume
+    if resume is None and output:
+        output = Path(output)
+        # Not *.json next to the results: the pages glob data/<kind>-*.json
+        resume = output.with_suffix(".resume") if output.suffix == ".json" else output / "resume.json"
+    return ScanBudget(deadline, resume)
+
+
+def prioritize(tasks, analyzers, recent_days=RECENT_DAYS):
+    """
+    Order tasks (lists of (path, analyzer indices)) for a time-boxed scan:
+    the newest `recent_days` days first, newest first, then everything else
+    by the mean Analyzer.priority() of its frames, newest first among equals.
+    """
+    def dt_of(item):
+        return parse_dt_from_stem(item[0].stem)
+
+    dts = [dt for task in tasks for dt in (dt_of(task[0]),) if dt is not None]
+    if not dts:
+        return list(tasks)
+    recent_from = max(dts) - timedelta(days=recent_days)
+
+    def key(task):
+        first = dt_of(task[0])
+        newest = -first.timestamp() if first else 0.0
+        if first is not None and first > recent_from:
+            return (0, 0.0, newest)
+        prio = sum(max(analyzers[j].priority(dt_of(item)) for j in item[1]) for item in task) / len(task)
+        return (1, -prio, newest)
+
+    return sorted(tasks, key=key)
+
+
+class AnalyzerRun:
+    """Per-analyzer tallies of one pipeline run."""
+
+    def __init__(self, analyzer, sink=None, top_k=None, recall=True):
+        self.analyzer = analyzer
+        self.sink = sink             # MonthSink, or None to keep every result in .results
+        self.top = TopK(top_k) if top_k else None
+        self.recall = recall         # keep .paths and .short_circuited for recall reports
+        self.paths = []              # frames handed to this analyzer
+        self.results = []            # (score, path) at or above threshold (when there is no sink)
+        self.kept = 0                # results at or above threshold
+        self.pending = Counter()     # month key → frames not yet scored
+        self.skipped = Counter()     # reason → frames settled without a full score
+        self.short_circuited = {}    # path → kept score (None = dropped), for recall reports
+        self.skipped_time = 0
+        self.scanned = 0
+
+
+# ── Worker side ───────────────────────────────────────────────────────────────
+# NOTE: multiprocessing on macOS uses "spawn", so module-level globals in the
+# main process are NOT inherited by workers. _worker_init() sets them.
+
+_analyzers = []
+_cache = None
+
+
+def _worker_init(analyzers, cache=None, profile=False, profile_dump=None):
+    global _analyzers, _cache
+    _analyzers = analyzers
+    _cache = cache
+    if profile:
+        stage_profile.start_worker(profile_dump)
+    for analyzer in _analyzers:
+        analyzer.start()
+
+
+MAX_READ_AHEAD = 8
+_reader = None
+
+
+def _read_bytes(path, scale):
+    """
+    (data, seconds, cpu seconds) for one frame: its bytes, or with a
+    decoded-mode frame cache possibly the decoded image at 1/scale; None if
+    unreadable. CPU time is this thread's (reads run on read-ahead threads).
+    """
+    start = time.perf_counter()
+    cpu = time.thread_time()
+    data = None
+    try:
+        if _cache is None:
+            data = Path(path).read_bytes()
+        elif _cache.mode == "decoded":
+            data = _cache.get_array(path, scale)
+            if data is None:
+                data = Path(path).read_bytes()
+        else:
+            data = _cache.read(path)
+    except OSError:
+        pass
+    return data, time.perf_counter() - start, time.thread_time() - cpu
+
+
+def _read_ahead(requests, depth, timing):
+    """
+    Yield (data, seconds, cpu seconds) for each (path, scale) request in
+    order (see _read_bytes). With depth > 0 up to depth files are read on
+    background threads while the caller decodes and scores, which hides
+    network-drive latency.
+    """
+    global _reader
+    if depth <= 0:
+        for path, scale in requests:
+            read = _read_bytes(path, scale)
+            _count_read(timing, read)
+            yield read
+        return
+    if _reader is None:
+        _reader = ThreadPoolExecutor(max_workers=MAX_READ_AHEAD)
+    pending = deque()
+    for path, scale in requests:
+        pending.append(_reader.submit(_read_bytes, path, scale))
+        if len(pending) > depth:
+            read = pending.popleft().result()
+            _count_read(timing, read)
+            yield read
+    while pending:
+        read = pending.popleft().result()
+        _count_read(timing, read)
+        yield read
+
+
+def _count_read(timing, read):
+    data, seconds, _ = read
+    timing["read"] += seconds
+    if data is not None:
+        timing["bytes read"] += data.nbytes if isinstance(data, np.ndarray) else len(data)
+
+
+def _base_scale(indices):
+    return min(_analyzers[j].scale for j in indices)
+
+
+def _frame(path, data, scale):
+    if data is None:
+        return None
+    if isinstance(data, np.ndarray):
+        # Decoded-mode cache hit: no bytes, the base view is already there
+        frame = Frame(path, None, scale)
+        frame._views[scale] = data
+        return frame
+    return Frame(path, data, scale)
+
+
+def _cache_decode(frame):
+    """Store a frame's base-scale decode in a decoded-mode cache (after scoring)."""
+    if (_cache is not None and _cache.mode == "decoded" and frame is not None and frame.raw is not None
+            and frame._views.get(frame.base_scale) is not None):
+        _cache.put_array(frame.path, frame.base_scale, frame._views[frame.base_scale])
+
+
+def _run_sequence(items, read_ahead=0):
+    """
+    Worker task: score a list of (path, analyzer indices) in order.
+    Returns ([(path, {analyzer name: (score, reason)})], stage timing) where
+    stage timing has the seconds spent in prefilters, reading, decoding and
+    scoring, the bytes read and the frames that failed ("errors"), and with --profile the
+    per-frame stage samples under "profile".
+    """
+    out = []
+    timing = Counter()
+    decode_before = Frame.decode_seconds
+    with quiet_stderr():
+        for analyzer in _analyzers:
+            analyzer.begin_sequence()
+
+        # Prefilters first, so only frames that need a decode are read (ahead)
+        start = time.perf_counter()
+        settled = []
+        for i, (path, indices) in enumerate(items):
+            stage_profile.frame(i)
+            scores = {}
+            pending = []
+            for j in indices:
+                analyzer = _analyzers[j]
+                with stage_profile.stage(f"{analyzer.name}.prefilter"):
+                    result = analyzer.prefilter(path)
+                if result is not None:
+                    scores[analyzer.name] = result
+                else:
+                    pending.append(j)
+            settled.append((scores, pending))
+        timing["prefilter"] += time.perf_counter() - start
+
+        # Each stateful analyzer warms on the first `warmup` frames it will score:
+        # a frame its prefilter settled (e.g. a night exposure) would skew it
+        warm = {}
+        for j, analyzer in enumerate(_analyzers):
+            if analyzer.warmup:
+                for i in [i for i, (_, pending) in enumerate(settled) if j in pending][:analyzer.warmup]:
+                    warm.setdefault(i, []).append(j)
+        wanted = [i for i, (_, pending) in enumerate(settled) if pending]
+        scales = {i: _base_scale(settled[i][1]) for i in wanted}
+        raws = _read_ahead([(items[i][0], scales[i]) for i in wanted], read_ahead, timing)
+        waited = 0.0
+
+        def next_raw():
+            nonlocal waited
+            t = time.perf_counter()
+            raw, seconds, cpu = next(raws)
+            waited += time.perf_counter() - t
+            stage_profile.record("read", seconds, cpu)
+            return raw
+
+        # Frames up to the last warm-up frame are read first and kept (bytes
+        # only), so each file is still read just once and in order.
+        start = time.perf_counter()
+        held = {}
+        early = wanted[:wanted.index(max(warm)) + 1] if warm else []
+        for i in early:
+            stage_profile.frame(i)
+            frame = held[i] = _frame(items[i][0], next_raw(), scales[i])
+            if frame is None:
+                continue
+            for j in warm.get(i, []):
+                _analyzers[j].warm(frame)
+            frame.release()
+
+        for i, (path, indices) in enumerate(items):
+            scores, pending = settled[i]
+            if pending:
+                stage_profile.frame(i)
+                frame = held.pop(i) if i in held else _frame(path, next_raw(), scales[i])
+                failed = frame is None          # unreadable
+                for j in pending:
+                    analyzer = _analyzers[j]
+                    try:
+                        with stage_profile.stage(analyzer.name):
+                            scores[analyzer.name] = analyzer.analyze(frame) if frame else (0.0, None)
+                    except (cv2.error, OSError):
+                        # A frame the analyzer can't process; a bug in it propagates and stops the scan
+                        failed = True
+                        scores[analyzer.name] = (0.0, None)
+                if failed or any(img is None for img in frame._views.values()):
+                    timing["errors"] += 1       # one per frame, also when read but not decodable
+                _cache_decode(frame)
+            out.append((path, scores))
+        timing["decode"] = Frame.decode_seconds - decode_before
+        timing["score"] = max(0.0, time.perf_counter() - start - waited - timing["decode"])
+    if _cache is not None:
+        timing["cache hits"], timing["cache misses"] = _cache.hits, _cache.misses
+        _cache.hits = _cache.misses = 0
+    timing = dict(timing)
+    samples = stage_profile.take()
+    if samples is not None:
+        timing["profile"] = samples
+    return out, timing
+
+
+# ── Parent side ───────────────────────────────────────────────────────────────
+
+CHUNK_FRAMES = 8
+STAGES = ("read", "prefilter", "decode", "score")
+
+
+class ConcurrencyController:
+    """
+    Feedback controller behind --workers auto.
+
+    The pool starts max_workers processes, but only `workers` tasks are in
+    flight at a time, and each worker reads `read_ahead` frames ahead of the
+    one it is scoring. Every `window` seconds the controller compares
+    images/sec with the previous window and hill-climbs one level at a time:
+    read-ahead when reading takes most of the workers' time (network drive),
+    otherwise the number of active workers. A step up is kept only if it
+    gains more than `gain`; a step down is kept unless it loses more than
+    `gain`. So it settles on the fewest workers that keep throughput up.
+    """
+
+    def __init__(self, max_workers, workers=2, read_ahead=1, window=5.0, gain=0.05):
+        self.max_workers = max(1, max_workers)
+        self.workers = min(workers, self.max_workers)
+        self.read_ahead = read_ahead
+        self.window = window
+        self.gain = gain
+        self.direction = {"workers": 1, "read_ahead": 1}
+        self.move = None             # (knob, step) applied at the start of this window
+        self.last_rate = None
+        self.best = (0.0, self.workers, self.read_ahead)
+        self.stages = Counter()      # seconds per stage (STAGES), whole run
+        self._window_stages = Counter()
+        self._frames = 0
+        self._window_start = time.monotonic()
+
+    def levels(self):
+        return f"workers {self.workers}, read-ahead {self.read_ahead}"
+
+    def dispatch(self, pool, tasks):
+        """Yield task results as they finish, keeping `workers` tasks in flight."""
+        done = queue.SimpleQueue()
+        tasks = iter(tasks)
+        in_flight = 0
+        while True:
+            while in_flight < self.workers:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pool.apply_async(_run_sequence, (task, self.read_ahead),
+                                 callback=done.put, error_callback=done.put)
+                in_flight += 1
+            if not in_flight:
+                return
+            result = done.get()
+            in_flight -= 1
+            if isinstance(result, BaseException):
+                raise result
+            yield result
+
+    def record(self, frames, timing, now=None):
+        """Account for one finished task; adjusts the levels at the end of a window."""
+        self._frames += frames
+        self._window_stages.update(timing)
+        self.stages.update(timing)
+        now = now if now is not None else time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= self.window and self._frames >= self.workers:
+            self._step(self._frames / elapsed)
+            self._frames = 0
+            self._window_stages = Counter()
+            self._window_start = now
+
+    def _set(self, knob, step):
+        value = getattr(self, knob) + step
+        upper = self.max_workers if knob == "workers" else MAX_READ_AHEAD
+        lower = 1 if knob == "workers" else 0
+        if not lower <= value <= upper:
+            return False
+        setattr(self, knob, value)
+        return True
+
+    def _step(self, rate):
+        if rate > self.best[0]:
+            self.best = (rate, self.workers, self.read_ahead)
+        if self.move is not None:
+            knob, step = self.move
+            self.move = None
+            kept = rate > self.last_rate * (1 + self.gain) if step > 0 else rate >= self.last_rate * (1 - self.gain)
+            if not kept:
+                # Undo, measure the old level again, and try the other way next
+                self._set(knob, -step)
+                self.direction[knob] = -step
+                return
+        self.last_rate = rate
+        total = sum(self._window_stages[stage] for stage in STAGES)
+        knob = "read_ahead" if total and self._window_stages["read"] / total > 0.5 else "workers"
+        step = self.direction[knob]
+        if not self._set(knob, step):
+            step = -step
+            self.direction[knob] = step
+            if not self._set(knob, step):
+                return
+        self.move = (knob, step)
+
+    def summary(self):
+        total = sum(self.stages[stage] for stage in STAGES) or 1.0
+        shares = " / ".join(f"{stage} {self.stages[stage] / total:.0%}" for stage in STAGES)
+        best = f", best {self.best[0]:.1f} img/s at workers {self.best[1]}, read-ahead {self.best[2]}" \
+            if self.best[0] else ""
+        return f"Adaptive concurrency: ended at {self.levels()}{best}; worker time {shares}"
+
+
+def _chunked(tasks, size):
+    """Consecutive runs of `size` single-frame tasks joined into one, as they are taken."""
+    tasks = iter(tasks)
+    while True:
+        chunk = [item for task in islice(tasks, size) for item in task]
+        if not chunk:
+            return
+        yield chunk
+
+
+def workers_arg(value):
+    """argparse type for --workers: a number, or "auto" for the ConcurrencyController."""
+    return value if value == "auto" else int(value)
+
+
+def frame_paths(folder, catalog=None):
+    """
+    Frame paths under folder (mini/ thumbnails excluded). With catalog (an
+    image_catalog.py database) the list comes from the catalog instead of a
+    directory walk, as long as folder is inside a catalogued root.
+    """
+    if catalog:
+        from image_catalog import open_catalog
+        paths = open_catalog(catalog).paths_under(folder)
+        if paths is not None:
+            return paths
+        print(f"{folder} is not in catalog {catalog} — walking the folder instead")
+    return (p for p in Path(folder).rglob("*.jpg") if "mini" not in str(p))
+
+
+def collect_work(folder, analyzers, date_before=None, date_after=None, catalog=None, runs=None, skip=None,
+                 frame_key=timestamp_of):
+    """
+    Walk folder (or each of a list of folders) once, or read it from catalog.
+    Returns (items, runs, all_months, skipped_date) where items is
+    [(path, [analyzer indices])] for frames at least one analyzer wants, and
+    all_months is the month key of every frame present regardless of time
+    filters: YYYYMM, or camera/YYYYMM with a camera_profiles.py frame_key.
+    Frames whose key is in skip (already scanned by a time-boxed run) are
+    left out, and count as skipped by date.
+    """
+    runs = runs or {a.name: AnalyzerRun(a) for a in analyzers}
+    items = []
+    all_months = set()
+    skipped_date = 0
+    folders = folder if isinstance(folder, list) else [folder]
+    print("Collecting file list...", end="", flush=True)
+    for path in (p for f in folders for p in frame_paths(f, catalog)):
+        stem = path.stem
+        dt = parse_dt_from_stem(stem)
+        date_str = dt.strftime("%Y%m%d") if dt else stem[:8]
+        if date_before and date_str >= date_before:
+            skipped_date += 1
+            continue
+        if date_after and date_str < date_after:
+            skipped_date += 1
+            continue
+        key = frame_key(path)
+        if skip and key in skip:
+            skipped_date += 1
+            continue
+        if dt:
+            all_months.add(key[:-8])
+        indices = []
+        for j, analyzer in enumerate(analyzers):
+            if dt is not None and not analyzer.wants(dt):
+                runs[analyzer.name].skipped_time += 1
+                continue
+            indices.append(j)
+            run = runs[analyzer.name]
+            run.pending[key[:-8]] += 1
+            if run.recall:
+                run.paths.append(path)
+        if indices:
+            items.append((path, indices))
+            if len(items) % 500 == 0:
+                print(f"\rCollecting file list... {len(items)} found", end="", flush=True)
+    return items, runs, all_months, skipped_date
+
+
+def run_pipeline(folder, analyzers, workers=None, date_before=None, date_after=None, catalog=None,
+                 sinks=None, top_k=None, recall=True, budget=None, cache=None, frame_key=timestamp_of,
+                 profile=None, metrics=None):
+    """
+    Scan folder, or a list of folders, with every analyzer in one pass and
+    one worker pool. catalog: optional
+    image_catalog.py database to take the file list from. workers: pool
+    size (default: CPU count), or "auto" to let a ConcurrencyController
+    adjust the active workers and read-ahead as the scan goes.
+
+    sinks maps analyzer name to a MonthSink: that analyzer's results are
+    streamed to it month by month instead of collected in run.results.
+    top_k keeps the best top_k results of each analyzer in run.top for the
+    report. recall=False drops the per-frame bookkeeping only the recall
+    reports need. Together they keep the results from growing with the
+    archive; the parent still holds the work list (one entry per frame to
+    scan, and with a budget the keys of the frames scanned), so its memory
+    is O(paths).
+
+    cache: optional frame_cache.FrameCache the workers read frames through.
+
+    frame_key maps a frame path to the key results, months and resume
+    points are tracked by: its timestamp, or camera/timestamp for a scan of
+    several camera roots (CameraProfiles.frame_key, with SinkRouter sinks).
+    A frame's month key is its key without the last 8 characters.
+
+    profile: optional stage_profile.StageProfile (--profile). The workers
+    then time every stage of every frame, and the summary is printed at the end.
+
+    metrics: optional run_metrics.RunMetrics (--metrics). Gets the frames
+    scanned, bytes read, errors, workers and skip reasons of the scan.
+
+    budget: optional ScanBudget. The frames are then scanned in priority
+    order and the scan stops at the deadline (checked as each task finishes);
+    see ScanBudget for what is written then.
+
+    Returns (runs, all_months, interrupted): runs maps analyzer name to its
+    AnalyzerRun; all_months is every month key present in the folder(s).
+    interrupted is also True when the budget ran out (budget.expired).
+    """
+    sinks = sinks or {}
+    runs = {a.name: AnalyzerRun(a, sinks.get(a.name), top_k, recall) for a in analyzers}
+    for f in folder if isinstance(folder, list) else [folder]:
+        if not Path(f).is_dir():
+            print(f"Error: folder not found: {f}")
+            return runs, set(), False
+
+    if budget is not None:
+        budget.start(folder, [a.name for a in analyzers])
+        for sink in sinks.values():
+            sink.resume(budget.resumed_months())
+    items, runs, all_months, skipped_date = collect_work(folder, analyzers, date_before, date_after,
+                                                         catalog, runs, budget.done if budget else None,
+                                                         frame_key)
+    total = len(items)
+    time_note = ", ".join(f"{r.skipped_time}" if len(runs) == 1 else f"{name} {r.skipped_time}"
+                          for name, r in runs.items())
+    date_note = f", {skipped_date} by date filter or resume file" if skipped_date else ""
+    print(f"\rFound {total} images to scan ({time_note} skipped by time filter{date_note})    ")
+
+    if any(a.stateful for a in analyzers):
+        tasks = chronological_sequences(items, frame_key)
+    else:
+        tasks = ([item] for item in items)
+    if budget is not None:
+        tasks = prioritize(list(tasks), analyzers, budget.recent_days)
+
+    scanned = 0
+    tick = 0
+    spinner = ["-", "\\", "|", "/"]
+    interrupted = False
+
+    cache_counts = Counter()
+    counts = Counter()
+    controller = None
+    if workers == "auto":
+        controller = ConcurrencyController(multiprocessing.cpu_count())
+        num_workers = controller.max_workers
+        if not any(a.stateful for a in analyzers):
+            # Several frames per task so the worker has something to read ahead
+            tasks = _chunked(tasks, CHUNK_FRAMES)
+    else:
+        num_workers = workers if workers is not None else multiprocessing.cpu_count()
+    if profile is not None:
+        profile.begin()
+    try:
+        with multiprocessing.Pool(processes=num_workers, initializer=_worker_init,
+                                  initargs=(analyzers, cache, profile is not None,
+                                            profile.dump if profile else None)) as pool:
+            if controller is None:
+                results = pool.imap_unordered(_run_sequence, tasks, chunksize=1)
+            else:
+                results = controller.dispatch(pool, tasks)
+            for batch, timing in results:
+                samples = timing.pop("profile", None)
+                if profile is not None:
+                    profile.add(samples)
+                cache_counts.update({k: v for k, v in timing.items() if k.startswith("cache")})
+                counts.update({"bytes read": timing.get("bytes read", 0), "errors": timing.get("errors", 0)})
+                for path, scores in batch:
+                    scanned += 1
+                    tick += 1
+                    month = frame_key(path)[:-8]
+                    for name, (score, reason) in scores.items():
+                        _tally(runs[name], path, score, reason, month)
+                kept = ", ".join(f"{r.kept}" if len(runs) == 1 else f"{name} {r.kept}"
+                                 for name, r in runs.items())
+                levels = ""
+                if controller is not None:
+                    controller.record(len(batch), timing)
+                    levels = f" [{controller.levels()}]"
+                print(f"\r  {spinner[tick % 4]} {scanned}/{total} scanned, {kept} above threshold{levels}   ",
+                      end="", flush=True)
+                if budget is not None:
+                    budget.done.update(frame_key(path) for path, _ in batch)
+                    if budget.out_of_time():
+                        budget.expired = True
+                        break
+            if profile is not None and not (budget is not None and budget.expired):
+                # Let the workers exit normally, so the profiled one writes --profile-dump
+                pool.close()
+                pool.join()
+    except KeyboardInterrupt:
+        interrupted = True
+        print(f"\n\nInterrupted after {scanned}/{total} images.")
+    print()  # newline after progress line
+    if metrics is not None:
+        metrics.items += scanned
+        metrics.bytes_read += counts["bytes read"]
+        metrics.errors += counts["errors"]
+        metrics.workers = num_workers
+        for name, run in runs.items():
+            metrics.skipped.update({f"{name}.{reason}": n for reason, n in run.skipped.items()})
+            if run.skipped_time:
+                metrics.skipped[f"{name}.time"] += run.skipped_time
+        if skipped_date:
+            metrics.skipped["date"] += skipped_date
+        if interrupted:
+            metrics.status = "interrupted"
+        elif budget is not None and budget.expired:
+            metrics.status = "budget"
+    if controller is not None:
+        print(controller.summary())
+    if profile is not None:
+        print(profile.summary())
+    if cache is not None:
+        lookups = cache_counts["cache hits"] + cache_counts["cache misses"]
+        rate = f"{cache_counts['cache hits'] / lookups:.0%} hits ({cache_counts['cache hits']}/{lookups})" \
+            if lookups else "no lookups"
+        print(f"Frame cache ({cache.mode}): {rate}, {cache.usage()[1] / 2**30:.1f} of "
+              f"{cache.max_bytes / 2**30:.0f} GB used in {cache.directory}")
+    if budget is not None and budget.expired:
+        print(f"Time budget used up after {scanned}/{total} images — writing partial results.")
+        for run in runs.values():
+            if run.sink is not None:
+                run.sink.flush_partial()
+        budget.save()
+        if budget.resume_path:
+            print(f"Resume point saved to {budget.resume_path}; run again with the same options to continue.")
+        return runs, all_months, True
+    if budget is not None and not interrupted:
+        budget.finish()
+    return runs, all_months, interrupted
+
+
+def _tally(run, path, score, reason, month):
+    run.scanned += 1
+    if reason is not None:
+        run.skipped[reason] += 1
+    if reason in ("exif", "prescreen"):
+        # Not decoded; never kept, but remembered for the recall report
+        if run.recall:
+            run.short_circuited[path] = None
+    else:
+        if reason == "dedupe" and run.recall:
+            run.short_circuited[path] = score
+        if score >= run.analyzer.threshold:
+            run.kept += 1
+            if run.top is not None:
+                run.top.push(score, path)
+            if run.sink is not None:
+                run.sink.add(score, path)
+            else:
+                run.results.append((score, path))
+
+    run.pending[month] -= 1
+    if run.pending[month] == 0:
+        del run.pending[month]
+        if run.sink is not None:
+            run.sink.month_done(month)
+
+
+# ── Reporting ─────────────────────────────────────────────────────────────────
+
+def print_top(results, limit, title, base_url):
+    """Print the best `limit` (score, path) results with page URLs. base_url: a prefix, or path → prefix."""
+    print(f"\nTop {limit} {title}:\n")
+    for score, path in heapq.nlargest(limit, results):
+        timestamp = path.stem
+        dt = parse_dt_from_stem(timestamp)
+        readable = dt.strftime("%Y-%m-%d %H:%M:%S") if dt else timestamp
+        print(f"{score:.4f}  {readable}")
+        print(f"        {base_url(path) if callable(base_url) else base_url}{timestamp}")
+
+
+def report_recall(label, paths, short_circuited, reference, threshold):
+    """
+    Print how many previously found frames a short-circuit lost.
+
+    short_circuited maps path → the score we kept for it (None = dropped).
+    A reference frame at/above threshold counts as missed when it was
+    short-circuited to a score below threshold.
+    """
+    scanned_ts = {timestamp_of(p) for p in paths}
+    known = {ts for ts, score in reference.items() if score >= threshold and ts in scanned_ts}
+    if not known:
+        print(f"{label} recall: no reference frames in this scan")
+        return
+    kept = {timestamp_of(p): s for p, s in short_circuited.items()}
+    missed = sorted(ts for ts in known if ts in kept and (kept[ts] is None or kept[ts] < threshold))
+    recall = 1.0 - len(missed) / len(known)
+    print(f"{label} recall vs reference: {recall:.3f} ({len(known) - len(missed)}/{len(known)})")
+    for ts in missed[:20]:
+        print(f"  missed {ts}  (reference score {reference[ts]:.4f})")
+
+
+def load_reference(path):
+    """{timestamp: score} from a results file or store directory, or None if it doesn't exist."""
+    if path and Path(path).is_dir():
+        return {x["timestamp"]: x["score"] for x in ResultStore(path).entries()} or None
+    if path and Path(path).exists():
+        return {x["timestamp"]: x["score"] for x in json.loads(Path(path).read_text())}
+    return None
+
+
+# ── Results files ─────────────────────────────────────────────────────────────
+
+def write_results(json_output, results, scanned_months, append=False):
+    """
+    Merge (score, path) results into a data/<kind>-YYYY.json file.
+
+    Replace mode removes every existing entry in scanned_months first, so a
+    rescan that finds nothing clears old false positives. Append mode upserts
+    by timestamp and leaves everything else alone. The file is re-read and
+    merged under an advisory lock and replaced atomically, so several month
+    scans can write the same year at once.
+    """
+    new_data = sorted(
+        [{"timestamp": timestamp_of(path), "score": round(score, 4)} for score, path in results],
+        key=lambda x: x["timestamp"]
+    )
+    output_path = Path(json_output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with locked(output_path):
+        if output_path.exists():
+            existing = json.loads(output_path.read_text())
+            if append:
+                # Upsert mode: merge new entries into existing by timestamp
+                if not new_data:
+                    print(f"\nNo new results; {json_output} unchanged.")
+                    return
+                by_ts = {x["timestamp"]: x for x in existing}
+                for item in new_data:
+                    by_ts[item["timestamp"]] = item
+                merged = sorted(by_ts.values(), key=lambda x: x["timestamp"])
+                write_atomic(output_path, json.dumps(merged, indent=2))
+                print(f"\nJSON updated in {json_output} ({len(merged)} total entries, {len(new_data)} new/updated)")
+            else:
+                # Replace mode: remove all entries for scanned months, add new ones.
+                # This correctly clears false positives when a rescan finds 0 results.
+                kept = [x for x in existing if x["timestamp"][:6] not in scanned_months]
+                merged = sorted(kept + new_data, key=lambda x: x["timestamp"])
+                write_atomic(output_path, json.dumps(merged, indent=2))
+                removed = len(existing) - len(kept)
+                print(f"\nJSON merged into {json_output} ({len(merged)} total entries, {len(new_data)} from this scan, {removed} removed)")
+        else:
+            write_atomic(output_path, json.dumps(new_data, indent=2))
+            print(f"\nJSON written to {json_output} ({len(new_data)} entries)")
+
+
+def write_results_store(store_dir, results, scanned_months, append=False):
+    """Merge (score, path) results into a result_store.py directory, touching only the affected months."""
+    new_data = [{"timestamp": timestamp_of(path), "score": round(score, 4)} for score, path in results]
+    if append and not new_data:
+        print(f"\nNo new results; {store_dir} unchanged.")
+        return
+    counts = ResultStore(store_dir).write(new_data, scanned_months, append=append)
+    print(f"\nResults stored in {store_dir} ({len(new_data)} from this scan, "
+          f"{len(counts)} month(s) updated)")
+
+
+# ── Combined CLI ──────────────────────────────────────────────────────────────
+
+def _analyzer_modules(names):
+    modules = {}
+    for name in names:
+        if name == "aurora":
+            import aurora_scan
+            modules[name] = aurora_scan
+        elif name == "people":
+            import people_scan
+            modules[name] = people_scan
+        else:
+            raise SystemExit(f"Unknown analyzer: {name} (choose from aurora, people)")
+    return modules
+
+
+def main():
+    import argparse
+
+    from camera_profiles import add_profile_arguments
+    from scan_shards import add_shard_arguments
+
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--analyzers", default="aurora,people")
+    known, _ = pre.parse_known_args()
+    modules = _analyzer_modules([n.strip() for n in known.analyzers.split(",") if n.strip()])
+
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("folder", help="Folder to scan (year, month, or day directory)")
+    parser.add_argument("--analyzers", default="aurora,people",
+                        help="Comma-separated analyzers to run (default: aurora,people)")
+    parser.add_argument("--limit", type=int, default=20, help="Results to print per analyzer")
+    parser.add_argument("--workers", type=workers_arg, default=None,
+                        help="Parallel workers, or auto to adjust workers and read-ahead while scanning "
+                             "(default: all CPU cores)")
+    parser.add_argument("--data-dir", default="data",
+                        help="Results go to the store <data-dir>/<analyzer>/ (default: data)")
+    parser.add_argument("--export-json", action="store_true",
+                        help="Also write the legacy <data-dir>/<analyzer>-YYYY.json files from the store")
+    parser.add_argument("--append", action="store_true",
+                        help="Upsert entries by timestamp instead of replacing the whole scanned month")
+    parser.add_argument("--before", metavar="YYYYMMDD", help="Only scan images before this date")
+    parser.add_argument("--after", metavar="YYYYMMDD", help="Only scan images from this date onward")
+    parser.add_argument("--catalog", metavar="DB",
+                        help="Take the file list from an image_catalog.py database instead of walking the folder")
+    add_profile_arguments(parser)
+    add_shard_arguments(parser)
+    add_budget_arguments(parser)
+    add_cache_arguments(parser)
+    add_stage_profile_arguments(parser)
+    add_metrics_arguments(parser)
+    for name, module in modules.items():
+        group = parser.add_argument_group(f"{name} analyzer")
+        module.add_analyzer_arguments(group, prefix=f"{name}-")
+    args = parser.parse_args()
+    with metrics_from_args(args, "scan_pipeline") as metrics:
+        scan_from_args(args, modules, metrics=metrics)
+
+
+def scan_from_args(args, modules, prefixed=True, metrics=None):
+    """
+    Run the analyzers of modules ({name: scanner module}) as the command line
+    asks, write their results and print the report. Without --profiles the
+    results go to <data-dir>/<analyzer>/. With --profiles args.folder is a
+    path under every camera root, all cameras are scanned in one pass, and
+    each camera's results go to <its data dir>/<analyzer>/. With --shard-dir
+    the scan is split into camera/month shards shared with other hosts and
+    results go to partial files (scan_shards.py). aurora_scan.py and
+    people_scan.py call this for --profiles and --shard-dir (prefixed=False:
+    their options have no analyzer prefix). metrics: optional
+    run_metrics.RunMetrics to count the scan in.
+    """
+    prefixes = {name: f"{name}-" if prefixed else "" for name in modules}
+    profiles = None
+    if getattr(args, "profiles", None):
+        from camera_profiles import load_profiles
+        try:
+            profiles = load_profiles(args.profiles, args.cameras)
+        except (OSError, ValueError, KeyError) as e:
+            raise SystemExit(f"Cannot use {args.profiles}: {e}")
+        found = profiles.folders(args.folder)
+        if not found:
+            raise SystemExit(f"{args.folder} is not under the root of any camera in {args.profiles}")
+        folder = [f for _, f in found]
+        print("Cameras: " + ", ".join(f"{camera.name} ({f})" for camera, f in found))
+        data_dirs = {camera.name: camera.data for camera in profiles.cameras}
+    else:
+        folder = args.folder
+        data_dirs = {None: Path(getattr(args, "data_dir", "data"))}
+
+    analyzers = [module.analyzer_from_args(args, prefix=prefixes[name], folder=args.folder, profiles=profiles)
+                 for name, module in modules.items()]
+    frame_key = profiles.frame_key if profiles else timestamp_of
+    if getattr(args, "shard_dir", None):
+        from scan_shards import scan_shards
+        if args.max_seconds is not None or args.deadline:
+            raise SystemExit("--shard-dir does not combine with --max-seconds/--deadline")
+        found = [(camera, f) for camera, f in profiles.folders(args.folder)] if profiles else [(None, folder)]
+        scan_shards(args.shard_dir, found, analyzers, data_dirs, args.lease_seconds, workers=args.workers,
+                    date_before=getattr(args, "before", None), date_after=getattr(args, "after", None),
+                    catalog=args.catalog, cache=cache_from_args(args), frame_key=frame_key,
+                    profile=stage_profile_from_args(args), metrics=metrics)
+        return
+    sinks = {}
+    for name, module in modules.items():
+        hook = getattr(module, "after_write", None)
+        by_camera = {camera: MonthSink(store=data_dir / name, append=args.append,
+                                       on_write=hook(data_dir / name, args, prefix=prefixes[name]) if hook else None)
+                     for camera, data_dir in data_dirs.items()}
+        sinks[name] = SinkRouter(by_camera, profiles.camera_name) if profiles else by_camera[None]
+    budget = budget_from_args(args, args.profiles if profiles else args.data_dir)
+    runs, all_months, interrupted = run_pipeline(
+        folder, analyzers, workers=args.workers,
+        date_before=getattr(args, "before", None), date_after=getattr(args, "after", None), catalog=args.catalog,
+        sinks=sinks, top_k=args.limit, recall=False, budget=budget, cache=cache_from_args(args),
+        frame_key=frame_key, profile=stage_profile_from_args(args), metrics=metrics,
+    )
+    for name, module in modules.items():
+        run = runs[name]
+        print_top(run.top.best() if run.top else [], args.limit, module.REPORT_TITLE,
+                  profiles.url_of if profiles else module.BASE_URL)
+        print(f"\n{name}: scanned {run.scanned} images, kept {run.kept} above threshold "
+              f"{run.analyzer.threshold}" + "".join(f", {n} {reason}" for reason, n in run.skipped.items()))
+
+    if budget is not None and budget.expired:
+        return
+    if interrupted:
+        print("\nScan was interrupted — only completed months were written.")
+        raise SystemExit(1)
+    for name in modules:
+        sinks[name].close(all_months)
+        if getattr(args, "export_json", False):
+            for data_dir in data_dirs.values():
+                for path in ResultStore(data_dir / name).export_json(data_dir, name):
+                    print(f"Exported {path}")
+
+
+if __name__ == "__main__":
+    main()
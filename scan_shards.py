@@ -0,0 +1,283 @@
+"""
+scan_shards.py — split a scan across several machines or processes that
+share a directory, and merge their partial results.
+
+A shard is one month of one camera: camera/YYYYMM with --profiles (see
+camera_profiles.py), YYYYMM without. The shard list depends only on the
+archive, so every host running the same command sees the same shards. Start
+the same scan with --shard-dir on each host. Each host claims the newest
+shard that is neither done nor leased, scans it with its own worker pool and
+writes a partial result file. It then moves on to the next shard until none
+are left:
+
+    DIR/leases/<shard>.lease               held while a shard is scanned
+    DIR/partials/<analyzer>/<shard>.json   one shard's results and scanned months
+
+A lease is a file created with O_EXCL and touched every --lease-seconds / 3
+while its shard runs. A lease not touched for --lease-seconds belongs to a
+host that died and is taken over, under DIR/leases/<shard>.lease.lock so
+only one host does. Hosts never talk to each other, only to
+the directory, so several local processes work the same way (and are how
+the tests run it). A shard whose partials all exist is done. Reusing a shard
+directory resumes an interrupted rescan; start a fresh one for a new rescan.
+
+When the hosts are finished, merge the partials into data/<analyzer>-YYYY.json
+(per camera data directory) with the usual month-replace rules. The result
+store data/<analyzer>/ is updated too when there is one:
+
+    # on each box that mounts the archive (and the shared directory)
+    python3 scan_pipeline.py . --profiles cameras.json --shard-dir /Volumes/homes/cl/rescan-2026 \\
+        --people-civil-day --people-threshold 0.2
+    python3 scan_shards.py status /Volumes/homes/cl/rescan-2026
+    python3 scan_shards.py merge /Volumes/homes/cl/rescan-2026
+"""
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from camera_profiles import month_folders
+from result_store import locked, write_atomic
+from scan_pipeline import run_pipeline, timestamp_of, write_results, write_results_store
+
+LEASE_SECONDS = 900
+
+
+def shard_list(found):
+    """
+    [(shard, camera name or None, YYYYMM, folder)] for [(camera or None, folder)],
+    newest month first. A day folder is its own month's shard.
+    """
+    shards = []
+    for camera, folder in found:
+        folder = Path(folder)
+        for ym, month_dir in month_folders(folder):
+            shard = f"{camera.name}/{ym}" if camera is not None else ym
+            scan = folder if len(folder.parts) > len(month_dir.parts) else month_dir
+            shards.append((shard, camera.name if camera is not None else None, ym, scan))
+    return sorted(shards, key=lambda s: (s[2], s[0]), reverse=True)
+
+
+class Lease:
+    """A claimed shard: renews its lease file in the background until released."""
+
+    def __init__(self, path, token, seconds):
+        self.path = path
+        self.token = token
+        self.seconds = seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _ours(self):
+        try:
+            return self.path.read_text() == self.token
+        except OSError:
+            return False
+
+    def _renew(self):
+        while not self._stop.wait(self.seconds / 3):
+            if self._ours():
+                os.utime(self.path)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._renew, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if self._ours():
+            self.path.unlink(missing_ok=True)
+
+
+class ShardDir:
+    """The shared directory: leases, partial results, and which shards are done."""
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+
+    def lease_path(self, shard):
+        return self.path / "leases" / f"{shard}.lease"
+
+    def partial_path(self, shard, analyzer):
+        return self.path / "partials" / analyzer / f"{shard}.json"
+
+    def is_done(self, shard, analyzers):
+        return all(self.partial_path(shard, name).exists() for name in analyzers)
+
+    def lease_age(self, shard):
+        """Seconds since the shard's lease was last renewed, or None if it has none."""
+        try:
+            return time.time() - self.lease_path(shard).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def claim(self, shard):
+        """A Lease on the shard, or None if another process holds a live one."""
+        path = self.lease_path(shard)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        age = self.lease_age(shard)
+        if age is not None:
+            if age < self.lease_seconds:
+                return None
+            # Expired: take it over under the lease's lock, checking again there,
+            # so a host that saw the same expired lease can't remove the fresh one
+            # the first taker just created
+            with locked(path):
+                age = self.lease_age(shard)
+                if age is not None:
+                    if age < self.lease_seconds:
+                        return None
+                    path.unlink(missing_ok=True)
+        token = f"{socket.gethostname()} {os.getpid()} {uuid.uuid4().hex}"
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w") as f:
+            f.write(token)
+        return Lease(path, token, self.lease_seconds)
+
+    def write_partial(self, shard, analyzer, camera, data_dir, results, months):
+        path = self.partial_path(shard, analyzer)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps({
+            "shard": shard,
+            "analyzer": analyzer,
+            "camera": camera,
+            "data": str(data_dir),
+            "months": sorted(months),
+            "host": socket.gethostname(),
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "results": sorted(({"timestamp": timestamp_of(frame), "score": round(score, 4)}
+                               for score, frame in results), key=lambda x: x["timestamp"]),
+        }, separators=(",", ":")))
+
+    def partials(self):
+        for path in sorted((self.path / "partials").rglob("*.json")):
+            yield json.loads(path.read_text())
+
+
+def scan_shards(shard_dir, found, analyzers, data_dirs, lease_seconds=LEASE_SECONDS, **pipeline_args):
+    """
+    Claim and scan shards of found ([(camera or None, folder)]) until every
+    one is done or leased by another process. data_dirs maps camera name (None
+    without profiles) to the data directory merge() writes its results to.
+    pipeline_args go to run_pipeline(). Returns the number of shards scanned here.
+    """
+    work = ShardDir(shard_dir, lease_seconds)
+    names = [a.name for a in analyzers]
+    shards = shard_list(found)
+    print(f"{len(shards)} shards in {shard_dir}")
+    scanned = 0
+    claimed = True
+    while claimed:
+        # Keep passing over the list: a lease that expires meanwhile is taken over
+        claimed = False
+        for shard, camera, ym, folder in shards:
+            if work.is_done(shard, names):
+                continue
+            lease = work.claim(shard)
+            if lease is None:
+                continue
+            claimed = True
+            with lease:
+                if work.is_done(shard, names):
+                    continue    # finished by another host since the check above
+                print(f"\n── Shard {shard}: {folder}")
+                runs, all_months, interrupted = run_pipeline(str(folder), analyzers, recall=False,
+                                                             **pipeline_args)
+                if interrupted:
+                    print(f"\nShard {shard} was interrupted — left for the next run.")
+                    raise SystemExit(1)
+                months = {key[-6:] for key in all_months}
+                for name in names:
+                    run = runs[name]
+                    work.write_partial(shard, name, camera, data_dirs[camera], run.results, months)
+                    print(f"{name}: {run.kept} of {run.scanned} frames above threshold {run.analyzer.threshold}")
+            scanned += 1
+    done = sum(work.is_done(shard, names) for shard, *_ in shards)
+    print(f"\nScanned {scanned} shard(s) here; {done} of {len(shards)} done in {shard_dir}")
+    if done < len(shards):
+        print("The rest are leased by other hosts. Run merge when they have finished.")
+    return scanned
+
+
+def merge(shard_dir):
+    """
+    Merge every partial in shard_dir into <data>/<analyzer>-YYYY.json, and
+    into the result store <data>/<analyzer>/ where one exists. Each partial's
+    months are replaced, so merging twice gives the same files.
+    """
+    groups = {}
+    for partial in ShardDir(shard_dir).partials():
+        for ym in partial["months"]:
+            key = (partial["data"], partial["analyzer"], ym[:4])
+            groups.setdefault(key, ([], set()))[1].add(ym)
+        for entry in partial["results"]:
+            key = (partial["data"], partial["analyzer"], entry["timestamp"][:4])
+            # write_results() takes (score, frame path); a bare timestamp is a path with that stem
+            groups.setdefault(key, ([], set()))[0].append((entry["score"], Path(entry["timestamp"])))
+    for (data, analyzer, year), (results, months) in sorted(groups.items()):
+        write_results(Path(data) / f"{analyzer}-{year}.json", results, months)
+        store = Path(data) / analyzer
+        if store.is_dir():
+            write_results_store(store, results, months)
+            if analyzer == "aurora":
+                from aurora_events import update_events
+                update_events(store, months)
+    return len(groups)
+
+
+def status(shard_dir, lease_seconds=LEASE_SECONDS):
+    work = ShardDir(shard_dir, lease_seconds)
+    done = {}
+    for partial in work.partials():
+        done.setdefault(partial["shard"], []).append(f"{partial['analyzer']} on {partial['host']} "
+                                                     f"{partial['finished']}")
+    for shard, lines in sorted(done.items()):
+        print(f"done    {shard}: " + "; ".join(lines))
+    for lease in sorted((work.path / "leases").rglob("*.lease")):
+        shard = str(lease.relative_to(work.path / "leases"))[:-len(".lease")]
+        age = work.lease_age(shard)
+        if age is None:
+            continue
+        owner = lease.read_text().rsplit(" ", 1)[0]
+        state = "leased " if age < lease_seconds else "expired"
+        print(f"{state} {shard}: {owner}, renewed {age:.0f} s ago")
+
+
+def add_shard_arguments(parser):
+    parser.add_argument("--shard-dir", metavar="DIR",
+                        help="Claim camera/month shards from this shared directory, scan them and write partial "
+                             "results there, for scanning on several hosts at once (see scan_shards.py)")
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS,
+                        help="With --shard-dir: a shard lease not renewed for this long is taken over")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    m = sub.add_parser("merge", help="Merge the partial results into data/<analyzer>-YYYY.json (and stores)")
+    m.add_argument("shard_dir")
+    s = sub.add_parser("status", help="List done, leased and expired shards")
+    s.add_argument("shard_dir")
+    s.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS)
+    args = parser.parse_args()
+
+    if args.command == "merge":
+        print(f"Merged {merge(args.shard_dir)} analyzer-year file(s)")
+    else:
+        status(args.shard_dir, args.lease_seconds)
+
+
+if __name__ == "__main__":
+    main()
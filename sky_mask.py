@@ -0,0 +1,161 @@
+"""
+sky_mask.py
+
+Per-camera, per-era sky masks for the aurora score. Without one,
+aurora_score_image() looks at the top 65% of every frame, mountains,
+horizon and shore lights included. A mask says which part of the frame is
+actually sky; the score then only looks at those pixels, which is less work
+and removes the ground lights that score as faint green patches.
+
+Masks are kept in a JSON file:
+
+    {"masks": [
+      {"name": "lillevik-4k", "size": [3840, 2160], "from": "20250726",
+       "sky": ["0.0,0.0,1.0,0.45", [[0.0, 0.45], [1.0, 0.45], [1.0, 0.52], [0.0, 0.58]]],
+       "exclude": ["0.52,0.40,0.61,0.50"]},
+      {"name": "lillevik-old", "size": [2560, 1920], "until": "20250725",
+       "sky": ["0.0,0.0,1.0,0.55"]}
+    ]}
+
+Regions are fractions of the full frame (0–1), either a rectangle
+"x1,y1,x2,y2" as in people_scan.py --exclude-zone, or a polygon of [x, y]
+points. The mask is the union of the "sky" regions minus the "exclude"
+regions. For a frame, the first mask whose aspect ratio matches the decoded
+image (so full frames, 1/4 decodes and mini/ thumbnails all match) and whose
+"from"/"until" dates (YYYYMMDD, inclusive) cover the frame is used. Frames
+without a match keep the 65% crop.
+
+At the scorer's working size the mask is turned into a flat index of the sky
+pixels once per image size and reused for every frame.
+
+Draw a mask over a frame to calibrate it:
+
+    python3 sky_mask.py sky_masks.json /path/to/images/2026/01/15/20260115223019.jpg -o /tmp/mask.jpg
+
+Requires: opencv-python, numpy
+"""
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Aspect ratios within this fraction of each other count as the same camera framing.
+ASPECT_TOLERANCE = 0.02
+
+
+def parse_region(region):
+    """A rectangle "x1,y1,x2,y2" or a list of [x, y] points → polygon as an N×2 float array."""
+    if isinstance(region, str):
+        try:
+            x1, y1, x2, y2 = (float(v) for v in region.split(","))
+        except ValueError:
+            raise ValueError(f"Invalid region '{region}': expected x1,y1,x2,y2 as fractions 0–1")
+        return np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+    points = np.array(region, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+        raise ValueError(f"Invalid region {region!r}: expected a list of at least three [x, y] points")
+    return points
+
+
+class SkyMask:
+    """The sky part of one camera's frames over a date range."""
+
+    def __init__(self, name, sky, exclude=(), size=None, start=None, end=None):
+        self.name = name
+        self.sky = [parse_region(r) for r in sky]
+        self.exclude = [parse_region(r) for r in exclude]
+        self.aspect = size[0] / size[1] if size else None
+        self.start = start
+        self.end = end
+        # Lowest sky row as a fraction of the frame height: the crop the scorer resizes
+        self.bottom = min(1.0, max(float(p[:, 1].max()) for p in self.sky))
+        self._indexes = {}
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(entry.get("name", "mask"), entry["sky"], entry.get("exclude", ()),
+                   entry.get("size"), entry.get("from"), entry.get("until"))
+
+    def matches(self, shape, dt=None):
+        """Whether the mask applies to an image of this shape taken at dt (None: any date)."""
+        h, w = shape[:2]
+        if self.aspect is not None and abs(w / h - self.aspect) > self.aspect * ASPECT_TOLERANCE:
+            return False
+        if dt is not None:
+            day = dt.strftime("%Y%m%d")
+            if (self.start and day < self.start) or (self.end and day > self.end):
+                return False
+        return True
+
+    def render(self, width, height, bottom=1.0):
+        """uint8 mask (255 = sky) of the top `bottom` of a width×height frame, at width×height."""
+        # Drawn at 4× and averaged down, so a pixel is sky when most of it
+        # is (fillPoly includes the edge pixels of every polygon).
+        mask = np.zeros((height * 4, width * 4), np.uint8)
+        to_pixels = np.array([width * 4, height * 4 / bottom])
+        for polygons, value in ((self.sky, 255), (self.exclude, 0)):
+            for points in polygons:
+                cv2.fillPoly(mask, [np.round(points * to_pixels).astype(np.int32)], value)
+        mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_AREA)
+        return np.where(mask > 127, 255, 0).astype(np.uint8)
+
+    def index(self, height, width):
+        """Flat indices of the sky pixels in a height×width crop of the top `bottom` of a frame."""
+        key = (height, width)
+        if key not in self._indexes:
+            self._indexes[key] = np.flatnonzero(self.render(width, height, self.bottom))
+        return self._indexes[key]
+
+
+def load_masks(path):
+    """[SkyMask] from a sky mask JSON file, in file order."""
+    data = json.loads(Path(path).read_text())
+    return [SkyMask.from_dict(entry) for entry in data["masks"]]
+
+
+def select_mask(masks, shape, dt=None):
+    """The first of masks that matches an image of this shape taken at dt, or None."""
+    return next((m for m in masks or () if m.matches(shape, dt)), None)
+
+
+def overlay(img, mask):
+    """img with the non-sky part darkened and the scored crop line drawn, for calibration."""
+    h, w = img.shape[:2]
+    small = min(w, 1280)
+    sky = cv2.resize(mask.render(small, round(h * small / w)), (w, h), interpolation=cv2.INTER_NEAREST) > 0
+    out = img.copy()
+    out[~sky] = (out[~sky] * 0.35).astype(np.uint8)
+    y = int(h * mask.bottom)
+    cv2.line(out, (0, min(y, h - 1)), (w - 1, min(y, h - 1)), (0, 128, 255), max(1, h // 400))
+    cv2.putText(out, f"{mask.name}: {sky.mean():.0%} of frame is sky", (10, max(20, h // 30)),
+                cv2.FONT_HERSHEY_SIMPLEX, max(0.5, h / 1000), (0, 128, 255), max(1, h // 500))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("masks", help="Sky mask JSON file")
+    parser.add_argument("image", help="Frame to draw the matching mask on")
+    parser.add_argument("-o", "--output", required=True, help="Output image")
+    args = parser.parse_args()
+
+    img = cv2.imread(args.image)
+    if img is None:
+        raise SystemExit(f"Cannot read {args.image}")
+    try:
+        dt = datetime.strptime(Path(args.image).stem[-14:], "%Y%m%d%H%M%S")
+    except ValueError:
+        dt = None
+    mask = select_mask(load_masks(args.masks), img.shape, dt)
+    if mask is None:
+        raise SystemExit(f"No mask in {args.masks} matches {args.image} ({img.shape[1]}×{img.shape[0]})")
+    cv2.imwrite(args.output, overlay(img, mask))
+    print(f"{mask.name} → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+stage_profile.py — per-stage timing of scans (--profile).
+
+With --profile every worker times each stage of each frame: the read, the
+JPEG decode, each analyzer's prefilter and score, and the steps inside the
+scorers (aurora: crop/resize, HSV, blur, connected components; people: the
+foreground mask and YOLO). The parent folds the samples into log-scale
+histograms and prints wall-time percentiles per stage, with CPU time next
+to wall time. CPU time is the process's, so a YOLO step that uses several
+cores shows cpu/wall above 1, and a read that waits on the NAS shows well below.
+
+    python3 aurora_scan.py /path/to/images/2026/01 --profile
+    python3 people_scan.py /path/to/images/2026/07/15 --civil-day --profile --profile-dump /tmp/people.json
+
+--profile-dump FILE also profiles one worker in detail. FILE.prof gets that
+worker's cProfile statistics (python3 -m pstats FILE.prof, snakeviz).
+FILE.json gets a timeline of its stages in speedscope's format: open it at
+https://www.speedscope.app.
+
+Without --profile stage() returns a shared no-op context manager, so the
+cost is one function call per stage.
+
+Requires: nothing beyond the standard library
+"""
+
+import cProfile
+import json
+import math
+import os
+import time
+from collections import Counter
+from contextlib import nullcontext
+from multiprocessing import util
+from pathlib import Path
+
+_NULL = nullcontext()
+_recorder = None            # this worker's _Recorder while profiling, else None
+
+# Histogram resolution: buckets per decade of seconds (about 12% wide)
+BUCKETS_PER_DECADE = 20
+MIN_SECONDS = 1e-7
+MAX_EVENTS = 500_000        # cap on timeline events kept for a .json dump
+
+
+def stage(name):
+    """Context manager that times one stage of the current frame; a no-op unless profiling."""
+    if _recorder is None:
+        return _NULL
+    return _Stage(_recorder, name)
+
+
+def record(name, wall, cpu):
+    """Add an already measured stage (e.g. a read on a read-ahead thread) to the current frame."""
+    if _recorder is not None:
+        _recorder.add(name, wall, cpu)
+
+
+def frame(index):
+    """Later stages belong to frame `index` of the current task."""
+    if _recorder is not None:
+        _recorder.current = _recorder.frames.setdefault(index, {})
+
+
+def take():
+    """The current task's per-frame samples, [{stage: (wall, cpu)}], and start a new task."""
+    if _recorder is None:
+        return None
+    frames = [f for _, f in sorted(_recorder.frames.items()) if f]
+    _recorder.frames = {}
+    _recorder.current = {}
+    return frames
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "wall", "cpu")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        if self.recorder.events is not None:
+            self.recorder.event("O", self.name, self.wall)
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter()
+        self.recorder.add(self.name, wall - self.wall, time.process_time() - self.cpu)
+        if self.recorder.events is not None:
+            self.recorder.event("C", self.name, wall)
+
+
+class _Recorder:
+    def __init__(self, timeline=False):
+        self.frames = {}
+        self.current = {}
+        self.events = [] if timeline else None
+        self.open = []
+        self.names = {}
+        self.start = time.perf_counter()
+
+    def add(self, name, wall, cpu):
+        w, c = self.current.get(name, (0.0, 0.0))
+        self.current[name] = (w + wall, c + cpu)
+
+    def event(self, kind, name, at):
+        # Balanced open/close pairs only: past the cap no new stage is opened,
+        # but the ones already open still close.
+        if kind == "O":
+            self.open.append(len(self.events) < MAX_EVENTS)
+            if not self.open[-1]:
+                return
+        elif not self.open.pop():
+            return
+        self.events.append({"type": kind, "frame": self.names.setdefault(name, len(self.names)),
+                            "at": at - self.start})
+
+    def speedscope(self):
+        events = self.events
+        end = events[-1]["at"] if events else 0.0
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name} for name in self.names]},
+            "profiles": [{"type": "evented", "name": f"scan worker {os.getpid()}", "unit": "seconds",
+                          "startValue": 0.0, "endValue": end, "events": events}],
+            "exporter": "webcam stage_profile.py",
+        }
+
+
+def start_worker(dump=None):
+    """
+    Turn profiling on in this worker process (scan_pipeline._worker_init()).
+    dump: the --profile-dump file. The first worker to create it profiles
+    itself in detail and writes it when the pool shuts down.
+    """
+    global _recorder
+    detailed = False
+    if dump:
+        try:
+            os.close(os.open(dump, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            detailed = True
+        except FileExistsError:
+            pass
+    _recorder = _Recorder(timeline=detailed and str(dump).endswith(".json"))
+    if not detailed:
+        return
+    if _recorder.events is not None:
+        util.Finalize(None, _write_timeline, args=(dump,), exitpriority=10)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        util.Finalize(None, _write_cprofile, args=(profiler, dump), exitpriority=10)
+
+
+def _write_timeline(path):
+    Path(path).write_text(json.dumps(_recorder.speedscope(), separators=(",", ":")))
+
+
+def _write_cprofile(profiler, path):
+    profiler.disable()
+    profiler.dump_stats(path)
+
+
+class Histogram:
+    """Log-scale histogram of durations: percentiles to about 12% in constant memory."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0.0
+        self.n = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[math.floor(math.log10(max(seconds, MIN_SECONDS)) * BUCKETS_PER_DECADE)] += 1
+        self.total += seconds
+        self.n += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile (seconds), never above max."""
+        rank = p / 100 * self.n
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(10 ** ((bucket + 1) / BUCKETS_PER_DECADE), self.max)
+        return self.max
+
+
+class StageProfile:
+    """Parent side of --profile: folds the workers' samples into per-stage histograms."""
+
+    def __init__(self, dump=None):
+        self.dump = str(dump) if dump else None
+        self.wall = {}
+        self.cpu = Counter()
+        self.frames = 0
+
+    def begin(self):
+        """Before the pool starts: clear a dump from an earlier run, so a worker can claim it."""
+        if self.dump:
+            Path(self.dump).unlink(missing_ok=True)
+
+    def add(self, frames):
+        for stages in frames or ():
+            self.frames += 1
+            for name, (wall, cpu) in stages.items():
+                self.wall.setdefault(name, Histogram()).add(wall)
+                self.cpu[name] += cpu
+
+    def summary(self):
+        if not self.wall:
+            return "Stage profile: no frames"
+        lines = [f"Stage profile ({self.frames} frames; ms per frame that ran the stage):",
+                 f"  {'stage':<22}{'frames':>8}{'total s':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+                 f"{'cpu/wall':>10}"]
+        for name, h in sorted(self.wall.items(), key=lambda kv: -kv[1].total):
+            ms = [h.percentile(p) * 1000 for p in (50, 90, 99)] + [h.max * 1000]
+            ratio = self.cpu[name] / h.total if h.total else 0.0
+            lines.append(f"  {name:<22}{h.n:>8}{h.total:>10.1f}" + "".join(f"{v:>9.2f}" for v in ms)
+                         + f"{ratio:>10.2f}")
+        if self.dump:
+            lines.append(f"Detailed profile of one worker: {self.dump}")
+        return "\n".join(lines)
+
+
+def add_stage_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="Time every stage of every frame (read, decode, scoring steps) and print "
+                             "per-stage percentiles at the end")
+    parser.add_argument("--profile-dump", metavar="FILE",
+                        help="With --profile: also profile one worker in detail, to FILE.prof (cProfile) "
+                             "or FILE.json (speedscope timeline of its stages)")
+
+
+def stage_profile_from_args(args):
+    """StageProfile for --profile / --profile-dump, or None."""
+    if not (args.profile or args.profile_dump):
+        return None
+    return StageProfile(args.profile_dump)
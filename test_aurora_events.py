@@ -0,0 +1,71 @@
+"""
+test_aurora_events.py
+
+Checks aurora_events.py: frames split into events on gaps and at noon, peak
+and duration bookkeeping, and incremental updates of the per-year events
+file when only one month is rewritten (including a night that crosses into
+the next month), and events from data/aurora-YYYY.json files across New Year.
+
+Run with pytest: pytest test_aurora_events.py -v
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from aurora_events import group_events, load_events, update_events
+from result_store import ResultStore
+
+
+def _e(ts, score):
+    return {"timestamp": ts, "score": score}
+
+
+def test_group_events_splits_on_gaps_and_nights():
+    events = group_events([
+        _e("20260115221000", 0.2), _e("20260115222000", 0.6), _e("20260115224000", 0.3),
+        _e("20260115233000", 0.4),                               # 50 min gap: new event
+        _e("20260116110000", 0.2), _e("20260116121000", 0.3),  # noon splits nights
+    ], gap_minutes=30)
+    assert [(ev["start"], ev["end"], ev["frames"]) for ev in events] == [
+        ("20260115221000", "20260115224000", 3),
+        ("20260115233000", "20260115233000", 1),
+        ("20260116110000", "20260116110000", 1),
+        ("20260116121000", "20260116121000", 1),
+    ]
+    first = events[0]
+    assert (first["peak"], first["peak_score"], first["minutes"]) == ("20260115222000", 0.6, 30)
+    assert [ev["night"] for ev in events] == ["2026-01-15", "2026-01-15", "2026-01-15", "2026-01-16"]
+
+
+def test_update_events_recomputes_only_written_nights():
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = Path(tmp) / "aurora"
+        store = ResultStore(store_dir)
+        store.write([_e("20260110220000", 0.5),
+                     _e("20260131235000", 0.3), _e("20260201000000", 0.7)], {"202601", "202602"})
+        update_events(store_dir, {"202601", "202602"})
+        events = load_events(store_dir, "2026")
+        assert [(ev["night"], ev["frames"], ev["peak"]) for ev in events] == [
+            ("2026-01-10", 1, "20260110220000"),
+            ("2026-01-31", 2, "20260201000000"),
+        ]
+
+        # A February rescan adds a frame to the night that began on Jan 31
+        store.write([_e("20260201000000", 0.7), _e("20260201001000", 0.9)], {"202602"})
+        update_events(store_dir, {"202602"})
+        events = load_events(store_dir, "2026")
+        assert [(ev["night"], ev["frames"], ev["peak"]) for ev in events] == [
+            ("2026-01-10", 1, "20260110220000"),
+            ("2026-01-31", 3, "20260201001000"),
+        ]
+
+
+def test_update_events_from_yearly_json_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "aurora-2025.json").write_text(json.dumps([_e("20251231233000", 0.4)]))
+        (Path(tmp) / "aurora-2026.json").write_text(json.dumps([_e("20260101000000", 0.6)]))
+        update_events(Path(tmp) / "aurora-2025.json", {"202512"})
+        events = load_events(tmp, "2025")
+        assert [(ev["night"], ev["frames"], ev["peak"]) for ev in events] == [
+            ("2025-12-31", 2, "20260101000000")]
@@ -233,5 +233,66 @@ try:
         os.unlink(tmp.name)
         assert score < 0.08, f"Bright sky score {score:.3f} should be suppressed"
 
+    def test_mini_prescreen_tracks_full_score():
+        import numpy as np, cv2, tempfile, os
+        from aurora_scan import aurora_score, aurora_score_mini
+        # Green aurora patch on dark sky, saved full size and as a 160×120 mini
+        h, w = 1920, 2560
+        img = np.zeros((h, w, 3), dtype=np.uint8)
+        sky_h = int(h * 0.65)
+        hsv = np.zeros((sky_h, w, 3), dtype=np.uint8)
+        hsv[:, :, 2] = 15
+        hsv[:300, :700, 0] = 60
+        hsv[:300, :700, 1] = 180
+        hsv[:300, :700, 2] = 40
+        img[:sky_h] = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        tmpdir = tempfile.mkdtemp()
+        full = os.path.join(tmpdir, "20260115220000.jpg")
+        mini = os.path.join(tmpdir, "mini.jpg")
+        cv2.imwrite(full, img)
+        cv2.imwrite(mini, cv2.resize(img, (160, 120), interpolation=cv2.INTER_AREA))
+        full_score = aurora_score(full)
+        mini_score = aurora_score_mini(mini)
+        os.unlink(full)
+        os.unlink(mini)
+        os.rmdir(tmpdir)
+        assert full_score >= 0.08
+        assert abs(mini_score - full_score) < 0.03, f"mini {mini_score:.3f} vs full {full_score:.3f}"
+
+    def test_dedupe_signature_near_duplicates():
+        import numpy as np, cv2
+        from frame_hash import signature_of, near_duplicate
+        rng = np.random.default_rng(1)
+        night = np.full((270, 480, 3), 12, dtype=np.uint8)
+        night[:100, 200:300] = 30   # a few lit clouds
+        noisy = np.clip(night.astype(np.int16) + rng.integers(-2, 3, night.shape), 0, 255).astype(np.uint8)
+        # Same structure, but the whole sky has turned aurora green
+        green = night.copy()
+        green[:150, :, 1] = 90
+        a, b, c = (signature_of(img) for img in (night, noisy, green))
+        assert near_duplicate(a, b, max_distance=4)
+        assert not near_duplicate(a, c, max_distance=4)
+
+    def test_batch_scores_match_per_frame():
+        import numpy as np, cv2
+        from aurora_scan import FEATURES, aurora_score_sky, aurora_scores_batch, sky_crop
+        rng = np.random.default_rng(3)
+        skies = []
+        for i in range(12):
+            img = rng.integers(0, 40, (240, 320, 3), dtype=np.uint8)
+            if i % 3 == 0:
+                cv2.ellipse(img, (160, 50), (90, 18), 0, 0, 360, (60, 200, 90), -1)   # green band
+            if i % 4 == 0:
+                cv2.circle(img, (60, 40), 15, (200, 180, 40), -1)                 # teal-only blob
+            if i == 5:
+                img[:] = 130                                                      # twilight
+            skies.append(sky_crop(img))
+        features, scores = aurora_scores_batch(np.stack(skies))
+        reference = [aurora_score_sky(sky) for sky in skies]
+        assert features.shape == (12, len(FEATURES))
+        assert np.allclose(scores, reference, atol=1e-3)
+        assert scores[0] > 0.08 and scores[5] == 0.0
+        assert features[4, FEATURES.index("cc_teal")] > features[4, FEATURES.index("cc_classic")]
+
 except ImportError:
     pass
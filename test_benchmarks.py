@@ -0,0 +1,38 @@
+"""
+test_benchmarks.py
+
+Checks benchmarks.py: a quick run of the discovery, sun and result-merge
+benchmarks gives a time and a rate per item, and compare flags a benchmark
+slower than the tolerance but not one within it.
+
+Run with pytest: pytest test_benchmarks.py -v
+"""
+
+import tempfile
+
+from benchmarks import compare, run_benchmarks, synthetic_frame, synthetic_tree
+from scan_pipeline import frame_paths
+
+
+def test_quick_run():
+    with tempfile.TemporaryDirectory() as tmp:
+        assert synthetic_tree(tmp, 1, 4) == 4 * 31 == sum(1 for _ in frame_paths(tmp))
+    assert synthetic_frame(320, 240).startswith(b"\xff\xd8")
+
+    results = run_benchmarks(["discovery.*", "sun.*", "results.*"], quick=True, rounds=1)
+    assert set(results) == {"discovery.frame_paths", "discovery.collect_work", "sun.find_sun_times",
+                            "sun.is_aurora_time", "results.write_json", "results.write_store"}
+    for r in results.values():
+        assert r["median"] > 0 and r["per_second"] > 0 and r["rounds"] == 1
+    assert results["discovery.frame_paths"]["unit"] == "file" and results["sun.find_sun_times"]["items"] == 365
+
+
+def test_compare():
+    baseline = {"benchmarks": {"a": {"median": 1.0}, "b": {"median": 2.0}, "c": {"median": 1.0},
+                               "gone": {"median": 1.0}}}
+    current = {"benchmarks": {"a": {"median": 1.3}, "b": {"median": 2.2}, "c": {"median": 0.5},
+                              "new": {"median": 1.0}, "people": {"skipped": "no ultralytics"}}}
+    rows, regressions = compare(baseline, current, tolerance=0.15)
+    assert regressions == ["a"]
+    assert [name for name, *_ in rows] == ["a", "b", "c"]
+    assert compare(baseline, current, tolerance=0.5)[1] == []
@@ -0,0 +1,94 @@
+"""
+test_camera_profiles.py
+
+Checks camera_profiles.py and multi-camera scans: a frame's camera and era
+from its path and date, per-era background names, and one pipeline pass
+over two camera roots with the same timestamps, each camera scored with its
+own sky mask and written to its own store.
+
+Run with pytest: pytest test_camera_profiles.py -v
+"""
+
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from aurora_scan import AuroraAnalyzer
+from camera_profiles import load_profiles, month_folders
+from result_store import ResultStore
+from scan_pipeline import MonthSink, SinkRouter, run_pipeline
+
+
+def _profiles(tmp, **roots):
+    path = Path(tmp) / "cameras.json"
+    path.write_text(json.dumps({"cameras": [
+        {"name": "a", "root": roots.get("a", f"{tmp}/a"), "url": "https://example.org/a/?image=",
+         "data": f"{tmp}/data-a",
+         "eras": [{"name": "old", "until": "20250725", "size": [4, 3], "exclude_zones": ["0,0,1,0.68"]},
+                  {"name": "new", "from": "20250726", "size": [16, 9], "exclude_zones": ["0,0,1,0.6"],
+                   "sky": ["0,0,1,0.4"]}]},
+        {"name": "b", "root": roots.get("b", f"{tmp}/b"), "url": "https://example.org/b/?image=",
+         "data": f"{tmp}/data-b"},
+    ]}))
+    return path
+
+
+def test_camera_and_era_of_a_frame():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = load_profiles(_profiles(tmp))
+        a, b = profiles.cameras
+        camera, era = profiles.era_of(Path(tmp) / "a/2025/07/25/20250725120000.jpg")
+        assert (camera.name, era.name, era.exclude_zones) == ("a", "old", [(0.0, 0.0, 1.0, 0.68)])
+        assert profiles.era_of(Path(tmp) / "a/2025/07/26/20250726120000.jpg")[1].name == "new"
+        assert profiles.era_of(Path(tmp) / "b/2026/01/15/Viktun_01_20260115120000.jpg")[1].name == "all"
+        assert profiles.frame_key(Path(tmp) / "b/2026/01/15/Viktun_01_20260115120000.jpg") == "b/20260115120000"
+        assert profiles.url_of(Path(tmp) / "a/x.jpg") == "https://example.org/a/?image="
+        with pytest.raises(ValueError):
+            profiles.camera_of(Path(tmp) / "c/2026/01/15/20260115120000.jpg")
+
+        # The month of the camera change has one background per era
+        assert a.background_path(a.eras[0], "202507").name == "background-2025-07-old.png"
+        assert a.background_path(a.eras[1], "202508").name == "background-2025-08.png"
+        assert [m.name for m in a.sky_masks] == ["a-new"] and b.sky_masks == []
+        assert [c.name for c in load_profiles(_profiles(tmp), "b").cameras] == ["b"]
+        with pytest.raises(ValueError):
+            load_profiles(_profiles(tmp), "a,c")
+
+        for ym in ("2026/01", "2026/02"):
+            (Path(tmp) / "a" / ym / "15").mkdir(parents=True)
+        assert [ym for ym, _ in month_folders(Path(tmp) / "a")] == ["202601", "202602"]
+        assert month_folders(Path(tmp) / "a/2026/02/15") == [("202602", Path(tmp) / "a/2026/02")]
+
+
+def test_one_pass_over_two_cameras():
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = load_profiles(_profiles(tmp))
+        rng = np.random.default_rng(3)
+        img = rng.integers(0, 20, (360, 640, 3), dtype=np.uint8)
+        cv2.rectangle(img, (200, 170), (420, 200), (60, 200, 90), -1)   # green lights at y 47–56%
+        for camera in ("a", "b"):
+            day = Path(tmp) / camera / "2026/01/15"
+            day.mkdir(parents=True)
+            for ts in ("20260115220000", "20260115230000"):
+                cv2.imwrite(str(day / f"{ts}.jpg"), img)
+
+        sinks = {"aurora": SinkRouter({c.name: MonthSink(store=c.data / "aurora") for c in profiles.cameras},
+                                      profiles.camera_name)}
+        folders = [f for _, f in profiles.folders("2026")]
+        runs, months, _ = run_pipeline(folders, [AuroraAnalyzer(0.1, profiles=profiles)], workers=2,
+                                       sinks=sinks, frame_key=profiles.frame_key)
+        sinks["aurora"].close(months)
+
+        assert months == {"a/202601", "b/202601"}
+        assert runs["aurora"].scanned == 4
+        # Camera a's sky mask stops above the lights; camera b scores the whole crop
+        assert [e["timestamp"] for e in ResultStore(Path(tmp) / "data-a/aurora").entries()] == []
+        assert [e["timestamp"] for e in ResultStore(Path(tmp) / "data-b/aurora").entries()] == [
+            "20260115220000", "20260115230000"]
+        assert profiles.era_of(folders[0] / "01/15/20260115220000.jpg")[1].sky_mask.matches(img.shape,
+                                                                                         datetime(2026, 1, 15))
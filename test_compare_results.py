@@ -0,0 +1,38 @@
+"""
+test_compare_results.py
+
+Checks util/compare_results.py: rows loaded from several files per side,
+recall, precision and agreement of a candidate scan against a reference
+at a detection threshold, and the score difference on shared frames.
+
+Run with pytest: pytest test_compare_results.py -v
+"""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / "util"))
+from compare_results import compare, load_rows  # noqa: E402
+
+
+def test_load_and_compare():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = Path(tmp) / "2025.json", Path(tmp) / "2026.json"
+        a.write_text(json.dumps([{"timestamp": "20251231120000", "score": 0.9}]))
+        b.write_text(json.dumps([{"timestamp": "20260101120000", "score": 0.1},
+                                 {"timestamp": "20260102120000", "score": 0.6}]))
+        reference = load_rows(f"{a},{b}")
+    assert reference == {"20251231120000": 0.9, "20260101120000": 0.1, "20260102120000": 0.6}
+
+    candidate = {"20251231120000": 0.8, "20260101120000": 0.5, "20260103120000": 0.7}
+    stats = compare(reference, candidate, threshold=0.3)
+    assert (stats["reference"], stats["candidate"], stats["both"]) == (2, 3, 1)
+    assert (stats["only_reference"], stats["only_candidate"]) == (1, 2)
+    assert stats["recall"] == 0.5 and stats["precision"] == pytest.approx(1 / 3)
+    assert stats["agreement"] == 0.25
+    assert stats["score_mae"] == pytest.approx((0.1 + 0.4) / 2)
+    assert compare({}, {})["recall"] == compare({}, {})["agreement"] == 1.0
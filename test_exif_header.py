@@ -0,0 +1,126 @@
+"""
+test_exif_header.py
+
+Checks exif_header.read_exif() against synthetic JPEGs with a hand-built
+APP1/EXIF segment, laid out the way exiftool leaves them (extra COM segment
+before the EXIF block, a large XMP APP1 ahead of it), plus a corrupt segment
+length.
+
+Run with pytest: pytest test_exif_header.py -v
+"""
+
+import os
+import struct
+import tempfile
+
+import cv2
+import numpy as np
+
+from exif_header import read_exif
+
+
+def _exif_segment(exposure=(1, 4), iso=800, dims=(3840, 2160), order="<"):
+    bo = b"II" if order == "<" else b"MM"
+    # IFD0 at offset 8 with a single ExifIFD pointer entry
+    ifd0_offset = 8
+    exif_ifd_offset = ifd0_offset + 2 + 12 + 4
+    entries = [
+        (0x829A, 5, 1, None),           # ExposureTime, value stored after the IFD
+        (0x8827, 3, 1, iso),            # ISO
+        (0xA002, 4, 1, dims[0]),        # PixelXDimension
+        (0xA003, 4, 1, dims[1]),        # PixelYDimension
+    ]
+    rational_offset = exif_ifd_offset + 2 + 12 * len(entries) + 4
+
+    tiff = bo + struct.pack(order + "HI", 42, ifd0_offset)
+    tiff += struct.pack(order + "H", 1)
+    tiff += struct.pack(order + "HHII", 0x8769, 4, 1, exif_ifd_offset)
+    tiff += struct.pack(order + "I", 0)
+    tiff += struct.pack(order + "H", len(entries))
+    for tag, typ, n, value in entries:
+        if tag == 0x829A:
+            tiff += struct.pack(order + "HHII", tag, typ, n, rational_offset)
+        elif typ == 3:
+            tiff += struct.pack(order + "HHIHH", tag, typ, n, value, 0)
+        else:
+            tiff += struct.pack(order + "HHII", tag, typ, n, value)
+    tiff += struct.pack(order + "I", 0)
+    tiff += struct.pack(order + "II", *exposure)
+
+    payload = b"Exif\x00\x00" + tiff
+    return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+
+
+def _write_jpeg(segments, size=(64, 48)):
+    ok, buf = cv2.imencode(".jpg", np.zeros((size[1], size[0], 3), np.uint8))
+    data = buf.tobytes()
+    tmp = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
+    tmp.write(data[:2] + b"".join(segments) + data[2:])
+    tmp.close()
+    return tmp.name
+
+
+def test_reads_exposure_iso_and_dimensions():
+    comment = b"Lillevik Lofoten webcam"
+    com = b"\xff\xfe" + struct.pack(">H", len(comment) + 2) + comment
+    path = _write_jpeg([com, _exif_segment()])
+    try:
+        info = read_exif(path)
+    finally:
+        os.unlink(path)
+    assert abs(info["exposure_time"] - 0.25) < 1e-9
+    assert info["iso"] == 800
+    # SOF wins over the EXIF pixel dimensions
+    assert (info["width"], info["height"]) == (64, 48)
+
+
+def test_xmp_app1_is_skipped_not_read():
+    # exiftool can put a large XMP APP1 first; only its identifier counts against max_bytes
+    xmp = b"http://ns.adobe.com/xap/1.0/\x00" + b" " * 60000
+    app1 = b"\xff\xe1" + struct.pack(">H", len(xmp) + 2) + xmp
+    path = _write_jpeg([app1, _exif_segment()])
+    try:
+        info = read_exif(path, max_bytes=4096)
+    finally:
+        os.unlink(path)
+    assert abs(info["exposure_time"] - 0.25) < 1e-9
+    assert (info["width"], info["height"]) == (64, 48)
+
+
+def test_big_endian_exif():
+    path = _write_jpeg([_exif_segment(exposure=(1, 500), iso=100, order=">")])
+    try:
+        info = read_exif(path)
+    finally:
+        os.unlink(path)
+    assert abs(info["exposure_time"] - 0.002) < 1e-9
+    assert info["iso"] == 100
+
+
+def test_no_exif_and_not_jpeg():
+    path = _write_jpeg([])
+    try:
+        info = read_exif(path)
+    finally:
+        os.unlink(path)
+    assert info["exposure_time"] is None and info["iso"] is None
+    assert (info["width"], info["height"]) == (64, 48)
+
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
+        tmp.write(b"not a jpeg")
+    try:
+        assert read_exif(tmp.name)["width"] is None
+    finally:
+        os.unlink(tmp.name)
+
+
+def test_corrupt_segment_length():
+    # A SOF segment claiming a length below 2 (the length field itself)
+    sof = b"\xff\xc0\x00\x01" + b"\x08\x12\x34\x56\x78"
+    for segments in ([sof], [b"\xff\xe1\x00\x00", _exif_segment()]):
+        path = _write_jpeg(segments)
+        try:
+            info = read_exif(path)
+        finally:
+            os.unlink(path)
+        assert info == {"exposure_time": None, "iso": None, "width": None, "height": None}
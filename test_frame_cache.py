@@ -0,0 +1,80 @@
+"""
+test_frame_cache.py
+
+Checks frame_cache.FrameCache: read-through hits and misses, a rewritten
+source file missing instead of serving stale bytes, least-recently-used
+eviction, decoded arrays, and that a scan through the cache (either mode)
+scores the same as one without it.
+
+Run with pytest: pytest test_frame_cache.py -v
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from frame_cache import FrameCache
+from scan_pipeline import run_pipeline
+from test_scan_pipeline import _MeanAnalyzer, _write_day
+
+
+def test_read_through_and_invalidation():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "20260115220000.jpg"
+        src.write_bytes(b"first")
+        cache = FrameCache(Path(tmp) / "cache", max_bytes=1 << 20)
+        assert cache.read(src) == b"first"
+        assert cache.read(src) == b"first"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        src.write_bytes(b"second!")
+        os.utime(src, ns=(0, 10**18))
+        assert cache.read(src) == b"second!"
+        assert cache.misses == 2
+
+
+def test_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FrameCache(Path(tmp) / "cache", max_bytes=10_000)
+        paths = []
+        for i in range(4):
+            p = Path(tmp) / f"2026011522{i:02d}00.jpg"
+            p.write_bytes(bytes(3000))
+            paths.append(p)
+        for i, p in enumerate(paths[:3]):
+            cache.read(p)
+            entry = cache._entry(p, ".raw")
+            os.utime(entry, (1000 + i, 1000 + i))
+        cache.read(paths[0])          # refreshes the oldest entry
+        cache.read(paths[3])          # 12 KB > 10 KB: evict down to 9 KB
+        cache.evict()
+        assert cache.usage() == (3, 9000)
+        assert not cache._entry(paths[1], ".raw").exists()
+        assert cache._entry(paths[0], ".raw").exists()
+
+
+def test_decoded_arrays_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "20260115220000.jpg"
+        src.write_bytes(b"x")
+        cache = FrameCache(Path(tmp) / "cache", mode="decoded")
+        assert cache.get_array(src, 4) is None
+        img = np.arange(24, dtype=np.uint8).reshape(2, 4, 3)
+        cache.put_array(src, 4, img)
+        assert np.array_equal(cache.get_array(src, 4), img)
+        assert cache.get_array(src, 2) is None
+
+
+def test_scans_through_the_cache_score_the_same():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_day(tmp, [1, 2, 3, 4])
+        analyzer = _MeanAnalyzer("mean", 4, set(range(24)))
+        plain, _, _ = run_pipeline(tmp, [analyzer], workers=1)
+        for mode in ("raw", "decoded"):
+            cache = FrameCache(Path(tmp) / f"cache-{mode}", mode=mode)
+            for _ in range(2):  # fill, then hit
+                cached, _, _ = run_pipeline(tmp, [analyzer], workers=1, cache=cache)
+                assert sorted(cached["mean"].results) == sorted(plain["mean"].results)
+            assert cache.usage()[0] == 4
@@ -0,0 +1,99 @@
+"""
+test_frame_index.py
+
+Checks frame_index.py: the multi-index hashing probes find every hash within
+the probe radius and leave out frames whose every chunk is farther off,
+nearest() ranks planted near-duplicates by distance and skips excluded
+times, an incremental rebuild adds new frames without duplicating old ones,
+and a query prints each result's page URL.
+
+Run with pytest: pytest test_frame_index.py -v
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import frame_index
+from frame_index import FrameIndex, _popcount, build_index, index_path, load_index
+
+QUERY = 0x0123_4567_89AB_CDEF
+
+
+def _flip(h, bits):
+    """h with the given bit positions flipped."""
+    for b in bits:
+        h ^= 1 << b
+    return h
+
+
+def _index(planted):
+    """FrameIndex of 2000 random hashes plus {timestamp: hash} planted ones, all colours equal."""
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2**64, 2000, dtype=np.uint64, endpoint=False)
+    timestamps = np.arange(20250101000000, 20250101000000 + 2000, dtype=np.uint64)
+    hashes = np.concatenate([hashes, np.array(list(planted.values()), np.uint64)])
+    timestamps = np.concatenate([timestamps, np.array(list(planted), np.uint64)])
+    order = np.argsort(timestamps)
+    return FrameIndex(timestamps[order], hashes[order], np.zeros((len(order), 48), np.uint8))
+
+
+def test_probes_and_ranking():
+    planted = {
+        20260115220000: QUERY,
+        20260115221000: _flip(QUERY, [0]),                  # 1 bit
+        20260115222000: _flip(QUERY, [1, 17, 33]),          # 3 bits in three chunks
+        20260115223000: _flip(QUERY, [2, 3, 18, 19, 34, 35, 50, 51]),   # 8 bits, 2 in every chunk
+    }
+    index = _index(planted)
+    q = np.uint64(QUERY)
+    for radius in (3, 7, 11):
+        found = set(index._candidates(QUERY, radius).tolist())
+        within = set(np.flatnonzero(_popcount(index.hashes ^ q) <= radius).tolist())
+        assert within <= found
+    row = {int(ts): i for i, ts in enumerate(index.timestamps)}
+    # Two flipped bits in every chunk: out of reach of one flip per chunk, found with two
+    assert row[20260115223000] not in set(index._candidates(QUERY, 7).tolist())
+    assert row[20260115223000] in set(index._candidates(QUERY, 11).tolist())
+
+    results = index.nearest(QUERY, np.zeros(48), n=4)
+    assert [(bits, ts) for _, bits, ts in results] == [
+        (0, 20260115220000), (1, 20260115221000), (3, 20260115222000), (8, 20260115223000)]
+    # Random hashes sit ~32 bits away: none of them comes before the planted ones
+    assert index.nearest(QUERY, np.zeros(48), n=2, exclude=lambda ts: ts == 20260115220000)[0][2] == 20260115221000
+
+
+def _write(folder, ts, value):
+    day = Path(folder) / ts[:4] / ts[4:6] / ts[6:8]
+    day.mkdir(parents=True, exist_ok=True)
+    img = np.zeros((64, 96, 3), np.uint8)
+    img[:, : 10 + value] = (value * 3, 120, 200 - value)
+    cv2.imwrite(str(day / f"{ts}.jpg"), img)
+
+
+def test_incremental_build_and_query_urls(capsys, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(3):
+            _write(tmp, f"2026011522{i:02d}00", i * 20)
+        build_index(tmp, 2026, tmp, workers=1)
+        for i in range(3, 5):
+            _write(tmp, f"2026011523{i:02d}00", i * 20)
+        (Path(tmp) / "2026/01/15/mini").mkdir()
+        build_index(tmp, 2026, tmp, workers=1)
+        timestamps, hashes, colours = load_index(index_path(tmp, 2026))
+        assert timestamps.tolist() == [20260115220000, 20260115220100, 20260115220200,
+                                       20260115230300, 20260115230400]
+        assert len(hashes) == len(colours) == 5
+        capsys.readouterr()
+        build_index(tmp, 2026, tmp, workers=1)
+        assert "Found 0 new frames to index (5 already indexed)" in capsys.readouterr().out
+
+        monkeypatch.setattr(sys, "argv", ["frame_index.py", "query", "20260115220000", "--index-dir", tmp,
+                                          "--min-gap-minutes", "0", "--limit", "2"])
+        frame_index.main()
+        out = capsys.readouterr().out
+        assert f"{frame_index.BASE_URL}20260115220000" in out
+        assert "Top 2 frames like 20260115220000" in out
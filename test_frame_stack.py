@@ -0,0 +1,68 @@
+"""
+test_frame_stack.py
+
+Checks frame_stack.py on synthetic frames: one stack per month and frame
+size, sky rows identical to what aurora_score_image() sees (so scores from
+a stack match scores from the JPEGs), undecodable frames listed as missing
+and not scored, and an unchanged month skipped on the next build.
+
+Run with pytest: pytest test_frame_stack.py -v
+"""
+
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from aurora_scan import aurora_score_image, sky_crop
+from frame_stack import build, open_stack, score_stacks
+
+
+def _frame(folder, ts, size=(320, 240), green=0):
+    day = Path(folder) / ts[:4] / ts[4:6] / ts[6:8]
+    day.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(int(ts[-6:]))
+    img = rng.integers(0, 40, (size[1], size[0], 3), dtype=np.uint8)
+    img[: size[1] // 3, :, 1] = green
+    path = day / f"{ts}.jpg"
+    cv2.imwrite(str(path), img)
+    return path
+
+
+def test_stacks_per_month_and_size_with_matching_scores():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [_frame(tmp, "20260115220000", green=180), _frame(tmp, "20260115221000"),
+                 _frame(tmp, "20260116010000", size=(640, 360)), _frame(tmp, "20260201230000")]
+        (Path(tmp) / "2026/01/15/20260115223000.jpg").write_bytes(b"not a jpeg")
+        out = Path(tmp) / "stacks"
+
+        written = build(Path(tmp) / "2026", out, "sky", workers=2, camera="test")
+        assert sorted(p.name for p in written) == ["202601-sky-640x232.npy", "202601-sky-640x312.npy",
+                                                   "202602-sky-640x312.npy"]
+
+        frames, stamps, meta = open_stack(out / "202601-sky-640x312.npy")
+        assert frames.shape == (3, 312, 640, 3)
+        assert stamps == ["20260115220000", "20260115221000", "20260115223000"]
+        assert meta["missing"] == ["20260115223000"] and not frames[2].any()
+        first = cv2.imread(str(paths[0]), cv2.IMREAD_REDUCED_COLOR_4)
+        assert np.array_equal(frames[0], sky_crop(first))
+
+        scores = dict(score_stacks(written))
+        assert "20260115223000" not in scores
+        for path in paths:
+            img = cv2.imread(str(path), cv2.IMREAD_REDUCED_COLOR_4)
+            assert abs(scores[path.stem] - aurora_score_image(img)) < 1e-3
+
+
+def test_unchanged_month_is_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        _frame(tmp, "20260115220000")
+        out = Path(tmp) / "stacks"
+        assert len(build(tmp, out, "frame", width=160)) == 1
+        assert build(tmp, out, "frame", width=160) == []
+
+        _frame(tmp, "20260115221000")
+        (stack,) = build(tmp, out, "frame", width=160)
+        assert open_stack(stack)[0].shape == (2, 120, 160, 3)
+        assert len(list(out.glob("*.npy"))) == 1
@@ -0,0 +1,106 @@
+"""
+test_image_catalog.py
+
+Checks image_catalog.Catalog on a small synthetic YYYY/MM/DD tree: initial
+build, incremental updates driven by directory mtimes, date-range and folder
+queries, the util/ scripts' day listing, the mini/ and truncated flags, and a
+truncated frame re-checked once its upload finishes.
+
+Run with pytest: pytest test_image_catalog.py -v
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from image_catalog import Catalog, day_listing_or_none
+
+
+def _jpeg(path, size=(64, 48)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(str(path), np.zeros((size[1], size[0], 3), np.uint8))
+
+
+def _bump_mtime(path, offset=10):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + offset))
+
+
+def test_build_query_and_flags():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "cam"
+        _jpeg(root / "2026/01/15/20260115120000.jpg")
+        _jpeg(root / "2026/01/15/mini/20260115120000.jpg", size=(16, 12))
+        _jpeg(root / "2026/01/15/20260115130000.jpg")
+        _jpeg(root / "2026/02/01/20260201120000.jpg", size=(80, 60))
+        full = (root / "2026/02/01/20260201120000.jpg").read_bytes()
+        (root / "2026/02/01/20260201130000.jpg").write_bytes(full[:len(full) // 2])
+
+        catalog = Catalog(Path(tmp) / "catalog.sqlite")
+        listed, frames, removed = catalog.update(root, camera="test")
+        assert (listed, frames, removed) == (2, 4, 0)
+
+        entries = catalog.entries(camera="test")
+        assert [e.timestamp for e in entries] == [
+            "20260115120000", "20260115130000", "20260201120000", "20260201130000"]
+        first = entries[0]
+        assert first.path == root / "2026/01/15/20260115120000.jpg"
+        assert (first.width, first.height, first.has_mini, first.truncated) == (64, 48, True, False)
+        assert not entries[1].has_mini
+        assert entries[3].truncated
+        assert [e.timestamp for e in catalog.entries(start="20260201", end="20260202")] == \
+            ["20260201120000", "20260201130000"]
+        assert len(catalog.entries(include_truncated=False)) == 3
+
+        assert catalog.paths_under(root / "2026/01") == [
+            root / "2026/01/15/20260115120000.jpg", root / "2026/01/15/20260115130000.jpg"]
+        assert catalog.paths_under(tmp) is None
+        assert catalog.day_listing(str(root), "2026/02") == [
+            (str(root / "2026/02/01"), ["20260201120000.jpg", "20260201130000.jpg"])]
+        assert day_listing_or_none(Path(tmp) / "catalog.sqlite", str(root), "2026/02") == \
+            catalog.day_listing(str(root), "2026/02")
+        assert day_listing_or_none(Path(tmp) / "catalog.sqlite", tmp) is None
+
+
+def test_incremental_update_only_relists_changed_days():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "cam"
+        _jpeg(root / "2026/01/15/20260115120000.jpg")
+        _jpeg(root / "2026/01/16/20260116120000.jpg")
+        catalog = Catalog(Path(tmp) / "catalog.sqlite")
+        catalog.update(root, camera="test")
+        assert catalog.update(root, camera="test") == (0, 0, 0)
+
+        _jpeg(root / "2026/01/16/20260116130000.jpg")
+        _bump_mtime(root / "2026/01/16")
+        (root / "2026/01/15/20260115120000.jpg").unlink()
+        (root / "2026/01/15").rmdir()
+        listed, frames, removed = catalog.update(root, camera="test")
+        assert (listed, frames, removed) == (1, 2, 1)
+        assert [e.timestamp for e in catalog.entries()] == ["20260116120000", "20260116130000"]
+
+
+def test_finished_upload_clears_truncated():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "cam"
+        path = root / "2026/01/15/20260115120000.jpg"
+        _jpeg(path)
+        full = path.read_bytes()
+        path.write_bytes(full[:len(full) // 2])       # caught mid-upload
+        day = root / "2026/01/15"
+        catalog = Catalog(Path(tmp) / "catalog.sqlite")
+        catalog.update(root, camera="test")
+        assert catalog.entries()[0].truncated
+
+        # The upload finishes: the file grows, the directory's mtime doesn't change
+        stamp = os.stat(day).st_mtime
+        path.write_bytes(full)
+        _bump_mtime(path)
+        os.utime(day, (stamp, stamp))
+        assert catalog.update(root, camera="test")[0] == 1
+        entry = catalog.entries()[0]
+        assert not entry.truncated and entry.size == len(full)
+        assert catalog.update(root, camera="test") == (0, 0, 0)
@@ -0,0 +1,91 @@
+"""
+test_keogram.py
+
+Checks keogram.py on synthetic frames: nights split at noon, one column per
+time slot with gaps left black, the last frame kept when it falls past a
+half slot, the slice taken from the configured column, a night across a
+month boundary built whole from either month's folder, and the per-year
+index merging new nights into existing ones.
+
+Run with pytest: pytest test_keogram.py -v
+"""
+
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from keogram import _build_night, build_keogram, collect_nights, load_index, save_index_entries
+
+
+def _frame(folder, ts, value):
+    day = Path(folder) / ts[:4] / ts[4:6] / ts[6:8]
+    day.mkdir(parents=True, exist_ok=True)
+    img = np.zeros((80, 120, 3), np.uint8)
+    img[:, 60] = value  # only the middle column is lit
+    path = day / f"{ts}.jpg"
+    cv2.imwrite(str(path), img)
+    return path
+
+
+def test_nights_split_at_noon_and_columns_follow_time():
+    with tempfile.TemporaryDirectory() as tmp:
+        for ts, v in [("20260115220000", 100), ("20260115221000", 150),
+                      ("20260115224000", 200), ("20260116110000", 50), ("20260116130000", 80)]:
+            _frame(tmp, ts, v)
+        nights = collect_nights(tmp, all_hours=True)
+        assert {n: len(f) for n, f in nights.items()} == {"20260115": 4, "20260116": 1}
+
+        frames = nights["20260115"][:3]  # 22:00, 22:10, 22:40
+        keogram = build_keogram(frames, column=0.5, sky=(0.0, 1.0), scale=1, slot=10, width=1)
+        assert keogram.shape == (80, 5, 3)
+        middle = keogram[40, :, 0].astype(int)
+        assert abs(middle[0] - 100) < 10 and abs(middle[1] - 150) < 10 and abs(middle[4] - 200) < 10
+        assert middle[2] == middle[3] == 0  # no frames at 22:20 and 22:30
+
+        # A slice off the lit column is dark
+        assert build_keogram(frames, column=0.1, scale=1, slot=10, width=1).max() < 10
+
+
+def test_last_frame_past_half_slot():
+    with tempfile.TemporaryDirectory() as tmp:
+        for ts, v in [("20260115220000", 100), ("20260115225500", 200)]:
+            _frame(tmp, ts, v)
+        frames = collect_nights(tmp, all_hours=True)["20260115"]
+        keogram = build_keogram(frames, sky=(0.0, 1.0), scale=1, slot=10, width=2)
+        assert keogram.shape == (80, 12, 3)   # 55 minutes: six slots
+        assert abs(int(keogram[40, 10, 0]) - 200) < 10 and abs(int(keogram[40, 11, 0]) - 200) < 10
+
+
+def test_night_across_month_boundary():
+    with tempfile.TemporaryDirectory() as tmp:
+        for ts in ("20260130220000", "20260131020000", "20260131220000", "20260131230000", "20260201020000",
+                   "20260201220000", "20260202020000"):
+            _frame(tmp, ts, 100)
+        for month in ("2026/01", "2026/02"):
+            nights = collect_nights(Path(tmp) / month, all_hours=True)
+            # 31 January's night has both its evening and its morning, from either folder
+            assert [p.stem for _, p in nights["20260131"]] == ["20260131220000", "20260131230000", "20260201020000"]
+        # January's folder plus 1 February: the nights of 30 and 31 January, not the half of 1 February's
+        assert sorted(collect_nights(Path(tmp) / "2026/01", all_hours=True)) == ["20260130", "20260131"]
+        # The morning of 31 January is read, but its night started in the unread 30th
+        assert sorted(collect_nights(Path(tmp) / "2026/02", all_hours=True)) == ["20260131", "20260201"]
+        assert sorted(collect_nights(Path(tmp) / "2026/02/01", all_hours=True)) == ["20260131", "20260201"]
+
+
+def test_night_png_and_index_merge():
+    with tempfile.TemporaryDirectory() as tmp:
+        _frame(tmp, "20260115220000", 100)
+        out = Path(tmp) / "keograms"
+        night, frames = next(iter(collect_nights(Path(tmp) / "2026", all_hours=True).items()))
+        options = {"column": 0.5, "sky": (0.0, 0.6), "scale": 2, "slot": 10, "width": 2}
+        built = dict([_build_night((night, frames, out / "2026" / f"{night}.png", options))])
+        save_index_entries(out, built)
+        save_index_entries(out, {"20261231": {"frames": 1}})
+
+        index = load_index(out, "2026")
+        assert list(index) == ["20260115", "20261231"]
+        assert index["20260115"]["frames"] == 1
+        assert index["20260115"]["start"] == "20260115220000"
+        assert cv2.imread(str(out / index["20260115"]["png"])).shape[:2] == (24, 2)
@@ -0,0 +1,73 @@
+"""
+test_month_manifest.py
+
+Checks month_manifest.py: the hour-image rule mirrors
+ImageFileManager::findFirstImageAfterTime(), mini/ tracking, and
+incremental rebuilds driven by day directory mtimes.
+
+Run with pytest: pytest test_month_manifest.py -v
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from month_manifest import hour_images, manifest_path, update_month
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+def _bump_mtime(path, offset=10):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + offset))
+
+
+def test_hour_images_first_in_hour_else_closest():
+    stamps = ["20260115063000", "20260115064500", "20260115093000", "20260115120000"]
+    hours = hour_images(stamps)
+    assert hours[6] == "20260115063000"
+    assert hours[0] == "20260115063000"
+    # 08:00 is 90 minutes from 06:30 and 06:45 is 75: closest wins
+    assert hours[8] == "20260115064500"
+    # 11:00 is 90 minutes from 09:30 and 60 from 12:00
+    assert hours[11] == "20260115120000"
+    assert hours[23] == "20260115120000"
+    # 08:30 and 11:30 are both 90 minutes from 10:00: earliest wins
+    assert hour_images(["20260115083000", "20260115113000"])[10] == "20260115083000"
+
+
+def test_update_month_is_incremental_and_tracks_minis():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        _touch(root / "2026/01/15/20260115120000.jpg")
+        _touch(root / "2026/01/15/mini/20260115120000.jpg")
+        _touch(root / "2026/01/15/20260115130000.jpg")
+        _touch(root / "2026/01/16/20260116120000.jpg")
+
+        assert update_month(root, "2026", "01") == 2
+        out = manifest_path(root, "2026", "01")
+        days = json.loads(out.read_text())["days"]
+        assert sorted(days) == ["15", "16"]
+        assert days["15"]["count"] == 2
+        assert (days["15"]["first"], days["15"]["last"]) == ("20260115120000", "20260115130000")
+        assert days["15"]["hours"][12] == "20260115120000"
+        assert days["15"]["no_mini"] == ["20260115130000"]
+        assert days["16"]["no_mini"] == ["20260116120000"]
+        assert days["15"]["polar_night"] is False
+
+        assert update_month(root, "2026", "01") is None
+
+        _touch(root / "2026/01/16/mini/20260116120000.jpg")
+        _bump_mtime(root / "2026/01/16")
+        (root / "2026/01/15/20260115120000.jpg").unlink()
+        (root / "2026/01/15/20260115130000.jpg").unlink()
+        _bump_mtime(root / "2026/01/15")
+        assert update_month(root, "2026", "01") == 2
+        days = json.loads(out.read_text())["days"]
+        assert sorted(days) == ["16"]
+        assert days["16"]["no_mini"] == []
+        assert not list(out.parent.glob(".*.tmp"))
@@ -0,0 +1,46 @@
+"""
+test_people_background.py
+
+Checks people_scan.AdaptiveBackground without running YOLO: the median
+seeded from the first window of frames, a passing object moving the
+background by at most one step per frame, and a lasting change in light
+being followed.
+
+Needs people_scan's imports (ultralytics); skipped without them.
+
+Run with pytest: pytest test_people_background.py -v
+"""
+
+import numpy as np
+import pytest
+
+people_scan = pytest.importorskip("people_scan")
+
+
+def _frame(value, shape=(40, 60, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+def test_seeded_median_and_bounded_steps():
+    bg = people_scan.AdaptiveBackground(window=5, step=4)
+    assert bg.background() is None
+    for value in (50, 52, 200, 51, 49):      # one bright outlier in the seed
+        bg.push(_frame(value))
+    assert int(bg.background()[0, 0, 0]) == 51
+
+    # Someone walks past: one frame, one step
+    passer = _frame(50)
+    passer[10:20, 10:20] = 255
+    bg.push(passer)
+    assert int(bg.background()[15, 15, 0]) == 55 and int(bg.background()[0, 0, 0]) == 50
+
+    # The light changes for good: followed step by step
+    for _ in range(10):
+        bg.push(_frame(90))
+    assert int(bg.background()[0, 0, 0]) == 90
+
+
+def test_frames_are_reduced_to_the_long_edge():
+    bg = people_scan.AdaptiveBackground(window=2, max_long_edge=30)
+    bg.push(_frame(10, (40, 60, 3)))
+    assert bg.background().shape == (20, 30, 3)
@@ -0,0 +1,46 @@
+"""
+test_people_rescan_all.py
+
+Checks util/people-rescan-all.py's run_jobs(): with --jobs N a failed month
+stops the run, letting the months already running finish but starting no
+new one.
+
+Run with pytest: pytest test_people_rescan_all.py -v
+"""
+
+import importlib.util
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location("people_rescan_all", Path(__file__).parent / "util/people-rescan-all.py")
+rescan = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(rescan)
+
+
+def test_failed_job_stops_later_jobs():
+    started = []
+    lock = threading.Lock()
+    second = threading.Event()
+
+    def job(i):
+        with lock:
+            started.append(i)
+        if i == 1:
+            second.set()
+        if i == 0:
+            second.wait(5)      # fail while month 1 is running
+            sys.exit(3)
+        time.sleep(0.2)
+
+    with pytest.raises(SystemExit) as e:
+        rescan.run_jobs([lambda i=i: job(i) for i in range(6)], parallel=2)
+    assert e.value.code == 3
+    assert sorted(started) == [0, 1]
+
+    started.clear()
+    rescan.run_jobs([lambda i=i: job(i) for i in range(1, 5)], parallel=2)
+    assert sorted(started) == [1, 2, 3, 4]
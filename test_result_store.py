@@ -0,0 +1,94 @@
+"""
+test_result_store.py
+
+Checks result_store.ResultStore: month replace vs. append upserts, torn
+segment lines (skipped, and not joined by the next append), compaction, the summary the pages read, the legacy
+per-year JSON export, and that parallel month writers don't lose updates.
+
+Run with pytest: pytest test_result_store.py -v
+"""
+
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from result_store import ResultStore
+from scan_pipeline import write_results
+
+
+def _e(ts, score):
+    return {"timestamp": ts, "score": score}
+
+
+def test_replace_and_append_touch_only_their_months():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / "aurora")
+        store.write([_e("20260110220000", 0.3), _e("20260210220000", 0.4)], {"202601", "202602"})
+        assert store.months() == ["202601", "202602"]
+
+        # Replace: a rescan of January that finds nothing clears it; February untouched
+        feb_before = (store.directory / "202602.jsonl").read_text()
+        assert store.write([], {"202601"}) == {"202601": 0}
+        assert store.months() == ["202602"]
+        assert (store.directory / "202602.jsonl").read_text() == feb_before
+
+        # Append: later line wins, and the segment grows instead of being rewritten
+        store.write([_e("20260211220000", 0.5)], set(), append=True)
+        store.write([_e("20260210220000", 0.9)], set(), append=True)
+        assert len((store.directory / "202602.jsonl").read_text().splitlines()) == 3
+        assert store.month("202602") == [_e("20260210220000", 0.9), _e("20260211220000", 0.5)]
+
+        summary = store.load_summary()["months"]
+        assert list(summary) == ["202602"]
+        assert summary["202602"]["count"] == 2
+        assert summary["202602"]["max"] == 0.9
+        assert summary["202602"]["top"][0]["timestamp"] == "20260210220000"
+        assert summary["202602"]["days"] == {"10": [1, 0.9], "11": [1, 0.5]}
+
+
+def test_torn_line_compaction_and_export():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / "people")
+        store.write([_e("20260301120000", 0.6)], {"202603"})
+        with open(store.directory / "202603.jsonl", "a") as f:
+            f.write('{"timestamp": "2026030')
+        assert store.month("202603") == [_e("20260301120000", 0.6)]
+
+        # An append after a torn line starts on a line of its own
+        store.write([_e("20260302120000", 0.7)], set(), append=True)
+        assert store.month("202603") == [_e("20260301120000", 0.6), _e("20260302120000", 0.7)]
+        assert store.load_summary()["months"]["202603"]["count"] == 2
+        store.write([], {"202603"})
+        store.write([_e("20260301120000", 0.6)], {"202603"})
+
+        for score in (0.1, 0.2, 0.3):
+            store.write([_e("20260301120000", score)], set(), append=True)
+        # Compacted once the lines outnumber twice the entries
+        assert (store.directory / "202603.jsonl").read_text().count("\n") <= 2
+        assert store.month("202603") == [_e("20260301120000", 0.3)]
+
+        written = store.export_json(tmp, "people")
+        assert written == [Path(tmp) / "people-2026.json"]
+        assert json.loads(written[0].read_text()) == [_e("20260301120000", 0.3)]
+
+
+def _scan_month(args):
+    """One "month scan": 20 results written to both the legacy JSON and the store."""
+    tmp, month = args
+    results = [(0.5, Path(f"2026{month:02d}{d:02d}220000.jpg")) for d in range(1, 21)]
+    write_results(Path(tmp) / "people-2026.json", results, {f"2026{month:02d}"})
+    ResultStore(Path(tmp) / "people").write(
+        [{"timestamp": p.stem, "score": s} for s, p in results], {f"2026{month:02d}"})
+
+
+def test_parallel_month_writers_keep_every_month():
+    with tempfile.TemporaryDirectory() as tmp:
+        with ProcessPoolExecutor(max_workers=6) as pool:
+            list(pool.map(_scan_month, [(tmp, m) for m in range(1, 13)]))
+        rows = json.loads((Path(tmp) / "people-2026.json").read_text())
+        assert len(rows) == 12 * 20
+        store = ResultStore(Path(tmp) / "people")
+        assert len(store.entries()) == 12 * 20
+        assert len(store.load_summary()["months"]) == 12
+        assert not list(Path(tmp).glob(".*.tmp"))
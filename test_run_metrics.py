@@ -0,0 +1,85 @@
+"""
+test_run_metrics.py
+
+Checks run_metrics.py: a run's JSON line and Prometheus textfile, the status
+taken from how the run ended, the last-success time kept across a failed
+run, the counts a pipeline scan reports, and the slow-run check.
+
+Run with pytest: pytest test_run_metrics.py -v
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from run_metrics import RunMetrics, load_runs, slow_runs
+from scan_pipeline import Analyzer, run_pipeline
+
+
+class _DarkOnly(Analyzer):
+    name = "dark"
+
+    def prefilter(self, path):
+        return (0.0, "odd") if int(path.stem[-3]) % 2 else None
+
+    def analyze(self, frame):
+        img = frame.view(1)
+        return (float(img.mean()), None) if img is not None else (0.0, None)
+
+
+def test_records_and_textfile():
+    with tempfile.TemporaryDirectory() as tmp:
+        with RunMetrics("regen_minis", tmp) as metrics:
+            metrics.items = 40
+            metrics.bytes_written = 1234
+            metrics.skipped["exists"] = 3
+        prom = (Path(tmp) / "webcam_regen_minis.prom").read_text()
+        assert 'webcam_run_items{tool="regen_minis"} 40' in prom
+        assert 'webcam_run_bytes{tool="regen_minis",direction="written"} 1234' in prom
+        assert 'webcam_run_skipped{tool="regen_minis",reason="exists"} 3' in prom
+        assert 'webcam_run_success{tool="regen_minis"} 1' in prom
+        success = [line for line in prom.splitlines() if line.startswith("webcam_run_last_success")]
+
+        with pytest.raises(SystemExit):
+            with RunMetrics("regen_minis", tmp):
+                raise SystemExit(2)
+        with pytest.raises(KeyboardInterrupt):
+            with RunMetrics("regen_minis", tmp):
+                raise KeyboardInterrupt
+        prom = (Path(tmp) / "webcam_regen_minis.prom").read_text()
+        assert 'webcam_run_success{tool="regen_minis"} 0' in prom
+        assert [line for line in prom.splitlines() if line.startswith("webcam_run_last_success")] == success
+
+        runs = load_runs(tmp, "regen_minis")
+        assert [r["status"] for r in runs] == ["ok", "failed", "interrupted"]
+        assert runs[0]["items"] == 40 and runs[0]["skipped"] == {"exists": 3}
+        assert load_runs(tmp, "aurora_scan") == []
+
+
+def test_pipeline_counts():
+    with tempfile.TemporaryDirectory() as tmp:
+        day = Path(tmp) / "archive/2026/01/15"
+        day.mkdir(parents=True)
+        for minute in range(10):
+            cv2.imwrite(str(day / f"2026011522{minute:02d}00.jpg"), np.full((60, 80, 3), 20, np.uint8))
+        (day / "20260115223000.jpg").write_bytes(b"not a jpeg")     # unreadable
+
+        metrics = RunMetrics("scan_pipeline")
+        run_pipeline(str(day.parent.parent.parent), [_DarkOnly()], workers=2, metrics=metrics)
+        assert metrics.items == 11
+        assert metrics.skipped == {"dark.odd": 5}
+        assert metrics.errors == 1
+        assert metrics.workers == 2
+        assert metrics.bytes_read == sum(p.stat().st_size for p in day.glob("*.jpg") if int(p.stem[-3]) % 2 == 0)
+        assert json.loads(json.dumps(metrics.finish()))["items"] == 11
+
+
+def test_slow_runs():
+    runs = [{"tool": "aurora_scan", "status": "ok", "items": 1000, "items_per_second": ips}
+            for ips in (40, 42, 38, 41, 15, 39)]
+    runs.insert(2, {"tool": "prune_webcam", "status": "ok", "items": 10, "items_per_second": 1})
+    assert [r["items_per_second"] for r in slow_runs(runs)] == [15]
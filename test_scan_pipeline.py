@@ -0,0 +1,274 @@
+"""
+test_scan_pipeline.py
+
+Checks the shared scan engine: filename parsing, decode-once frame views,
+routing of frames to analyzers by time filter, the JSON month-replace /
+upsert merge, streaming results month by month with a bounded top-K, and
+time-boxed scans (priority order, partial flush, resume), warm-up that
+skips prefiltered frames, analyzer errors (an unprocessable frame counted,
+a bug stopping the scan), and the adaptive concurrency controller.
+
+Run with pytest: pytest test_scan_pipeline.py -v
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from result_store import ResultStore
+from scan_pipeline import (Analyzer, ConcurrencyController, Frame, MonthSink, ScanBudget, TopK, _chunked,
+                           deadline_from, parse_dt_from_stem, prioritize, run_pipeline, write_results)
+
+
+class _MeanAnalyzer(Analyzer):
+    """Scores a frame by its mean brightness at the given scale."""
+
+    def __init__(self, name, scale, hours):
+        self.name = name
+        self.scale = scale
+        self.hours = hours
+
+    def wants(self, dt):
+        return dt.hour in self.hours
+
+    def analyze(self, frame):
+        return (float(frame.view(self.scale).mean()), None)
+
+
+class _LateAnalyzer(_MeanAnalyzer):
+    """Prefers later hours."""
+
+    def priority(self, dt):
+        return dt.hour
+
+
+class _WarmAnalyzer(Analyzer):
+    """Stateful; settles odd hours in its prefilter and scores the hours it was warmed with."""
+
+    name = "warm"
+    stateful = True
+    warmup = 3
+
+    def begin_sequence(self):
+        self.warmed = []
+
+    def warm(self, frame):
+        self.warmed.append(int(frame.path.stem[8:10]))
+
+    def prefilter(self, path):
+        return (0.0, "odd") if int(path.stem[8:10]) % 2 else None
+
+    def analyze(self, frame):
+        return (float(sum(self.warmed)), ",".join(map(str, self.warmed)))
+
+
+def _write_day(folder, hours, month="01"):
+    day = Path(folder) / "2026" / month / "15"
+    day.mkdir(parents=True)
+    for h in hours:
+        img = np.full((240, 320, 3), 10 * h, np.uint8)
+        cv2.imwrite(str(day / f"2026{month}15{h:02d}0000.jpg"), img)
+    return day
+
+
+def test_parse_dt_from_stem_handles_camera_prefixes():
+    assert parse_dt_from_stem("20260313054407").hour == 5
+    assert parse_dt_from_stem("Viktun_01_20260313054407").minute == 44
+    assert parse_dt_from_stem("background") is None
+
+
+def test_frame_views_share_one_decode():
+    ok, buf = cv2.imencode(".jpg", np.full((240, 320, 3), 80, np.uint8))
+    frame = Frame(Path("20260115120000.jpg"), buf.tobytes(), base_scale=1)
+    full = frame.view(1)
+    quarter = frame.view(4)
+    assert full.shape == (240, 320, 3)
+    assert quarter.shape == (60, 80, 3)
+    assert frame.view(4) is quarter
+    frame.release()
+    assert frame.view(1) is not full
+
+
+def test_pipeline_routes_frames_by_time_filter():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_day(tmp, [1, 2, 12, 13])
+        night = _MeanAnalyzer("night", 4, {1, 2})
+        day = _MeanAnalyzer("day", 1, {12, 13})
+        runs, months, interrupted = run_pipeline(tmp, [night, day], workers=1)
+    assert not interrupted
+    assert months == {"202601"}
+    assert sorted(p.stem for _, p in runs["night"].results) == ["20260115010000", "20260115020000"]
+    assert sorted(p.stem for _, p in runs["day"].results) == ["20260115120000", "20260115130000"]
+    assert runs["night"].skipped_time == 2 and runs["day"].skipped_time == 2
+    for score, path in runs["day"].results:
+        assert abs(score - 10 * int(path.stem[8:10])) < 2
+
+
+def test_warmup_skips_prefiltered_frames():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_day(tmp, list(range(1, 10)))
+        mean = _MeanAnalyzer("mean", 1, set(range(24)))
+        runs, _, _ = run_pipeline(tmp, [_WarmAnalyzer(), mean], workers=1)
+    # Warmed with 2, 4 and 6: the odd hours its prefilter settles never reach warm()
+    assert {score for score, p in runs["warm"].results if int(p.stem[8:10]) % 2 == 0} == {12.0}
+    assert runs["warm"].skipped["odd"] == 5
+    # Frames read early for the warm-up still reach the other analyzer in order
+    for score, path in runs["mean"].results:
+        assert abs(score - 10 * int(path.stem[8:10])) < 2
+    assert len(runs["mean"].results) == 9
+
+
+class _FailingAnalyzer(_MeanAnalyzer):
+    """Raises `error` on the 02:00 frame."""
+
+    def __init__(self, error):
+        super().__init__("failing", 1, set(range(24)))
+        self.error = error
+
+    def analyze(self, frame):
+        if frame.path.stem[8:10] == "02":
+            raise self.error
+        return super().analyze(frame)
+
+
+def test_analyzer_errors():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_day(tmp, [1, 2, 3])
+        runs, _, _ = run_pipeline(tmp, [_FailingAnalyzer(cv2.error("bad frame"))], workers=1)
+        assert sorted(p.stem[8:10] for s, p in runs["failing"].results if s > 0) == ["01", "03"]
+        with pytest.raises(TypeError):
+            run_pipeline(tmp, [_FailingAnalyzer(TypeError("bug"))], workers=1)
+
+
+def test_write_results_replaces_scanned_months_only():
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "aurora-2026.json")
+        Path(out).write_text(json.dumps([
+            {"timestamp": "20260110220000", "score": 0.3},
+            {"timestamp": "20260210220000", "score": 0.4},
+        ]))
+        write_results(out, [(0.5, Path("20260115220000.jpg"))], {"202601"})
+        assert [x["timestamp"] for x in json.loads(Path(out).read_text())] == \
+            ["20260115220000", "20260210220000"]
+
+        write_results(out, [(0.6, Path("20260210220000.jpg"))], {"202602"}, append=True)
+        merged = {x["timestamp"]: x["score"] for x in json.loads(Path(out).read_text())}
+        assert merged == {"20260115220000": 0.5, "20260210220000": 0.6}
+
+
+def test_topk_keeps_best_scores():
+    top = TopK(3)
+    for i, score in enumerate([0.1, 0.9, 0.5, 0.3, 0.7, 0.2]):
+        top.push(score, Path(f"{i}.jpg"))
+    assert [s for s, _ in top.best()] == [0.9, 0.7, 0.5]
+
+
+def test_results_stream_to_store_month_by_month():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_day(tmp, [1, 2, 3], month="01")
+        _write_day(tmp, [4, 5], month="02")
+        store = Path(tmp) / "store"
+        sink = MonthSink(store=store)
+        flushed = []
+        month_done = sink.month_done
+        sink.month_done = lambda ym: (flushed.append((ym, sorted(sink.buffers))), month_done(ym))
+
+        analyzer = _MeanAnalyzer("mean", 4, set(range(24)))
+        runs, months, _ = run_pipeline(tmp, [analyzer], workers=1, sinks={"mean": sink},
+                                       top_k=2, recall=False)
+        sink.close(months | {"202603"})
+
+        run = runs["mean"]
+        assert run.results == [] and run.paths == [] and run.kept == 5
+        assert [p.stem for _, p in run.top.best()] == ["20260215050000", "20260215040000"]
+        # Each month was written as soon as it finished, holding only itself
+        assert sorted(ym for ym, _ in flushed) == ["202601", "202602"]
+        assert all(buffered == [ym] for ym, buffered in flushed)
+        assert [e["timestamp"][:6] for e in ResultStore(store).entries()] == ["202601"] * 3 + ["202602"] * 2
+
+
+def test_budgeted_scan_orders_flushes_and_resumes():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_day(tmp, [1, 2, 3], month="01")
+        _write_day(tmp, [4, 5], month="02")
+        analyzer = _LateAnalyzer("mean", 4, set(range(24)))
+        tasks = [[(p, [0])] for p in sorted(Path(tmp).rglob("*.jpg"))]
+        # Newest days first, newest first; then the rest by priority
+        assert [t[0][0].stem[8:10] for t in prioritize(tasks, [analyzer], recent_days=2)] == [
+            "05", "04", "03", "02", "01"]
+
+        store = Path(tmp) / "store"
+        resume = Path(tmp) / "resume.json"
+        ResultStore(store).write([{"timestamp": "20260115230000", "score": 1.0}], {"202601"})
+
+        # Out of time after the first task: only that frame is written, as an upsert
+        budget = ScanBudget(deadline_from(max_seconds=0), resume)
+        sink = MonthSink(store=store)
+        runs, _, stopped = run_pipeline(tmp, [analyzer], workers=1, sinks={"mean": sink}, budget=budget)
+        assert stopped and budget.expired and runs["mean"].scanned == 1
+        assert [e["timestamp"] for e in ResultStore(store).entries()] == [
+            "20260115230000", "20260215050000"]
+        assert json.loads(resume.read_text())["done"] == {"20260215": ["050000"]}
+
+        # The next run skips that frame; February is upserted, January replaced
+        budget = ScanBudget(None, resume)
+        sink = MonthSink(store=store)
+        runs, months, stopped = run_pipeline(tmp, [analyzer], workers=1, sinks={"mean": sink}, budget=budget)
+        sink.close(months)
+        assert not stopped and runs["mean"].scanned == 4
+        assert [e["timestamp"][8:10] for e in ResultStore(store).entries()] == ["01", "02", "03", "04", "05"]
+        assert not resume.exists()
+
+
+def test_deadline_from_takes_the_earlier_limit():
+    now = datetime(2026, 1, 15, 23, 0).timestamp()
+    assert deadline_from(now=now) is None
+    assert deadline_from(max_seconds=60, now=now) == now + 60
+    assert deadline_from(until="23:30", now=now) == now + 1800
+    assert deadline_from(max_seconds=60, until="06:00", now=now) == now + 60
+    assert deadline_from(until="22:00", now=now) == now + 23 * 3600  # tomorrow
+
+
+def test_controller_keeps_steps_that_pay_off():
+    c = ConcurrencyController(max_workers=8, workers=2, read_ahead=1, window=1.0)
+    cpu = {"read": 0.1, "decode": 0.5, "score": 0.4}
+
+    def window(rate, timing=cpu):
+        c.record(0, timing, now=c._window_start)
+        c.record(rate, {}, now=c._window_start + 1.0)
+
+    window(10)                        # baseline; CPU-bound, so try one more worker
+    assert c.workers == 3
+    window(15)                        # helped: keep it and go on
+    assert c.workers == 4
+    window(15.2)                      # no real gain: back to 3
+    assert c.workers == 3
+    window(15)                        # next step goes down
+    assert c.workers == 2
+    window(10)                        # that cost throughput: back to 3
+    assert c.workers == 3
+    window(15, {"read": 0.8, "decode": 0.1, "score": 0.1})  # waiting on reads: more read-ahead
+    assert (c.workers, c.read_ahead) == (3, 2)
+    assert c.best == (15.2, 4, 1)
+
+    # Prefilter time is CPU work like decode and score, not waiting on reads
+    c = ConcurrencyController(max_workers=8, workers=2, read_ahead=1, window=1.0)
+    window(10, {"read": 0.4, "prefilter": 0.6})
+    assert (c.workers, c.read_ahead) == (3, 1)
+
+
+def test_auto_workers_score_every_frame():
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_day(tmp, list(range(12)))
+        analyzer = _MeanAnalyzer("mean", 2, set(range(24)))
+        fixed, _, _ = run_pipeline(tmp, [analyzer], workers=1)
+        auto, _, _ = run_pipeline(tmp, [analyzer], workers="auto")
+        assert sorted(fixed["mean"].results) == sorted(auto["mean"].results)
+        assert auto["mean"].scanned == 12
+    assert list(_chunked(([i] for i in range(5)), 2)) == [[0, 1], [2, 3], [4]]
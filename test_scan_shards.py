@@ -0,0 +1,123 @@
+"""
+test_scan_shards.py
+
+Checks sharded scans through a shared directory: one shard per month,
+newest first; a live lease keeps other processes off a shard, an expired
+one is taken over by exactly one of the hosts racing for it; and merge() puts the partials into the per-year JSON
+and the result store with month-replace semantics.
+
+Run with pytest: pytest test_scan_shards.py -v
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from result_store import ResultStore
+from scan_pipeline import Analyzer
+from scan_shards import ShardDir, merge, scan_shards, shard_list
+
+
+class _MeanAnalyzer(Analyzer):
+    name = "mean"
+
+    def analyze(self, frame):
+        return (float(frame.view(1).mean()), None)
+
+
+def _write_frames(folder, stamps):
+    for ts in stamps:
+        day = Path(folder) / ts[:4] / ts[4:6] / ts[6:8]
+        day.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(day / f"{ts}.jpg"), np.full((60, 80, 3), int(ts[8:10]) * 10, np.uint8))
+
+
+def test_leases():
+    with tempfile.TemporaryDirectory() as tmp:
+        work = ShardDir(tmp, lease_seconds=60)
+        lease = work.claim("cam/202601")
+        assert lease is not None and work.claim("cam/202601") is None
+        with lease:
+            assert work.lease_age("cam/202601") < 60
+        assert work.lease_age("cam/202601") is None       # released
+
+        assert work.claim("202602") is not None            # never released: the host died
+        old = time.time() - 120
+        os.utime(work.lease_path("202602"), (old, old))
+        assert work.claim("202602") is not None            # taken over
+
+
+def test_expired_lease_taken_over_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        a, b = ShardDir(tmp, lease_seconds=60), ShardDir(tmp, lease_seconds=60)
+        old = time.time() - 120
+        a.claim("202601")
+        os.utime(a.lease_path("202601"), (old, old))
+
+        # A sees the expired lease, then B takes the shard over before A acts on it
+        real_age = a.lease_age
+        seen = iter([120.0])
+        a.lease_age = lambda shard: next(seen, None) or real_age(shard)
+        taken = b.claim("202601")
+        assert taken is not None
+        assert a.claim("202601") is None
+        assert taken._ours()
+
+        # Several processes racing for one expired lease: one wins
+        for _ in range(10):
+            os.utime(b.lease_path("202601"), (old, old))
+            barrier = threading.Barrier(6)
+            won = []
+
+            def race():
+                work = ShardDir(tmp, lease_seconds=60)
+                barrier.wait()
+                won.append(work.claim("202601"))
+
+            threads = [threading.Thread(target=race) for _ in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert sum(lease is not None for lease in won) == 1
+
+
+def test_shards_scan_and_merge():
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "archive"
+        _write_frames(archive, ["20260115010000", "20260115020000", "20260210030000"])
+        data = Path(tmp) / "data"
+        (data / "mean").mkdir(parents=True)
+        (data / "mean-2026.json").write_text(json.dumps([
+            {"timestamp": "20260101000000", "score": 1.0},      # stale, January is rescanned
+            {"timestamp": "20260301000000", "score": 1.0},      # March is not
+        ]))
+        shards = Path(tmp) / "shards"
+        assert [s[0] for s in shard_list([(None, archive)])] == ["202602", "202601"]
+
+        # Another host holds February
+        other = ShardDir(shards, lease_seconds=60).claim("202602")
+        assert other is not None
+        assert scan_shards(shards, [(None, archive)], [_MeanAnalyzer()], {None: data}, 60, workers=1) == 1
+        partial = json.loads((shards / "partials/mean/202601.json").read_text())
+        assert partial["months"] == ["202601"] and len(partial["results"]) == 2
+
+        # ... and dies; its lease expires and the shard is taken over
+        old = time.time() - 120
+        os.utime(other.path, (old, old))
+        assert scan_shards(shards, [(None, archive)], [_MeanAnalyzer()], {None: data}, 60, workers=1) == 1
+        assert scan_shards(shards, [(None, archive)], [_MeanAnalyzer()], {None: data}, 60, workers=1) == 0
+
+        merge(shards)
+        merge(shards)   # idempotent
+        merged = json.loads((data / "mean-2026.json").read_text())
+        assert [x["timestamp"] for x in merged] == ["20260115010000", "20260115020000", "20260210030000",
+                                                    "20260301000000"]
+        assert abs(merged[2]["score"] - 30) < 2
+        assert [e["timestamp"] for e in ResultStore(data / "mean").entries()] == [x["timestamp"] for x in merged[:3]]
@@ -0,0 +1,70 @@
+"""
+test_sky_mask.py
+
+Checks sky_mask.py and masked aurora scoring on synthetic frames: masks
+selected by aspect ratio and date (full frames, decodes and minis alike), a
+mask covering the default crop scoring the same as no mask, and a bright
+green light below the sky line no longer counting once it is masked out.
+
+Run with pytest: pytest test_sky_mask.py -v
+"""
+
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from aurora_scan import aurora_score_image
+from sky_mask import SkyMask, load_masks, select_mask
+
+
+def test_select_by_aspect_and_date():
+    masks = [
+        SkyMask("old", ["0,0,1,0.55"], size=(2560, 1920), end="20250725"),
+        SkyMask("4k", ["0,0,1,0.45"], size=(3840, 2160), start="20250726"),
+        SkyMask("any", ["0,0,1,0.65"]),
+    ]
+    july = datetime(2025, 7, 25, 23, 0)
+    assert select_mask(masks, (480, 640, 3), july).name == "old"             # 1/4 decode of 2560×1920
+    assert select_mask(masks, (120, 160, 3), july).name == "old"             # mini
+    assert select_mask(masks, (540, 960, 3), july).name == "any"             # 16:9 before the change
+    assert select_mask(masks, (90, 160, 3), datetime(2025, 7, 26)).name == "4k"
+    assert select_mask(masks, (90, 160, 3), None).name == "4k"
+    assert select_mask(masks[:2], (100, 100, 3), july) is None
+    with pytest.raises(ValueError):
+        SkyMask("bad", ["0,0,1"])
+
+
+def test_index_covers_sky_minus_exclusions():
+    mask = SkyMask("m", ["0,0,1,0.4", [[0, 0.4], [1, 0.4], [1, 0.5], [0, 0.5]]], exclude=["0,0,0.5,0.2"])
+    assert mask.bottom == 0.5
+    index = mask.index(50, 100)                     # the top half of a 100×100 frame
+    assert len(index) == 100 * 50 - 50 * 20
+    assert index is mask.index(50, 100)             # computed once per size
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "masks.json"
+        path.write_text(json.dumps({"masks": [{"name": "a", "size": [4, 3], "from": "20250101",
+                                               "sky": ["0,0,1,0.6"], "exclude": []}]}))
+        (loaded,) = load_masks(path)
+        assert (loaded.name, loaded.start, loaded.end, loaded.bottom) == ("a", "20250101", None, 0.6)
+
+
+def test_masked_score_ignores_ground_lights():
+    rng = np.random.default_rng(5)
+    img = rng.integers(0, 20, (480, 640, 3), dtype=np.uint8)
+    cv2.rectangle(img, (200, 260), (420, 300), (60, 200, 90), -1)   # green lights at y 54–62%
+
+    whole = SkyMask("whole", ["0,0,1,0.65"])
+    sky = SkyMask("sky", ["0,0,1,0.5"])
+    assert abs(aurora_score_image(img, mask=whole) - aurora_score_image(img)) < 1e-6
+    assert aurora_score_image(img) > 0.15
+    assert aurora_score_image(img, mask=sky) < 0.05
+
+    # A real band in the sky still scores through the mask
+    cv2.ellipse(img, (320, 90), (220, 30), 0, 0, 360, (60, 200, 90), -1)
+    assert aurora_score_image(img, mask=sky) > 0.15
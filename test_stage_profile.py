@@ -0,0 +1,74 @@
+"""
+test_stage_profile.py
+
+Checks --profile: the log-scale histogram's percentiles, that stage() is a
+no-op outside a profiled worker, and that a profiled pipeline run times the
+read, decode and analyzer stages of every frame and has one worker write a
+speedscope timeline or a cProfile dump.
+
+Run with pytest: pytest test_stage_profile.py -v
+"""
+
+import json
+import pstats
+import tempfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+import stage_profile
+from scan_pipeline import Analyzer, run_pipeline
+from stage_profile import Histogram, StageProfile, stage
+
+
+class _MeanAnalyzer(Analyzer):
+    name = "mean"
+
+    def analyze(self, frame):
+        with stage("mean.step"):
+            return (float(frame.view(1).mean()), None)
+
+
+def _write_frames(folder, n):
+    day = Path(folder) / "2026/01/15"
+    day.mkdir(parents=True)
+    for i in range(n):
+        cv2.imwrite(str(day / f"202601152{i // 60:01d}{i % 60:02d}00.jpg"), np.full((60, 80, 3), i, np.uint8))
+
+
+def test_histogram_percentiles():
+    h = Histogram()
+    for ms in range(1, 1001):
+        h.add(ms / 1000)
+    assert h.n == 1000 and h.max == 1.0
+    assert h.percentile(50) == pytest.approx(0.5, rel=0.13)
+    assert h.percentile(90) == pytest.approx(0.9, rel=0.13)
+    assert h.percentile(100) == 1.0
+    assert stage("decode") is stage("read")         # not profiling: the shared no-op
+    assert stage_profile.take() is None
+
+
+@pytest.mark.parametrize("dump", ["timeline.json", "worker.prof"])
+def test_profiled_run(dump, capsys):
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_frames(tmp, 20)
+        profile = StageProfile(Path(tmp) / dump)
+        Path(profile.dump).write_text("left over from an earlier run")
+        runs, _, _ = run_pipeline(tmp, [_MeanAnalyzer()], workers=2, profile=profile)
+        assert runs["mean"].scanned == 20
+
+        assert profile.frames == 20
+        assert {name: h.n for name, h in profile.wall.items()} == {
+            "read": 20, "decode": 20, "mean": 20, "mean.step": 20, "mean.prefilter": 20}
+        assert "Stage profile (20 frames" in capsys.readouterr().out
+
+        if dump.endswith(".json"):
+            timeline = json.loads(Path(profile.dump).read_text())
+            events = timeline["profiles"][0]["events"]
+            assert events and sum(e["type"] == "O" for e in events) == sum(e["type"] == "C" for e in events)
+            names = {f["name"] for f in timeline["shared"]["frames"]}
+            assert {"decode", "mean", "mean.step"} <= names
+        else:
+            assert pstats.Stats(profile.dump).total_calls > 0
@@ -0,0 +1,89 @@
+"""
+test_timelapse.py
+
+Checks timelapse.py: night and event spans from the aurora results (both
+years' files for a night across New Year), that the read-ahead keeps frames
+in order with a bounded window, the deflicker gain, and a small end-to-end
+render read back with OpenCV.
+
+Run with pytest: pytest test_timelapse.py -v
+"""
+
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from timelapse import deflicker, event_span, frames_in_span, load_scores, night_span, read_ahead, render
+
+SCORES = {"20260115220000": 0.3, "20260115221000": 0.6, "20260116010000": 0.4, "20260116130000": 0.2}
+
+
+def test_spans_from_results():
+    assert night_span(SCORES, "2026-01-15", pad_minutes=0) == (
+        datetime(2026, 1, 15, 22, 0), datetime(2026, 1, 16, 1, 0))
+    assert night_span(SCORES, "2026-01-14") is None
+    assert event_span(SCORES, "20260115221000", gap_minutes=30, pad_minutes=10) == (
+        datetime(2026, 1, 15, 21, 50), datetime(2026, 1, 15, 22, 20))
+    assert event_span(SCORES, "20260115230000") is None
+
+
+def test_scores_of_a_night_across_new_year(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch.chdir(tmp)
+        Path("data").mkdir()
+        Path("data/aurora-2025.json").write_text(json.dumps([{"timestamp": "20251231230000", "score": 0.3}]))
+        Path("data/aurora-2026.json").write_text(json.dumps([{"timestamp": "20260101003000", "score": 0.5}]))
+        scores = load_scores(None, "2025-12-31")
+        assert night_span(scores, "2025-12-31", pad_minutes=0) == (
+            datetime(2025, 12, 31, 23, 0), datetime(2026, 1, 1, 0, 30))
+        assert load_scores("data/aurora-2026.json", "2025-12-31") == {"20260101003000": 0.5}
+
+
+def test_read_ahead_is_ordered_and_bounded():
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def load(i):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.001 * (i % 3))
+        return i
+
+    out = []
+    for i in read_ahead(range(40), load, window=4, workers=4):
+        out.append(i)
+        with lock:
+            in_flight[0] -= 1
+    assert out == list(range(40))
+    assert peak[0] <= 4
+
+
+def test_deflicker_pulls_towards_running_mean():
+    frames = [np.full((4, 4, 3), v, np.uint8) for v in (100, 100, 150, 100)]
+    out = list(deflicker(iter(frames), window=100))
+    assert [int(f[0, 0, 0]) for f in out[:2]] == [100, 100]
+    assert int(out[2][0, 0, 0]) < 110  # the bright frame is pulled down
+
+
+def test_render_writes_every_frame():
+    with tempfile.TemporaryDirectory() as tmp:
+        day = Path(tmp) / "2026" / "01" / "15"
+        day.mkdir(parents=True)
+        for minute in range(6):
+            img = np.full((240, 320, 3), 40 * minute, np.uint8)
+            cv2.imwrite(str(day / f"2026011522{minute:02d}00.jpg"), img)
+        paths = frames_in_span(tmp, datetime(2026, 1, 15, 22, 1), datetime(2026, 1, 15, 22, 5))
+        assert [p.stem for p in paths] == [f"2026011522{m:02d}00" for m in range(1, 6)]
+
+        output = Path(tmp) / "out.mp4"
+        assert render(paths, output, height=120, fps=10, deflicker_window=3) == 5
+        video = cv2.VideoCapture(str(output))
+        assert int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == 5
+        assert (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))) == (160, 120)
+        video.release()
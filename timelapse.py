@@ -0,0 +1,242 @@
+"""
+timelapse.py — render an aurora night or event straight to MP4.
+
+Picks the time span from the aurora results, then streams every archived
+frame in that span through decode → resize → (deflicker) → VideoWriter.
+Frames are decoded at the coarsest DCT scale that is still at least the
+output height (a 4K frame for 1080p output decodes at 1/2), on a few
+threads, with a bounded read-ahead window, so memory stays at a handful of
+frames however long the night is.
+
+    # The aurora frames of one night (noon to noon), padded by 30 minutes
+    python3 timelapse.py /path/to/images --night 2026-01-15
+
+    # The event containing a frame, at 720p, deflickered over ~15 frames
+    python3 timelapse.py /path/to/images --event 20260115223019 --height 720 --deflicker 15
+
+    # The whole dark part of the night, aurora or not
+    python3 timelapse.py /path/to/images --night 2026-01-15 --whole-night -o /tmp/night.mp4
+
+The results come from the aurora store (data/aurora, see result_store.py)
+or a legacy data/aurora-YYYY.json file (--results). Events are grouped the
+same way as aurora_events.py (--gap).
+
+Requires: opencv-python, numpy, astral
+"""
+
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from aurora_events import GAP_MINUTES, group_events, night_of
+from exif_header import read_exif
+from scan_pipeline import _DECODE_FLAGS, frame_paths, load_reference, parse_dt_from_stem, quiet_stderr
+from sun_calculator import is_aurora_time
+
+
+def _dt(ts):
+    return datetime.strptime(ts, "%Y%m%d%H%M%S")
+
+
+def default_results(year):
+    """The aurora store if there is one, else the legacy per-year file."""
+    store = Path("data/aurora")
+    return store if store.is_dir() else Path(f"data/aurora-{year}.json")
+
+
+def load_scores(results, night):
+    """
+    {timestamp: score} for the night starting on `night` (YYYY-MM-DD): from
+    results if given, else from default_results() of each year the night
+    touches (a night that starts on 31 Dec ends in the next year's file).
+    """
+    if results:
+        return load_reference(results) or {}
+    evening = datetime.strptime(night, "%Y-%m-%d")
+    scores = {}
+    for source in dict.fromkeys(default_results(d.year) for d in (evening, evening + timedelta(days=1))):
+        scores.update(load_reference(source) or {})
+    return scores
+
+
+def night_span(scores, night, pad_minutes=30):
+    """(start, end) datetimes around the aurora frames of a night, or None."""
+    stamps = sorted(ts for ts in scores if night_of(ts) == night)
+    if not stamps:
+        return None
+    pad = timedelta(minutes=pad_minutes)
+    return _dt(stamps[0]) - pad, _dt(stamps[-1]) + pad
+
+
+def event_span(scores, ts, gap_minutes=GAP_MINUTES, pad_minutes=30):
+    """(start, end) datetimes around the event containing timestamp ts, or None."""
+    night = night_of(ts)
+    entries = [{"timestamp": t, "score": s} for t, s in scores.items() if night_of(t) == night]
+    for ev in group_events(entries, gap_minutes):
+        if ev["start"] <= ts <= ev["end"]:
+            pad = timedelta(minutes=pad_minutes)
+            return _dt(ev["start"]) - pad, _dt(ev["end"]) + pad
+    return None
+
+
+def frames_in_span(root, start, end, catalog=None):
+    """Archived frame paths between start and end (inclusive), in time order."""
+    frames = []
+    day = start.date()
+    while day <= end.date():
+        folder = Path(root) / day.strftime("%Y/%m/%d")
+        if folder.is_dir():
+            for path in frame_paths(folder, catalog):
+                dt = parse_dt_from_stem(path.stem)
+                if dt is not None and start <= dt <= end:
+                    frames.append((dt, path))
+        day += timedelta(days=1)
+    return [path for _, path in sorted(frames)]
+
+
+def decode_scale_for(path, height):
+    """Coarsest DCT scale (8, 4, 2, 1) whose decode is still at least `height` tall."""
+    source = read_exif(path)["height"]
+    if not source:
+        return 1
+    return next((s for s in (8, 4, 2) if source // s >= height), 1)
+
+
+def output_size(path, height):
+    """(width, height) with the source aspect ratio; width rounded to even for the encoder."""
+    info = read_exif(path)
+    if not info["width"] or not info["height"]:
+        img = cv2.imread(str(path), cv2.IMREAD_REDUCED_COLOR_8)
+        if img is None:
+            raise SystemExit(f"Cannot read {path}")
+        info = {"height": img.shape[0], "width": img.shape[1]}
+    width = round(info["width"] * height / info["height"] / 2) * 2
+    return width, height
+
+
+def load_frame(path, scale, size):
+    """Decode at 1/scale and resize to size (w, h); None if unreadable."""
+    img = cv2.imread(str(path), _DECODE_FLAGS[scale])
+    if img is None:
+        return None
+    if (img.shape[1], img.shape[0]) != size:
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return img
+
+
+def read_ahead(paths, load, window=8, workers=4):
+    """
+    Yield load(path) for each path in order, with at most `window` frames
+    decoded or in flight at once. OpenCV releases the GIL while decoding, so
+    threads are enough.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(load, path))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def deflicker(frames, window):
+    """
+    Scale each frame's brightness towards a running mean over ~`window`
+    frames, which evens out the exposure steps between frames. Gain is
+    limited to 0.5–2 so a real change (dawn, a car's headlights) still shows.
+    """
+    alpha = 1.0 / max(1, window)
+    running = None
+    for img in frames:
+        level = max(1.0, float(np.mean(cv2.mean(img)[:3])))
+        running = level if running is None else running + alpha * (level - running)
+        gain = min(2.0, max(0.5, running / level))
+        yield img if abs(gain - 1.0) < 0.01 else cv2.convertScaleAbs(img, alpha=gain)
+
+
+def render(paths, output, height=1080, fps=25, deflicker_window=0, workers=4, window=8):
+    """Write paths as an MP4 to output. Returns the number of frames written."""
+    size = output_size(paths[0], height)
+    scale = decode_scale_for(paths[0], height)
+    writer = cv2.VideoWriter(str(output), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    if not writer.isOpened():
+        raise SystemExit(f"Cannot open {output} for writing")
+    written = 0
+    try:
+        with quiet_stderr():
+            frames = (img for img in read_ahead(paths, lambda p: load_frame(p, scale, size), window, workers)
+                      if img is not None)
+            if deflicker_window:
+                frames = deflicker(frames, deflicker_window)
+            for img in frames:
+                writer.write(img)
+                written += 1
+    finally:
+        writer.release()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="Image root containing the YYYY/MM/DD folders")
+    which = parser.add_mutually_exclusive_group(required=True)
+    which.add_argument("--night", metavar="YYYY-MM-DD", help="The night starting on this evening")
+    which.add_argument("--event", metavar="YYYYMMDDHHMMSS", help="The aurora event containing this frame")
+    parser.add_argument("-o", "--output", help="Output file (default: timelapse-<night or event>.mp4)")
+    parser.add_argument("--results", help="Aurora store directory or results JSON (default: data/aurora, "
+                                           "else data/aurora-YYYY.json)")
+    parser.add_argument("--whole-night", action="store_true",
+                        help="With --night: every frame dark enough for aurora, not just around the aurora frames")
+    parser.add_argument("--pad", type=int, default=30, help="Minutes added before and after the span (default: 30)")
+    parser.add_argument("--gap", type=int, default=GAP_MINUTES,
+                        help=f"Largest gap in minutes within one event (default: {GAP_MINUTES})")
+    parser.add_argument("--height", type=int, default=1080, help="Output height in pixels (default: 1080)")
+    parser.add_argument("--fps", type=float, default=25, help="Frames per second (default: 25)")
+    parser.add_argument("--deflicker", type=int, default=0, metavar="FRAMES",
+                        help="Even out brightness over a running window of this many frames (default: off)")
+    parser.add_argument("--workers", type=int, default=4, help="Decode threads (default: 4)")
+    parser.add_argument("--read-ahead", type=int, default=8,
+                        help="Most frames decoded ahead of the writer (default: 8)")
+    parser.add_argument("--catalog", metavar="DB",
+                        help="Take the file list from an image_catalog.py database instead of walking the folders")
+    args = parser.parse_args()
+
+    if args.night:
+        noon = datetime.strptime(args.night, "%Y-%m-%d") + timedelta(hours=12)
+        if args.whole_night:
+            span = noon, noon + timedelta(days=1)
+        else:
+            scores = load_scores(args.results, args.night)
+            span = night_span(scores, args.night, args.pad)
+            if span is None:
+                raise SystemExit(f"No aurora frames for the night of {args.night} (try --whole-night)")
+        label = args.night.replace("-", "")
+    else:
+        scores = load_scores(args.results, night_of(args.event))
+        span = event_span(scores, args.event, args.gap, args.pad)
+        if span is None:
+            raise SystemExit(f"No aurora event contains {args.event}")
+        label = args.event
+
+    paths = frames_in_span(args.root, *span, catalog=args.catalog)
+    if args.whole_night:
+        paths = [p for p in paths if is_aurora_time(parse_dt_from_stem(p.stem))]
+    if not paths:
+        raise SystemExit(f"No frames in {args.root} between {span[0]} and {span[1]}")
+
+    output = args.output or f"timelapse-{label}.mp4"
+    print(f"{len(paths)} frames, {paths[0].stem} → {paths[-1].stem}")
+    start = datetime.now()
+    n = render(paths, output, args.height, args.fps, args.deflicker, args.workers, args.read_ahead)
+    elapsed = (datetime.now() - start).total_seconds()
+    print(f"{n} frames written to {output} ({n / args.fps:.1f} s of video) in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+compare_results.py — compare two scanner result files (data/<kind>-YYYY.json).
+
+Used to check a new scan mode against the established one, e.g. the adaptive
+people background against the static per-month median:
+
+    python3 people_scan.py /path/to/2026 --civil-day --threshold 0.2 \\
+        --background data/background-2026.png --json-output /tmp/static-2026.json
+    python3 people_scan.py /path/to/2026 --civil-day --threshold 0.2 \\
+        --adaptive-background --json-output /tmp/adaptive-2026.json
+    python3 util/compare_results.py /tmp/static-2026.json /tmp/adaptive-2026.json
+
+Several files can be given per side (comma-separated) to compare 2025–2026 at once.
+Frames are matched by timestamp. A frame counts as a detection when its score
+is at or above --threshold (default: every row in the file).
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+
+def load_rows(spec):
+    """Load and concatenate rows from a comma-separated list of JSON files."""
+    rows = {}
+    for name in spec.split(","):
+        for row in json.loads(Path(name).read_text()):
+            rows[row["timestamp"]] = row["score"]
+    return rows
+
+
+def compare(reference, candidate, threshold=0.0):
+    """
+    Return a dict with overlap counts, recall/precision of candidate relative to
+    reference, Jaccard agreement and mean absolute score difference on shared frames.
+    """
+    ref = {ts for ts, s in reference.items() if s >= threshold}
+    cand = {ts for ts, s in candidate.items() if s >= threshold}
+    both = ref & cand
+    union = ref | cand
+    shared = set(reference) & set(candidate)
+    mae = (sum(abs(reference[ts] - candidate[ts]) for ts in shared) / len(shared)) if shared else 0.0
+    return {
+        "reference": len(ref),
+        "candidate": len(cand),
+        "both": len(both),
+        "only_reference": len(ref - cand),
+        "only_candidate": len(cand - ref),
+        "recall": len(both) / len(ref) if ref else 1.0,
+        "precision": len(both) / len(cand) if cand else 1.0,
+        "agreement": len(both) / len(union) if union else 1.0,
+        "score_mae": mae,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("reference", help="Reference JSON file(s), comma-separated")
+    parser.add_argument("candidate", help="Candidate JSON file(s), comma-separated")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Score counted as a detection (default 0)")
+    parser.add_argument("--by-month", action="store_true", help="Also print a per-month breakdown")
+    parser.add_argument("--show", type=int, default=10, help="List up to N disagreeing timestamps per side")
+    args = parser.parse_args()
+
+    reference = load_rows(args.reference)
+    candidate = load_rows(args.candidate)
+    stats = compare(reference, candidate, args.threshold)
+
+    print(f"Reference: {stats['reference']} frames  |  Candidate: {stats['candidate']} frames  "
+          f"(threshold {args.threshold})")
+    print(f"Both: {stats['both']}  |  Only reference: {stats['only_reference']}  |  "
+          f"Only candidate: {stats['only_candidate']}")
+    print(f"Recall: {stats['recall']:.3f}  |  Precision: {stats['precision']:.3f}  |  "
+          f"Agreement (Jaccard): {stats['agreement']:.3f}  |  Score MAE: {stats['score_mae']:.4f}")
+
+    if args.by_month:
+        months = defaultdict(lambda: ({}, {}))
+        for ts, s in reference.items():
+            months[ts[:6]][0][ts] = s
+        for ts, s in candidate.items():
+            months[ts[:6]][1][ts] = s
+        print("\nMonth    ref  cand  both  recall  precision")
+        for ym in sorted(months):
+            m = compare(*months[ym], threshold=args.threshold)
+            print(f"{ym}  {m['reference']:5d} {m['candidate']:5d} {m['both']:5d}  "
+                  f"{m['recall']:6.3f}  {m['precision']:9.3f}")
+
+    if args.show:
+        ref = {ts for ts, s in reference.items() if s >= args.threshold}
+        cand = {ts for ts, s in candidate.items() if s >= args.threshold}
+        for label, diff in (("Only reference", ref - cand), ("Only candidate", cand - ref)):
+            if diff:
+                print(f"\n{label} (first {args.show}):")
+                for ts in sorted(diff)[:args.show]:
+                    print(f"  {ts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ Additional space-saving features:
 
 Usage:
     python3 delete_old_images.py [--delete] [--year-filter YYYY/MM] [--min-age-years N]
-                                 [--one-per-hour] [--compress-quality QUALITY]
+                                 [--one-per-hour] [--compress-quality QUALITY] [--catalog DB]
 
 Options:
     --delete              Actually delete files (default is dry-run mode)
@@ -20,6 +20,7 @@ Options:
     --min-age-years N     Only process images older than N years (default: 5)
     --one-per-hour        Keep only one photo per hour (closest to whole hour)
     --compress-quality Q  Compress remaining images to quality Q (1-100, e.g., 80)
+    --catalog DB          Take the file list from an image_catalog.py database
 """
 
 import os
@@ -30,6 +31,11 @@ from datetime import datetime, timedelta
 import math
 import time
 from collections import defaultdict
+
+# The repo root, for the shared modules (run_metrics.py, image_catalog.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_catalog import day_listing_or_none  # noqa: E402
+from run_metrics import add_metrics_arguments, metrics_from_args  # noqa: E402
 try:
     from PIL import Image
     PIL_AVAILABLE = True
@@ -283,8 +289,9 @@ class ImageCleaner:
     COMPRESSION_QUALITY_LOW_SAVINGS = 0.45  # 45% file size savings below quality 70
     
     def __init__(self, base_dir=".", dry_run=True, min_age_years=5, 
-                 one_per_hour=False, compress_quality=None):
+                 one_per_hour=False, compress_quality=None, catalog=None):
         self.base_dir = base_dir
+        self.catalog = catalog
         self.dry_run = dry_run
         self.min_age_years = min_age_years
         self.one_per_hour = one_per_hour
@@ -300,7 +307,8 @@ class ImageCleaner:
             'total_size': 0,
             'size_to_delete': 0,
             'size_before_compress': 0,
-            'size_after_compress': 0
+            'size_after_compress': 0,
+            'errors': 0
         }
         self.available_years = set()
         self.processed_years = set()
@@ -364,8 +372,20 @@ class ImageCleaner:
         images_to_delete = []
         images_to_compress = []
         days_processed = 0
+        catalog_images = self._catalog_images(year_month_filter) if self.catalog else None
         
-        if year_month_filter:
+        if catalog_images is not None:
+            # Work list from the image catalog: no directory globbing at all
+            day_dirs = []
+            for day_dir in catalog_images:
+                year = os.path.basename(os.path.dirname(os.path.dirname(day_dir)))
+                if not year.isdigit():
+                    continue
+                self.available_years.add(int(year))
+                if year_month_filter or self.should_process_year(year):
+                    self.processed_years.add(int(year))
+                    day_dirs.append(day_dir)
+        elif year_month_filter:
             # Process only specified year/month
             pattern = os.path.join(self.base_dir, year_month_filter, "*")
             day_dirs = glob.glob(pattern)
@@ -396,11 +416,14 @@ class ImageCleaner:
                     day_pattern = os.path.join(month_dir, "??")
                     day_dirs.extend(glob.glob(day_pattern))
         
-        total_days = len([d for d in day_dirs if os.path.isdir(d)])
+        if catalog_images is not None:
+            total_days = len(day_dirs)
+        else:
+            total_days = len([d for d in day_dirs if os.path.isdir(d)])
         
         # Process each day directory
         for day_dir in sorted(day_dirs):
-            if not os.path.isdir(day_dir):
+            if catalog_images is None and not os.path.isdir(day_dir):
                 continue
             
             days_processed += 1
@@ -430,8 +453,11 @@ class ImageCleaner:
             dawn, dusk, midnight_sun, polar_night = self.sun_calculator.find_sun_times(date)
             
             # Find images in this day directory
-            image_pattern = os.path.join(day_dir, "*.jpg")
-            images = glob.glob(image_pattern)
+            if catalog_images is not None:
+                images = catalog_images[day_dir]
+            else:
+                image_pattern = os.path.join(day_dir, "*.jpg")
+                images = glob.glob(image_pattern)
             
             # Group images by hour for one-per-hour processing
             if self.one_per_hour:
@@ -514,6 +540,16 @@ class ImageCleaner:
         
         return images_to_delete, images_to_compress
     
+    def _catalog_images(self, year_month_filter=None):
+        """
+        {day_dir: [image paths]} from the image_catalog.py database, or None
+        if base_dir is not catalogued (the caller falls back to globbing).
+        """
+        listing = day_listing_or_none(self.catalog, self.base_dir, year_month_filter)
+        if listing is None:
+            return None
+        return {day_dir: [os.path.join(day_dir, n) for n in names] for day_dir, names in listing}
+    
     def _get_mini_path(self, image_path):
         """Get the corresponding mini image path"""
         dir_name = os.path.dirname(image_path)
@@ -577,6 +613,7 @@ class ImageCleaner:
                         # For small numbers, show each file
                         print(f"Deleted: {image_path} ({self._format_size(file_size)})")
             except Exception as e:
+                self.stats['errors'] += 1
                 print(f"Error processing {image_path}: {e}", file=sys.stderr)
         
         # Final update for delete mode
@@ -650,6 +687,7 @@ class ImageCleaner:
                         mini_new_size = os.path.getsize(mini_path)
                         self.stats['size_after_compress'] += mini_new_size
             except Exception as e:
+                self.stats['errors'] += 1
                 print(f"Error compressing {image_path}: {e}", file=sys.stderr)
         
         # Final update for compression
@@ -661,6 +699,20 @@ class ImageCleaner:
                 force=True
             )
     
+    def update_metrics(self, metrics):
+        """Copy the run's counts to a run_metrics.RunMetrics (--metrics)."""
+        compress_saved = self.stats['size_before_compress'] - self.stats['size_after_compress']
+        metrics.items = self.stats['total_files']
+        metrics.errors = self.stats['errors']
+        if not self.dry_run:
+            metrics.bytes_freed = self.stats['size_to_delete'] + max(0, compress_saved)
+        metrics.extra.update(
+            dry_run=self.dry_run,
+            files_to_delete=self.stats['files_to_delete'],
+            bytes_to_delete=self.stats['size_to_delete'],
+            files_to_compress=self.stats['files_to_compress'],
+        )
+    
     def _format_size(self, size_bytes):
         """Format file size in human-readable format"""
         for unit in ['B', 'KB', 'MB', 'GB']:
@@ -904,6 +956,15 @@ Examples:
         help='Compress remaining images to quality Q (1-100, e.g., 80)'
     )
     
+    parser.add_argument(
+        '--catalog',
+        type=str,
+        metavar='DB',
+        help='Take day directories and images from an image_catalog.py database instead of globbing'
+    )
+    
+    add_metrics_arguments(parser)
+    
     args = parser.parse_args()
     
     # Validate year-filter format if provided
@@ -931,7 +992,8 @@ Examples:
         dry_run=not args.delete,
         min_age_years=args.min_age_years,
         one_per_hour=args.one_per_hour,
-        compress_quality=args.compress_quality
+        compress_quality=args.compress_quality,
+        catalog=args.catalog
     )
     
     print("=" * 70)
@@ -949,31 +1011,35 @@ Examples:
     print("=" * 70)
     print()
     
-    # Start timing
-    cleaner.start_time = time.time()
+    with metrics_from_args(args, "delete_old_images") as metrics:
+        try:
+            # Start timing
+            cleaner.start_time = time.time()
     
-    # Find images to delete
-    print("Scanning for images...")
-    images_to_delete, images_to_compress = cleaner.find_images_to_delete(args.year_filter)
+            # Find images to delete
+            print("Scanning for images...")
+            images_to_delete, images_to_compress = cleaner.find_images_to_delete(args.year_filter)
     
-    if not images_to_delete and not images_to_compress:
-        print("No images found to process.")
-        return
+            if not images_to_delete and not images_to_compress:
+                print("No images found to process.")
+                return
     
-    print(f"\nFound {len(images_to_delete)} images to delete.")
-    if images_to_compress:
-        print(f"Found {len(images_to_compress)} images to compress.")
-    print()
+            print(f"\nFound {len(images_to_delete)} images to delete.")
+            if images_to_compress:
+                print(f"Found {len(images_to_compress)} images to compress.")
+            print()
     
-    # Delete (or list) images
-    cleaner.delete_images(images_to_delete)
+            # Delete (or list) images
+            cleaner.delete_images(images_to_delete)
     
-    # Compress images
-    if images_to_compress:
-        cleaner.compress_images(images_to_compress)
+            # Compress images
+            if images_to_compress:
+                cleaner.compress_images(images_to_compress)
     
-    # Print summary
-    cleaner.print_summary()
+            # Print summary
+            cleaner.print_summary()
+        finally:
+            cleaner.update_metrics(metrics)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 import os
+import sys
 import random
 import csv
 from collections import defaultdict
@@ -7,6 +8,7 @@ BASE_DIR = "/home/lilleviklofoten/www/webcam"
 SAMPLE_MONTHS = [1, 6, 12]   # Jan, Jun, Dec
 SAMPLE_SIZE = 10
 OUTPUT_CSV = "image_samples.csv"
+CATALOG = None               # image_catalog.py database, e.g. "data/catalog.sqlite"; skips the os.walk
 
 def parse_datetime_from_filename(fname):
     # filenames like 20200715000419.jpg → YYYY MM
@@ -19,17 +21,25 @@ def parse_datetime_from_filename(fname):
 
 samples = defaultdict(list)
 
-for root, _, files in os.walk(BASE_DIR):
-    for file in sorted(files):
-        if not file.lower().endswith(".jpg"):
-            continue
-        year, month = parse_datetime_from_filename(file)
-        if not year or not month:
-            continue
-        if month in SAMPLE_MONTHS:
-            filepath = os.path.join(root, file)
-            size_kb = os.stat(filepath).st_size // 1024
-            samples[(year, month)].append((year, month, filepath, size_kb))
+if CATALOG:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from image_catalog import open_catalog
+    for entry in open_catalog(CATALOG).entries(under=BASE_DIR):
+        year, month = parse_datetime_from_filename(entry.timestamp)
+        if year and month and month in SAMPLE_MONTHS:
+            samples[(year, month)].append((year, month, str(entry.path), entry.size // 1024))
+else:
+    for root, _, files in os.walk(BASE_DIR):
+        for file in sorted(files):
+            if not file.lower().endswith(".jpg"):
+                continue
+            year, month = parse_datetime_from_filename(file)
+            if not year or not month:
+                continue
+            if month in SAMPLE_MONTHS:
+                filepath = os.path.join(root, file)
+                size_kb = os.stat(filepath).st_size // 1024
+                samples[(year, month)].append((year, month, filepath, size_kb))
 
 # now take a sample from each month
 filtered = []
@@ -24,14 +24,32 @@ Usage:
     # Force rebuild of all background models
     python3 util/people-rescan-all.py --rebuild-backgrounds
     python3 util/people-rescan-all.py --rebuild-backgrounds 2026
+
+    # Scan three months at a time (the scanner locks and merges the JSON,
+    # so parallel months don't lose each other's results)
+    python3 util/people-rescan-all.py --jobs 3 2025
+
+    # Read frames through a local SSD cache: the background sample and the
+    # scan (and any rescan) then read each frame from the NAS only once
+    FRAME_CACHE_DIR=/ssd/frames python3 util/people-rescan-all.py 2025
+
+    # Record this run and every month scan it starts (see run_metrics.py)
+    python3 util/people-rescan-all.py --metrics /var/lib/node_exporter/textfile 2025
 """
 
 import argparse
+import os
 import subprocess
 import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
 from pathlib import Path
 
+# The repo root, for run_metrics.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from run_metrics import add_metrics_arguments, metrics_from_args  # noqa: E402
+
 # ── Configuration ─────────────────────────────────────────────────────────────
 
 WEBCAM_DIR = Path.home() / "Dev/webcam"
@@ -82,6 +100,9 @@ VIKTUN_ZONES = [
 OLD_CAMERA_JULY_BG_SOURCES = ["2025/06", "2025/05", "2025/04"]
 NEW_CAMERA_JULY_BG_SOURCES = ["2025/08", "2025/09", "2026/01"]
 
+# Commands run successfully, by kind ("background", "scan"), for --metrics
+completed = Counter()
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def log(msg: str):
@@ -99,6 +120,7 @@ def run(cmd: list[str]):
     if result.returncode != 0:
         print(f"ERROR: exit code {result.returncode}", flush=True)
         sys.exit(result.returncode)
+    completed["background" if "--build-background" in cmd else "scan"] += 1
 
 
 def available_years(base_dir: Path) -> list[int]:
@@ -144,11 +166,38 @@ def ensure_background(source_dir: Path, output: Path, rebuild: bool):
     return output.exists()
 
 
+def run_jobs(jobs: list, parallel: int):
+    """
+    Run month jobs one after another, or up to `parallel` at a time. A job is
+    only started when an earlier one has finished cleanly, so after a failed
+    scan (or Ctrl-C) the running months finish and no new one starts.
+    """
+    if parallel <= 1:
+        for job in jobs:
+            job()
+        return
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        running = set()
+        try:
+            for job in jobs:
+                if len(running) >= parallel:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()  # re-raises SystemExit from a failed run()
+                running.add(pool.submit(job))
+            for future in as_completed(running):
+                future.result()
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
 # ── Lillevik scanning ─────────────────────────────────────────────────────────
 
-def scan_lillevik(years: list[int], rebuild_bg: bool):
+def scan_lillevik(years: list[int], rebuild_bg: bool, parallel: int = 1):
     bg_dir = WEBCAM_DIR / "data"
     bg_dir.mkdir(parents=True, exist_ok=True)
+    jobs = []
 
     for year in sorted(years, reverse=True):
         year_dir = LILLEVIK / str(year)
@@ -161,55 +210,63 @@ def scan_lillevik(years: list[int], rebuild_bg: bool):
 
         for month in sorted(months, reverse=True):
             month_dir = year_dir / f"{month:02d}"
+            jobs.append(lambda year=year, month=month, month_dir=month_dir, json_out=json_out:
+                        scan_lillevik_month(year, month, month_dir, json_out, bg_dir, rebuild_bg))
+
+    run_jobs(jobs, parallel)
+
+
+def scan_lillevik_month(year: int, month: int, month_dir: Path, json_out: Path, bg_dir: Path, rebuild_bg: bool):
+    # ── 2025 July: two-pass split around camera change ────────────────────────
+    # Both passes stay in one job: pass 1 replaces the month, pass 2 appends.
+    if year == CHANGE_YEAR and month == CHANGE_MONTH:
+        # Pass 1: old camera, Jul 1–25
+        old_bg = bg_dir / "background-2025-07-old.png"
+        src = find_source_month(LILLEVIK, OLD_CAMERA_JULY_BG_SOURCES)
+        if src and ensure_background(src, old_bg, rebuild_bg):
+            log(f"Scanning Lillevik {year}-{month:02d} — old camera (before {CHANGE_DATE})")
+            run([PYTHON, SCANNER, str(month_dir),
+                 "--before", CHANGE_DATE,
+                 "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
+                 "--background", str(old_bg),
+                 *LILLEVIK_ZONES_OLD,
+                 "--json-output", str(json_out)])
+
+        # Pass 2: new camera, Jul 26–31 (append — don't overwrite pass 1)
+        new_bg = bg_dir / "background-2025-07-new.png"
+        src = find_source_month(LILLEVIK, NEW_CAMERA_JULY_BG_SOURCES)
+        if src and ensure_background(src, new_bg, rebuild_bg):
+            log(f"Scanning Lillevik {year}-{month:02d} — new camera (from {CHANGE_DATE})")
+            run([PYTHON, SCANNER, str(month_dir),
+                 "--after", CHANGE_DATE,
+                 "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
+                 "--background", str(new_bg),
+                 *LILLEVIK_ZONES_NEW,
+                 "--json-output", str(json_out),
+                 "--append"])
+        return
 
-            # ── 2025 July: two-pass split around camera change ────────────────
-            if year == CHANGE_YEAR and month == CHANGE_MONTH:
-                # Pass 1: old camera, Jul 1–25
-                old_bg = bg_dir / "background-2025-07-old.png"
-                src = find_source_month(LILLEVIK, OLD_CAMERA_JULY_BG_SOURCES)
-                if src and ensure_background(src, old_bg, rebuild_bg):
-                    log(f"Scanning Lillevik {year}-{month:02d} — old camera (before {CHANGE_DATE})")
-                    run([PYTHON, SCANNER, str(month_dir),
-                         "--before", CHANGE_DATE,
-                         "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
-                         "--background", str(old_bg),
-                         *LILLEVIK_ZONES_OLD,
-                         "--json-output", str(json_out)])
-
-                # Pass 2: new camera, Jul 26–31 (append — don't overwrite pass 1)
-                new_bg = bg_dir / "background-2025-07-new.png"
-                src = find_source_month(LILLEVIK, NEW_CAMERA_JULY_BG_SOURCES)
-                if src and ensure_background(src, new_bg, rebuild_bg):
-                    log(f"Scanning Lillevik {year}-{month:02d} — new camera (from {CHANGE_DATE})")
-                    run([PYTHON, SCANNER, str(month_dir),
-                         "--after", CHANGE_DATE,
-                         "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
-                         "--background", str(new_bg),
-                         *LILLEVIK_ZONES_NEW,
-                         "--json-output", str(json_out),
-                         "--append"])
-                continue
-
-            # ── Regular month ─────────────────────────────────────────────────
-            zones = LILLEVIK_ZONES_NEW if year > CHANGE_YEAR or (year == CHANGE_YEAR and month > CHANGE_MONTH) else LILLEVIK_ZONES_OLD
-            bg_file = bg_dir / f"background-{year}-{month:02d}.png"
-            if ensure_background(month_dir, bg_file, rebuild_bg):
-                log(f"Scanning Lillevik {year}-{month:02d}")
-                run([PYTHON, SCANNER, str(month_dir),
-                     "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
-                     "--background", str(bg_file),
-                     *zones,
-                     "--json-output", str(json_out)])
+    # ── Regular month ─────────────────────────────────────────────────────────
+    zones = LILLEVIK_ZONES_NEW if year > CHANGE_YEAR or (year == CHANGE_YEAR and month > CHANGE_MONTH) else LILLEVIK_ZONES_OLD
+    bg_file = bg_dir / f"background-{year}-{month:02d}.png"
+    if ensure_background(month_dir, bg_file, rebuild_bg):
+        log(f"Scanning Lillevik {year}-{month:02d}")
+        run([PYTHON, SCANNER, str(month_dir),
+             "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
+             "--background", str(bg_file),
+             *zones,
+             "--json-output", str(json_out)])
 
 
 # ── Viktun scanning ───────────────────────────────────────────────────────────
 
-def scan_viktun(years: list[int], rebuild_bg: bool):
+def scan_viktun(years: list[int], rebuild_bg: bool, parallel: int = 1):
     if not VIKTUN.is_dir():
         return
 
     bg_dir = WEBCAM_DIR / "viktun/data"
     bg_dir.mkdir(parents=True, exist_ok=True)
+    jobs = []
 
     for year in sorted(years, reverse=True):
         year_dir = VIKTUN / str(year)
@@ -221,15 +278,21 @@ def scan_viktun(years: list[int], rebuild_bg: bool):
 
         for month in sorted(months, reverse=True):
             month_dir = year_dir / f"{month:02d}"
-            bg_file = bg_dir / f"background-{year}-{month:02d}.png"
+            jobs.append(lambda year=year, month=month, month_dir=month_dir, json_out=json_out:
+                        scan_viktun_month(year, month, month_dir, json_out, bg_dir, rebuild_bg))
+
+    run_jobs(jobs, parallel)
 
-            if ensure_background(month_dir, bg_file, rebuild_bg):
-                log(f"Scanning Viktun {year}-{month:02d}")
-                run([PYTHON, SCANNER, str(month_dir),
-                     "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
-                     "--background", str(bg_file),
-                     *VIKTUN_ZONES,
-                     "--json-output", str(json_out)])
+
+def scan_viktun_month(year: int, month: int, month_dir: Path, json_out: Path, bg_dir: Path, rebuild_bg: bool):
+    bg_file = bg_dir / f"background-{year}-{month:02d}.png"
+    if ensure_background(month_dir, bg_file, rebuild_bg):
+        log(f"Scanning Viktun {year}-{month:02d}")
+        run([PYTHON, SCANNER, str(month_dir),
+             "--civil-day", "--threshold", THRESHOLD, "--workers", WORKERS,
+             "--background", str(bg_file),
+             *VIKTUN_ZONES,
+             "--json-output", str(json_out)])
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -243,7 +306,13 @@ def main():
                         help="Years to process (default: all available, most recent first)")
     parser.add_argument("--rebuild-backgrounds", action="store_true",
                         help="Rebuild all background models even if they already exist")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Months to scan at once (default: 1; each scan also uses WORKERS processes)")
+    add_metrics_arguments(parser)
     args = parser.parse_args()
+    if args.metrics:
+        # The month scans inherit it and record themselves (tool people_scan)
+        os.environ["WEBCAM_METRICS_DIR"] = str(Path(args.metrics).expanduser())
 
     if not LILLEVIK.is_dir():
         print(f"ERROR: {LILLEVIK} not found. Is the NAS mounted?", flush=True)
@@ -256,11 +325,22 @@ def main():
     print(f"Lillevik years: {sorted(lillevik_years, reverse=True)}", flush=True)
     print(f"Viktun years:   {sorted(viktun_years,   reverse=True)}", flush=True)
     print(f"Rebuild backgrounds: {args.rebuild_backgrounds}", flush=True)
-
-    scan_lillevik(lillevik_years, args.rebuild_backgrounds)
-
-    if viktun_years:
-        scan_viktun(viktun_years, args.rebuild_backgrounds)
+    print(f"Parallel months:     {args.jobs}", flush=True)
+
+    with metrics_from_args(args, "people_rescan_all") as metrics:
+        metrics.workers = args.jobs
+        try:
+            scan_lillevik(lillevik_years, args.rebuild_backgrounds, args.jobs)
+
+            if viktun_years:
+                scan_viktun(viktun_years, args.rebuild_backgrounds, args.jobs)
+        except SystemExit as e:
+            metrics.errors += 1 if e.code else 0     # a background build or scan failed
+            raise
+        finally:
+            # Items are month scans; the scans' own records have the frames
+            metrics.items = completed["scan"]
+            metrics.extra["backgrounds_built"] = completed["background"]
 
     log("All done. Upload JSON files to the server:")
     print(f"  rsync -az -e 'ssh -p 22' {WEBCAM_DIR}/data/ "
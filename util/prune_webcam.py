@@ -27,6 +27,11 @@ from typing import List, Tuple, Optional, Dict
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
+# The repo root, for the shared modules (run_metrics.py, image_catalog.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_catalog import day_listing_or_none  # noqa: E402
+from run_metrics import add_metrics_arguments, metrics_from_args  # noqa: E402
+
 # Pillow is OPTIONAL; only used if selected/fallback
 try:
     from PIL import Image
@@ -259,7 +264,7 @@ def purge_old_mini_dirs(root: str, cutoff: date, delete: bool) -> Tuple[int,int]
     return removed_dirs, removed_files
 
 # ---------- Main pruning ----------
-def main():
+def parse_args():
     ap = argparse.ArgumentParser(
         description="Prune webcam JPGs based on the website's 'Displaying photos ... between HH:MM and HH:MM' window."
     )
@@ -294,8 +299,12 @@ def main():
                     help="Purge entire mini/ directories for days older than the cutoff")
     ap.add_argument("--show-detectors", action="store_true",
                     help="Print detected compression tools at startup")
+    ap.add_argument("--catalog", metavar="DB",
+                    help="Take day directories and files from an image_catalog.py database instead of listing them")
+    add_metrics_arguments(ap)
+    return ap.parse_args()
 
-    args = ap.parse_args()
+def prune(args, metrics):
     month_filter = args.month or args.year_filter
 
     # Safety checks
@@ -334,6 +343,7 @@ def main():
     if args.purge_old_mini:
         print(f"== Purging mini/ directories older than {args.older_than_years} years ==")
         dcount, fcount = purge_old_mini_dirs(args.root, cutoff, args.delete)
+        metrics.extra.update(mini_dirs_purged=dcount, mini_files_purged=fcount)
         if not args.delete:
             print(f"(Dry run) Would purge {dcount} mini/ directories (~{fcount} files)")
 
@@ -354,7 +364,11 @@ def main():
             maybe_print_progress.last = time.time()
     maybe_print_progress.last = 0.0
 
-    for ddir in day_dirs(args.root, month_filter):
+    listing = day_listing_or_none(args.catalog, args.root, month_filter) if args.catalog else None
+    if listing is None:
+        listing = ((d, None) for d in day_dirs(args.root, month_filter))
+
+    for ddir, catalog_names in listing:
         rel = os.path.relpath(ddir, args.root)
         parts = rel.split(os.sep)
         try:
@@ -379,15 +393,19 @@ def main():
         if not win:
             # If we cannot get window for this day, skip to be safe
             # (Alternative policy could be "delete-all" — but safer to skip.)
+            metrics.skipped["no_window_days"] += 1
             continue
 
         win_start, win_end = win
 
         # Collect files
-        try:
-            names = sorted(os.listdir(ddir))
-        except Exception:
-            continue
+        if catalog_names is not None:
+            names = catalog_names
+        else:
+            try:
+                names = sorted(os.listdir(ddir))
+            except Exception:
+                continue
 
         inside: List[Tuple[datetime, str, int]] = []
         outside: List[Tuple[str, int]] = []
@@ -402,6 +420,7 @@ def main():
                 continue
             p = os.path.join(ddir, name)
             sz = size_of(p)
+            metrics.items += 1
 
             if win_start <= ts <= win_end:
                 inside.append((ts, p, sz))
@@ -467,7 +486,9 @@ def main():
                     total_deleted += 1
                     total_deleted_bytes += sz
                 except Exception as e:
+                    metrics.errors += 1
                     print(f"  FAILED to delete {p}: {e}", file=sys.stderr)
+            metrics.bytes_freed = total_deleted_bytes
             maybe_print_progress(f"Deleted so far: {total_deleted} files, {human(total_deleted_bytes)}")
 
         # Compression of KEPT images (original + mini if exists)
@@ -495,6 +516,7 @@ def main():
                     sz1 = size_of(p)
                     after_sum += sz1
                     if not ok:
+                        metrics.errors += 1
                         print(f"  WARN: compression skipped for {p} (no backend succeeded)", file=sys.stderr)
                 else:
                     # Only estimate (assume ~30% reduction; ~20% if quality>85)
@@ -521,6 +543,7 @@ def main():
     if args.compress_quality is not None:
         if args.apply_compression:
             saved = max(0, total_before_comp - total_after_comp)
+            metrics.bytes_freed += saved
             print(f"Compressed: {total_compress}  | Saved via compression: {human(saved)}")
         else:
             est_saved = max(0, total_before_comp - total_after_comp)
@@ -528,6 +551,13 @@ def main():
             print(f"Estimated savings: ~{human(est_saved)} at quality {args.compress_quality}")
 
     print(f"Elapsed: {int(time.time()-t0)}s")
+    metrics.extra.update(dry_run=not args.delete, candidates=total_candidates, candidate_bytes=total_bytes,
+                         deleted=total_deleted, compressed=total_compress)
+
+def main():
+    args = parse_args()
+    with metrics_from_args(args, "prune_webcam") as metrics:
+        prune(args, metrics)
 
 
 if __name__ == "__main__":
@@ -9,8 +9,20 @@ import argparse
 import subprocess
 from datetime import datetime
 
+# The repo root, for the shared modules (run_metrics.py, image_catalog.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_catalog import day_listing_or_none  # noqa: E402
+from run_metrics import add_metrics_arguments, metrics_from_args  # noqa: E402
+
 FNAME_RE = re.compile(r"^\d{14}\.jpg$", re.IGNORECASE)  # YYYYMMDDHHMMSS.jpg
 
+failures = 0  # files that could not be converted (for --metrics)
+
+def failed(msg):
+    global failures
+    failures += 1
+    print(msg, file=sys.stderr)
+
 def which(cmd):
     try:
         out = subprocess.run(["which", cmd], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
@@ -161,7 +173,7 @@ def gen_with_convert(day_dir, files, width, quality, overwrite):
                 except Exception:
                     pass
         except subprocess.CalledProcessError as e:
-            print(f"  convert failed for {src}: {e}", file=sys.stderr)
+            failed(f"  convert failed for {src}: {e}")
     return written, bytes_out
 
 def gen_with_convert(day_dir, files, width, quality, overwrite):
@@ -192,7 +204,7 @@ def gen_with_convert(day_dir, files, width, quality, overwrite):
                 except Exception:
                     pass
         except subprocess.CalledProcessError as e:
-            print(f"  convert failed for {src}: {e}", file=sys.stderr)
+            failed(f"  convert failed for {src}: {e}")
     return written, bytes_out
 
 # Optional Pillow fallback (only if installed)
@@ -235,7 +247,7 @@ def gen_with_pillow(day_dir, files, width, quality, overwrite):
                 except Exception:
                     pass
         except Exception as e:
-            print(f"  PIL failed for {src}: {e}", file=sys.stderr)
+            failed(f"  PIL failed for {src}: {e}")
     return written, bytes_out
 
 def main():
@@ -248,6 +260,8 @@ def main():
     ap.add_argument("--quality", type=int, default=80, help="JPEG quality (default: 80)")
     ap.add_argument("--overwrite", action="store_true", help="Overwrite existing files in mini/")
     ap.add_argument("--dry-run", action="store_true", help="List what would be done, don’t write files")
+    ap.add_argument("--catalog", metavar="DB", help="Take day directories and files from an image_catalog.py database")
+    add_metrics_arguments(ap)
     args = ap.parse_args()
 
     tools = find_tools()
@@ -271,49 +285,59 @@ def main():
     else:
         print()
 
-    total_days = 0
-    total_written = 0
-    total_bytes = 0
+    with metrics_from_args(args, "regen_minis") as metrics:
+        total_days = 0
+        total_written = 0
+        total_bytes = 0
+
+        listing = day_listing_or_none(args.catalog, args.root, args.month) if args.catalog else None
+        if listing is None:
+            listing = ((d, None) for d in list_day_dirs(args.root, args.month))
+
+        for day_dir, srcs in listing:
+            total_days += 1
+            if srcs is None:
+                names = sorted(os.listdir(day_dir))
+                # source files: jpgs in day_dir (not inside mini)
+                srcs = [n for n in names if n.lower().endswith(".jpg") and n != "mini" and os.path.isfile(os.path.join(day_dir, n))]
+            if not srcs:
+                continue
 
-    for day_dir in list_day_dirs(args.root, args.month):
-        total_days += 1
-        names = sorted(os.listdir(day_dir))
-        # source files: jpgs in day_dir (not inside mini)
-        srcs = [n for n in names if n.lower().endswith(".jpg") and n != "mini" and os.path.isfile(os.path.join(day_dir, n))]
-        if not srcs:
-            continue
+            if args.dry_run:
+                mini_dir = os.path.join(day_dir, "mini")
+                need = 0
+                for fn in srcs:
+                    dst = os.path.join(mini_dir, fn)
+                    if args.overwrite or not os.path.exists(dst):
+                        need += 1
+                if need:
+                    rel = os.path.relpath(day_dir, args.root)
+                    print(f"{rel}: would (re)generate {need} mini file(s)")
+                continue
 
-        if args.dry_run:
-            mini_dir = os.path.join(day_dir, "mini")
-            need = 0
-            for fn in srcs:
-                dst = os.path.join(mini_dir, fn)
-                if args.overwrite or not os.path.exists(dst):
-                    need += 1
-            if need:
+            if use == "mogrify":
+                wrote, bytes_out = gen_with_mogrify(day_dir, srcs, args.width, args.quality, args.overwrite)
+            elif use == "convert":
+                wrote, bytes_out = gen_with_convert(day_dir, srcs, args.width, args.quality, args.overwrite)
+            else:
+                wrote, bytes_out = gen_with_pillow(day_dir, srcs, args.width, args.quality, args.overwrite)
+
+            if wrote:
                 rel = os.path.relpath(day_dir, args.root)
-                print(f"{rel}: would (re)generate {need} mini file(s)")
-            continue
+                print(f"{rel}: generated {wrote} mini file(s) — ~{human(bytes_out)}")
+                total_written += wrote
+                total_bytes += bytes_out
+                metrics.items, metrics.bytes_written, metrics.errors = total_written, total_bytes, failures
 
-        if use == "mogrify":
-            wrote, bytes_out = gen_with_mogrify(day_dir, srcs, args.width, args.quality, args.overwrite)
-        elif use == "convert":
-            wrote, bytes_out = gen_with_convert(day_dir, srcs, args.width, args.quality, args.overwrite)
+        print("\n==== SUMMARY ====")
+        print(f"Days scanned: {total_days}")
+        if args.dry_run:
+            print("Dry-run only. Re-run without --dry-run to write files.")
         else:
-            wrote, bytes_out = gen_with_pillow(day_dir, srcs, args.width, args.quality, args.overwrite)
+            print(f"Mini files written: {total_written}  | Bytes out: ~{human(total_bytes)}")
 
-        if wrote:
-            rel = os.path.relpath(day_dir, args.root)
-            print(f"{rel}: generated {wrote} mini file(s) — ~{human(bytes_out)}")
-            total_written += wrote
-            total_bytes += bytes_out
-
-    print("\n==== SUMMARY ====")
-    print(f"Days scanned: {total_days}")
-    if args.dry_run:
-        print("Dry-run only. Re-run without --dry-run to write files.")
-    else:
-        print(f"Mini files written: {total_written}  | Bytes out: ~{human(total_bytes)}")
+        metrics.errors = failures
+        metrics.extra.update(days=total_days, dry_run=args.dry_run, converter=use)
 
 if __name__ == "__main__":
     main()
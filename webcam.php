@@ -499,7 +499,7 @@ function print_full_month($year, $month)
                 echo "src=\"$year/$month/$day/";
                 if ($size == "mini" || empty($size)) {
                     // Mini. If the mini version has been created: Use that. If not: Scale down the large version.
-                    if (file_exists("$year/$month/$day/mini/$yyyymmddhhmmss.jpg")) {
+                    if (has_mini_image($yyyymmddhhmmss)) {
                         echo "mini/";
                     }
                     echo "$yyyymmddhhmmss.jpg\" width=\"$mini_image_width\" height=\"$mini_image_height\" ";
@@ -610,7 +610,7 @@ function print_full_year($year)
                 echo "width=\"$mini_image_width\" height=\"$mini_image_height\" ";
                 echo "src=\"$year/$month/$day/";
                 // If the mini version has been created: Use that. If not: Scale down the full version.
-                if (file_exists("$year/$month/$day/mini/$yyyymmddhhmmss.jpg")) {
+                if (has_mini_image($yyyymmddhhmmss)) {
                     echo "mini/";
                 }
                 echo "$yyyymmddhhmmss.jpg\"></a>\n";
@@ -698,7 +698,7 @@ function print_all_years()
                     echo "width=\"$mini_image_width\" height=\"$mini_image_height\" ";
                     echo "src=\"$year/$month/$monthly_day/";
                     // If the mini version has been created: Use that. If not: Scale down the full version.
-                    if (file_exists("$year/$month/$monthly_day/mini/$yyyymmddhhmmss.jpg")) {
+                    if (has_mini_image($yyyymmddhhmmss)) {
                         echo "mini/";
                     }
                     echo "$yyyymmddhhmmss.jpg\"></a>\n";
@@ -862,6 +862,22 @@ function find_first_image_after_time($year, $month, $day, $hour, $minute, $secon
         $imageManager->findFirstImageAfterTime($year, $month, $day, $hour, $minute, $seconds) : '';
 }
 
+/**
+ * Whether an image has a mini/ thumbnail
+ * 
+ * @param string $yyyymmddhhmmss Example: "20231114134047"
+ * @return bool
+ */
+function has_mini_image($yyyymmddhhmmss)
+{
+    global $imageManager;
+    if ($imageManager) {
+        return $imageManager->hasMiniImage($yyyymmddhhmmss);
+    }
+    list($year, $month, $day) = split_image_filename($yyyymmddhhmmss);
+    return file_exists("$year/$month/$day/mini/$yyyymmddhhmmss.jpg");
+}
+
 /**
  * Print a single webcam image
  * 